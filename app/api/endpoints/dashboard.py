@@ -1,14 +1,18 @@
+import json
+import time
 from pathlib import Path
-from typing import Any, List, Optional
+from typing import Any, List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app import schemas
 from app.chain.dashboard import DashboardChain
+from app.core.config import global_vars
 from app.core.security import verify_token, verify_apitoken
 from app.db import get_db
-from app.db.models.transferhistory import TransferHistory
+from app.db.models.transferstatistic import TransferStatistic
 from app.helper.directory import DirectoryHelper
 from app.scheduler import Scheduler
 from app.utils.system import SystemUtils
@@ -17,51 +21,71 @@ router = APIRouter()
 
 
 @router.get("/statistic", summary="媒体数量统计", response_model=schemas.Statistic)
-def statistic(_: schemas.TokenPayload = Depends(verify_token)) -> Any:
+def statistic(response: Response, _: schemas.TokenPayload = Depends(verify_token)) -> Any:
     """
-    查询媒体数量统计信息
+    查询媒体数量统计信息，返回后台定时刷新的快照，Age响应头为快照已存在的秒数
     """
-    media_statistics: Optional[List[schemas.Statistic]] = DashboardChain().media_statistic()
-    if media_statistics:
-        # 汇总各媒体库统计信息
-        ret_statistic = schemas.Statistic()
-        for media_statistic in media_statistics:
-            ret_statistic.movie_count += media_statistic.movie_count
-            ret_statistic.tv_count += media_statistic.tv_count
-            ret_statistic.episode_count += media_statistic.episode_count
-            ret_statistic.user_count += media_statistic.user_count
-        return ret_statistic
-    else:
-        return schemas.Statistic()
+    data, age = DashboardChain().get_snapshot("statistic")
+    response.headers["Age"] = str(int(age))
+    return data or schemas.Statistic()
 
 
 @router.get("/statistic2", summary="媒体数量统计（API_TOKEN）", response_model=schemas.Statistic)
-def statistic2(_: str = Depends(verify_apitoken)) -> Any:
+def statistic2(response: Response, _: str = Depends(verify_apitoken)) -> Any:
     """
     查询媒体数量统计信息 API_TOKEN认证（?token=xxx）
     """
-    return statistic()
+    return statistic(response)
 
 
 @router.get("/storage", summary="存储空间", response_model=schemas.Storage)
-def storage(_: schemas.TokenPayload = Depends(verify_token)) -> Any:
+def storage(response: Response, _: schemas.TokenPayload = Depends(verify_token)) -> Any:
     """
-    查询存储空间信息
+    查询存储空间信息，返回后台定时刷新的快照，Age响应头为快照已存在的秒数
     """
-    library_dirs = DirectoryHelper().get_library_dirs()
-    total_storage, free_storage = SystemUtils.space_usage([Path(d.path) for d in library_dirs if d.path])
-    return schemas.Storage(
-        total_storage=total_storage,
-        used_storage=total_storage - free_storage
-    )
+    data, age = DashboardChain().get_snapshot("storage")
+    response.headers["Age"] = str(int(age))
+    return data or schemas.Storage()
 
 
 @router.get("/storage2", summary="存储空间（API_TOKEN）", response_model=schemas.Storage)
-def storage2(_: str = Depends(verify_apitoken)) -> Any:
+def storage2(response: Response, _: str = Depends(verify_apitoken)) -> Any:
     """
     查询存储空间信息 API_TOKEN认证（?token=xxx）
     """
-    return storage()
+    return storage(response)
+
+
+@router.get("/events", summary="统计快照更新推送")
+def events(token: str):
+    """
+    统计快照刷新时推送最新的媒体数量、存储空间统计，返回格式为SSE
+    数据格式：{名称: {"data": 数据, "age": 快照已存在的秒数}}
+    """
+    if not token or not verify_token(token):
+        raise HTTPException(
+            status_code=403,
+            detail="认证失败！",
+        )
+
+    dashboard = DashboardChain()
+
+    def event_generator():
+        version = None
+        while True:
+            if global_vars.is_system_stopped():
+                break
+            if dashboard.version != version:
+                version = dashboard.version
+                now = time.time()
+                snapshots = {
+                    key: {"data": data.dict() if data else None, "age": int(now - refresh_time)}
+                    for key, (data, refresh_time) in dashboard.get_snapshots().items()
+                }
+                yield 'data: %s\n\n' % json.dumps(snapshots)
+            time.sleep(1)
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
 
 
 @router.get("/processes", summary="进程信息", response_model=List[schemas.ProcessInfo])
@@ -121,9 +145,9 @@ def schedule2(_: str = Depends(verify_apitoken)) -> Any:
 def transfer(days: int = 7, db: Session = Depends(get_db),
              _: schemas.TokenPayload = Depends(verify_token)) -> Any:
     """
-    查询文件整理统计信息
+    查询文件整理统计信息，读取转移历史写入时维护的按日统计
     """
-    transfer_stat = TransferHistory.statistic(db, days)
+    transfer_stat = TransferStatistic.statistic(db, days)
     return [stat[1] for stat in transfer_stat]
 
 
@@ -19,13 +19,16 @@ router = APIRouter()
 
 
 @router.get("/download", summary="查询下载历史记录", response_model=List[schemas.DownloadHistory])
-def download_history(page: int = 1,
+def download_history(title: str = None,
+                     page: int = 1,
                      count: int = 30,
                      db: Session = Depends(get_db),
                      _: schemas.TokenPayload = Depends(verify_token)) -> Any:
     """
-    查询下载历史记录
+    查询下载历史记录，可按标题、种子名称或保存路径搜索
     """
+    if title:
+        return DownloadHistory.list_by_title(db, title=title, page=page, count=count)
     return DownloadHistory.list_by_page(db, page, count)
 
 
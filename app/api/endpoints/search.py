@@ -1,24 +1,98 @@
+from functools import partial
 from typing import List, Any
 
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 
 from app import schemas
 from app.chain.media import MediaChain
 from app.chain.search import SearchChain
+from app.core.compact import schema_dict
 from app.core.config import settings
 from app.core.security import verify_token
+from app.db.searchresult_oper import SearchResultOper
 from app.schemas.types import MediaType
+from app.utils.json import JsonUtils
 
 router = APIRouter()
 
 
-@router.get("/last", summary="查询搜索结果", response_model=List[schemas.Context])
-def search_latest(_: schemas.TokenPayload = Depends(verify_token)) -> Any:
+def _search_filters(site: str = None, free: bool = None, pix: str = None,
+                    season: int = None, keyword: str = None) -> dict:
     """
-    查询搜索结果
+    组装搜索结果过滤条件
     """
-    torrents = SearchChain().last_search_results()
-    return [torrent.to_dict() for torrent in torrents]
+    filters = {}
+    if site:
+        filters["sites"] = [int(s) for s in site.split(",") if s.strip().isdigit()]
+    if free is not None:
+        filters["free"] = free
+    if pix:
+        filters["resource_pix"] = pix
+    if season is not None:
+        filters["season"] = season
+    if keyword:
+        filters["keyword"] = keyword
+    return filters
+
+
+def _stream_response(items: List[Any], envelope: dict = None) -> StreamingResponse:
+    """
+    分块输出大量搜索结果，按schemas.Context投影字段，不复制数据也不做整体的模型校验
+    """
+    return StreamingResponse(JsonUtils.iter_list(items, to_dict=partial(schema_dict, schema=schemas.Context),
+                                                 envelope=envelope),
+                             media_type="application/json")
+
+
+@router.get("/last", summary="查询搜索结果",
+            responses={200: {"model": List[schemas.Context], "description": "搜索结果"}})
+def search_latest(page: int = 1,
+                  count: int = 0,
+                  sort: str = None,
+                  desc: bool = False,
+                  site: str = None,
+                  free: bool = None,
+                  pix: str = None,
+                  season: int = None,
+                  keyword: str = None,
+                  search_id: str = None,
+                  token: schemas.TokenPayload = Depends(verify_token)) -> Any:
+    """
+    查询搜索结果，支持分页（count为0时返回全部）、排序（position/site_order/size/seeders/peers/pubdate）
+    及按站点（多个,分隔）、免费、分辨率、季、关键词过滤，结果为上下文（schemas.Context）数组，分块输出
+    """
+    _, results = SearchChain().last_search_page(
+        userid=token.username, search_id=search_id,
+        page=page, count=count, sort=sort, desc=desc,
+        **_search_filters(site=site, free=free, pix=pix, season=season, keyword=keyword)
+    )
+    return _stream_response(results)
+
+
+@router.get("/last/info", summary="查询搜索结果概要", response_model=schemas.Response)
+def search_latest_info(site: str = None,
+                       free: bool = None,
+                       pix: str = None,
+                       season: int = None,
+                       keyword: str = None,
+                       search_id: str = None,
+                       token: schemas.TokenPayload = Depends(verify_token)) -> Any:
+    """
+    查询最近一次搜索的ID、关键词、时间及符合过滤条件的结果总数，用于分页
+    """
+    record = SearchResultOper().get_record(search_id=search_id, userid=token.username)
+    if not record:
+        return schemas.Response(success=False, message="没有搜索结果")
+    total = SearchResultOper().count(
+        record.search_id, **_search_filters(site=site, free=free, pix=pix, season=season, keyword=keyword)
+    )
+    return schemas.Response(success=True, data={
+        "search_id": record.search_id,
+        "keyword": record.keyword,
+        "reg_time": record.reg_time,
+        "total": total
+    })
 
 
 @router.get("/media/{mediaid}", summary="精确搜索资源", response_model=schemas.Response)
@@ -26,7 +100,7 @@ def search_by_id(mediaid: str,
                  mtype: str = None,
                  area: str = "title",
                  season: str = None,
-                 _: schemas.TokenPayload = Depends(verify_token)) -> Any:
+                 token: schemas.TokenPayload = Depends(verify_token)) -> Any:
     """
     根据TMDBID/豆瓣ID精确搜索站点资源 tmdb:/douban:/bangumi:
     """
@@ -41,11 +115,13 @@ def search_by_id(mediaid: str,
             doubaninfo = MediaChain().get_doubaninfo_by_tmdbid(tmdbid=tmdbid, mtype=mtype)
             if doubaninfo:
                 torrents = SearchChain().search_by_id(doubanid=doubaninfo.get("id"),
-                                                      mtype=mtype, area=area, season=season)
+                                                      mtype=mtype, area=area, season=season,
+                                                      userid=token.username)
             else:
                 return schemas.Response(success=False, message="未识别到豆瓣媒体信息")
         else:
-            torrents = SearchChain().search_by_id(tmdbid=tmdbid, mtype=mtype, area=area, season=season)
+            torrents = SearchChain().search_by_id(tmdbid=tmdbid, mtype=mtype, area=area, season=season,
+                                                      userid=token.username)
     elif mediaid.startswith("douban:"):
         doubanid = mediaid.replace("douban:", "")
         if settings.RECOGNIZE_SOURCE == "themoviedb":
@@ -55,11 +131,13 @@ def search_by_id(mediaid: str,
                 if tmdbinfo.get('season') and not season:
                     season = tmdbinfo.get('season')
                 torrents = SearchChain().search_by_id(tmdbid=tmdbinfo.get("id"),
-                                                      mtype=mtype, area=area, season=season)
+                                                      mtype=mtype, area=area, season=season,
+                                                      userid=token.username)
             else:
                 return schemas.Response(success=False, message="未识别到TMDB媒体信息")
         else:
-            torrents = SearchChain().search_by_id(doubanid=doubanid, mtype=mtype, area=area, season=season)
+            torrents = SearchChain().search_by_id(doubanid=doubanid, mtype=mtype, area=area, season=season,
+                                                      userid=token.username)
     elif mediaid.startswith("bangumi:"):
         bangumiid = int(mediaid.replace("bangumi:", ""))
         if settings.RECOGNIZE_SOURCE == "themoviedb":
@@ -67,7 +145,8 @@ def search_by_id(mediaid: str,
             tmdbinfo = MediaChain().get_tmdbinfo_by_bangumiid(bangumiid=bangumiid)
             if tmdbinfo:
                 torrents = SearchChain().search_by_id(tmdbid=tmdbinfo.get("id"),
-                                                      mtype=mtype, area=area, season=season)
+                                                      mtype=mtype, area=area, season=season,
+                                                      userid=token.username)
             else:
                 return schemas.Response(success=False, message="未识别到TMDB媒体信息")
         else:
@@ -75,7 +154,8 @@ def search_by_id(mediaid: str,
             doubaninfo = MediaChain().get_doubaninfo_by_bangumiid(bangumiid=bangumiid)
             if doubaninfo:
                 torrents = SearchChain().search_by_id(doubanid=doubaninfo.get("id"),
-                                                      mtype=mtype, area=area, season=season)
+                                                      mtype=mtype, area=area, season=season,
+                                                      userid=token.username)
             else:
                 return schemas.Response(success=False, message="未识别到豆瓣媒体信息")
     else:
@@ -84,18 +164,18 @@ def search_by_id(mediaid: str,
     if not torrents:
         return schemas.Response(success=False, message="未搜索到任何资源")
     else:
-        return schemas.Response(success=True, data=[torrent.to_dict() for torrent in torrents])
+        return _stream_response(torrents, envelope={"success": True, "message": None})
 
 
 @router.get("/title", summary="模糊搜索资源", response_model=schemas.Response)
 def search_by_title(keyword: str = None,
                     page: int = 0,
                     site: int = None,
-                    _: schemas.TokenPayload = Depends(verify_token)) -> Any:
+                    token: schemas.TokenPayload = Depends(verify_token)) -> Any:
     """
     根据名称模糊搜索站点资源，支持分页，关键词为空是返回首页资源
     """
-    torrents = SearchChain().search_by_title(title=keyword, page=page, site=site)
+    torrents = SearchChain().search_by_title(title=keyword, page=page, site=site, userid=token.username)
     if not torrents:
         return schemas.Response(success=False, message="未搜索到任何资源")
-    return schemas.Response(success=True, data=[torrent.to_dict() for torrent in torrents])
+    return _stream_response(torrents, envelope={"success": True, "message": None})
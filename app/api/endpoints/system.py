@@ -5,7 +5,7 @@ from typing import Union, Any
 
 import tailer
 from dotenv import set_key
-from fastapi import APIRouter, HTTPException, Depends, Response
+from fastapi import APIRouter, HTTPException, Depends, Response, Header
 from fastapi.responses import StreamingResponse
 
 from app import schemas
@@ -13,13 +13,17 @@ from app.chain.search import SearchChain
 from app.chain.system import SystemChain
 from app.core.config import settings, global_vars
 from app.core.module import ModuleManager
-from app.core.security import verify_token
+from app.core.metrics import metrics
+from app.core.security import verify_token, verify_apikey
 from app.db.models import User
+from app.db.plugindata_oper import PluginDataOper
 from app.db.systemconfig_oper import SystemConfigOper
 from app.db.userauth import get_current_active_superuser
+from app.helper.image import ImageHelper
 from app.helper.message import MessageHelper
 from app.helper.progress import ProgressHelper
 from app.helper.sites import SitesHelper
+from app.helper.torrentcache import TorrentCacheHelper
 from app.scheduler import Scheduler
 from app.schemas.types import SystemConfigKey
 from app.utils.http import RequestUtils
@@ -30,19 +34,29 @@ router = APIRouter()
 
 
 @router.get("/img/{proxy}", summary="图片代理")
-def get_img(imgurl: str, proxy: bool = False) -> Any:
+def get_img(imgurl: str, proxy: bool = False, width: int = None,
+            if_none_match: str = Header(None)) -> Any:
     """
-    通过图片代理（使用代理服务器）
+    通过图片代理（使用代理服务器），图片缓存在本地，浏览器缓存未变化时返回304
+    :param imgurl: 图片地址
+    :param proxy: 是否使用代理服务器
+    :param width: 缩略图宽度
     """
     if not imgurl:
         return None
-    if proxy:
-        response = RequestUtils(ua=settings.USER_AGENT, proxies=settings.PROXY).get_res(url=imgurl)
-    else:
-        response = RequestUtils(ua=settings.USER_AGENT).get_res(url=imgurl)
-    if response:
-        return Response(content=response.content, media_type="image/jpeg")
-    return None
+    image = ImageHelper().get_image(url=imgurl,
+                                    proxies=settings.PROXY if proxy else None,
+                                    width=width)
+    if not image:
+        return None
+    headers = {
+        "Cache-Control": "public, max-age=86400",
+        "ETag": image.etag,
+        "Last-Modified": image.last_modified
+    }
+    if if_none_match and image.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=image.content, media_type=image.content_type, headers=headers)
 
 
 @router.get("/env", summary="查询系统环境变量", response_model=schemas.Response)
@@ -304,6 +318,33 @@ def moduletest(moduleid: str, _: schemas.TokenPayload = Depends(verify_token)):
     return schemas.Response(success=state, message=errmsg)
 
 
+@router.get("/dbcache", summary="数据库写回缓存统计", response_model=schemas.Response)
+def dbcache(_: schemas.TokenPayload = Depends(verify_token)):
+    """
+    查询插件数据写回缓存的命中率及合并节省的写入次数
+    """
+    return schemas.Response(success=True, data={
+        "plugindata": PluginDataOper().metrics()
+    })
+
+
+@router.get("/torrentcache", summary="种子文件缓存统计", response_model=schemas.Response)
+def torrentcache(_: schemas.TokenPayload = Depends(verify_token)):
+    """
+    查询缓存的种子数、下载链接数及占用空间
+    """
+    return schemas.Response(success=True, data=TorrentCacheHelper().stats())
+
+
+@router.get("/metrics", summary="运行指标")
+def get_metrics(_: str = Depends(verify_apikey)):
+    """
+    按Prometheus文本格式导出模块、HTTP请求、数据库操作、定时任务、事件处理及API请求的耗时指标，
+    通过 apikey 参数或 X-API-Key 请求头认证
+    """
+    return Response(content=metrics.export(), media_type="text/plain; version=0.0.4")
+
+
 @router.get("/restart", summary="重启系统", response_model=schemas.Response)
 def restart_system(_: User = Depends(get_current_active_superuser)):
     """
@@ -4,7 +4,9 @@ from fastapi import APIRouter, BackgroundTasks, Request, Depends
 
 from app import schemas
 from app.chain.webhook import WebhookChain
+from app.core.config import settings
 from app.core.security import verify_apitoken
+from app.helper.transferqueue import TransferQueueHelper
 
 router = APIRouter()
 
@@ -40,3 +42,16 @@ def webhook_message(background_tasks: BackgroundTasks,
     args = request.query_params
     background_tasks.add_task(start_webhook_chain, None, None, args)
     return schemas.Response(success=True)
+
+
+@router.get("/downloader", summary="下载器下载完成通知", response_model=schemas.Response)
+def downloader_completed(hash: str, _: str = Depends(verify_apitoken)) -> Any:
+    """
+    下载器下载完成通知，将种子加入整理队列，
+    如qBittorrent中设置Torrent完成时运行外部程序：curl "http://IP:PORT/api/v1/webhook/downloader?token=API_TOKEN&hash=%I"，
+    Transmission中设置下载完成脚本调用该地址并传入$TR_TORRENT_HASH
+    """
+    if not settings.DOWNLOADER_MONITOR:
+        return schemas.Response(success=False, message="未开启下载器监控")
+    TransferQueueHelper().put_hash(hash)
+    return schemas.Response(success=True)
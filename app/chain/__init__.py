@@ -13,6 +13,7 @@ from app.core.config import settings
 from app.core.context import Context, MediaInfo, TorrentInfo
 from app.core.event import EventManager
 from app.core.meta import MetaBase
+from app.core.metrics import metrics
 from app.core.module import ModuleManager
 from app.db.message_oper import MessageOper
 from app.helper.message import MessageHelper
@@ -104,13 +105,16 @@ class ChainBase(metaclass=ABCMeta):
                 func = getattr(module, method)
                 if is_result_empty(result):
                     # 返回None，第一次执行或者需继续执行下一模块
-                    result = func(*args, **kwargs)
+                    with metrics.span("module", module=module_id, method=method):
+                        result = func(*args, **kwargs)
                 elif ObjectUtils.check_signature(func, result):
                     # 返回结果与方法签名一致，将结果传入（不能多个模块同时运行的需要通过开关控制）
-                    result = func(result)
+                    with metrics.span("module", module=module_id, method=method):
+                        result = func(result)
                 elif isinstance(result, list):
                     # 返回为列表，有多个模块运行结果时进行合并（不能多个模块同时运行的需要通过开关控制）
-                    temp = func(*args, **kwargs)
+                    with metrics.span("module", module=module_id, method=method):
+                        temp = func(*args, **kwargs)
                     if isinstance(temp, list):
                         result.extend(temp)
                 else:
@@ -374,6 +378,15 @@ class ChainBase(metaclass=ABCMeta):
         """
         return self.run_module("list_torrents", status=status, hashs=hashs, downloader=downloader)
 
+    def exists_torrent(self, torrent_hash: str, downloader: str = settings.DEFAULT_DOWNLOADER) -> Optional[bool]:
+        """
+        下载器中是否已存在该种子任务，存在时重新打上标签
+        :param torrent_hash:  种子Hash
+        :param downloader:  下载器
+        :return: 是否已存在
+        """
+        return self.run_module("exists_torrent", torrent_hash=torrent_hash, downloader=downloader)
+
     def transfer(self, path: Path, meta: MetaBase, mediainfo: MediaInfo,
                  transfer_type: str, target: Path = None,
                  episodes_info: List[TmdbEpisode] = None,
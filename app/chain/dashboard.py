@@ -1,14 +1,35 @@
-from typing import Optional, List
+import threading
+import time
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple, Callable
 
 from app import schemas
 from app.chain import ChainBase
+from app.core.config import settings
+from app.helper.directory import DirectoryHelper
+from app.log import logger
 from app.utils.singleton import Singleton
+from app.utils.system import SystemUtils
 
 
 class DashboardChain(ChainBase, metaclass=Singleton):
     """
     各类仪表板统计处理链
+    媒体数量、存储空间等耗时的统计由定时服务在后台刷新，接口直接返回最近一次的快照
     """
+
+    def __init__(self):
+        super().__init__()
+        # 统计快照：名称 -> (数据, 刷新时间)
+        self._snapshots: Dict[str, Tuple[Any, float]] = {}
+        # 每项统计的刷新锁，同一时间只刷新一次
+        self._locks: Dict[str, threading.Lock] = {
+            "statistic": threading.Lock(),
+            "storage": threading.Lock()
+        }
+        # 快照版本，每次刷新后递增，用于推送更新
+        self._version = 0
+
     def media_statistic(self) -> Optional[List[schemas.Statistic]]:
         """
         媒体数量统计
@@ -20,3 +41,79 @@ class DashboardChain(ChainBase, metaclass=Singleton):
         下载器信息
         """
         return self.run_module("downloader_info")
+
+    def __refresh(self, key: str, func: Callable[[], Any]) -> Tuple[Any, float]:
+        """
+        刷新统计快照，正在刷新时等待其完成并返回其结果
+        """
+        lock = self._locks[key]
+        if not lock.acquire(blocking=False):
+            with lock:
+                return self._snapshots.get(key, (None, 0))
+        try:
+            start = time.time()
+            data = func()
+            self._snapshots[key] = (data, time.time())
+            self._version += 1
+            logger.debug(f"仪表板统计 {key} 已刷新，耗时 {time.time() - start:.2f} 秒")
+            return self._snapshots[key]
+        except Exception as err:
+            logger.error(f"仪表板统计 {key} 刷新失败：{str(err)}")
+            return self._snapshots.get(key, (None, 0))
+        finally:
+            lock.release()
+
+    def refresh_statistic(self) -> Tuple[Any, float]:
+        """
+        刷新媒体数量统计，汇总各媒体服务器的统计信息
+        """
+
+        def __statistic() -> schemas.Statistic:
+            ret_statistic = schemas.Statistic()
+            for media_statistic in self.media_statistic() or []:
+                ret_statistic.movie_count += media_statistic.movie_count
+                ret_statistic.tv_count += media_statistic.tv_count
+                ret_statistic.episode_count += media_statistic.episode_count
+                ret_statistic.user_count += media_statistic.user_count
+            return ret_statistic
+
+        return self.__refresh("statistic", __statistic)
+
+    def refresh_storage(self) -> Tuple[Any, float]:
+        """
+        刷新媒体库存储空间
+        """
+
+        def __storage() -> schemas.Storage:
+            library_dirs = DirectoryHelper().get_library_dirs()
+            total_storage, free_storage = SystemUtils.space_usage([Path(d.path) for d in library_dirs if d.path])
+            return schemas.Storage(
+                total_storage=total_storage,
+                used_storage=total_storage - free_storage
+            )
+
+        return self.__refresh("storage", __storage)
+
+    def get_snapshot(self, key: str) -> Tuple[Any, float]:
+        """
+        获取统计快照，还没有快照或未开启定时刷新时立即刷新
+        :param key: statistic/storage
+        :return: 数据, 快照已存在的秒数
+        """
+        if key not in self._snapshots or not getattr(settings, f"DASHBOARD_{key.upper()}_INTERVAL"):
+            getattr(self, f"refresh_{key}")()
+        data, refresh_time = self._snapshots.get(key, (None, 0))
+        return data, (time.time() - refresh_time) if refresh_time else 0
+
+    def get_snapshots(self) -> Dict[str, Tuple[Any, float]]:
+        """
+        获取所有已有的统计快照：名称 -> (数据, 刷新时间)
+        """
+        return dict(self._snapshots)
+
+    @property
+    def version(self) -> int:
+        """
+        快照版本
+        """
+        return self._version
@@ -163,6 +163,11 @@ class DownloadChain(ChainBase):
         # Cookie
         site_cookie = torrent.site_cookie
         if torrent.enclosure.startswith("["):
+            # 已缓存的种子不再解析下载地址
+            cached = self.torrent.torrentcache.get(torrent.enclosure)
+            if cached:
+                download_folder, files = self.torrent.get_torrent_info(cached[0])
+                return cached[0], download_folder, files
             # 需要解码获取下载地址
             torrent_url = __get_redict_url(url=torrent.enclosure,
                                            ua=torrent.site_ua,
@@ -195,6 +200,10 @@ class DownloadChain(ChainBase):
                 userid=userid))
             return None, "", []
 
+        if torrent_url != torrent.enclosure:
+            # 下载地址需要解析时，原始链接也关联到缓存的种子
+            self.torrent.torrentcache.link(torrent.enclosure, self.torrent.torrentcache.get_hash(torrent_url))
+
         # 返回 种子文件路径，种子目录名，种子文件清单
         return torrent_file, download_folder, files
 
@@ -228,7 +237,19 @@ class DownloadChain(ChainBase):
         # 实际下载的集数
         download_episodes = StringUtils.format_ep(list(episodes)) if episodes else None
         _folder_name = ""
+        _file_list = []
+        # 已知infohash的种子先查询下载器，已存在时不再下载种子和添加任务，只给已有任务重新打上标签
+        exists_hash = None
         if not torrent_file:
+            exists_hash = self.torrent.torrentcache.get_hash(_torrent.enclosure)
+            if exists_hash and not self.exists_torrent(exists_hash):
+                exists_hash = None
+        if exists_hash:
+            content = None
+            cached = self.torrent.torrentcache.get(_torrent.enclosure)
+            if cached:
+                _folder_name, _file_list = self.torrent.get_torrent_info(cached[0])
+        elif not torrent_file:
             # 下载种子文件，得到的可能是文件也可能是磁力链
             content, _folder_name, _file_list = self.download_torrent(_torrent,
                                                                       channel=channel,
@@ -271,12 +292,15 @@ class DownloadChain(ChainBase):
                                    title="下载失败", role="system")
             return None
 
-        # 添加下载
-        result: Optional[tuple] = self.download(content=content,
-                                                cookie=_torrent.site_cookie,
-                                                episodes=episodes,
-                                                download_dir=download_dir,
-                                                category=_media.category)
+        if exists_hash:
+            result: Optional[tuple] = (exists_hash, "下载任务已存在")
+        else:
+            # 添加下载
+            result = self.download(content=content,
+                                   cookie=_torrent.site_cookie,
+                                   episodes=episodes,
+                                   download_dir=download_dir,
+                                   category=_media.category)
         if result:
             _hash, error_msg = result
         else:
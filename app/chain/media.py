@@ -430,7 +430,7 @@ class MediaChain(ChainBase, metaclass=Singleton):
                 # 生成目录内图片文件
                 if init_folder:
                     # 图片
-                    for attr_name, attr_value in vars(mediainfo).items():
+                    for attr_name, attr_value in mediainfo.attributes().items():
                         if attr_value \
                                 and attr_name.endswith("_path") \
                                 and attr_value \
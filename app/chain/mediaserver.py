@@ -1,14 +1,22 @@
 import json
 import threading
-from typing import List, Union, Optional
+from typing import List, Union, Optional, Dict, Generator
 
 from app import schemas
 from app.chain import ChainBase
 from app.core.config import settings
+from app.core.event import eventmanager, Event
 from app.db.mediaserver_oper import MediaServerOper
 from app.log import logger
+from app.schemas.types import EventType
 
 lock = threading.Lock()
+# 媒体库数据写入锁，Webhook更新与同步不同时写入
+db_lock = threading.Lock()
+
+# 各媒体服务器的入库、删除事件
+_ADDED_EVENTS = {"library.new", "ItemAdded"}
+_DELETED_EVENTS = {"library.deleted", "ItemDeleted"}
 
 
 class MediaServerChain(ChainBase):
@@ -16,6 +24,9 @@ class MediaServerChain(ChainBase):
     媒体服务器处理链
     """
 
+    # 媒体库变更标识缓存文件
+    _token_cache = "__mediaserver_tokens__"
+
     def __init__(self):
         super().__init__()
         self.dboper = MediaServerOper()
@@ -32,12 +43,24 @@ class MediaServerChain(ChainBase):
         """
         return self.run_module("mediaserver_items", server=server, library_id=library_id)
 
+    def library_items(self, server: str, library_id: Union[str, int]) -> Optional[Generator]:
+        """
+        批量获取媒体服务器媒体库的所有项目，电视剧包含各季剧集
+        """
+        return self.run_module("mediaserver_library_items", server=server, library_id=library_id)
+
     def iteminfo(self, server: str, item_id: Union[str, int]) -> schemas.MediaServerItem:
         """
         获取媒体服务器项目信息
         """
         return self.run_module("mediaserver_iteminfo", server=server, item_id=item_id)
 
+    def library_token(self, server: str, library_id: Union[str, int]) -> Optional[str]:
+        """
+        获取媒体库变更标识
+        """
+        return self.run_module("mediaserver_library_token", server=server, library_id=library_id)
+
     def episodes(self, server: str, item_id: Union[str, int]) -> List[schemas.MediaServerSeasonInfo]:
         """
         获取媒体服务器剧集信息
@@ -62,9 +85,68 @@ class MediaServerChain(ChainBase):
         """
         return self.run_module("mediaserver_play_url", server=server, item_id=item_id)
 
+    def __item_dict(self, server: str, item: schemas.MediaServerItem) -> dict:
+        """
+        生成媒体服务器数据，电视剧未包含剧集时查询各季的剧集
+        """
+        seasoninfo = item.seasoninfo or {}
+        # 类型
+        item_type = "电视剧" if item.item_type in ['Series', 'show'] else "电影"
+        if item_type == "电视剧" and item.seasoninfo is None:
+            # 查询剧集信息
+            espisodes_info = self.episodes(server, item.item_id) or []
+            for episode in espisodes_info:
+                seasoninfo[episode.season] = episode.episodes
+        item_dict = item.dict()
+        item_dict['seasoninfo'] = json.dumps(seasoninfo)
+        item_dict['item_type'] = item_type
+        return item_dict
+
+    @eventmanager.register(EventType.WebhookMessage)
+    def webhook_update(self, event: Event):
+        """
+        媒体服务器入库、删除事件时更新对应项目的数据，无需等待同步
+        """
+        if not event or not settings.MEDIASERVER:
+            return
+        event_info: schemas.WebhookEventInfo = event.event_data
+        if not event_info or event_info.channel not in settings.MEDIASERVER.split(","):
+            return
+        if event_info.event not in _ADDED_EVENTS | _DELETED_EVENTS:
+            return
+        if event_info.item_type == "MOV":
+            item_id = event_info.item_id
+        elif event_info.item_type in ["TV", "SHOW"]:
+            item_id = event_info.series_id or event_info.item_id
+        else:
+            return
+        if not item_id:
+            return
+        server = event_info.channel
+        deleted = event_info.event in _DELETED_EVENTS
+        if deleted and event_info.item_type == "MOV":
+            with db_lock:
+                self.dboper.delete(server, item_id)
+            logger.info(f"{server} 已删除 {event_info.item_name}，已移除媒体库数据")
+            return
+        # 电视剧的剧集有增删时重新查询该剧的所有剧集
+        item = self.iteminfo(server, item_id)
+        if not item or not item.item_id:
+            if deleted:
+                with db_lock:
+                    self.dboper.delete(server, item_id)
+                logger.info(f"{server} 已删除 {event_info.item_name}，已移除媒体库数据")
+            else:
+                logger.warn(f"{server} 未查询到 {event_info.item_name} 的详情，跳过更新媒体库数据")
+            return
+        item_dict = self.__item_dict(server, item)
+        with db_lock:
+            added = self.dboper.upsert(**item_dict)
+        logger.info(f"{server} {'新增' if added else '更新'}媒体库数据：{item.title}")
+
     def sync(self):
         """
-        同步媒体库所有数据到本地数据库
+        同步媒体库数据到本地数据库，只重新获取变更标识有变化的媒体库
         """
         # 设置的媒体服务器
         if not settings.MEDIASERVER:
@@ -72,45 +154,73 @@ class MediaServerChain(ChainBase):
         # 同步黑名单
         sync_blacklist = settings.MEDIASERVER_SYNC_BLACKLIST.split(
             ",") if settings.MEDIASERVER_SYNC_BLACKLIST else []
-        mediaservers = settings.MEDIASERVER.split(",")
+        mediaservers = [mediaserver for mediaserver in settings.MEDIASERVER.split(",") if mediaserver]
         with lock:
             # 汇总统计
             total_count = 0
-            # 清空登记薄
-            self.dboper.empty()
+            # 上次同步时各媒体库的变更标识，{媒体服务器:媒体库ID: 标识}
+            tokens: Dict[str, str] = self.load_cache(self._token_cache) or {}
+            # 清理已不再使用的媒体服务器
+            with db_lock:
+                self.dboper.empty_servers(mediaservers)
+            tokens = {key: token for key, token in tokens.items() if key.split(":")[0] in mediaservers}
             # 遍历媒体服务器
             for mediaserver in mediaservers:
-                if not mediaserver:
-                    continue
                 logger.info(f"开始同步媒体库 {mediaserver} 的数据 ...")
-                for library in self.librarys(mediaserver):
+                librarys = self.librarys(mediaserver)
+                if not librarys:
+                    logger.warn(f"未获取到 {mediaserver} 的媒体库，保留原有数据")
+                    continue
+                if not any(key.startswith(f"{mediaserver}:") for key in tokens):
+                    # 没有同步记录，清空原有数据后全量同步
+                    with db_lock:
+                        self.dboper.empty(mediaserver)
+                library_ids = []
+                for library in librarys:
                     # 同步黑名单 跳过
                     if library.name in sync_blacklist:
                         continue
+                    library_ids.append(str(library.id))
+                    key = f"{mediaserver}:{library.id}"
+                    token = self.library_token(mediaserver, library.id)
+                    if token and tokens.get(key) == token:
+                        logger.info(f"{mediaserver} 媒体库 {library.name} 无变化，跳过同步")
+                        continue
                     logger.info(f"正在同步 {mediaserver} 媒体库 {library.name} ...")
-                    library_count = 0
-                    for item in self.items(mediaserver, library.id):
-                        if not item:
-                            continue
-                        if not item.item_id:
-                            continue
-                        logger.debug(f"正在同步 {item.title} ...")
-                        # 计数
-                        library_count += 1
-                        seasoninfo = {}
-                        # 类型
-                        item_type = "电视剧" if item.item_type in ['Series', 'show'] else "电影"
-                        if item_type == "电视剧":
-                            # 查询剧集信息
-                            espisodes_info = self.episodes(mediaserver, item.item_id) or []
-                            for episode in espisodes_info:
-                                seasoninfo[episode.season] = episode.episodes
-                        # 插入数据
-                        item_dict = item.dict()
-                        item_dict['seasoninfo'] = json.dumps(seasoninfo)
-                        item_dict['item_type'] = item_type
-                        self.dboper.add(**item_dict)
-                    logger.info(f"{mediaserver} 媒体库 {library.name} 同步完成，共同步数量：{library_count}")
+                    items = []
+                    try:
+                        # 优先批量获取，不支持时逐个查询电视剧的剧集
+                        library_items = self.library_items(mediaserver, library.id)
+                        if library_items is None:
+                            library_items = self.items(mediaserver, library.id)
+                        for item in library_items or []:
+                            if not item:
+                                continue
+                            if not item.item_id:
+                                continue
+                            logger.debug(f"正在同步 {item.title} ...")
+                            item_dict = self.__item_dict(mediaserver, item)
+                            item_dict['library'] = str(library.id)
+                            items.append(item_dict)
+                    except Exception as err:
+                        logger.error(f"获取 {mediaserver} 媒体库 {library.name} 数据出错，保留原有数据：{str(err)}")
+                        continue
+                    # 插入数据
+                    with db_lock:
+                        self.dboper.replace_library(mediaserver, str(library.id), items)
+                    if token:
+                        tokens[key] = token
+                    else:
+                        tokens.pop(key, None)
+                    # 每个媒体库同步完成后保存，中断后已完成的媒体库不再重复同步
+                    self.save_cache(tokens, self._token_cache)
+                    logger.info(f"{mediaserver} 媒体库 {library.name} 同步完成，共同步数量：{len(items)}")
                     # 总数累加
-                    total_count += library_count
+                    total_count += len(items)
+                # 清理已删除或加入黑名单的媒体库
+                with db_lock:
+                    self.dboper.empty_others(mediaserver, library_ids)
+                tokens = {key: token for key, token in tokens.items()
+                          if not key.startswith(f"{mediaserver}:") or key.split(":", 1)[1] in library_ids}
+            self.save_cache(tokens, self._token_cache)
             logger.info("【MediaServer】媒体库数据同步完成，同步数量：%s" % total_count)
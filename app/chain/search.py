@@ -1,22 +1,27 @@
-import pickle
+import copy
+import time
 import traceback
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import Dict
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from app.chain import ChainBase
 from app.core.context import Context
 from app.core.context import MediaInfo, TorrentInfo
 from app.core.event import eventmanager, Event
+from app.core.meta import MetaBase
 from app.core.metainfo import MetaInfo
+from app.db.searchresult_oper import SearchResultOper
 from app.db.systemconfig_oper import SystemConfigOper
 from app.helper.progress import ProgressHelper
+from app.helper.sitelimiter import SiteLimiterHelper
 from app.helper.sites import SitesHelper
 from app.helper.torrent import TorrentHelper
 from app.log import logger
 from app.schemas import NotExistMediaInfo
 from app.schemas.types import MediaType, ProgressKey, SystemConfigKey, EventType
+from app.utils.string import StringUtils
 
 
 class SearchChain(ChainBase):
@@ -28,11 +33,14 @@ class SearchChain(ChainBase):
         super().__init__()
         self.siteshelper = SitesHelper()
         self.progress = ProgressHelper()
+        self.sitelimiter = SiteLimiterHelper()
         self.systemconfig = SystemConfigOper()
+        self.searchresult = SearchResultOper()
         self.torrenthelper = TorrentHelper()
 
     def search_by_id(self, tmdbid: int = None, doubanid: str = None,
-                     mtype: MediaType = None, area: str = "title", season: int = None) -> List[Context]:
+                     mtype: MediaType = None, area: str = "title", season: int = None,
+                     userid: str = None) -> List[Context]:
         """
         根据TMDBID/豆瓣ID搜索资源，精确匹配，但不不过滤本地存在的资源
         :param tmdbid: TMDB ID
@@ -40,6 +48,7 @@ class SearchChain(ChainBase):
         :param mtype: 媒体，电影 or 电视剧
         :param area: 搜索范围，title or imdbid
         :param season: 季数
+        :param userid: 用户，用于区分保存的搜索结果
         """
         mediainfo = self.recognize_media(tmdbid=tmdbid, doubanid=doubanid, mtype=mtype)
         if not mediainfo:
@@ -54,16 +63,16 @@ class SearchChain(ChainBase):
             }
         results = self.process(mediainfo=mediainfo, area=area, no_exists=no_exists)
         # 保存结果
-        bytes_results = pickle.dumps(results)
-        self.systemconfig.set(SystemConfigKey.SearchResults, bytes_results)
+        self.searchresult.save(results, keyword=mediainfo.title, userid=userid)
         return results
 
-    def search_by_title(self, title: str, page: int = 0, site: int = None) -> List[Context]:
+    def search_by_title(self, title: str, page: int = 0, site: int = None, userid: str = None) -> List[Context]:
         """
         根据标题搜索资源，不识别不过滤，直接返回站点内容
         :param title: 标题，为空时返回所有站点首页内容
         :param page: 页码
         :param site: 站点ID
+        :param userid: 用户，用于区分保存的搜索结果
         """
         if title:
             logger.info(f'开始搜索资源，关键词：{title} ...')
@@ -78,22 +87,32 @@ class SearchChain(ChainBase):
         contexts = [Context(meta_info=MetaInfo(title=torrent.title, subtitle=torrent.description),
                             torrent_info=torrent) for torrent in torrents]
         # 保存结果
-        bytes_results = pickle.dumps(contexts)
-        self.systemconfig.set(SystemConfigKey.SearchResults, bytes_results)
+        self.searchresult.save(contexts, keyword=title, userid=userid)
         return contexts
 
-    def last_search_results(self) -> List[Context]:
+    def last_search_page(self, userid: str = None, search_id: str = None,
+                         page: int = 1, count: int = 0, sort: str = None, desc: bool = False,
+                         **kwargs) -> Tuple[int, List[dict]]:
         """
-        获取上次搜索结果
+        分页获取上次搜索结果，只加载当前页数据
+        :param userid: 用户
+        :param search_id: 搜索ID，为空时取用户最近一次搜索
+        :param page: 页码
+        :param count: 每页数量，为0时返回全部
+        :param sort: 排序字段
+        :param desc: 是否倒序
+        :param kwargs: 过滤条件：sites、free、resource_pix、season、keyword
+        :return: 总数、上下文字典列表
         """
-        results = self.systemconfig.get(SystemConfigKey.SearchResults)
-        if not results:
-            return []
+        record = self.searchresult.get_record(search_id=search_id, userid=userid)
+        if not record:
+            return 0, []
         try:
-            return pickle.loads(results)
+            return self.searchresult.list(record.search_id, userid=userid, page=page, count=count,
+                                          sort=sort, desc=desc, **kwargs)
         except Exception as e:
             logger.error(f'加载搜索结果失败：{str(e)} - {traceback.format_exc()}')
-            return []
+            return 0, []
 
     def process(self, mediainfo: MediaInfo,
                 keyword: str = None,
@@ -115,12 +134,24 @@ class SearchChain(ChainBase):
 
         def __do_filter(torrent_list: List[TorrentInfo]) -> List[TorrentInfo]:
             """
-            执行优先级过滤
+            执行优先级过滤，规则相关内容完全相同的种子（多个站点发布的同一资源）只过滤一次
             """
-            return self.filter_torrents(rule_string=priority_rule,
-                                        torrent_list=torrent_list,
-                                        season_episodes=season_episodes,
-                                        mediainfo=mediainfo) or []
+            signatures: Dict[tuple, List[TorrentInfo]] = {}
+            for _torrent in torrent_list:
+                signatures.setdefault(self.torrenthelper.rule_signature(_torrent), []).append(_torrent)
+            filtered = self.filter_torrents(rule_string=priority_rule,
+                                            torrent_list=[same[0] for same in signatures.values()],
+                                            season_episodes=season_episodes,
+                                            mediainfo=mediainfo) or []
+            filtered_ids = {id(_torrent) for _torrent in filtered}
+            ret_torrents = []
+            for same in signatures.values():
+                if id(same[0]) not in filtered_ids:
+                    continue
+                for _torrent in same[1:]:
+                    _torrent.pri_order = same[0].pri_order
+                ret_torrents.extend(same)
+            return ret_torrents
 
         # 豆瓣标题处理
         if not mediainfo.tmdb_id:
@@ -176,29 +207,40 @@ class SearchChain(ChainBase):
 
         # 开始匹配
         _match_torrents = []
+        # 匹配过的种子的识别结果，同一资源共用
+        _torrent_metas: Dict[int, MetaBase] = {}
         # 总数
         _total = len(torrents)
         # 已处理数
         _count = 0
         if mediainfo:
+            # 多个站点发布的同一资源只识别和比对一次
+            groups = self.torrenthelper.group_torrents(torrents)
             # 英文标题应该在别名/原标题中，不需要再匹配
             logger.info(f"开始匹配结果 标题：{mediainfo.title}，原标题：{mediainfo.original_title}，别名：{mediainfo.names}")
+            logger.info(f"共 {_total} 个资源，合并不同站点的相同资源后共 {len(groups)} 个")
             self.progress.update(value=0, text=f'开始匹配，总 {_total} 个资源 ...', key=ProgressKey.Search)
-            for torrent in torrents:
-                _count += 1
+            for group in groups:
+                _count += len(group)
                 self.progress.update(value=(_count / _total) * 96,
-                                     text=f'正在匹配 {torrent.site_name}，已完成 {_count} / {_total} ...',
+                                     text=f'正在匹配 {group[0].site_name}，已完成 {_count} / {_total} ...',
                                      key=ProgressKey.Search)
-                if not torrent.title:
-                    continue
-                # 比对IMDBID
-                if torrent.imdbid \
-                        and mediainfo.imdb_id \
-                        and torrent.imdbid == mediainfo.imdb_id:
-                    logger.info(f'{mediainfo.title} 通过IMDBID匹配到资源：{torrent.site_name} - {torrent.title}')
-                    _match_torrents.append(torrent)
+                _others = []
+                for torrent in group:
+                    if not torrent.title:
+                        continue
+                    # 比对IMDBID
+                    if torrent.imdbid \
+                            and mediainfo.imdb_id \
+                            and torrent.imdbid == mediainfo.imdb_id:
+                        logger.info(f'{mediainfo.title} 通过IMDBID匹配到资源：{torrent.site_name} - {torrent.title}')
+                        _match_torrents.append(torrent)
+                        continue
+                    _others.append(torrent)
+                if not _others:
                     continue
                 # 识别
+                torrent = _others[0]
                 torrent_meta = MetaInfo(title=torrent.title, subtitle=torrent.description)
                 if torrent.title != torrent_meta.org_string:
                     logger.info(f"种子名称应用识别词后发生改变：{torrent.title} => {torrent_meta.org_string}")
@@ -207,8 +249,8 @@ class SearchChain(ChainBase):
                                                     torrent_meta=torrent_meta,
                                                     torrent=torrent):
                     # 匹配成功
-                    _match_torrents.append(torrent)
-                    continue
+                    _match_torrents.extend(_others)
+                    _torrent_metas.update({id(_torrent): torrent_meta for _torrent in _others})
             # 匹配完成
             logger.info(f"匹配完成，共匹配到 {len(_match_torrents)} 个资源")
             self.progress.update(value=97,
@@ -247,8 +289,9 @@ class SearchChain(ChainBase):
         # 去掉mediainfo中多余的数据
         mediainfo.clear()
 
-        # 组装上下文
-        contexts = [Context(meta_info=MetaInfo(title=torrent.title, subtitle=torrent.description),
+        # 组装上下文，同一资源复用识别结果，各自保留副本以免下载时修改相互影响
+        contexts = [Context(meta_info=copy.deepcopy(_torrent_metas[id(torrent)]) if id(torrent) in _torrent_metas
+                            else MetaInfo(title=torrent.title, subtitle=torrent.description),
                             media_info=mediainfo,
                             torrent_info=torrent) for torrent in _match_torrents]
 
@@ -291,6 +334,8 @@ class SearchChain(ChainBase):
         if not sites:
             sites = self.systemconfig.get(SystemConfigKey.IndexerSites) or []
 
+        # 连续请求失败暂停访问的站点
+        skipped_sites = []
         for indexer in self.siteshelper.get_indexers():
             # 检查站点索引开关
             if not sites or indexer.get("id") in sites:
@@ -299,9 +344,19 @@ class SearchChain(ChainBase):
                 if state:
                     logger.warn(msg)
                     continue
+                # 站点熔断
+                open_until = self.sitelimiter.get_open(StringUtils.get_url_domain(indexer.get("domain")))
+                if open_until:
+                    logger.warn(f"站点 {indexer.get('name')} 连续请求失败，"
+                                f"暂停访问至 {time.strftime('%H:%M', time.localtime(open_until))}，跳过搜索")
+                    skipped_sites.append(indexer.get("name"))
+                    continue
                 indexer_sites.append(indexer)
+        # 跳过站点的提示
+        skipped_text = f"，跳过 {len(skipped_sites)} 个暂停访问的站点：{'、'.join(skipped_sites)}" \
+            if skipped_sites else ""
         if not indexer_sites:
-            logger.warn('未开启任何有效站点，无法搜索资源')
+            logger.warn(f'未开启任何有效站点，无法搜索资源{skipped_text}')
             return []
 
         # 开始进度
@@ -314,7 +369,7 @@ class SearchChain(ChainBase):
         finish_count = 0
         # 更新进度
         self.progress.update(value=0,
-                             text=f"开始搜索，共 {total_num} 个站点 ...",
+                             text=f"开始搜索，共 {total_num} 个站点{skipped_text} ...",
                              key=ProgressKey.Search)
         # 多线程
         executor = ThreadPoolExecutor(max_workers=len(indexer_sites))
@@ -348,7 +403,8 @@ class SearchChain(ChainBase):
         end_time = datetime.now()
         # 更新进度
         self.progress.update(value=100,
-                             text=f"站点搜索完成，有效资源数：{len(results)}，总耗时 {(end_time - start_time).seconds} 秒",
+                             text=f"站点搜索完成，有效资源数：{len(results)}，"
+                                  f"总耗时 {(end_time - start_time).seconds} 秒{skipped_text}",
                              key=ProgressKey.Search)
         logger.info(f"站点搜索完成，有效资源数：{len(results)}，总耗时 {(end_time - start_time).seconds} 秒")
         # 结束进度
@@ -21,6 +21,7 @@ from app.helper.cookie import CookieHelper
 from app.helper.cookiecloud import CookieCloudHelper
 from app.helper.message import MessageHelper
 from app.helper.rss import RssHelper
+from app.helper.sitelimiter import SiteLimiterHelper
 from app.helper.sites import SitesHelper
 from app.log import logger
 from app.schemas import MessageChannel, Notification
@@ -349,6 +350,22 @@ class SiteChain(ChainBase):
             else:
                 logger.warn(f"缓存站点 {indexer.get('name')} 图标失败")
 
+    @eventmanager.register(EventType.SiteUpdated)
+    def reset_site_limiter(self, event: Event):
+        """
+        站点信息更新后重置站点的流控和熔断状态
+        """
+        if not event:
+            return
+        event_data = event.event_data or {}
+        # 主域名
+        domain = event_data.get("domain")
+        if not domain:
+            return
+        if str(domain).startswith("http"):
+            domain = StringUtils.get_url_domain(domain)
+        SiteLimiterHelper().reset(domain)
+
     @eventmanager.register(EventType.SiteUpdated)
     def clear_site_data(self, event: Event):
         """
@@ -382,6 +399,9 @@ class SiteChain(ChainBase):
         if not site_info:
             return False, f"站点【{url}】不存在"
 
+        # 手动测试时重置站点的流控和熔断状态
+        SiteLimiterHelper().reset(domain)
+
         # 模拟登录
         try:
             # 开始记时
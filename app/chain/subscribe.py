@@ -20,12 +20,13 @@ from app.db.site_oper import SiteOper
 from app.db.subscribe_oper import SubscribeOper
 from app.db.subscribehistory_oper import SubscribeHistoryOper
 from app.db.systemconfig_oper import SystemConfigOper
+from app.helper.batch import BatchHelper
 from app.helper.message import MessageHelper
 from app.helper.subscribe import SubscribeHelper
 from app.helper.torrent import TorrentHelper
 from app.log import logger
 from app.schemas import NotExistMediaInfo, Notification
-from app.schemas.types import MediaType, SystemConfigKey, MessageChannel, NotificationType, EventType
+from app.schemas.types import MediaType, SystemConfigKey, MessageChannel, NotificationType, EventType, ProgressKey
 
 
 class SubscribeChain(ChainBase):
@@ -33,6 +34,14 @@ class SubscribeChain(ChainBase):
     订阅管理处理链
     """
 
+    # 批量处理订阅时的并发数
+    _batch_workers = 8
+    # 各类外部依赖的并发上限
+    _batch_limits = {
+        "tmdb": 4,
+        "mediaserver": 2
+    }
+
     def __init__(self):
         super().__init__()
         self.downloadchain = DownloadChain()
@@ -539,21 +548,22 @@ class SubscribeChain(ChainBase):
             return
         # 记录重新识别过的种子
         _recognize_cached = []
+        # 优先级规则过滤结果，规则相关内容相同的种子（多个站点发布的同一资源）只过滤一次：
+        # (规则, 媒体, 种子规则相关内容) -> 优先级，不匹配时为None
+        _priority_cached: Dict[tuple, Optional[int]] = {}
         # 所有订阅
         subscribes = self.subscribeoper.list('R')
+        # 并发识别媒体信息及查询缺失情况，匹配和下载仍逐个订阅进行
+        batch = BatchHelper(workers=self._batch_workers, limits=self._batch_limits)
+        prepared = {subscribe.id: result for subscribe, result in
+                    batch.run(subscribes, handler=lambda s: self.__prepare_match(s, batch))}
         # 遍历订阅
         for subscribe in subscribes:
+            if not prepared.get(subscribe.id):
+                continue
             logger.info(f'开始匹配订阅，标题：{subscribe.name} ...')
+            meta, mediainfo, exist_flag, no_exists = prepared[subscribe.id]
             mediakey = subscribe.tmdbid or subscribe.doubanid
-            # 生成元数据
-            meta = MetaInfo(subscribe.name)
-            meta.year = subscribe.year
-            meta.begin_season = subscribe.season or None
-            try:
-                meta.type = MediaType(subscribe.type)
-            except ValueError:
-                logger.error(f'订阅 {subscribe.name} 类型错误：{subscribe.type}')
-                continue
             # 订阅的站点域名列表
             domains = []
             if subscribe.sites:
@@ -563,44 +573,6 @@ class SubscribeChain(ChainBase):
                         domains = self.siteoper.get_domains_by_ids(siteids)
                 except JSONDecodeError:
                     pass
-            # 识别媒体信息
-            mediainfo: MediaInfo = self.recognize_media(meta=meta, mtype=meta.type,
-                                                        tmdbid=subscribe.tmdbid,
-                                                        doubanid=subscribe.doubanid,
-                                                        cache=False)
-            if not mediainfo:
-                logger.warn(
-                    f'未识别到媒体信息，标题：{subscribe.name}，tmdbid：{subscribe.tmdbid}，doubanid：{subscribe.doubanid}')
-                continue
-            # 非洗版
-            if not subscribe.best_version:
-                # 每季总集数
-                totals = {}
-                if subscribe.season and subscribe.total_episode:
-                    totals = {
-                        subscribe.season: subscribe.total_episode
-                    }
-                # 查询缺失的媒体信息
-                exist_flag, no_exists = self.downloadchain.get_no_exists_info(
-                    meta=meta,
-                    mediainfo=mediainfo,
-                    totals=totals
-                )
-            else:
-                # 洗版
-                exist_flag = False
-                if meta.type == MediaType.TV:
-                    no_exists = {
-                        mediakey: {
-                            subscribe.season: NotExistMediaInfo(
-                                season=subscribe.season,
-                                episodes=[],
-                                total_episode=subscribe.total_episode,
-                                start_episode=subscribe.start_episode or 1)
-                        }
-                    }
-                else:
-                    no_exists = {}
 
             # 已存在
             if exist_flag:
@@ -680,14 +652,20 @@ class SubscribeChain(ChainBase):
                         priority_rule = self.systemconfig.get(SystemConfigKey.BestVersionFilterRules)
                     else:
                         priority_rule = self.systemconfig.get(SystemConfigKey.SubscribeFilterRules)
-                    result: List[TorrentInfo] = self.filter_torrents(
-                        rule_string=priority_rule,
-                        torrent_list=[torrent_info],
-                        mediainfo=torrent_mediainfo)
-                    if result is not None and not result:
+                    _priority_key = (priority_rule, torrent_mediainfo.tmdb_id, torrent_mediainfo.douban_id,
+                                     self.torrenthelper.rule_signature(torrent_info))
+                    if _priority_key not in _priority_cached:
+                        result: List[TorrentInfo] = self.filter_torrents(
+                            rule_string=priority_rule,
+                            torrent_list=[torrent_info],
+                            mediainfo=torrent_mediainfo)
+                        _priority_cached[_priority_key] = None if result is not None and not result \
+                            else torrent_info.pri_order
+                    if _priority_cached[_priority_key] is None:
                         # 不符合过滤规则
                         logger.debug(f"{torrent_info.title} 不匹配当前过滤规则")
                         continue
+                    torrent_info.pri_order = _priority_cached[_priority_key]
 
                     # 不在订阅站点范围的不处理
                     sub_sites = self.get_sub_sites(subscribe)
@@ -777,51 +755,119 @@ class SubscribeChain(ChainBase):
         if not subscribes:
             # 没有订阅不运行
             return
-        # 遍历订阅
-        for subscribe in subscribes:
-            logger.info(f'开始更新订阅元数据：{subscribe.name} ...')
-            # 生成元数据
-            meta = MetaInfo(subscribe.name)
-            meta.year = subscribe.year
-            meta.begin_season = subscribe.season or None
-            try:
-                meta.type = MediaType(subscribe.type)
-            except ValueError:
-                logger.error(f'订阅 {subscribe.name} 类型错误：{subscribe.type}')
-                continue
-            # 识别媒体信息
-            mediainfo: MediaInfo = self.recognize_media(meta=meta, mtype=meta.type,
-                                                        tmdbid=subscribe.tmdbid,
-                                                        doubanid=subscribe.doubanid,
-                                                        cache=False)
-            if not mediainfo:
-                logger.warn(
-                    f'未识别到媒体信息，标题：{subscribe.name}，tmdbid：{subscribe.tmdbid}，doubanid：{subscribe.doubanid}')
-                continue
-            # 对于电视剧，获取当前季的总集数
-            episodes = mediainfo.seasons.get(subscribe.season) or []
-            if not subscribe.manual_total_episode and len(episodes):
-                total_episode = len(episodes)
-                lack_episode = subscribe.lack_episode + (total_episode - subscribe.total_episode)
-                logger.info(
-                    f'订阅 {subscribe.name} 总集数变化，更新总集数为{total_episode}，缺失集数为{lack_episode} ...')
+        batch = BatchHelper(name="subscribe_check", workers=self._batch_workers, limits=self._batch_limits,
+                            progress_key=ProgressKey.SubscribeCheck.value)
+        batch.run(subscribes,
+                  handler=lambda s: self.__check_subscribe(s, batch),
+                  key=lambda s: s.id,
+                  text=lambda s: f"正在更新订阅元数据：{s.name}")
+        logger.info(f'订阅元数据更新完成，共 {len(subscribes)} 个订阅')
+
+    def __recognize_subscribe(self, subscribe: Subscribe,
+                              batch: BatchHelper) -> Tuple[MetaBase, Optional[MediaInfo]]:
+        """
+        生成订阅的元数据并识别媒体信息，同一批次内相同媒体只识别一次
+        """
+        meta = MetaInfo(subscribe.name)
+        meta.year = subscribe.year
+        meta.begin_season = subscribe.season or None
+        meta.type = MediaType(subscribe.type)
+        if subscribe.tmdbid or subscribe.doubanid:
+            key = (meta.type, subscribe.tmdbid, subscribe.doubanid)
+        else:
+            # 没有媒体ID时按名称识别，年份和季不同的是不同的媒体
+            key = (meta.type, subscribe.name, subscribe.year, subscribe.season)
+        mediainfo: MediaInfo = batch.once("tmdb", key,
+                                          self.recognize_media,
+                                          meta=meta, mtype=meta.type,
+                                          tmdbid=subscribe.tmdbid,
+                                          doubanid=subscribe.doubanid,
+                                          cache=False)
+        return meta, mediainfo
+
+    def __check_subscribe(self, subscribe: Subscribe, batch: BatchHelper):
+        """
+        更新单个订阅的元数据
+        """
+        logger.info(f'开始更新订阅元数据：{subscribe.name} ...')
+        try:
+            meta, mediainfo = self.__recognize_subscribe(subscribe, batch)
+        except ValueError:
+            logger.error(f'订阅 {subscribe.name} 类型错误：{subscribe.type}')
+            return
+        if not mediainfo:
+            logger.warn(
+                f'未识别到媒体信息，标题：{subscribe.name}，tmdbid：{subscribe.tmdbid}，doubanid：{subscribe.doubanid}')
+            return
+        # 对于电视剧，获取当前季的总集数
+        episodes = mediainfo.seasons.get(subscribe.season) or []
+        if not subscribe.manual_total_episode and len(episodes):
+            total_episode = len(episodes)
+            lack_episode = subscribe.lack_episode + (total_episode - subscribe.total_episode)
+            logger.info(
+                f'订阅 {subscribe.name} 总集数变化，更新总集数为{total_episode}，缺失集数为{lack_episode} ...')
+        else:
+            total_episode = subscribe.total_episode
+            lack_episode = subscribe.lack_episode
+        # 更新TMDB信息
+        self.subscribeoper.update(subscribe.id, {
+            "name": mediainfo.title,
+            "year": mediainfo.year,
+            "vote": mediainfo.vote_average,
+            "poster": mediainfo.get_poster_image(),
+            "backdrop": mediainfo.get_backdrop_image(),
+            "description": mediainfo.overview,
+            "imdbid": mediainfo.imdb_id,
+            "tvdbid": mediainfo.tvdb_id,
+            "total_episode": total_episode,
+            "lack_episode": lack_episode
+        })
+        logger.info(f'{subscribe.name} 订阅元数据更新完成')
+
+    def __prepare_match(self, subscribe: Subscribe, batch: BatchHelper) \
+            -> Optional[Tuple[MetaBase, MediaInfo, bool, Dict[Union[int, str], Dict[int, NotExistMediaInfo]]]]:
+        """
+        识别订阅的媒体信息并查询媒体库中的缺失情况
+        :return: 元数据、媒体信息、是否已存在、缺失信息，识别失败返回None
+        """
+        try:
+            meta, mediainfo = self.__recognize_subscribe(subscribe, batch)
+        except ValueError:
+            logger.error(f'订阅 {subscribe.name} 类型错误：{subscribe.type}')
+            return None
+        if not mediainfo:
+            logger.warn(
+                f'未识别到媒体信息，标题：{subscribe.name}，tmdbid：{subscribe.tmdbid}，doubanid：{subscribe.doubanid}')
+            return None
+        # 非洗版
+        if not subscribe.best_version:
+            # 每季总集数
+            totals = {}
+            if subscribe.season and subscribe.total_episode:
+                totals = {
+                    subscribe.season: subscribe.total_episode
+                }
+            # 查询缺失的媒体信息
+            exist_flag, no_exists = batch.call("mediaserver", self.downloadchain.get_no_exists_info,
+                                               meta=meta,
+                                               mediainfo=mediainfo,
+                                               totals=totals)
+        else:
+            # 洗版
+            exist_flag = False
+            if meta.type == MediaType.TV:
+                no_exists = {
+                    subscribe.tmdbid or subscribe.doubanid: {
+                        subscribe.season: NotExistMediaInfo(
+                            season=subscribe.season,
+                            episodes=[],
+                            total_episode=subscribe.total_episode,
+                            start_episode=subscribe.start_episode or 1)
+                    }
+                }
             else:
-                total_episode = subscribe.total_episode
-                lack_episode = subscribe.lack_episode
-            # 更新TMDB信息
-            self.subscribeoper.update(subscribe.id, {
-                "name": mediainfo.title,
-                "year": mediainfo.year,
-                "vote": mediainfo.vote_average,
-                "poster": mediainfo.get_poster_image(),
-                "backdrop": mediainfo.get_backdrop_image(),
-                "description": mediainfo.overview,
-                "imdbid": mediainfo.imdb_id,
-                "tvdbid": mediainfo.tvdb_id,
-                "total_episode": total_episode,
-                "lack_episode": lack_episode
-            })
-            logger.info(f'{subscribe.name} 订阅元数据更新完成')
+                no_exists = {}
+        return meta, mediainfo, exist_flag, no_exists
 
     def __update_subscribe_note(self, subscribe: Subscribe, downloads: List[Context]):
         """
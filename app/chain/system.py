@@ -5,6 +5,7 @@ from typing import Union
 
 from app.chain import ChainBase
 from app.core.config import settings
+from app.helper.torrentcache import TorrentCacheHelper
 from app.log import logger
 from app.schemas import Notification, MessageChannel
 from app.utils.http import RequestUtils
@@ -24,6 +25,7 @@ class SystemChain(ChainBase, metaclass=Singleton):
         清理系统缓存
         """
         self.clear_cache()
+        TorrentCacheHelper().clear()
         self.post_message(Notification(channel=channel,
                                        title=f"缓存清理完成！", userid=userid))
 
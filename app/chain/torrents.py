@@ -28,6 +28,10 @@ class TorrentsChain(ChainBase, metaclass=Singleton):
 
     _spider_file = "__torrents_cache__"
     _rss_file = "__rss_cache__"
+    # 已处理过的种子标识：{缓存类型: {domain: {标识: None}}}
+    _seen_file = "__torrents_seen__"
+    # 每个站点保留的已处理种子标识数
+    _seen_limit = 2000
 
     def __init__(self):
         super().__init__()
@@ -70,6 +74,7 @@ class TorrentsChain(ChainBase, metaclass=Singleton):
         logger.info(f'开始清理种子缓存数据 ...')
         self.remove_cache(self._spider_file)
         self.remove_cache(self._rss_file)
+        self.remove_cache(self._seen_file)
         logger.info(f'种子缓存数据清理完成')
 
     @cached(cache=TTLCache(maxsize=128, ttl=595))
@@ -125,11 +130,41 @@ class TorrentsChain(ChainBase, metaclass=Singleton):
                 page_url=item.get("link"),
                 size=item.get("size"),
                 pubdate=item["pubdate"].strftime("%Y-%m-%d %H:%M:%S") if item.get("pubdate") else None,
+                guid=item.get("guid"),
             )
             ret_torrents.append(torrentinfo)
 
         return ret_torrents
 
+    @staticmethod
+    def __torrent_key(torrent: TorrentInfo) -> str:
+        """
+        种子唯一标识，RSS优先使用条目GUID
+        """
+        return torrent.guid or f'{torrent.title}{torrent.description}'
+
+    def __load_seen(self, stype: str, torrents_cache: Dict[str, List[Context]]) -> Dict[str, Dict[str, None]]:
+        """
+        读取已处理过的种子标识，并补充缓存中的种子
+        """
+        seen = (self.load_cache(self._seen_file) or {}).get(stype) or {}
+        for domain, contexts in torrents_cache.items():
+            domain_seen = seen.setdefault(domain, {})
+            for context in contexts:
+                domain_seen.setdefault(self.__torrent_key(context.torrent_info), None)
+        return seen
+
+    def __save_seen(self, stype: str, seen: Dict[str, Dict[str, None]]):
+        """
+        保存已处理过的种子标识，每个站点只保留最近的部分
+        """
+        for domain, domain_seen in seen.items():
+            if len(domain_seen) > self._seen_limit:
+                seen[domain] = dict.fromkeys(list(domain_seen)[-self._seen_limit:])
+        seen_cache = self.load_cache(self._seen_file) or {}
+        seen_cache[stype] = seen
+        self.save_cache(seen_cache, self._seen_file)
+
     def refresh(self, stype: str = None, sites: List[int] = None) -> Dict[str, List[Context]]:
         """
         刷新站点最新资源，识别并缓存起来
@@ -145,13 +180,16 @@ class TorrentsChain(ChainBase, metaclass=Singleton):
             sites = self.systemconfig.get(SystemConfigKey.RssSites) or []
 
         # 读取缓存
-        torrents_cache = self.get_torrents()
+        torrents_cache = self.get_torrents(stype)
 
         # 缓存过滤掉无效种子
         for _domain, _torrents in torrents_cache.items():
             torrents_cache[_domain] = [_torrent for _torrent in _torrents
                                        if not self.torrenthelper.is_invalid(_torrent.torrent_info.enclosure)]
 
+        # 已处理过的种子，只有新种子才需要识别
+        seen = self.__load_seen(stype, torrents_cache)
+
         # 所有站点索引
         indexers = self.siteshelper.get_indexers()
         # 需要刷新的站点domain
@@ -175,16 +213,16 @@ class TorrentsChain(ChainBase, metaclass=Singleton):
             torrents = torrents[:settings.CACHE_CONF.get('refresh')]
             if torrents:
                 # 过滤出没有处理过的种子
+                domain_seen = seen.setdefault(domain, {})
                 torrents = [torrent for torrent in torrents
-                            if f'{torrent.title}{torrent.description}'
-                            not in [f'{t.torrent_info.title}{t.torrent_info.description}'
-                                    for t in torrents_cache.get(domain) or []]]
+                            if self.__torrent_key(torrent) not in domain_seen]
                 if torrents:
                     logger.info(f'{indexer.get("name")} 有 {len(torrents)} 个新种子')
                 else:
                     logger.info(f'{indexer.get("name")} 没有新种子')
                     continue
                 for torrent in torrents:
+                    domain_seen[self.__torrent_key(torrent)] = None
                     logger.info(f'处理资源：{torrent.title} ...')
                     # 识别
                     meta = MetaInfo(title=torrent.title, subtitle=torrent.description)
@@ -222,6 +260,7 @@ class TorrentsChain(ChainBase, metaclass=Singleton):
             self.save_cache(torrents_cache, self._spider_file)
         else:
             self.save_cache(torrents_cache, self._rss_file)
+        self.__save_seen(stype, seen)
 
         # 去除不在站点范围内的缓存种子
         if sites and torrents_cache:
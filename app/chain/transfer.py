@@ -10,6 +10,7 @@ from app.chain.media import MediaChain
 from app.chain.tmdb import TmdbChain
 from app.core.config import settings
 from app.core.context import MediaInfo
+from app.core.event import eventmanager, Event
 from app.core.meta import MetaBase
 from app.core.metainfo import MetaInfoPath, MetaInfo
 from app.db.downloadhistory_oper import DownloadHistoryOper
@@ -21,6 +22,7 @@ from app.helper.aliyun import AliyunHelper
 from app.helper.directory import DirectoryHelper
 from app.helper.format import FormatParser
 from app.helper.progress import ProgressHelper
+from app.helper.transferqueue import TransferQueueHelper
 from app.helper.u115 import U115Helper
 from app.log import logger
 from app.schemas import TransferInfo, TransferTorrent, Notification, EpisodeFormat
@@ -61,15 +63,38 @@ class TransferChain(ChainBase):
         """
         获取下载器中的种子列表，并执行转移
         """
+        return bool(self.__process())
+
+    def process_queue(self, hashs: List[str], paths: List[Path]) -> List[str]:
+        """
+        执行整理队列中的任务，只处理指定的种子或下载内容路径
+        :param hashs: 种子Hash列表
+        :param paths: 下载内容路径列表
+        :return: 下载器中未找到已完成的种子Hash
+        """
+        processed = {torrent.hash for torrent in self.__process(hashs=hashs, paths=paths)}
+        return [torrent_hash for torrent_hash in hashs if torrent_hash not in processed]
+
+    def __process(self, hashs: List[str] = None, paths: List[Path] = None) -> List[TransferTorrent]:
+        """
+        获取下载器中已完成的种子并执行转移，指定种子或路径时只处理匹配的种子
+        :return: 已处理的种子
+        """
 
         # 全局锁，避免重复处理
         with lock:
-            logger.info("开始执行下载器文件转移 ...")
             # 从下载器获取种子列表
             torrents: Optional[List[TransferTorrent]] = self.list_torrents(status=TorrentStatus.TRANSFER)
+            if hashs or paths:
+                torrents = [torrent for torrent in torrents or []
+                            if torrent.hash in (hashs or [])
+                            or any(self.__match_path(torrent.path, path) for path in paths or [])]
+                if not torrents:
+                    return []
+            logger.info("开始执行下载器文件转移 ...")
             if not torrents:
                 logger.info("没有获取到已完成的下载任务")
-                return False
+                return []
 
             logger.info(f"获取到 {len(torrents)} 个已完成的下载任务")
 
@@ -101,7 +126,31 @@ class TransferChain(ChainBase):
                 self.transfer_completed(hashs=torrent.hash, path=torrent.path)
             # 结束
             logger.info("下载器文件转移执行完成")
-            return True
+            return torrents
+
+    @staticmethod
+    def __match_path(torrent_path: Optional[Path], path: Path) -> bool:
+        """
+        种子内容路径与变化的下载路径是否对应
+        """
+        if not torrent_path:
+            return False
+        return torrent_path == path or path in torrent_path.parents or torrent_path in path.parents
+
+    def sync_downloader(self):
+        """
+        增量同步下载器种子状态，种子由未完成变为已完成时下载器模块会发出下载完成事件
+        """
+        self.list_torrents(status=TorrentStatus.DOWNLOADING)
+
+    @eventmanager.register(EventType.DownloadCompleted)
+    def download_completed(self, event: Event):
+        """
+        下载完成时加入整理队列
+        """
+        if not event or not settings.DOWNLOADER_MONITOR:
+            return
+        TransferQueueHelper().put_hash(event.event_data.get("hash"))
 
     def __do_transfer(self, storage: str, path: Path, drive_id: str = None, fileid: str = None, filetype: str = None,
                       meta: MetaBase = None, mediainfo: MediaInfo = None,
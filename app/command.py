@@ -13,6 +13,7 @@ from app.chain.system import SystemChain
 from app.chain.transfer import TransferChain
 from app.core.config import settings
 from app.core.event import Event as ManagerEvent, eventmanager, EventManager
+from app.core.metrics import metrics
 from app.core.plugin import PluginManager
 from app.helper.message import MessageHelper
 from app.helper.thread import ThreadHelper
@@ -186,6 +187,7 @@ class Command(metaclass=Singleton):
             event, handlers = self.eventmanager.get_event()
             if event:
                 logger.info(f"处理事件：{event.event_type} - {handlers}")
+                event_type = getattr(event.event_type, "value", event.event_type)
                 for handler in handlers:
                     names = handler.__qualname__.split(".")
                     [class_name, method_name] = names
@@ -193,7 +195,8 @@ class Command(metaclass=Singleton):
                         if class_name in self.pluginmanager.get_plugin_ids():
                             # 插件事件
                             self.threader.submit(
-                                self.pluginmanager.run_plugin_method,
+                                metrics.wrap("event", self.pluginmanager.run_plugin_method,
+                                             event=event_type, handler=handler.__qualname__),
                                 class_name, method_name, copy.deepcopy(event)
                             )
 
@@ -216,7 +219,8 @@ class Command(metaclass=Singleton):
                             # 检查类是否存在并调用方法
                             if hasattr(class_obj, method_name):
                                 self.threader.submit(
-                                    getattr(class_obj, method_name),
+                                    metrics.wrap("event", getattr(class_obj, method_name),
+                                                 event=event_type, handler=handler.__qualname__),
                                     copy.deepcopy(event)
                                 )
                     except Exception as e:
@@ -0,0 +1,258 @@
+import copy
+import sys
+from dataclasses import fields, MISSING
+from enum import Enum
+from functools import partial
+from operator import attrgetter
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_SINGLETON
+
+# 各类的字段默认值：(字段名, 默认值, 默认值工厂, 空值样本)
+_class_defaults: Dict[type, Tuple[Tuple[str, Any, Optional[Callable], Any], ...]] = {}
+# 各类转换为字典的字段计划：(输出的字段名, 批量取值函数)
+_class_dict_plans: Dict[type, Tuple[Tuple[str, ...], Callable[[Any], Any]]] = {}
+# 不可变的基本类型，转换为字典时无需复制
+_atomic_types = (str, int, float, bool, type(None))
+# 各接口数据模型的字段投影计划：(字段名, 默认值, 类型转换)
+_schema_plans: Dict[type, Tuple[Tuple[str, Any, Optional[Callable[[Any], Any]]], ...]] = {}
+
+
+def _to_str(value: Any) -> Any:
+    """
+    与模型校验一致：枚举取值，数字转为字符串
+    """
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (int, float)):
+        return str(value)
+    return value
+
+
+def _to_int(value: Any) -> Any:
+    """
+    与模型校验一致：浮点数、数字字符串转为整数
+    """
+    if isinstance(value, int):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _to_float(value: Any) -> Any:
+    """
+    与模型校验一致：整数、数字字符串转为浮点数
+    """
+    if isinstance(value, float):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _to_bool(value: Any) -> Any:
+    """
+    与模型校验一致：0、1转为布尔值
+    """
+    if type(value) is int and value in (0, 1):
+        return bool(value)
+    return value
+
+
+_schema_converters = {str: _to_str, int: _to_int, float: _to_float, bool: _to_bool}
+
+
+def _schema_plan(schema: type) -> Tuple[Tuple[str, Any, Optional[Callable[[Any], Any]]], ...]:
+    """
+    接口数据模型的字段投影计划，按模型缓存
+    """
+    plan = _schema_plans.get(schema)
+    if plan is None:
+        items = []
+        for name, field in schema.__fields__.items():
+            convert = None
+            if field.shape == SHAPE_SINGLETON:
+                if isinstance(field.type_, type) and issubclass(field.type_, BaseModel):
+                    # 嵌套的数据模型
+                    convert = partial(schema_dict, schema=field.type_)
+                else:
+                    convert = _schema_converters.get(field.type_)
+            items.append((name, field.get_default(), convert))
+        plan = tuple(items)
+        _schema_plans[schema] = plan
+    return plan
+
+
+def schema_dict(value: Any, schema: type) -> Optional[Dict[str, Any]]:
+    """
+    按接口数据模型投影为字典，只输出模型中的字段并按模型类型转换基本类型，结果与模型校验后一致，
+    嵌套的列表、字典不复制，只用于编码输出，修改结果会影响对象本身
+    :param value: 对象或字典
+    :param schema: 接口数据模型（pydantic）
+    """
+    if value is None:
+        return None
+    plan = _schema_plan(schema)
+    if isinstance(value, dict):
+        values = [value.get(name, default) for name, default, _ in plan]
+    else:
+        values = [getattr(value, name, default) for name, default, _ in plan]
+    return {name: convert(v) if convert and v is not None else v
+            for (name, _, convert), v in zip(plan, values)}
+
+
+def _copy_value(value: Any) -> Any:
+    """
+    复制嵌套的列表、字典，基本类型直接返回，其它对象深复制，与dataclasses.asdict一致
+    """
+    if isinstance(value, _atomic_types):
+        return value
+    if type(value) is list:
+        return [_copy_value(v) for v in value]
+    if type(value) is dict:
+        return {k: _copy_value(v) for k, v in value.items()}
+    if type(value) is tuple:
+        return tuple(_copy_value(v) for v in value)
+    return copy.deepcopy(value)
+
+
+class CompactObject:
+    """
+    紧凑数据对象基类，配合 @dataclass(slots=True) 使用
+    字段保存在 __slots__ 中，只有设置字段以外的属性时才会创建 __dict__；
+    序列化时只保存与默认值不同的字段，反序列化后对重复出现的字符串进行驻留
+    """
+    # 需要驻留的字段，字段值为字符串或字符串列表
+    _intern_fields: Tuple[str, ...] = ()
+    # 转换为字典时不输出内容（值为None）的字段
+    _dict_none_fields: Tuple[str, ...] = ()
+    # 接口输出的数据模型
+    _api_schema: Optional[type] = None
+
+    @classmethod
+    def _defaults(cls) -> Tuple[Tuple[str, Any, Optional[Callable], Any], ...]:
+        """
+        字段默认值，按类缓存
+        """
+        defaults = _class_defaults.get(cls)
+        if defaults is None:
+            defaults = tuple(
+                (f.name, None if f.default is MISSING else f.default,
+                 None if f.default_factory is MISSING else f.default_factory,
+                 f.default if f.default_factory is MISSING else f.default_factory())
+                for f in fields(cls)
+            )
+            _class_defaults[cls] = defaults
+        return defaults
+
+    def _set_defaults(self, **kwargs):
+        """
+        按默认值初始化所有字段，kwargs中的值优先，供自定义__init__及反序列化使用
+        """
+        for name, default, factory, _ in self._defaults():
+            if name in kwargs:
+                value = kwargs.pop(name)
+            else:
+                value = factory() if factory else default
+            object.__setattr__(self, name, value)
+        if kwargs:
+            raise TypeError(f"{self.__class__.__name__}.__init__() got an unexpected keyword argument "
+                            f"'{next(iter(kwargs))}'")
+
+    @classmethod
+    def _dict_plan(cls) -> Tuple[Tuple[str, ...], Callable[[Any], Any]]:
+        """
+        转换为字典的字段计划，按类缓存
+        """
+        plan = _class_dict_plans.get(cls)
+        if plan is None:
+            names = tuple(name for name, *_ in cls._defaults() if name not in cls._dict_none_fields)
+            getter = attrgetter(*names)
+            if len(names) == 1:
+                plan = (names, lambda obj: (getter(obj),))
+            else:
+                plan = (names, getter)
+            _class_dict_plans[cls] = plan
+        return plan
+
+    def _fields_dict(self) -> Dict[str, Any]:
+        """
+        按字段计划投影为字典，嵌套的列表、字典复制后输出，修改结果不影响对象本身
+        """
+        names, getter = self._dict_plan()
+        dicts = {name: value if isinstance(value, _atomic_types) else _copy_value(value)
+                 for name, value in zip(names, getter(self))}
+        for name in self._dict_none_fields:
+            dicts[name] = None
+        return dicts
+
+    def to_api_dict(self) -> Dict[str, Any]:
+        """
+        按接口数据模型投影为字典，不复制嵌套数据，用于大量对象的接口输出，需修改结果时使用to_dict
+        """
+        return schema_dict(self, self._api_schema)
+
+    def attributes(self) -> Dict[str, Any]:
+        """
+        返回所有属性，包括字段及字段以外的属性，替代vars()
+        """
+        attrs = {name: getattr(self, name) for name, *_ in self._defaults()}
+        extras = getattr(self, "__dict__", None)
+        if extras:
+            attrs.update(extras)
+        return attrs
+
+    def compact(self):
+        """
+        驻留重复出现的字符串，减小内存占用
+        """
+        for name in self._intern_fields:
+            value = getattr(self, name, None)
+            if isinstance(value, str):
+                object.__setattr__(self, name, sys.intern(value))
+            elif isinstance(value, list):
+                value[:] = [sys.intern(v) if isinstance(v, str) else v for v in value]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        只序列化与默认值不同的字段
+        """
+        state = {}
+        for name, _, _, empty in self._defaults():
+            value = getattr(self, name, empty)
+            if type(value) is type(empty) and value == empty:
+                continue
+            state[name] = value
+        extras = getattr(self, "__dict__", None)
+        if extras:
+            for key, value in extras.items():
+                state.setdefault(key, value)
+        return state
+
+    def __setstate__(self, state: Any):
+        """
+        反序列化，兼容旧版本以__dict__保存的数据
+        """
+        if isinstance(state, tuple):
+            dict_state, slot_state = state
+            state = {**(dict_state or {}), **(slot_state or {})}
+        else:
+            state = dict(state or {})
+        setter = object.__setattr__
+        for name, default, factory, _ in self._defaults():
+            if name in state:
+                setter(self, name, state.pop(name))
+            else:
+                setter(self, name, factory() if factory else default)
+        # 属性及字段以外的数据
+        for key, value in state.items():
+            try:
+                setattr(self, key, value)
+            except AttributeError:
+                # 只读属性
+                continue
+        self.compact()
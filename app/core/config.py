@@ -39,6 +39,8 @@ class Settings(BaseSettings):
     DEBUG: bool = False
     # 是否开发模式
     DEV: bool = False
+    # 是否允许请求追踪，开启后带 X-Trace 请求头的API请求会记录各环节耗时
+    REQUEST_TRACE: bool = False
     # 是否开启插件热加载
     PLUGIN_AUTO_RELOAD: bool = False
     # 配置文件目录
@@ -61,6 +63,14 @@ class Settings(BaseSettings):
     SCRAP_FOLLOW_TMDB: bool = True
     # TMDB图片地址
     TMDB_IMAGE_DOMAIN: str = "image.tmdb.org"
+    # 刮削TMDB图片尺寸，格式：类型:尺寸，多个用,分隔，类型为 poster/backdrop/logo/still/profile，如 poster:w780,still:w300，未配置的类型使用original
+    SCRAP_IMAGE_SIZE: str = ""
+    # 刮削图片同时下载数
+    SCRAP_IMAGE_THREADS: int = 4
+    # 图片代理磁盘缓存大小（MB），0为不缓存
+    IMAGE_CACHE_SIZE: int = 512
+    # 图片代理缓存到磁盘的图片域名，多个用,分隔，包含子域名，TMDB图片域名始终缓存，其它地址只代理不缓存
+    IMAGE_CACHE_DOMAINS: str = "doubanio.com,lain.bgm.tv,assets.fanart.tv,artworks.thetvdb.com"
     # TMDB API地址
     TMDB_API_DOMAIN: str = "api.themoviedb.org"
     # TMDB API Key
@@ -137,7 +147,7 @@ class Settings(BaseSettings):
     VOCECHAT_CHANNEL_ID: str = ""
     # 下载器 qbittorrent/transmission，启用多个下载器时使用,分隔，只有第一个会被默认使用
     DOWNLOADER: str = "qbittorrent"
-    # 下载器监控开关
+    # 下载器监控开关，开启后下载完成、下载目录文件变化及下载器Webhook通知时自动整理
     DOWNLOADER_MONITOR: bool = True
     # Qbittorrent地址，IP:PORT
     QB_HOST: Optional[str] = None
@@ -167,6 +177,10 @@ class Settings(BaseSettings):
     MEDIASERVER_SYNC_INTERVAL: Optional[int] = 6
     # 媒体服务器同步黑名单，多个媒体库名称,分割
     MEDIASERVER_SYNC_BLACKLIST: Optional[str] = None
+    # 媒体服务器同步每页获取的项目数
+    MEDIASERVER_SYNC_PAGE_SIZE: int = 500
+    # 媒体服务器同步时并发获取的页数
+    MEDIASERVER_SYNC_THREADS: int = 4
     # EMBY服务器地址，IP:PORT
     EMBY_HOST: Optional[str] = None
     # EMBY外网地址，http(s)://DOMAIN:PORT，未设置时使用EMBY_HOST
@@ -189,6 +203,14 @@ class Settings(BaseSettings):
     TRANSFER_TYPE: str = "copy"
     # 是否同盘优先
     TRANSFER_SAME_DISK: bool = True
+    # 媒体库目录监听，开启后媒体库文件变化时实时更新媒体库索引，网络存储无法监听时可关闭，由定时对账更新
+    LIBRARY_MONITOR: bool = True
+    # 种子文件缓存容量（MB），超出时淘汰最久未使用的种子
+    TORRENT_CACHE_SIZE: int = 64
+    # 仪表板媒体数量统计刷新间隔（分钟），0为每次请求时实时统计
+    DASHBOARD_STATISTIC_INTERVAL: int = 10
+    # 仪表板存储空间刷新间隔（分钟），0为每次请求时实时统计，休眠硬盘或网络存储可适当调大
+    DASHBOARD_STORAGE_INTERVAL: int = 30
     # CookieCloud是否启动本地服务
     COOKIECLOUD_ENABLE_LOCAL: Optional[bool] = False
     # CookieCloud服务器地址
@@ -273,7 +295,11 @@ class Settings(BaseSettings):
     @validator("SUBSCRIBE_RSS_INTERVAL",
                "COOKIECLOUD_INTERVAL",
                "MEDIASERVER_SYNC_INTERVAL",
+               "MEDIASERVER_SYNC_PAGE_SIZE",
+               "MEDIASERVER_SYNC_THREADS",
                "META_CACHE_EXPIRE",
+               "DASHBOARD_STATISTIC_INTERVAL",
+               "DASHBOARD_STORAGE_INTERVAL",
                pre=True, always=True)
     def convert_int(cls, value):
         if not value:
@@ -326,7 +352,8 @@ class Settings(BaseSettings):
                 "torrents": 100,
                 "douban": 512,
                 "fanart": 512,
-                "meta": (self.META_CACHE_EXPIRE or 168) * 3600
+                "meta": (self.META_CACHE_EXPIRE or 168) * 3600,
+                "meta_lru": 16384
             }
         return {
             "tmdb": 256,
@@ -334,7 +361,8 @@ class Settings(BaseSettings):
             "torrents": 50,
             "douban": 256,
             "fanart": 128,
-            "meta": (self.META_CACHE_EXPIRE or 72) * 3600
+            "meta": (self.META_CACHE_EXPIRE or 72) * 3600,
+            "meta_lru": 4096
         }
 
     @property
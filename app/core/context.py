@@ -1,7 +1,9 @@
 import re
-from dataclasses import dataclass, field, asdict
-from typing import List, Dict, Any, Tuple
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Tuple, NamedTuple
 
+from app import schemas
+from app.core.compact import CompactObject
 from app.core.config import settings
 from app.core.meta import MetaBase
 from app.core.metainfo import MetaInfo
@@ -9,8 +11,10 @@ from app.schemas.types import MediaType
 from app.utils.string import StringUtils
 
 
-@dataclass
-class TorrentInfo:
+class TorrentSite(NamedTuple):
+    """
+    种子所属站点信息，同一站点的种子共享同一对象
+    """
     # 站点ID
     site: int = None
     # 站点名称
@@ -23,6 +27,40 @@ class TorrentInfo:
     site_proxy: bool = False
     # 站点优先级
     site_order: int = 0
+
+    @staticmethod
+    def get(*args, **kwargs) -> "TorrentSite":
+        """
+        获取共享的站点信息对象，相同的站点信息只保留一份
+        """
+        site = TorrentSite(*args, **kwargs)
+        if len(_torrent_sites) > 1024:
+            _torrent_sites.clear()
+        return _torrent_sites.setdefault(site, site)
+
+
+# 共享的站点信息
+_torrent_sites: Dict[TorrentSite, TorrentSite] = {}
+
+
+def _site_property(name: str) -> property:
+    """
+    生成代理到共享站点信息的属性，修改时替换为新的站点信息对象，不影响同站点的其它种子
+    """
+
+    def getter(self) -> Any:
+        return getattr(self.site_info, name)
+
+    def setter(self, value: Any):
+        self.site_info = TorrentSite.get(**{**self.site_info._asdict(), name: value})
+
+    return property(getter, setter)
+
+
+@dataclass(init=False, slots=True)
+class TorrentInfo(CompactObject):
+    # 站点信息，同一站点的种子共享
+    site_info: TorrentSite = field(default_factory=TorrentSite)
     # 种子名称
     title: str = None
     # 种子副标题
@@ -59,21 +97,50 @@ class TorrentInfo:
     pri_order: int = 0
     # 种子分类 电影/电视剧
     category: str = None
+    # RSS条目唯一标识
+    guid: str = None
 
-    def __setattr__(self, name: str, value: Any):
-        self.__dict__[name] = value
+    # 需要驻留的字段
+    _intern_fields = ("category", "labels")
+    # 接口输出的数据模型
+    _api_schema = schemas.TorrentInfo
+
+    # 站点ID
+    site = _site_property("site")
+    # 站点名称
+    site_name = _site_property("site_name")
+    # 站点Cookie
+    site_cookie = _site_property("site_cookie")
+    # 站点UA
+    site_ua = _site_property("site_ua")
+    # 站点是否使用代理
+    site_proxy = _site_property("site_proxy")
+    # 站点优先级
+    site_order = _site_property("site_order")
+
+    def __init__(self, site: int = None, site_name: str = None, site_cookie: str = None, site_ua: str = None,
+                 site_proxy: bool = False, site_order: int = 0, **kwargs):
+        self._set_defaults(**kwargs)
+        self.site_info = TorrentSite.get(site, site_name, site_cookie, site_ua, site_proxy, site_order)
 
     def __get_properties(self):
         """
-        获取属性列表
+        获取只读属性列表
         """
         property_names = []
         for member_name in dir(self.__class__):
             member = getattr(self.__class__, member_name)
-            if isinstance(member, property):
+            if isinstance(member, property) and not member.fset:
                 property_names.append(member_name)
         return property_names
 
+    def compact(self):
+        """
+        驻留重复出现的字符串，并共享站点信息
+        """
+        CompactObject.compact(self)
+        self.site_info = TorrentSite.get(*self.site_info)
+
     def from_dict(self, data: dict):
         """
         从字典中初始化
@@ -125,14 +192,16 @@ class TorrentInfo:
         """
         返回字典
         """
-        dicts = asdict(self)
+        dicts = self.site_info._asdict()
+        dicts.update(self._fields_dict())
+        del dicts["site_info"]
         dicts["volume_factor"] = self.volume_factor
         dicts["freedate_diff"] = self.freedate_diff
         return dicts
 
 
-@dataclass
-class MediaInfo:
+@dataclass(slots=True)
+class MediaInfo(CompactObject):
     # 来源：themoviedb、douban、bangumi
     source: str = None
     # 类型 电影、电视剧
@@ -240,6 +309,13 @@ class MediaInfo:
     # 下一集
     next_episode_to_air: dict = field(default_factory=dict)
 
+    # 需要驻留的字段
+    _intern_fields = ("source", "year", "original_language", "category", "status")
+    # 转换为字典时不输出的原始数据
+    _dict_none_fields = ("tmdb_info", "douban_info", "bangumi_info")
+    # 接口输出的数据模型
+    _api_schema = schemas.MediaInfo
+
     def __post_init__(self):
         # 设置媒体信息
         if self.tmdb_info:
@@ -249,9 +325,6 @@ class MediaInfo:
         if self.bangumi_info:
             self.set_bangumi_info(self.bangumi_info)
 
-    def __setattr__(self, name: str, value: Any):
-        self.__dict__[name] = value
-
     def __get_properties(self):
         """
         获取属性列表
@@ -715,13 +788,10 @@ class MediaInfo:
         """
         返回字典
         """
-        dicts = asdict(self)
+        dicts = self._fields_dict()
         dicts["type"] = self.type.value if self.type else None
         dicts["detail_link"] = self.detail_link
         dicts["title_year"] = self.title_year
-        dicts["tmdb_info"] = None
-        dicts["douban_info"] = None
-        dicts["bangumi_info"] = None
         return dicts
 
     def clear(self):
@@ -744,8 +814,8 @@ class MediaInfo:
         self.next_episode_to_air = {}
 
 
-@dataclass
-class Context:
+@dataclass(slots=True)
+class Context(CompactObject):
     """
     上下文对象
     """
@@ -757,6 +827,9 @@ class Context:
     # 种子信息
     torrent_info: TorrentInfo = None
 
+    # 接口输出的数据模型
+    _api_schema = schemas.Context
+
     def to_dict(self):
         """
         转换为字典
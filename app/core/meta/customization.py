@@ -16,6 +16,9 @@ class CustomizationMatcher(metaclass=Singleton):
         self.systemconfig = SystemConfigOper()
         self.customization = None
         self.custom_separator = None
+        # 编译后的正则及对应的配置，配置变化时重新编译
+        self.__customization_conf = None
+        self.__customization_re = None
 
     def match(self, title=None):
         """
@@ -24,19 +27,21 @@ class CustomizationMatcher(metaclass=Singleton):
         """
         if not title:
             return ""
-        if not self.customization:
-            # 自定义占位符
-            customization = self.systemconfig.get(SystemConfigKey.Customization)
-            if not customization:
-                return ""
+        # 自定义占位符
+        customization = self.systemconfig.get(SystemConfigKey.Customization)
+        if not customization:
+            return ""
+        if customization != self.__customization_conf or not self.__customization_re:
+            conf = customization if isinstance(customization, str) else list(customization)
             if isinstance(customization, str):
                 customization = customization.replace("\n", ";").replace("|", ";").strip(";").split(";")
             self.customization = "|".join([f"({item})" for item in customization])
+            self.__customization_re = re.compile(r"%s" % self.customization)
+            self.__customization_conf = conf
 
-        customization_re = re.compile(r"%s" % self.customization)
         # 处理重复多次的情况，保留先后顺序（按添加自定义占位符的顺序）
         unique_customization = {}
-        for item in re.findall(customization_re, title):
+        for item in self.__customization_re.findall(title):
             if not isinstance(item, tuple):
                 item = (item,)
             for i in range(len(item)):
@@ -1,17 +1,19 @@
 import traceback
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from typing import Union, Optional, List, Self
 
 import cn2an
 import regex as re
 
+from app import schemas
+from app.core.compact import CompactObject
 from app.log import logger
 from app.utils.string import StringUtils
 from app.schemas.types import MediaType
 
 
-@dataclass
-class MetaBase(object):
+@dataclass(slots=True)
+class MetaBase(CompactObject):
     """
     媒体信息基类
     """
@@ -65,6 +67,12 @@ class MetaBase(object):
     tmdbid: int = None
     doubanid: str = None
 
+    # 需要驻留的字段
+    _intern_fields = ("year", "part", "resource_type", "resource_effect", "resource_pix", "resource_team",
+                      "customization", "video_encode", "audio_encode", "apply_words")
+    # 接口输出的数据模型
+    _api_schema = schemas.MetaInfo
+
     # 副标题解析
     _subtitle_flag = False
     _title_episodel_re = r"Episode\s+(\d{1,4})"
@@ -75,6 +83,7 @@ class MetaBase(object):
     _subtitle_episode_all_re = r"([0-9一二三四五六七八九十百零]+)\s*集\s*全|[全共]\s*([0-9一二三四五六七八九十百零]+)\s*[集话話期幕]"
 
     def __init__(self, title: str, subtitle: str = None, isfile: bool = False):
+        self._set_defaults()
         if not title:
             return
         self.org_string = title.strip() if title else None
@@ -585,11 +594,20 @@ class MetaBase(object):
         if not self.part:
             self.part = meta.part
 
+    def compact(self):
+        """
+        识别完成后释放识别过程中的临时数据，并驻留重复出现的字符串
+        """
+        extras = getattr(self, "__dict__", None)
+        if extras:
+            extras.clear()
+        CompactObject.compact(self)
+
     def to_dict(self):
         """
         转为字典
         """
-        dicts = asdict(self)
+        dicts = self._fields_dict()
         dicts["type"] = self.type.value if self.type else None
         dicts["season_episode"] = self.season_episode
         dicts["edition"] = self.edition
@@ -1,15 +1,204 @@
+from itertools import product
+from typing import Dict, List, Optional, Tuple
+
 import regex as re
 
 from app.db.systemconfig_oper import SystemConfigOper
 from app.schemas.types import SystemConfigKey
 from app.utils.singleton import Singleton
 
+# 制作组前、后的分隔符
+_GROUP_PREFIX = "-@[￡【&"
+_GROUP_SUFFIX = "@.][】&"
+# 单个组展开为字面量的最大数量，超过时按正则匹配
+_MAX_EXPAND = 256
+
+
+class GroupPatternMatcher:
+    """
+    制作组匹配器，结果与按顺序组合的正则 (?<=[-@\\[￡【&])(?:组1|组2|...)(?=[@.\\s\\]\\[】&]) 忽略大小写findall一致：
+    能展开为有限个字面量的组（如 HDS(?:|ky|TV)）放入字典树，只在分隔符之后的位置查找；其余的组编译为正则兜底
+    """
+
+    def __init__(self, patterns: List[str]):
+        """
+        :param patterns: 按优先顺序排列的组正则
+        """
+        self._patterns = [pattern for pattern in patterns if pattern]
+        # 字典树：字符 -> 子节点，None键保存字面量的优先顺序 (组序号, 展开序号)
+        self._trie: dict = {}
+        # 无法展开的组：[(组序号, 单个组的正则)]
+        self._fallbacks: List[Tuple[int, re.Pattern]] = []
+        fallback_patterns = []
+        for index, pattern in enumerate(self._patterns):
+            literals = self.__expand(pattern)
+            if not literals or "" in literals:
+                self._fallbacks.append((index, self.__compile(pattern)))
+                fallback_patterns.append(pattern)
+                continue
+            for order, literal in enumerate(literals):
+                self.__add(literal.lower(), (index, order))
+        self._fallback_re = self.__compile("|".join(fallback_patterns)) if fallback_patterns else None
+        self._regex: Optional[re.Pattern] = None
+
+    @property
+    def fallback_count(self) -> int:
+        """
+        按正则匹配的组数量
+        """
+        return len(self._fallbacks)
+
+    @staticmethod
+    def __compile(pattern: str) -> re.Pattern:
+        return re.compile(r"(?<=[-@\[￡【&])(?:%s)(?=[@.\s\]\[】&])" % pattern, re.I)
+
+    def __add(self, literal: str, order: Tuple[int, int]):
+        """
+        字面量加入字典树，重复的字面量保留最优先的顺序
+        """
+        node = self._trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        if None not in node or order < node[None]:
+            node[None] = order
+
+    @staticmethod
+    def __expand(pattern: str) -> Optional[List[str]]:
+        """
+        将只包含字面量、转义符号和非捕获分组 (?:a|b) 的正则展开为字面量列表，顺序与正则回溯尝试的顺序一致；
+        包含其它正则语法或展开数量过多时返回None
+        """
+
+        def parse_alternation(pos: int) -> Tuple[Optional[List[str]], int]:
+            alternatives = []
+            while True:
+                sequence, pos = parse_sequence(pos)
+                if sequence is None:
+                    return None, pos
+                alternatives.extend(sequence)
+                if len(alternatives) > _MAX_EXPAND:
+                    return None, pos
+                if pos < len(pattern) and pattern[pos] == "|":
+                    pos += 1
+                    continue
+                return alternatives, pos
+
+        def parse_sequence(pos: int) -> Tuple[Optional[List[str]], int]:
+            parts: List[List[str]] = []
+            while pos < len(pattern) and pattern[pos] not in "|)":
+                char = pattern[pos]
+                if char == "\\":
+                    # \d \s \b 等字符类及断言不展开
+                    if pos + 1 >= len(pattern) or pattern[pos + 1].isalnum():
+                        return None, pos
+                    parts.append([pattern[pos + 1]])
+                    pos += 2
+                elif pattern.startswith("(?:", pos):
+                    group, pos = parse_alternation(pos + 3)
+                    if group is None or pos >= len(pattern) or pattern[pos] != ")":
+                        return None, pos
+                    parts.append(group)
+                    pos += 1
+                elif char in ".^$*+?{}[]()":
+                    return None, pos
+                else:
+                    parts.append([char])
+                    pos += 1
+            total = 1
+            for part in parts:
+                total *= len(part)
+                if total > _MAX_EXPAND:
+                    return None, pos
+            return ["".join(items) for items in product(*parts)], pos
+
+        literals, end = parse_alternation(0)
+        if literals is None or end != len(pattern):
+            return None
+        return literals
+
+    def __match_trie(self, lower: str, pos: int) -> Optional[Tuple[Tuple[int, int], int]]:
+        """
+        查找从指定位置开始、后接分隔符的最优先字面量
+        :return: (优先顺序, 结束位置)
+        """
+        best = None
+        node = self._trie
+        length = len(lower)
+        i = pos
+        while i < length:
+            node = node.get(lower[i])
+            if node is None:
+                break
+            i += 1
+            order = node.get(None)
+            if order is not None and i < length \
+                    and (lower[i] in _GROUP_SUFFIX or lower[i].isspace()) \
+                    and (best is None or order < best[0]):
+                best = (order, i)
+        return best
+
+    def __match_fallback(self, title: str, pos: int, before: int = None):
+        """
+        按组的顺序查找在指定位置匹配的兜底正则
+        :param before: 只查找组序号小于该值的组
+        """
+        for index, pattern in self._fallbacks:
+            if before is not None and index > before:
+                break
+            matched = pattern.match(title, pos)
+            if matched:
+                return matched
+        return None
+
+    def findall(self, title: str) -> List[str]:
+        """
+        按出现顺序查找标题中的所有组
+        """
+        lower = title.lower()
+        if len(lower) != len(title):
+            # 个别字符转为小写后长度变化，位置无法对应，整体按正则匹配
+            if not self._regex:
+                self._regex = self.__compile("|".join(self._patterns))
+            return self._regex.findall(title)
+        results = []
+        length = len(title)
+        pos = 0
+        while pos < length:
+            # 兜底正则的最早匹配位置
+            fallback = self._fallback_re.search(title, pos) if self._fallback_re else None
+            limit = fallback.start() if fallback else length
+            # 字典树只查找分隔符之后、不晚于兜底正则的位置
+            matched = None
+            start = pos if pos > 0 else 1
+            if self._trie:
+                while start <= limit and start < length:
+                    if title[start - 1] in _GROUP_PREFIX:
+                        matched = self.__match_trie(lower, start)
+                        if matched:
+                            break
+                    start += 1
+            if matched and fallback and start == fallback.start():
+                # 同一位置都能匹配时按组的顺序取优先的
+                fallback = self.__match_fallback(title, start, before=matched[0][0])
+                if fallback:
+                    matched = None
+            if matched:
+                results.append(title[start:matched[1]])
+                pos = matched[1]
+            elif fallback:
+                fallback = self.__match_fallback(title, fallback.start()) or fallback
+                results.append(fallback.group())
+                pos = fallback.end() if fallback.end() > fallback.start() else fallback.end() + 1
+            else:
+                break
+        return results
+
 
 class ReleaseGroupsMatcher(metaclass=Singleton):
     """
     识别制作组、字幕组
     """
-    __release_groups: str = None
+    __release_groups: List[str] = None
     # 内置组
     RELEASE_GROUPS: dict = {
         "0ff": ['FF(?:(?:A|WE)B|CD|E(?:DU|B)|TV)'],
@@ -83,7 +272,30 @@ class ReleaseGroupsMatcher(metaclass=Singleton):
         for site_groups in self.RELEASE_GROUPS.values():
             for release_group in site_groups:
                 release_groups.append(release_group)
-        self.__release_groups = '|'.join(release_groups)
+        self.__release_groups = release_groups
+        # 内置组及自定义组的匹配器，自定义组变化时重建
+        self.__custom_groups: Optional[Tuple[str, ...]] = None
+        self.__matcher: Optional[GroupPatternMatcher] = None
+        # 指定组的匹配器
+        self.__group_matchers: Dict[str, GroupPatternMatcher] = {}
+
+    def __get_matcher(self, groups: str = None) -> GroupPatternMatcher:
+        """
+        获取匹配器，配置不变时复用
+        """
+        if groups:
+            matcher = self.__group_matchers.get(groups)
+            if not matcher:
+                if len(self.__group_matchers) >= 32:
+                    self.__group_matchers.clear()
+                matcher = GroupPatternMatcher([groups])
+                self.__group_matchers[groups] = matcher
+            return matcher
+        custom_groups = tuple(self.systemconfig.get(SystemConfigKey.CustomReleaseGroups) or ())
+        if self.__matcher is None or custom_groups != self.__custom_groups:
+            self.__matcher = GroupPatternMatcher(self.__release_groups + list(custom_groups))
+            self.__custom_groups = custom_groups
+        return self.__matcher
 
     def match(self, title: str = None, groups: str = None):
         """
@@ -93,19 +305,10 @@ class ReleaseGroupsMatcher(metaclass=Singleton):
         """
         if not title:
             return ""
-        if not groups:
-            # 自定义组
-            custom_release_groups = self.systemconfig.get(SystemConfigKey.CustomReleaseGroups)
-            if custom_release_groups:
-                custom_release_groups_str = '|'.join(custom_release_groups)
-                groups = f"{self.__release_groups}|{custom_release_groups_str}"
-            else:
-                groups = self.__release_groups
         title = f"{title} "
-        groups_re = re.compile(r"(?<=[-@\[￡【&])(?:%s)(?=[@.\s\]\[】&])" % groups, re.I)
         # 处理一个制作组识别多次的情况，保留顺序
         unique_groups = []
-        for item in re.findall(groups_re, title):
+        for item in self.__get_matcher(groups).findall(title):
             if item not in unique_groups:
                 unique_groups.append(item)
         return "@".join(unique_groups)
@@ -58,6 +58,8 @@ def MetaInfo(title: str, subtitle: str = None) -> MetaBase:
         meta.end_episode = metainfo['end_episode']
     if metainfo.get('total_episode'):
         meta.total_episode = metainfo['total_episode']
+    # 释放识别临时数据
+    meta.compact()
     return meta
 
 
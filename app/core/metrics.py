@@ -0,0 +1,218 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.utils.singleton import Singleton
+
+# 耗时直方图的分桶上限（秒）
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+# 单个指标的最大标签组合数，超过后归入other，避免标签无限增长
+_MAX_SERIES = 1000
+# 单个追踪记录的最大跨度数
+_MAX_SPANS = 2000
+
+# 指标说明
+_HELP = {
+    "module_seconds": "模块方法执行耗时",
+    "module_errors_total": "模块方法执行出错次数",
+    "http_request_seconds": "HTTP请求耗时（按域名）",
+    "http_requests_total": "HTTP请求次数（按域名和状态码）",
+    "db_seconds": "数据库操作耗时（按方法）",
+    "scheduler_job_seconds": "定时任务执行耗时",
+    "scheduler_job_errors_total": "定时任务执行出错次数",
+    "event_seconds": "事件处理耗时",
+    "event_errors_total": "事件处理出错次数",
+    "api_request_seconds": "API请求耗时"
+}
+
+# 当前请求的追踪记录：[(名称, 标签, 开始偏移秒, 耗时秒, 层级)]
+_trace: ContextVar[Optional[list]] = ContextVar("trace", default=None)
+# 当前跨度的层级
+_depth: ContextVar[int] = ContextVar("trace_depth", default=0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Metrics(metaclass=Singleton):
+    """
+    运行指标：各环节的耗时直方图与计数器，按Prometheus文本格式导出；
+    请求开启追踪时，同时记录该请求内各跨度的耗时
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 直方图：名称 -> 标签 -> [各分桶计数..., 总耗时, 总次数]
+        self._histograms: Dict[str, Dict[Labels, list]] = {}
+        # 计数器：名称 -> 标签 -> 值
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        # 指标说明
+        self._help: Dict[str, str] = dict(_HELP)
+        self._started = time.time()
+
+    def describe(self, name: str, text: str):
+        """
+        设置指标说明
+        """
+        self._help[name] = text
+
+    @staticmethod
+    def __labels(series: dict, labels: dict) -> Labels:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        if key not in series and len(series) >= _MAX_SERIES:
+            key = tuple((k, "other") for k, _ in key)
+        return key
+
+    def observe(self, name: str, seconds: float, **labels):
+        """
+        记录一次耗时
+        """
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            key = self.__labels(series, labels)
+            values = series.get(key)
+            if values is None:
+                values = series[key] = [0] * len(_BUCKETS) + [0.0, 0]
+            for i, bound in enumerate(_BUCKETS):
+                if seconds <= bound:
+                    values[i] += 1
+                    break
+            values[-2] += seconds
+            values[-1] += 1
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """
+        计数器累加
+        """
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = self.__labels(series, labels)
+            series[key] = series.get(key, 0) + value
+
+    @contextmanager
+    def span(self, name: str, **labels):
+        """
+        记录代码块耗时到 {name}_seconds 直方图，出现异常时累加 {name}_errors_total，
+        当前请求开启追踪时同时记录跨度；返回标签字典，结束前可修改标签
+        """
+        trace = _trace.get()
+        depth = _depth.get()
+        token = _depth.set(depth + 1) if trace is not None else None
+        start = time.perf_counter()
+        try:
+            yield labels
+        except Exception:
+            self.inc(f"{name}_errors_total", **labels)
+            raise
+        finally:
+            cost = time.perf_counter() - start
+            if token:
+                _depth.reset(token)
+            self.observe(f"{name}_seconds", cost, **labels)
+            if trace is not None and len(trace) < _MAX_SPANS:
+                trace.append((name, labels, start - trace[0], cost, depth))
+
+    def wrap(self, name: str, func: Callable, **labels) -> Callable:
+        """
+        包装函数，调用时记录耗时，用于提交到线程池的任务
+        """
+
+        def wrapper(*args, **kwargs):
+            with self.span(name, **labels):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    @staticmethod
+    def start_trace():
+        """
+        开启当前上下文的追踪，返回用于结束追踪的令牌
+        """
+        # 第一个元素记录开始时间
+        return _trace.set([time.perf_counter()])
+
+    @staticmethod
+    def finish_trace(token) -> List[tuple]:
+        """
+        结束追踪，返回记录的跨度：[(名称, 标签, 开始偏移秒, 耗时秒, 层级)]，按开始时间排序
+        """
+        trace = _trace.get() or []
+        _trace.reset(token)
+        return sorted(trace[1:], key=lambda x: x[2])
+
+    @staticmethod
+    def format_trace(spans: List[tuple]) -> str:
+        """
+        追踪记录格式化为多行文本
+        """
+        lines = []
+        for name, labels, offset, cost, depth in spans:
+            label_str = " ".join(f"{k}={v}" for k, v in labels.items())
+            lines.append(f"{'  ' * depth}+{offset * 1000:.1f}ms {name} {label_str} {cost * 1000:.1f}ms")
+        return "\n".join(lines)
+
+    @staticmethod
+    def server_timing(spans: List[tuple]) -> str:
+        """
+        追踪记录按名称汇总为 Server-Timing 响应头
+        """
+        totals: Dict[str, List[float]] = {}
+        for name, _, _, cost, _ in spans:
+            total = totals.setdefault(name, [0.0, 0])
+            total[0] += cost
+            total[1] += 1
+        return ", ".join(f'{name};dur={cost * 1000:.1f};desc="{count}"'
+                         for name, (cost, count) in totals.items())
+
+    def export(self, prefix: str = "naspilot") -> str:
+        """
+        导出为Prometheus文本格式
+        """
+
+        def label_str(labels: Labels, extra: Tuple[str, str] = None) -> str:
+            items = list(labels) + ([extra] if extra else [])
+            if not items:
+                return ""
+            escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+        with self._lock:
+            histograms = {name: {k: list(v) for k, v in series.items()} for name, series in self._histograms.items()}
+            counters = {name: dict(series) for name, series in self._counters.items()}
+        lines = [f"# HELP {prefix}_uptime_seconds 运行时长",
+                 f"# TYPE {prefix}_uptime_seconds gauge",
+                 f"{prefix}_uptime_seconds {time.time() - self._started:.0f}"]
+        for name in sorted(histograms):
+            metric = f"{prefix}_{name}"
+            if self._help.get(name):
+                lines.append(f"# HELP {metric} {self._help[name]}")
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, values in sorted(histograms[name].items()):
+                cumulative = 0
+                for bound, count in zip(_BUCKETS, values):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{label_str(labels, ('le', str(bound)))} {cumulative}")
+                lines.append(f"{metric}_bucket{label_str(labels, ('le', '+Inf'))} {values[-1]}")
+                lines.append(f"{metric}_sum{label_str(labels)} {values[-2]:.6f}")
+                lines.append(f"{metric}_count{label_str(labels)} {values[-1]}")
+        for name in sorted(counters):
+            metric = f"{prefix}_{name}"
+            if self._help.get(name):
+                lines.append(f"# HELP {metric} {self._help[name]}")
+            lines.append(f"# TYPE {metric} counter")
+            for labels, value in sorted(counters[name].items()):
+                lines.append(f"{metric}{label_str(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """
+        清空所有指标
+        """
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+# 实例引用，用于记录指标
+metrics = Metrics()
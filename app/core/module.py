@@ -1,3 +1,4 @@
+import threading
 import traceback
 from typing import Generator, Optional, Tuple, Any
 
@@ -17,21 +18,32 @@ class ModuleManager(metaclass=Singleton):
     _modules: dict = {}
     # 运行态模块列表
     _running_modules: dict = {}
+    # 已启用但还未初始化的模块
+    _deferred_modules: set = set()
 
     def __init__(self):
+        self._lock = threading.RLock()
         self.load_modules()
 
     def load_modules(self):
         """
-        加载所有模块
+        加载所有模块，未启用的模块不导入，延迟初始化的模块在首次使用时初始化
         """
+        self._running_modules = {}
+        self._modules = {}
+        self._deferred_modules = set()
+        # 静态解析模块开关，开关未打开的模块不导入
+        skipped = set()
+        for package, manifest in ModuleHelper.load_manifests("app.modules", base_class="_ModuleBase").items():
+            if manifest and not self.check_setting(manifest.init_setting()):
+                self._modules[manifest.__name__] = manifest
+                skipped.add(package)
         # 扫描模块目录
         modules = ModuleHelper.load(
             "app.modules",
-            filter_func=lambda _, obj: hasattr(obj, 'init_module') and hasattr(obj, 'init_setting')
+            filter_func=lambda _, obj: hasattr(obj, 'init_module') and hasattr(obj, 'init_setting'),
+            package_filter=lambda package: package not in skipped
         )
-        self._running_modules = {}
-        self._modules = {}
         for module in modules:
             module_id = module.__name__
             self._modules[module_id] = module
@@ -41,18 +53,45 @@ class ModuleManager(metaclass=Singleton):
                 # 初始化模块
                 if self.check_setting(_module.init_setting()):
                     # 通过模板开关控制加载
-                    _module.init_module()
+                    if _module.lazy_init:
+                        self._deferred_modules.add(module_id)
+                    else:
+                        _module.init_module()
                     self._running_modules[module_id] = _module
                     logger.info(f"Moudle Loaded：{module_id}")
             except Exception as err:
                 logger.error(f"Load Moudle Error：{module_id}，{str(err)} - {traceback.format_exc()}", exc_info=True)
 
+    def __init_deferred(self, module_id: str) -> bool:
+        """
+        初始化延迟初始化的模块
+        :return: 模块是否可用，初始化失败时移出运行态模块列表
+        """
+        if module_id not in self._deferred_modules:
+            return module_id in self._running_modules
+        with self._lock:
+            if module_id not in self._deferred_modules:
+                return module_id in self._running_modules
+            try:
+                self._running_modules[module_id].init_module()
+                logger.info(f"Moudle Initialized：{module_id}")
+                return True
+            except Exception as err:
+                self._running_modules.pop(module_id, None)
+                logger.error(f"Load Moudle Error：{module_id}，{str(err)} - {traceback.format_exc()}", exc_info=True)
+                return False
+            finally:
+                self._deferred_modules.discard(module_id)
+
     def stop(self):
         """
         停止所有模块
         """
         logger.info("正在停止所有模块...")
         for module_id, module in self._running_modules.items():
+            if module_id in self._deferred_modules:
+                # 未初始化的模块不需要停止
+                continue
             if hasattr(module, "stop"):
                 try:
                     module.stop()
@@ -72,7 +111,7 @@ class ModuleManager(metaclass=Singleton):
         """
         测试模块
         """
-        if modleid not in self._running_modules:
+        if modleid not in self._running_modules or not self.__init_deferred(modleid):
             return False, "模块未加载，请检查参数设置"
         module = self._running_modules[modleid]
         if hasattr(module, "test") \
@@ -105,6 +144,8 @@ class ModuleManager(metaclass=Singleton):
             return None
         if not self._running_modules:
             return None
+        if module_id in self._running_modules and not self.__init_deferred(module_id):
+            return None
         return self._running_modules.get(module_id)
 
     def get_running_modules(self, method: str) -> Generator:
@@ -113,9 +154,10 @@ class ModuleManager(metaclass=Singleton):
         """
         if not self._running_modules:
             return []
-        for _, module in self._running_modules.items():
+        for module_id, module in list(self._running_modules.items()):
             if hasattr(module, method) \
-                    and ObjectUtils.check_method(getattr(module, method)):
+                    and ObjectUtils.check_method(getattr(module, method)) \
+                    and self.__init_deferred(module_id):
                 yield module
 
     def get_module(self, module_id: str) -> Any:
@@ -18,7 +18,7 @@ from app.core.event import eventmanager
 from app.db.plugindata_oper import PluginDataOper
 from app.db.systemconfig_oper import SystemConfigOper
 from app.helper.module import ModuleHelper
-from app.helper.plugin import PluginHelper
+from app.helper.plugin import PluginHelper, PluginIndexHelper, PluginManifest
 from app.helper.sites import SitesHelper
 from app.log import logger
 from app.schemas.types import SystemConfigKey
@@ -105,6 +105,8 @@ class PluginManager(metaclass=Singleton):
     _plugins: dict = {}
     # 运行态插件列表
     _running_plugins: dict = {}
+    # 插件加载统计
+    _plugin_stats: dict = {}
     # 配置Key
     _config_key: str = "plugin.%s"
     # 监听器
@@ -113,6 +115,7 @@ class PluginManager(metaclass=Singleton):
     def __init__(self):
         self.siteshelper = SitesHelper()
         self.pluginhelper = PluginHelper()
+        self.pluginindex = PluginIndexHelper()
         self.systemconfig = SystemConfigOper()
         self.plugindata = PluginDataOper()
         # 开发者模式监测插件修改
@@ -139,21 +142,39 @@ class PluginManager(metaclass=Singleton):
                 return False
             return True
 
-        # 扫描插件目录
-        if pid:
-            # 加载指定插件
-            plugins = ModuleHelper.load_with_pre_filter(
-                "app.plugins",
-                filter_func=lambda name, obj: check_module(obj) and name == pid
-            )
-        else:
-            # 加载所有插件
-            plugins = ModuleHelper.load(
-                "app.plugins",
-                filter_func=lambda _, obj: check_module(obj)
+        # 导入耗时及内存增量
+        import_costs: Dict[str, Tuple[float, int]] = {}
+
+        def load_module(package: str) -> List[Any]:
+            """
+            导入插件包，指定插件时为热更新，需要重新加载
+            """
+            _start_time = time.perf_counter()
+            _start_memory = SystemUtils.process_memory()
+            _modules = ModuleHelper.load_package(
+                f"app.plugins.{package}",
+                filter_func=lambda name, obj: check_module(obj) and (not pid or name == pid),
+                reload=bool(pid)
             )
+            for _module in _modules:
+                import_costs[_module.__name__] = (time.perf_counter() - _start_time,
+                                                  SystemUtils.process_memory() - _start_memory)
+            return _modules
+
         # 已安装插件
         installed_plugins = self.systemconfig.get(SystemConfigKey.UserInstalledPlugins) or []
+        # 扫描插件索引，只导入已安装或无法静态解析的插件
+        plugins = []
+        for package, manifest in self.pluginindex.list().items():
+            if manifest:
+                if pid and manifest.__name__ != pid:
+                    continue
+                if manifest.__name__ not in installed_plugins:
+                    plugins.append(manifest)
+                    continue
+            elif pid and package != pid.lower():
+                continue
+            plugins.extend(load_module(package))
         # 排序
         plugins.sort(key=lambda x: x.plugin_order if hasattr(x, "plugin_order") else 0)
         for plugin in plugins:
@@ -174,13 +195,23 @@ class PluginManager(metaclass=Singleton):
                     # 设置事件状态为不可用
                     eventmanager.disable_events_hander(plugin_id)
                     continue
+                import_time, import_memory = import_costs.get(plugin_id, (0, 0))
+                start_time = time.perf_counter() - import_time
+                start_memory = SystemUtils.process_memory() - import_memory
                 # 生成实例
                 plugin_obj = plugin()
                 # 生效插件配置
                 plugin_obj.init_plugin(self.get_plugin_config(plugin_id))
                 # 存储运行实例
                 self._running_plugins[plugin_id] = plugin_obj
-                logger.info(f"加载插件：{plugin_id} 版本：{plugin_obj.plugin_version}")
+                # 记录加载耗时及内存增量
+                self._plugin_stats[plugin_id] = {
+                    "load_time": round((time.perf_counter() - start_time) * 1000, 1),
+                    "load_memory": round(max(SystemUtils.process_memory() - start_memory, 0) / 1024 / 1024, 2)
+                }
+                logger.info(f"加载插件：{plugin_id} 版本：{plugin_obj.plugin_version}，"
+                            f"耗时：{self._plugin_stats[plugin_id]['load_time']}ms，"
+                            f"内存：{self._plugin_stats[plugin_id]['load_memory']}MB")
                 # 启用的插件才设置事件注册状态可用
                 if plugin_obj.get_state():
                     eventmanager.enable_events_hander(plugin_id)
@@ -224,10 +255,12 @@ class PluginManager(metaclass=Singleton):
             # 清空指定插件
             if pid in self._running_plugins:
                 self._running_plugins.pop(pid)
+            self._plugin_stats.pop(pid, None)
         else:
             # 清空
             self._plugins = {}
             self._running_plugins = {}
+            self._plugin_stats = {}
         logger.info("插件停止完成")
 
     def __start_monitor(self):
@@ -707,7 +740,9 @@ class PluginManager(metaclass=Singleton):
             else:
                 plugin.state = False
             # 是否有详情页面
-            if hasattr(plugin_class, "get_page"):
+            if isinstance(plugin_class, PluginManifest):
+                plugin.has_page = plugin_class.has_page
+            elif hasattr(plugin_class, "get_page"):
                 if ObjectUtils.check_method(plugin_class.get_page):
                     plugin.has_page = True
                 else:
@@ -739,6 +774,10 @@ class PluginManager(metaclass=Singleton):
             # 加载顺序
             if hasattr(plugin_class, "plugin_order"):
                 plugin.plugin_order = plugin_class.plugin_order
+            # 加载耗时及内存
+            if self._plugin_stats.get(pid):
+                plugin.load_time = self._plugin_stats[pid].get("load_time")
+                plugin.load_memory = self._plugin_stats[pid].get("load_memory")
             # 是否需要更新
             plugin.has_update = False
             # 本地标志
@@ -0,0 +1,146 @@
+import importlib.abc
+import os
+import sys
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from app.core.metrics import metrics
+
+metrics.describe("startup_phase_seconds", "启动各阶段耗时")
+
+# 导入耗时报告中显示的模块数
+_IMPORT_TOP = 30
+
+
+class _TimingLoader(importlib.abc.Loader):
+    """
+    记录模块执行耗时的加载器，其它属性转发给原加载器
+    """
+
+    def __init__(self, loader, profiler: "ImportProfiler"):
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler.enter()
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler.exit(module.__name__, time.perf_counter() - start)
+            # 还原加载器，避免影响依赖加载器类型的代码
+            module.__loader__ = self._loader
+            if getattr(module, "__spec__", None):
+                module.__spec__.loader = self._loader
+
+
+class ImportProfiler(importlib.abc.MetaPathFinder):
+    """
+    模块导入耗时统计，与 python -X importtime 相同，记录每个模块自身及包含其依赖的导入耗时
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        # [(模块名, 自身耗时, 累计耗时, 层级)]
+        self._records: List[Tuple[str, float, float, int]] = []
+
+    def find_spec(self, fullname, path, target=None):
+        if getattr(self._local, "finding", False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is None:
+                    continue
+                if spec.loader and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimingLoader(spec.loader, self)
+                return spec
+            return None
+        finally:
+            self._local.finding = False
+
+    def enter(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        # 记录子模块的累计耗时，用于计算自身耗时
+        stack.append(0.0)
+
+    def exit(self, name: str, cost: float):
+        stack = self._local.stack
+        children = stack.pop()
+        if stack:
+            stack[-1] += cost
+        self._records.append((name, cost - children, cost, len(stack)))
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def report(self, top: int = _IMPORT_TOP) -> str:
+        """
+        按累计耗时输出最慢的顶层导入
+        """
+        records = sorted(self._records, key=lambda x: x[2], reverse=True)[:top]
+        lines = ["self [us] | cumulative | imported package"]
+        for name, self_cost, cost, depth in records:
+            lines.append(f"{int(self_cost * 1e6):>9} | {int(cost * 1e6):>10} | {'  ' * depth}{name}")
+        return "\n".join(lines)
+
+
+class StartupProfiler:
+    """
+    启动耗时统计，记录启动各阶段的耗时；
+    设置环境变量 STARTUP_PROFILE 时同时统计各模块的导入耗时（需在导入其它模块前开启，因此不使用系统配置）
+    """
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self._last = self._start
+        # [(阶段, 耗时)]
+        self._phases: List[Tuple[str, float]] = []
+        self._imports: Optional[ImportProfiler] = None
+        if os.getenv("STARTUP_PROFILE", "").lower() in ("1", "true", "yes"):
+            self._imports = ImportProfiler()
+            self._imports.install()
+
+    def mark(self, phase: str):
+        """
+        记录阶段完成，耗时为距上一阶段完成的时间
+        """
+        now = time.perf_counter()
+        self._phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self) -> str:
+        """
+        结束统计，返回各阶段耗时报告，开启导入统计时包括最慢的模块导入
+        """
+        total = self._last - self._start
+        lines = [f"启动完成，共耗时 {total:.2f} 秒："]
+        for phase, cost in self._phases:
+            metrics.observe("startup_phase_seconds", cost, phase=phase)
+            lines.append(f"  {phase}：{cost:.2f} 秒（{cost * 100 / total if total else 0:.0f}%）")
+        if self._imports:
+            self._imports.uninstall()
+            lines.append(self._imports.report())
+            self._imports = None
+        return "\n".join(lines)
+
+
+# 启动前创建，从导入 app.main 开始计时
+startup = StartupProfiler()
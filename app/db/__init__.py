@@ -1,12 +1,13 @@
-from typing import Any, Self, List
+from typing import Any, Self, List, Dict
 from typing import Tuple, Optional, Generator
 
 from sqlalchemy import create_engine, QueuePool
-from sqlalchemy import inspect
+from sqlalchemy import inspect, text
 from sqlalchemy.orm import declared_attr
 from sqlalchemy.orm import sessionmaker, Session, scoped_session, as_declarative
 
 from app.core.config import settings
+from app.core.metrics import metrics
 
 # 数据库引擎
 Engine = create_engine(f"sqlite:///{settings.CONFIG_PATH}/user.db",
@@ -24,6 +25,9 @@ SessionFactory = sessionmaker(bind=Engine)
 # 多线程全局使用的数据库会话
 ScopedSession = scoped_session(SessionFactory)
 
+# 全文索引表是否可用
+_fts_tables: Dict[str, bool] = {}
+
 
 def get_db() -> Generator:
     """
@@ -71,6 +75,37 @@ def update_args_db(args: tuple, kwargs: dict, db: Session) -> Tuple[tuple, dict]
     return args, kwargs
 
 
+def get_method_name(func, args: tuple) -> str:
+    """
+    获取数据库操作的方法名称，模型方法带上实际的模型类名
+    """
+    owner = args[0] if args else None
+    if isinstance(owner, type):
+        return f"{owner.__name__}.{func.__name__}"
+    if owner is not None and not isinstance(owner, (Session, scoped_session)):
+        return f"{type(owner).__name__}.{func.__name__}"
+    return func.__qualname__
+
+
+def fts_match(db: Session, table: str, keyword: str) -> Optional[str]:
+    """
+    生成全文索引的MATCH查询表达式，按空白拆分为多个词同时匹配
+    全文索引不可用（SQLite不支持FTS5或未迁移）或存在少于3个字的词（trigram分词无法匹配）时返回None，由调用方使用LIKE查询
+    :param db: 数据库会话
+    :param table: 全文索引表名
+    :param keyword: 关键字
+    """
+    words = keyword.split() if keyword else []
+    if not words or any(len(word) < 3 for word in words):
+        return None
+    if table not in _fts_tables:
+        _fts_tables[table] = db.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                                        {"name": table}).first() is not None
+    if not _fts_tables[table]:
+        return None
+    return " ".join('"%s"' % word.replace('"', '""') for word in words)
+
+
 def db_update(func):
     """
     数据库更新类操作装饰器，第一个参数必须是数据库会话或存在db参数
@@ -89,10 +124,11 @@ def db_update(func):
             # 更新参数中的数据库会话
             args, kwargs = update_args_db(args, kwargs, db)
         try:
-            # 执行函数
-            result = func(*args, **kwargs)
-            # 提交事务
-            db.commit()
+            with metrics.span("db", op="update", method=get_method_name(func, args)):
+                # 执行函数
+                result = func(*args, **kwargs)
+                # 提交事务
+                db.commit()
         except Exception as err:
             # 回滚事务
             db.rollback()
@@ -125,8 +161,9 @@ def db_query(func):
             # 更新参数中的数据库会话
             args, kwargs = update_args_db(args, kwargs, db)
         try:
-            # 执行函数
-            result = func(*args, **kwargs)
+            with metrics.span("db", op="query", method=get_method_name(func, args)):
+                # 执行函数
+                result = func(*args, **kwargs)
         except Exception as err:
             raise err
         finally:
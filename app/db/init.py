@@ -1,8 +1,10 @@
+import ast
 import random
+import re
+import sqlite3
 import string
-
-from alembic.command import upgrade
-from alembic.config import Config
+from pathlib import Path
+from typing import Optional
 
 from app.core.config import settings
 from app.core.security import get_password_hash
@@ -40,12 +42,54 @@ def init_super_user():
             _user.create(db)
 
 
+def get_head_revision(versions_path: Path) -> Optional[str]:
+    """
+    静态解析迁移脚本，获取最新的版本号，存在多个最新版本或无法解析时返回None
+    """
+    revisions, down_revisions = set(), set()
+    for version_file in versions_path.glob("*.py"):
+        content = version_file.read_text(encoding="utf-8")
+        revision = re.search(r"^revision\s*=\s*(.+)$", content, re.MULTILINE)
+        down_revision = re.search(r"^down_revision\s*=\s*(.+)$", content, re.MULTILINE)
+        if not revision or not down_revision:
+            return None
+        try:
+            revisions.add(ast.literal_eval(revision.group(1).strip()))
+            down = ast.literal_eval(down_revision.group(1).strip())
+        except (ValueError, SyntaxError):
+            return None
+        # 合并版本有多个上级版本
+        down_revisions.update(down if isinstance(down, (tuple, list)) else [down])
+    heads = revisions - down_revisions
+    return heads.pop() if len(heads) == 1 else None
+
+
+def get_db_revision(db_location: Path) -> Optional[str]:
+    """
+    获取数据库当前的版本号
+    """
+    if not db_location.exists():
+        return None
+    try:
+        with sqlite3.connect(db_location) as conn:
+            row = conn.execute("SELECT version_num FROM alembic_version").fetchone()
+        return row[0] if row else None
+    except sqlite3.Error:
+        return None
+
+
 def update_db():
     """
-    更新数据库
+    更新数据库，数据库已是最新版本时不执行迁移
     """
     db_location = settings.CONFIG_PATH / 'user.db'
     script_location = settings.ROOT_PATH / 'database'
+    head_revision = get_head_revision(script_location / 'versions')
+    if head_revision and get_db_revision(db_location) == head_revision:
+        logger.info(f'数据库已是最新版本：{head_revision}')
+        return
+    from alembic.command import upgrade
+    from alembic.config import Config
     try:
         alembic_cfg = Config()
         alembic_cfg.set_main_option('script_location', str(script_location))
@@ -1,5 +1,6 @@
 import json
-from typing import Optional
+from datetime import datetime
+from typing import Optional, List
 
 from sqlalchemy.orm import Session
 
@@ -25,6 +26,52 @@ class MediaServerOper(DbOper):
             return True
         return False
 
+    def upsert(self, **kwargs) -> bool:
+        """
+        新增或更新媒体服务器数据
+        :return: 是否为新增
+        """
+        kwargs["lst_mod_date"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        item = MediaServerItem.get_by_server_itemid(self._db, kwargs.get("server"), kwargs.get("item_id"))
+        if item:
+            # 媒体库以已有数据为准，由同步时更正
+            kwargs.pop("library", None)
+            item.update(self._db, kwargs)
+            return False
+        if kwargs.get("library") \
+                and str(kwargs.get("library")) not in MediaServerItem.get_libraries(self._db, kwargs.get("server")):
+            # 项目的上级不一定是媒体库（如Emby的ParentId为所在目录），不是已同步的媒体库时置空，同步时更正或清理
+            kwargs["library"] = None
+        MediaServerItem(**kwargs).create(self._db)
+        return True
+
+    def delete(self, server: str, item_id: str):
+        """
+        删除媒体服务器数据
+        """
+        MediaServerItem.delete_by_itemid(self._db, server, item_id)
+
+    def replace_library(self, server: str, library: str, items: List[dict]):
+        """
+        替换媒体库的所有数据
+        """
+        lst_mod_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for item in items:
+            item["lst_mod_date"] = lst_mod_date
+        MediaServerItem.replace_library(self._db, server, library, items)
+
+    def empty_others(self, server: str, libraries: List[str]):
+        """
+        清空媒体服务器已删除或不再同步的媒体库数据
+        """
+        MediaServerItem.empty_others(self._db, server, libraries)
+
+    def empty_servers(self, servers: List[str]):
+        """
+        清空已不再使用的媒体服务器数据
+        """
+        MediaServerItem.empty_servers(self._db, servers)
+
     def empty(self, server: Optional[str] = None):
         """
         清空媒体服务器数据
@@ -1,10 +1,12 @@
 from .downloadhistory import DownloadHistory, DownloadFiles
 from .mediaserver import MediaServerItem
 from .plugindata import PluginData
+from .searchresult import SearchRecord, SearchResult
 from .site import Site
 from .siteicon import SiteIcon
 from .subscribe import Subscribe
 from .systemconfig import SystemConfig
 from .transferhistory import TransferHistory
+from .transferstatistic import TransferStatistic
 from .user import User
 from .userconfig import UserConfig
@@ -1,9 +1,9 @@
 import time
 
-from sqlalchemy import Column, Integer, String, Sequence
+from sqlalchemy import Column, Integer, String, Sequence, func, or_, text
 from sqlalchemy.orm import Session
 
-from app.db import db_query, db_update, Base
+from app.db import db_query, db_update, fts_match, Base
 
 
 class DownloadHistory(Base):
@@ -59,6 +59,45 @@ class DownloadHistory(Base):
         result = db.query(DownloadHistory).offset((page - 1) * count).limit(count).all()
         return list(result)
 
+    @staticmethod
+    @db_query
+    def list_by_title(db: Session, title: str, page: int = 1, count: int = 30):
+        """
+        按标题、种子名称或保存路径搜索下载记录
+        """
+        match = fts_match(db, "downloadhistory_fts", title)
+        if match:
+            # 全文索引按相关度排序
+            result = db.query(DownloadHistory).from_statement(text(
+                "SELECT downloadhistory.* FROM downloadhistory_fts "
+                "JOIN downloadhistory ON downloadhistory.id = downloadhistory_fts.rowid "
+                "WHERE downloadhistory_fts MATCH :match "
+                "ORDER BY downloadhistory_fts.rank, downloadhistory.date DESC "
+                "LIMIT :count OFFSET :offset"
+            )).params(match=match, count=count, offset=(page - 1) * count).all()
+        else:
+            result = db.query(DownloadHistory).filter(or_(
+                DownloadHistory.title.like(f'%{title}%'),
+                DownloadHistory.torrent_name.like(f'%{title}%'),
+                DownloadHistory.path.like(f'%{title}%'),
+            )).order_by(
+                DownloadHistory.date.desc()
+            ).offset((page - 1) * count).limit(count).all()
+        return list(result)
+
+    @staticmethod
+    @db_query
+    def count_by_title(db: Session, title: str):
+        match = fts_match(db, "downloadhistory_fts", title)
+        if match:
+            return db.execute(text("SELECT count(*) FROM downloadhistory_fts "
+                                   "WHERE downloadhistory_fts MATCH :match"), {"match": match}).scalar()
+        return db.query(func.count(DownloadHistory.id)).filter(or_(
+            DownloadHistory.title.like(f'%{title}%'),
+            DownloadHistory.torrent_name.like(f'%{title}%'),
+            DownloadHistory.path.like(f'%{title}%')
+        )).first()[0]
+
     @staticmethod
     @db_query
     def get_by_path(db: Session, path: str):
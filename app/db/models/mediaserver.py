@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 
-from sqlalchemy import Column, Integer, String, Sequence
+from sqlalchemy import Column, Integer, String, Sequence, or_
 from sqlalchemy.orm import Session
 
 from app.db import db_query, db_update, Base
@@ -46,6 +46,62 @@ class MediaServerItem(Base):
     def get_by_itemid(db: Session, item_id: str):
         return db.query(MediaServerItem).filter(MediaServerItem.item_id == item_id).first()
 
+    @staticmethod
+    @db_query
+    def get_by_server_itemid(db: Session, server: str, item_id: str):
+        return db.query(MediaServerItem).filter(MediaServerItem.server == server,
+                                                MediaServerItem.item_id == item_id).first()
+
+    @staticmethod
+    @db_update
+    def delete_by_itemid(db: Session, server: str, item_id: str):
+        db.query(MediaServerItem).filter(MediaServerItem.server == server,
+                                         MediaServerItem.item_id == item_id).delete()
+
+    @staticmethod
+    @db_update
+    def replace_library(db: Session, server: str, library: str, items: List[dict]):
+        """
+        在同一事务中替换媒体库的所有数据，其它媒体库中相同ID的项目一并替换
+        """
+        db.query(MediaServerItem).filter(MediaServerItem.server == server,
+                                         MediaServerItem.library == library).delete()
+        item_ids = [item.get("item_id") for item in items]
+        for i in range(0, len(item_ids), 500):
+            db.query(MediaServerItem).filter(MediaServerItem.server == server,
+                                             MediaServerItem.item_id.in_(item_ids[i:i + 500])
+                                             ).delete(synchronize_session=False)
+        db.add_all([MediaServerItem(**item) for item in items])
+
+    @staticmethod
+    @db_update
+    def empty_others(db: Session, server: str, libraries: List[str]):
+        """
+        删除媒体服务器不在媒体库列表中及未知媒体库的数据
+        """
+        db.query(MediaServerItem).filter(MediaServerItem.server == server,
+                                         or_(MediaServerItem.library.notin_(libraries),
+                                             MediaServerItem.library.is_(None))).delete(synchronize_session=False)
+
+    @staticmethod
+    @db_query
+    def get_libraries(db: Session, server: str) -> List[str]:
+        """
+        查询媒体服务器已同步的媒体库
+        """
+        return [row[0] for row in db.query(MediaServerItem.library).filter(
+            MediaServerItem.server == server,
+            MediaServerItem.library.isnot(None)
+        ).distinct()]
+
+    @staticmethod
+    @db_update
+    def empty_servers(db: Session, servers: List[str]):
+        """
+        删除不在媒体服务器列表中的数据
+        """
+        db.query(MediaServerItem).filter(MediaServerItem.server.notin_(servers)).delete(synchronize_session=False)
+
     @staticmethod
     @db_update
     def empty(db: Session, server: Optional[str] = None):
@@ -1,3 +1,5 @@
+from typing import Dict, Tuple
+
 from sqlalchemy import Column, Integer, String, Sequence
 from sqlalchemy.orm import Session
 
@@ -39,3 +41,16 @@ class PluginData(Base):
     def get_plugin_data_by_plugin_id(db: Session, plugin_id: str):
         result = db.query(PluginData).filter(PluginData.plugin_id == plugin_id).all()
         return list(result)
+
+    @staticmethod
+    @db_update
+    def batch_save(db: Session, items: Dict[Tuple[str, str], str]):
+        """
+        在一个事务中批量写入插件数据，key为(plugin_id, key)
+        """
+        for (plugin_id, key), value in items.items():
+            data = db.query(PluginData).filter(PluginData.plugin_id == plugin_id, PluginData.key == key).first()
+            if data:
+                data.value = value
+            else:
+                db.add(PluginData(plugin_id=plugin_id, key=key, value=value))
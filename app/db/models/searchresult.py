@@ -0,0 +1,146 @@
+from typing import List, Optional
+
+from sqlalchemy import Column, Integer, String, Sequence, Float, or_
+from sqlalchemy.orm import Session
+
+from app.db import db_query, db_update, Base
+
+
+class SearchRecord(Base):
+    """
+    搜索记录表，每次搜索一条，媒体信息只保存一份
+    """
+    id = Column(Integer, Sequence('id'), primary_key=True, index=True)
+    # 搜索ID
+    search_id = Column(String, index=True, nullable=False)
+    # 用户
+    userid = Column(String, index=True)
+    # 搜索关键词
+    keyword = Column(String)
+    # 媒体信息，以JSON存储
+    media_info = Column(String)
+    # 结果数
+    total = Column(Integer, default=0)
+    # 搜索时间
+    reg_time = Column(String, index=True)
+
+    @staticmethod
+    @db_query
+    def get_last(db: Session, userid: str = None):
+        return db.query(SearchRecord).filter(
+            SearchRecord.userid == (userid or "")
+        ).order_by(SearchRecord.reg_time.desc(), SearchRecord.id.desc()).first()
+
+    @staticmethod
+    @db_query
+    def get_by_search_id(db: Session, search_id: str, userid: str = None):
+        return db.query(SearchRecord).filter(
+            SearchRecord.search_id == search_id,
+            SearchRecord.userid == (userid or "")
+        ).first()
+
+    @staticmethod
+    @db_update
+    def save(db: Session, record: "SearchRecord", results: List["SearchResult"]):
+        """
+        在一个事务中保存搜索记录及结果
+        """
+        db.add(record)
+        db.add_all(results)
+
+    @staticmethod
+    @db_update
+    def expire(db: Session, before: str, userid: str = None, keep: int = 0):
+        """
+        删除过期的搜索记录及结果，同时只保留用户最近的keep次搜索
+        """
+        expired = [r.search_id for r in db.query(SearchRecord.search_id).filter(SearchRecord.reg_time < before)]
+        if keep:
+            expired.extend([r.search_id for r in db.query(SearchRecord.search_id).filter(
+                SearchRecord.userid == (userid or "")
+            ).order_by(SearchRecord.reg_time.desc(), SearchRecord.id.desc()).offset(keep)])
+        if not expired:
+            return
+        db.query(SearchResult).filter(SearchResult.search_id.in_(expired)).delete(synchronize_session=False)
+        db.query(SearchRecord).filter(SearchRecord.search_id.in_(expired)).delete(synchronize_session=False)
+
+
+class SearchResult(Base):
+    """
+    搜索结果表，每个资源一条，常用于排序、过滤的字段单独成列
+    """
+    id = Column(Integer, Sequence('id'), primary_key=True, index=True)
+    # 搜索ID
+    search_id = Column(String, index=True, nullable=False)
+    # 原始排序
+    position = Column(Integer, default=0)
+    # 站点ID
+    site = Column(Integer)
+    # 站点名称
+    site_name = Column(String)
+    # 站点优先级
+    site_order = Column(Integer, default=0)
+    # 种子名称
+    title = Column(String)
+    # 种子副标题
+    description = Column(String)
+    # 种子大小
+    size = Column(Float, default=0)
+    # 做种者
+    seeders = Column(Integer, default=0)
+    # 下载者
+    peers = Column(Integer, default=0)
+    # 发布时间
+    pubdate = Column(String)
+    # 下载因子
+    downloadvolumefactor = Column(Float)
+    # 识别的季
+    season = Column(Integer)
+    # 识别的分辨率
+    resource_pix = Column(String)
+    # 识别元数据，以JSON存储
+    meta_info = Column(String)
+    # 种子信息，以JSON存储，不含站点Cookie/UA
+    torrent_info = Column(String)
+    # 与搜索记录不同的媒体信息，以JSON存储
+    media_info = Column(String)
+
+    # 支持排序的字段
+    SORT_FIELDS = ("position", "site_order", "size", "seeders", "peers", "pubdate")
+
+    @staticmethod
+    def __filter(query, search_id: str, sites: Optional[List[int]] = None, free: bool = None,
+                 resource_pix: str = None, season: int = None, keyword: str = None):
+        query = query.filter(SearchResult.search_id == search_id)
+        if sites:
+            query = query.filter(SearchResult.site.in_(sites))
+        if free is not None:
+            if free:
+                query = query.filter(SearchResult.downloadvolumefactor == 0)
+            else:
+                query = query.filter(or_(SearchResult.downloadvolumefactor.is_(None),
+                                         SearchResult.downloadvolumefactor > 0))
+        if resource_pix:
+            query = query.filter(SearchResult.resource_pix == resource_pix)
+        if season is not None:
+            query = query.filter(SearchResult.season == season)
+        if keyword:
+            query = query.filter(or_(SearchResult.title.like(f'%{keyword}%'),
+                                     SearchResult.description.like(f'%{keyword}%')))
+        return query
+
+    @staticmethod
+    @db_query
+    def list_by_page(db: Session, search_id: str, page: int = 1, count: int = 0,
+                     sort: str = None, desc: bool = False, **kwargs):
+        query = SearchResult.__filter(db.query(SearchResult), search_id, **kwargs)
+        field = getattr(SearchResult, sort if sort in SearchResult.SORT_FIELDS else "position")
+        query = query.order_by(field.desc() if desc else field.asc(), SearchResult.position.asc())
+        if count:
+            query = query.offset((max(page, 1) - 1) * count).limit(count)
+        return list(query.all())
+
+    @staticmethod
+    @db_query
+    def count(db: Session, search_id: str, **kwargs) -> int:
+        return SearchResult.__filter(db.query(SearchResult), search_id, **kwargs).count()
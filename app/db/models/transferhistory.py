@@ -1,9 +1,9 @@
 import time
 
-from sqlalchemy import Column, Integer, String, Sequence, Boolean, func, or_
+from sqlalchemy import Column, Integer, String, Sequence, Boolean, func, or_, text
 from sqlalchemy.orm import Session
 
-from app.db import db_query, db_update, Base
+from app.db import db_query, db_update, fts_match, Base
 
 
 class TransferHistory(Base):
@@ -56,13 +56,24 @@ class TransferHistory(Base):
                 TransferHistory.date.desc()
             ).offset((page - 1) * count).limit(count).all()
         else:
-            result = db.query(TransferHistory).filter(or_(
-                TransferHistory.title.like(f'%{title}%'),
-                TransferHistory.src.like(f'%{title}%'),
-                TransferHistory.dest.like(f'%{title}%'),
-            )).order_by(
-                TransferHistory.date.desc()
-            ).offset((page - 1) * count).limit(count).all()
+            match = fts_match(db, "transferhistory_fts", title)
+            if match:
+                # 全文索引按相关度排序
+                result = db.query(TransferHistory).from_statement(text(
+                    "SELECT transferhistory.* FROM transferhistory_fts "
+                    "JOIN transferhistory ON transferhistory.id = transferhistory_fts.rowid "
+                    "WHERE transferhistory_fts MATCH :match "
+                    "ORDER BY transferhistory_fts.rank, transferhistory.date DESC "
+                    "LIMIT :count OFFSET :offset"
+                )).params(match=match, count=count, offset=(page - 1) * count).all()
+            else:
+                result = db.query(TransferHistory).filter(or_(
+                    TransferHistory.title.like(f'%{title}%'),
+                    TransferHistory.src.like(f'%{title}%'),
+                    TransferHistory.dest.like(f'%{title}%'),
+                )).order_by(
+                    TransferHistory.date.desc()
+                ).offset((page - 1) * count).limit(count).all()
         return list(result)
 
     @staticmethod
@@ -128,6 +139,10 @@ class TransferHistory(Base):
         if status is not None:
             return db.query(func.count(TransferHistory.id)).filter(TransferHistory.status == status).first()[0]
         else:
+            match = fts_match(db, "transferhistory_fts", title)
+            if match:
+                return db.execute(text("SELECT count(*) FROM transferhistory_fts "
+                                       "WHERE transferhistory_fts MATCH :match"), {"match": match}).scalar()
             return db.query(func.count(TransferHistory.id)).filter(or_(
                 TransferHistory.title.like(f'%{title}%'),
                 TransferHistory.src.like(f'%{title}%'),
@@ -0,0 +1,30 @@
+import time
+
+from sqlalchemy import Column, Integer, String, Sequence
+from sqlalchemy.orm import Session
+
+from app.db import db_query, Base
+
+
+class TransferStatistic(Base):
+    """
+    文件整理按日统计，由转移历史表的触发器维护
+    """
+    id = Column(Integer, Sequence('id'), primary_key=True, index=True)
+    # 日期 YYYY-MM-DD
+    date = Column(String, unique=True, index=True)
+    # 整理数量
+    total = Column(Integer, default=0)
+
+    @staticmethod
+    @db_query
+    def statistic(db: Session, days: int = 7):
+        """
+        统计最近days天的整理数量，按日期返回每日数量
+        """
+        start_date = time.strftime("%Y-%m-%d", time.localtime(time.time() - 86400 * days))
+        result = db.query(TransferStatistic.date, TransferStatistic.total).filter(
+            TransferStatistic.date >= start_date,
+            TransferStatistic.total > 0
+        ).order_by(TransferStatistic.date).all()
+        return list(result)
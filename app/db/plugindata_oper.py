@@ -1,8 +1,9 @@
 import json
-from typing import Any
+from typing import Any, Optional
 
 from app.db import DbOper
 from app.db.models.plugindata import PluginData
+from app.db.writecache import WriteBehindCache
 from app.utils.object import ObjectUtils
 
 
@@ -10,23 +11,29 @@ class PluginDataOper(DbOper):
     """
     插件数据管理
     """
+    # 插件数据读写缓存，所有实例共享
+    _cache = WriteBehindCache(name="plugindata",
+                              flush_func=lambda items: PluginData.batch_save(None, items))
 
     def save(self, plugin_id: str, key: str, value: Any):
         """
-        保存插件数据
+        保存插件数据，写入缓存后批量提交到数据库
         :param plugin_id: 插件id
         :param key: 数据key
         :param value: 数据值
         """
         if ObjectUtils.is_obj(value):
             value = json.dumps(value)
-        plugin = PluginData.get_plugin_data_by_key(self._db, plugin_id, key)
-        if plugin:
-            plugin.update(self._db, {
-                "value": value
-            })
-        else:
-            PluginData(plugin_id=plugin_id, key=key, value=value).create(self._db)
+        self._cache.set((plugin_id, key), value)
+
+    def __load(self, plugin_id: str, key: str) -> Optional[str]:
+        """
+        从数据库加载插件数据
+        """
+        data = PluginData.get_plugin_data_by_key(self._db, plugin_id, key)
+        if not data:
+            return None
+        return data.value
 
     def get_data(self, plugin_id: str, key: str = None) -> Any:
         """
@@ -35,13 +42,14 @@ class PluginDataOper(DbOper):
         :param key: 数据key
         """
         if key:
-            data = PluginData.get_plugin_data_by_key(self._db, plugin_id, key)
-            if not data:
+            value = self._cache.get((plugin_id, key), lambda: self.__load(plugin_id, key))
+            if value is None:
                 return None
-            if ObjectUtils.is_obj(data.value):
-                return json.loads(data.value)
-            return data.value
+            if ObjectUtils.is_obj(value):
+                return json.loads(value)
+            return value
         else:
+            self._cache.flush()
             return PluginData.get_plugin_data(self._db, plugin_id)
 
     def del_data(self, plugin_id: str, key: str = None) -> Any:
@@ -51,14 +59,17 @@ class PluginDataOper(DbOper):
         :param key: 数据key
         """
         if key:
+            self._cache.discard(lambda k: k == (plugin_id, key))
             PluginData.del_plugin_data_by_key(self._db, plugin_id, key)
         else:
+            self._cache.discard(lambda k: k[0] == plugin_id)
             PluginData.del_plugin_data(self._db, plugin_id)
 
     def truncate(self):
         """
         清空插件数据
         """
+        self._cache.clear()
         PluginData.truncate(self._db)
 
     def get_data_all(self, plugin_id: str) -> Any:
@@ -66,4 +77,23 @@ class PluginDataOper(DbOper):
         获取插件所有数据
         :param plugin_id: 插件id
         """
+        self._cache.flush()
         return PluginData.get_plugin_data_by_plugin_id(self._db, plugin_id)
+
+    def flush(self):
+        """
+        立即提交缓存中的插件数据
+        """
+        self._cache.flush()
+
+    def stop(self):
+        """
+        停止定时提交并提交剩余的插件数据
+        """
+        self._cache.stop()
+
+    def metrics(self) -> dict:
+        """
+        插件数据缓存统计
+        """
+        return self._cache.metrics()
@@ -0,0 +1,130 @@
+import json
+import time
+import uuid
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.context import Context, TorrentInfo
+from app.db import DbOper
+from app.db.models.searchresult import SearchRecord, SearchResult
+from app.db.site_oper import SiteOper
+from app.utils.string import StringUtils
+
+
+class SearchResultOper(DbOper):
+    """
+    搜索结果管理
+    """
+    # 搜索结果保存时间（秒）
+    _ttl = 24 * 3600
+    # 每个用户保留的搜索次数
+    _keep = 5
+    # 不保存到结果中的字段，站点Cookie/UA读取时从站点信息中补充，促销信息读取时重新计算
+    _site_fields = ("site_cookie", "site_ua", "volume_factor", "freedate_diff")
+
+    def save(self, contexts: List[Context], keyword: str = None, userid: str = None) -> str:
+        """
+        保存一次搜索的结果
+        :param contexts: 搜索结果
+        :param keyword: 搜索关键词
+        :param userid: 用户
+        :return: 搜索ID
+        """
+        search_id = uuid.uuid4().hex
+        # 同一次搜索的媒体信息只保存一份
+        mediainfo = next((c.media_info for c in contexts if c.media_info), None)
+        results = []
+        for position, context in enumerate(contexts):
+            torrent, meta = context.torrent_info, context.meta_info
+            torrent_dict = torrent.to_dict() if torrent else {}
+            for key in self._site_fields:
+                torrent_dict.pop(key, None)
+            results.append(SearchResult(
+                search_id=search_id,
+                position=position,
+                site=torrent.site if torrent else None,
+                site_name=torrent.site_name if torrent else None,
+                site_order=(torrent.site_order or 0) if torrent else 0,
+                title=torrent.title if torrent else None,
+                description=torrent.description if torrent else None,
+                size=(torrent.size or 0) if torrent else 0,
+                seeders=(torrent.seeders or 0) if torrent else 0,
+                peers=(torrent.peers or 0) if torrent else 0,
+                pubdate=torrent.pubdate if torrent else None,
+                downloadvolumefactor=torrent.downloadvolumefactor if torrent else None,
+                season=meta.begin_season if meta else None,
+                resource_pix=meta.resource_pix if meta else None,
+                meta_info=json.dumps(meta.to_dict()) if meta else None,
+                torrent_info=json.dumps(torrent_dict),
+                media_info=json.dumps(context.media_info.to_dict())
+                if context.media_info and context.media_info is not mediainfo else None
+            ))
+        record = SearchRecord(
+            search_id=search_id,
+            userid=userid or "",
+            keyword=keyword,
+            media_info=json.dumps(mediainfo.to_dict()) if mediainfo else None,
+            total=len(results),
+            reg_time=time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+        )
+        SearchRecord.save(self._db, record, results)
+        # 清理过期及超出数量的搜索
+        before = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(time.time() - self._ttl))
+        SearchRecord.expire(self._db, before=before, userid=userid, keep=self._keep)
+        return search_id
+
+    def get_record(self, search_id: str = None, userid: str = None) -> Optional[SearchRecord]:
+        """
+        获取用户的搜索记录，未指定搜索ID时返回用户最近一次搜索
+        """
+        if search_id:
+            return SearchRecord.get_by_search_id(self._db, search_id, userid)
+        return SearchRecord.get_last(self._db, userid)
+
+    def count(self, search_id: str, **kwargs) -> int:
+        """
+        统计符合过滤条件的搜索结果数
+        """
+        return SearchResult.count(self._db, search_id, **kwargs)
+
+    def list(self, search_id: str, userid: str = None, page: int = 1, count: int = 0,
+             sort: str = None, desc: bool = False, **kwargs) -> Tuple[int, List[dict]]:
+        """
+        分页查询搜索结果，返回总数和上下文字典列表
+        :param search_id: 搜索ID
+        :param userid: 用户，只能查询自己的搜索结果
+        :param page: 页码
+        :param count: 每页数量，为0时返回全部
+        :param sort: 排序字段
+        :param desc: 是否倒序
+        :param kwargs: 过滤条件：sites、free、resource_pix、season、keyword
+        """
+        record = SearchRecord.get_by_search_id(self._db, search_id, userid)
+        if not record:
+            return 0, []
+        total = SearchResult.count(self._db, search_id, **kwargs) if kwargs or count else None
+        rows = SearchResult.list_by_page(self._db, search_id, page=page, count=count,
+                                         sort=sort, desc=desc, **kwargs)
+        media_info = json.loads(record.media_info) if record.media_info else None
+        sites = {}
+        results = []
+        for row in rows:
+            torrent_info = json.loads(row.torrent_info) if row.torrent_info else {}
+            # 补充站点信息
+            if row.site and row.site not in sites:
+                site = SiteOper(self._db).get(row.site)
+                sites[row.site] = {
+                    "site_cookie": site.cookie,
+                    "site_ua": site.ua or settings.USER_AGENT
+                } if site else {}
+            torrent_info.update(sites.get(row.site) or {})
+            torrent_info["volume_factor"] = TorrentInfo.get_free_string(torrent_info.get("uploadvolumefactor"),
+                                                                        torrent_info.get("downloadvolumefactor"))
+            torrent_info["freedate_diff"] = StringUtils.diff_time_str(torrent_info.get("freedate")) \
+                if torrent_info.get("freedate") else ""
+            results.append({
+                "meta_info": json.loads(row.meta_info) if row.meta_info else None,
+                "torrent_info": torrent_info,
+                "media_info": json.loads(row.media_info) if row.media_info else media_info
+            })
+        return total if total is not None else len(results), results
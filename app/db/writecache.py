@@ -0,0 +1,165 @@
+import threading
+import traceback
+from typing import Any, Callable, Dict, Hashable
+
+from cachetools import LRUCache
+
+from app.log import logger
+
+
+class WriteBehindCache:
+    """
+    数据库读穿透/写回缓存
+    读取时优先命中内存，写入时只标记脏数据，同一Key的多次写入合并后按间隔批量提交，停止时提交剩余数据
+    """
+
+    def __init__(self, name: str, flush_func: Callable[[Dict[Hashable, Any]], None],
+                 maxsize: int = 1024, interval: int = 10):
+        """
+        :param name: 缓存名称
+        :param flush_func: 批量提交函数，入参为 {key: value}，需要在一个事务中完成写入
+        :param maxsize: 已提交数据的最大缓存条数，为0时只缓存写入
+        :param interval: 提交间隔（秒）
+        """
+        self._name = name
+        self._flush_func = flush_func
+        self._interval = interval
+        # 已与数据库一致的数据
+        self._clean = LRUCache(maxsize=maxsize)
+        # 待提交的数据
+        self._dirty: Dict[Hashable, Any] = {}
+        # 正在提交的数据
+        self._flushing: Dict[Hashable, Any] = {}
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._event = threading.Event()
+        self._thread = None
+        # 统计
+        self._stats = {
+            "reads": 0,
+            "hits": 0,
+            "writes": 0,
+            "db_writes": 0,
+            "flushes": 0,
+            "errors": 0
+        }
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        读取数据，未命中时通过loader从数据库加载并缓存
+        """
+        with self._lock:
+            self._stats["reads"] += 1
+            for cache in (self._dirty, self._flushing, self._clean):
+                if key in cache:
+                    self._stats["hits"] += 1
+                    return cache[key]
+        value = loader()
+        with self._lock:
+            # 加载期间有新的写入时以写入为准
+            if key not in self._dirty and key not in self._flushing:
+                self.__set_clean(key, value)
+        return value
+
+    def __set_clean(self, key: Hashable, value: Any):
+        """
+        缓存已与数据库一致的数据
+        """
+        if self._clean.maxsize:
+            self._clean[key] = value
+
+    def set(self, key: Hashable, value: Any):
+        """
+        写入数据，只标记为脏数据，等待批量提交
+        """
+        with self._lock:
+            self._stats["writes"] += 1
+            self._dirty[key] = value
+            self._clean.pop(key, None)
+            if not self._thread:
+                self._event = threading.Event()
+                self._thread = threading.Thread(target=self.__run, args=(self._event,),
+                                                name=f"{self._name}-flush", daemon=True)
+                self._thread.start()
+
+    def is_dirty(self, key: Hashable) -> bool:
+        """
+        是否存在未提交的写入
+        """
+        with self._lock:
+            return key in self._dirty or key in self._flushing
+
+    def discard(self, predicate: Callable[[Hashable], bool]):
+        """
+        丢弃满足条件的Key的缓存及未提交写入，用于直接在数据库中删除数据前，会等待正在进行的提交完成
+        """
+        with self._flush_lock, self._lock:
+            for cache in (self._dirty, self._clean):
+                for key in [k for k in cache.keys() if predicate(k)]:
+                    cache.pop(key, None)
+
+    def clear(self):
+        """
+        清空缓存及未提交写入
+        """
+        self.discard(lambda _: True)
+
+    def flush(self):
+        """
+        立即提交所有脏数据
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                self._flushing, self._dirty = self._dirty, {}
+            try:
+                self._flush_func(dict(self._flushing))
+            except Exception as err:
+                logger.error(f"{self._name} 缓存写入数据库失败：{str(err)} - {traceback.format_exc()}")
+                with self._lock:
+                    self._stats["errors"] += 1
+                    # 放回待提交队列，保留期间更新的值
+                    for key, value in self._flushing.items():
+                        self._dirty.setdefault(key, value)
+                    self._flushing = {}
+                return
+            with self._lock:
+                self._stats["flushes"] += 1
+                self._stats["db_writes"] += len(self._flushing)
+                for key, value in self._flushing.items():
+                    if key not in self._dirty:
+                        self.__set_clean(key, value)
+                self._flushing = {}
+
+    def __run(self, event: threading.Event):
+        """
+        定时提交
+        """
+        while not event.wait(self._interval):
+            self.flush()
+
+    def stop(self):
+        """
+        停止定时提交并提交剩余数据
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread:
+            self._event.set()
+            thread.join(timeout=self._interval)
+        self.flush()
+
+    def metrics(self) -> dict:
+        """
+        缓存统计：读取命中率、写入合并节省的数据库写入次数
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["name"] = self._name
+            stats["size"] = len(self._clean)
+            stats["dirty"] = len(self._dirty) + len(self._flushing)
+        stats["hit_rate"] = round(stats["hits"] / stats["reads"], 4) if stats["reads"] else 0
+        # 已处理的写入中被合并掉的次数
+        stats["writes_saved"] = max(stats["writes"] - stats["db_writes"] - stats["dirty"], 0)
+        return stats
@@ -0,0 +1,181 @@
+import json
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Set, Tuple, TypeVar
+
+from app.core.config import settings, global_vars
+from app.helper.progress import ProgressHelper
+from app.log import logger
+
+T = TypeVar("T")
+
+# 系统停止时未处理的项的结果
+_STOPPED = object()
+
+
+class BatchHelper:
+    """
+    批量任务并发执行
+    - 每类外部依赖（如TMDB、媒体服务器、文件系统）使用独立的并发上限
+    - 同一批次内相同键的调用只执行一次，其余调用等待并共用结果
+    - 单项出错只记录日志，不影响其它项
+    - 有进度键时按完成数更新进度；有名称时记录已完成的项，中断后再次执行时跳过
+    """
+
+    # 检查点有效期（秒），过期后重新执行全部
+    _checkpoint_ttl = 86400
+    # 检查点保存间隔（秒）
+    _checkpoint_interval = 2
+
+    def __init__(self, name: str = None, workers: int = 8, limits: Dict[str, int] = None,
+                 progress_key: str = None):
+        """
+        :param name: 批次名称，设置后启用检查点
+        :param workers: 并发执行的项数
+        :param limits: 各类依赖的并发上限，{依赖名称: 上限}
+        :param progress_key: 进度键
+        """
+        self._name = name
+        self._workers = max(workers, 1)
+        self._limits = {key: threading.BoundedSemaphore(max(value, 1)) for key, value in (limits or {}).items()}
+        self._progress_key = progress_key
+        self._progress = ProgressHelper() if progress_key else None
+        # 批次内相同键的调用结果
+        self._onces: Dict[Tuple[str, Hashable], Future] = {}
+        self._lock = threading.Lock()
+        self._checkpoint = settings.TEMP_PATH / f"__batch_{name}__.json" if name else None
+
+    @contextmanager
+    def limit(self, resource: str):
+        """
+        占用一个依赖的并发名额，未设置上限的依赖不限制
+        """
+        semaphore = self._limits.get(resource)
+        if not semaphore:
+            yield
+            return
+        with semaphore:
+            yield
+
+    def call(self, resource: str, func: Callable, *args, **kwargs) -> Any:
+        """
+        在依赖的并发上限内调用
+        """
+        with self.limit(resource):
+            return func(*args, **kwargs)
+
+    def once(self, resource: str, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        """
+        在依赖的并发上限内调用，批次内相同键只调用一次，出错时其它等待的调用同样抛出
+        """
+        with self._lock:
+            future = self._onces.get((resource, key))
+            owner = future is None
+            if owner:
+                future = self._onces[(resource, key)] = Future()
+        if owner:
+            try:
+                future.set_result(self.call(resource, func, *args, **kwargs))
+            except Exception as err:
+                future.set_exception(err)
+        return future.result()
+
+    def __load_done(self) -> Tuple[Set[str], float]:
+        """
+        读取上次中断时已完成的项
+        :return: 已完成的项, 上次开始时间
+        """
+        if not self._checkpoint or not self._checkpoint.exists():
+            return set(), 0
+        try:
+            data = json.loads(self._checkpoint.read_text(encoding="utf-8"))
+            if time.time() - data.get("time", 0) > self._checkpoint_ttl:
+                return set(), 0
+            return set(data.get("done") or []), data.get("time", 0)
+        except Exception as err:
+            logger.debug(f"读取批量任务 {self._name} 检查点失败：{str(err)}")
+            return set(), 0
+
+    def __save_done(self, done: Set[str], started: float):
+        if not self._checkpoint:
+            return
+        try:
+            self._checkpoint.write_text(json.dumps({"time": started, "done": sorted(done)}), encoding="utf-8")
+        except Exception as err:
+            logger.debug(f"保存批量任务 {self._name} 检查点失败：{str(err)}")
+
+    def run(self, items: Iterable[T], handler: Callable[[T], Any],
+            key: Callable[[T], str] = None, text: Callable[[T], str] = None) -> List[Tuple[T, Any]]:
+        """
+        并发处理所有项
+        :param items: 待处理的项
+        :param handler: 处理函数
+        :param key: 项的唯一标识，用于检查点
+        :param text: 进度文本
+        :return: 成功处理的 [(项, 结果)]，按原顺序
+        """
+        items = list(items)
+        done, started = self.__load_done() if key else (set(), 0)
+        if done:
+            skipped = len(items)
+            items = [item for item in items if str(key(item)) not in done]
+            skipped -= len(items)
+            logger.info(f"{self._name} 继续上次中断的处理，跳过已完成的 {skipped} 项")
+        else:
+            started = time.time()
+        total = len(items)
+
+        def __handle(item: T) -> Any:
+            # 系统停止时不再处理剩余的项
+            if global_vars.is_system_stopped():
+                return _STOPPED
+            return handler(item)
+
+        if self._progress:
+            self._progress.start(self._progress_key)
+        results: Dict[int, Any] = {}
+        stopped = False
+        finished = 0
+        saved = time.time()
+        try:
+            with ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix=self._name or "batch") as executor:
+                futures = {executor.submit(__handle, item): index for index, item in enumerate(items)}
+                for future in as_completed(futures):
+                    index = futures[future]
+                    item = items[index]
+                    finished += 1
+                    try:
+                        result = future.result()
+                        if result is _STOPPED:
+                            stopped = True
+                            continue
+                        results[index] = result
+                        if key:
+                            done.add(str(key(item)))
+                    except Exception as err:
+                        logger.error(f"{self._name or '批量任务'} 处理出错：{str(err)} - {traceback.format_exc()}")
+                    if self._progress:
+                        self._progress.update(self._progress_key, value=finished * 100 / total,
+                                              text=f"{text(item) if text else ''} {finished}/{total}".strip())
+                    if key and time.time() - saved > self._checkpoint_interval:
+                        self.__save_done(done, started)
+                        saved = time.time()
+        except BaseException:
+            # 中断时保存进度，下次继续
+            if key:
+                self.__save_done(done, started)
+            raise
+        finally:
+            if self._progress:
+                self._progress.end(self._progress_key)
+        if stopped:
+            # 系统停止，保存进度，下次继续
+            if key:
+                self.__save_done(done, started)
+        elif self._checkpoint:
+            # 全部完成，清除检查点
+            self._checkpoint.unlink(missing_ok=True)
+        return [(items[index], results[index]) for index in sorted(results)]
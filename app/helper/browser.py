@@ -1,19 +1,21 @@
-from typing import Callable, Any
+from typing import Callable, Any, TYPE_CHECKING
 
-from playwright.sync_api import sync_playwright, Page
-from cf_clearance import sync_cf_retry, sync_stealth
 from app.log import logger
 
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
+
 
 class PlaywrightHelper:
     def __init__(self, browser_type="chromium"):
         self.browser_type = browser_type
 
     @staticmethod
-    def __pass_cloudflare(url: str, page: Page) -> bool:
+    def __pass_cloudflare(url: str, page: "Page") -> bool:
         """
         尝试跳过cloudfare验证
         """
+        from cf_clearance import sync_cf_retry, sync_stealth
         sync_stealth(page, pure=True)
         page.goto(url)
         return sync_cf_retry(page)
@@ -36,6 +38,8 @@ class PlaywrightHelper:
         :param timeout: 超时时间
         """
         try:
+            # 浏览器仿真不常用，使用时才导入
+            from playwright.sync_api import sync_playwright
             with sync_playwright() as playwright:
                 browser = playwright[self.browser_type].launch(headless=headless)
                 context = browser.new_context(user_agent=ua, proxy=proxies)
@@ -73,6 +77,7 @@ class PlaywrightHelper:
         """
         source = ""
         try:
+            from playwright.sync_api import sync_playwright
             with sync_playwright() as playwright:
                 browser = playwright[self.browser_type].launch(headless=headless)
                 context = browser.new_context(user_agent=ua, proxy=proxies)
@@ -1,8 +1,7 @@
 import base64
-from typing import Tuple, Optional
+from typing import Tuple, Optional, TYPE_CHECKING
 
 from lxml import etree
-from playwright.sync_api import Page
 
 from app.helper.browser import PlaywrightHelper
 from app.helper.ocr import OcrHelper
@@ -12,6 +11,9 @@ from app.utils.http import RequestUtils
 from app.utils.site import SiteUtils
 from app.utils.string import StringUtils
 
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
+
 
 class CookieHelper:
     # 站点登录界面元素XPATH
@@ -85,7 +87,7 @@ class CookieHelper:
         :return: cookie、ua、message
         """
 
-        def __page_handler(page: Page) -> Tuple[Optional[str], Optional[str], str]:
+        def __page_handler(page: "Page") -> Tuple[Optional[str], Optional[str], str]:
             """
             页面处理
             :return: Cookie和UA
@@ -0,0 +1,452 @@
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email.utils import formatdate
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import urlparse
+
+from PIL import Image
+from requests import RequestException
+
+from app.core.config import settings
+from app.log import logger
+from app.utils.http import RequestUtils
+from app.utils.singleton import Singleton
+
+
+class CachedImage(NamedTuple):
+    """
+    图片代理缓存的图片
+    """
+    # 图片内容
+    content: bytes
+    # 内容类型
+    content_type: str
+    # 本站生成的ETag
+    etag: str
+    # 最后修改时间（HTTP日期格式）
+    last_modified: str
+
+
+class ImageHelper(metaclass=Singleton):
+    """
+    图片缓存：
+    1、刮削图片按图片地址（TMDB图片即路径和尺寸）内容寻址保存在本地，同一图片只下载一次，再硬链接或复制到各个媒体库目录
+    2、图片代理的磁盘缓存，支持条件请求重新验证、缩略图及按最近使用淘汰
+    """
+
+    # 缓存图片多少天未使用后清理
+    _expire_days = 7
+    # 清理间隔（秒）
+    _clean_interval = 86400
+    # 下载重试次数
+    _tries = 3
+    # 图片代理缓存在上游未指定有效期时的有效期（秒）
+    _proxy_max_age = 7 * 86400
+    # 图片代理支持的缩略图宽度
+    _thumb_widths = (100, 200, 300, 500, 780, 1280)
+    # 图片代理缓存的最大图片数（含缩略图）
+    _proxy_max_files = 50000
+
+    def __init__(self):
+        self._cache_path = settings.TEMP_PATH / "images"
+        self._proxy_path = settings.TEMP_PATH / "imgproxy"
+        # 图片代理缓存占用空间及图片数，首次使用时统计
+        self._proxy_size: Optional[int] = None
+        self._proxy_count = 0
+        self._pool = ThreadPoolExecutor(max_workers=max(settings.SCRAP_IMAGE_THREADS, 1),
+                                        thread_name_prefix="image")
+        # 同一图片同时只下载一次，锁按使用中的线程数计数，无线程使用时移除
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock_refs: Dict[str, int] = {}
+        self._locks_lock = threading.Lock()
+        # 同时只有一个线程扫描及淘汰图片代理缓存
+        self._evict_lock = threading.Lock()
+        self._last_clean = time.time()
+
+    @staticmethod
+    def tmdb_image_size(image_type: str) -> str:
+        """
+        获取配置的TMDB图片尺寸，未配置时为original
+        :param image_type: 图片类型，如 poster/backdrop/logo/still/profile
+        """
+        for item in (settings.SCRAP_IMAGE_SIZE or "").split(","):
+            if ":" not in item:
+                continue
+            name, size = item.split(":", 1)
+            if name.strip() == image_type and size.strip():
+                return size.strip()
+        return "original"
+
+    @staticmethod
+    def tmdb_image_url(image: str, image_type: str) -> str:
+        """
+        按配置的尺寸生成TMDB图片地址
+        :param image: TMDB图片路径（/xxx.jpg）或完整地址，非TMDB图片地址原样返回
+        :param image_type: 图片类型
+        """
+        if not image:
+            return image
+        size = ImageHelper.tmdb_image_size(image_type)
+        if image.startswith("/"):
+            return f"https://{settings.TMDB_IMAGE_DOMAIN}/t/p/{size}{image}"
+        if settings.TMDB_IMAGE_DOMAIN in image:
+            return re.sub(r"/t/p/[^/]+/", f"/t/p/{size}/", image, count=1)
+        return image
+
+    def cache_file(self, url: str) -> Path:
+        """
+        图片地址对应的缓存文件
+        """
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        suffix = Path(urlparse(url).path).suffix[:5] or ".jpg"
+        return self._cache_path / key[:2] / f"{key}{suffix}"
+
+    def fetch(self, url: str, proxies: dict = None) -> Optional[Path]:
+        """
+        获取图片的缓存文件，未缓存时下载，失败时重试
+        :param url: 图片地址
+        :param proxies: 代理
+        :return: 缓存文件路径，下载失败时返回None
+        """
+        if not url:
+            return None
+        cache_file = self.cache_file(url)
+        with self.__file_lock(str(cache_file)):
+            if cache_file.exists():
+                # 记录使用时间用于过期清理，缓存图片可能硬链接到了媒体库，不能修改其时间
+                self.__used_file(cache_file).touch()
+                return cache_file
+            return self.__download(url, cache_file, proxies)
+
+    @contextmanager
+    def __file_lock(self, key: str):
+        """
+        同一文件的操作加锁，等待中的线程也计入引用，没有线程使用时才移除锁
+        :param key: 文件路径
+        """
+        with self._locks_lock:
+            lock = self._locks.get(key)
+            if not lock:
+                lock = self._locks[key] = threading.Lock()
+            self._lock_refs[key] = self._lock_refs.get(key, 0) + 1
+        try:
+            with lock:
+                yield
+        finally:
+            with self._locks_lock:
+                self._lock_refs[key] -= 1
+                if not self._lock_refs[key]:
+                    self._lock_refs.pop(key)
+                    self._locks.pop(key)
+
+    @staticmethod
+    def __used_file(cache_file: Path) -> Path:
+        """
+        记录缓存图片最后使用时间的文件
+        """
+        return cache_file.with_name(f"{cache_file.name}.used")
+
+    def __last_used(self, cache_file: Path) -> float:
+        """
+        缓存图片的最后使用时间，未再使用过的为下载时间
+        """
+        try:
+            return self.__used_file(cache_file).stat().st_mtime
+        except OSError:
+            return cache_file.stat().st_mtime
+
+    def fetch_all(self, urls: List[str], proxies: dict = None) -> Dict[str, Optional[Path]]:
+        """
+        并发获取多张图片的缓存文件，并发数由 SCRAP_IMAGE_THREADS 限制
+        :param urls: 图片地址列表
+        :param proxies: 代理
+        :return: {图片地址: 缓存文件路径或None}
+        """
+        urls = list(dict.fromkeys(url for url in urls if url))
+        if not urls:
+            return {}
+        if len(urls) == 1:
+            return {urls[0]: self.fetch(urls[0], proxies)}
+        futures = {url: self._pool.submit(self.fetch, url, proxies) for url in urls}
+        return {url: future.result() for url, future in futures.items()}
+
+    def __download(self, url: str, cache_file: Path, proxies: dict = None) -> Optional[Path]:
+        """
+        下载图片到缓存，先写临时文件再改名，避免读到不完整的文件
+        """
+        delay = 1
+        for i in range(self._tries):
+            try:
+                logger.info(f"正在下载图片：{url} ...")
+                r = RequestUtils(proxies=proxies).get_res(url=url, raise_exception=True)
+                if r is None or r.status_code != 200 or not r.content:
+                    logger.warn(f"图片下载失败：{url}，状态码：{r.status_code if r is not None else '无响应'}")
+                    return None
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                temp_file = cache_file.with_name(f"{cache_file.name}.{uuid.uuid4().hex}.tmp")
+                temp_file.write_bytes(r.content)
+                os.replace(temp_file, cache_file)
+                return cache_file
+            except RequestException as err:
+                if i + 1 < self._tries:
+                    logger.warn(f"图片下载出错：{url} - {str(err)}，{delay} 秒后重试 ...")
+                    time.sleep(delay)
+                    delay *= 2
+                else:
+                    logger.error(f"图片下载出错：{url} - {str(err)}")
+            except Exception as err:
+                logger.error(f"图片保存出错：{url} - {str(err)}")
+                return None
+        return None
+
+    @staticmethod
+    def link(cache_file: Path, target: Path):
+        """
+        将缓存图片放到目标位置，优先硬链接，跨文件系统等无法硬链接时复制
+        """
+        if target.exists() or target.is_symlink():
+            target.unlink()
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(cache_file, target)
+        except OSError:
+            shutil.copyfile(cache_file, target)
+
+    def clean(self, force: bool = False):
+        """
+        清理过期未使用的缓存图片
+        :param force: 是否清理全部缓存
+        """
+        if not force and time.time() - self._last_clean < self._clean_interval:
+            return
+        self._last_clean = time.time()
+        if not self._cache_path.exists():
+            return
+        expire_time = time.time() - self._expire_days * 86400
+        count = 0
+        for cache_file in self._cache_path.glob("*/*"):
+            try:
+                if cache_file.suffix == ".used":
+                    # 图片已删除的使用记录
+                    if force or not cache_file.with_suffix("").exists():
+                        cache_file.unlink()
+                    continue
+                if force or self.__last_used(cache_file) < expire_time:
+                    cache_file.unlink()
+                    self.__used_file(cache_file).unlink(missing_ok=True)
+                    count += 1
+            except OSError:
+                continue
+        if count:
+            logger.info(f"已清理 {count} 个缓存图片")
+
+    def get_image(self, url: str, proxies: dict = None, width: int = None) -> Optional[CachedImage]:
+        """
+        图片代理：优先使用磁盘缓存，过期后携带ETag/Last-Modified向上游条件请求，
+        同一图片的并发请求只访问一次上游，缓存总大小超过 IMAGE_CACHE_SIZE 时按最近使用淘汰
+        :param url: 图片地址
+        :param proxies: 代理
+        :param width: 缩略图宽度，按支持的宽度向上取整，不超过原图宽度
+        :return: 图片，获取失败且无缓存时返回None
+        """
+        if not url:
+            return None
+        if not settings.IMAGE_CACHE_SIZE or not self.is_cacheable(url):
+            # 不缓存
+            r = RequestUtils(ua=settings.USER_AGENT, proxies=proxies).get_res(url=url)
+            if r is None or r.status_code != 200:
+                return None
+            return CachedImage(content=r.content,
+                               content_type=r.headers.get("Content-Type") or "image/jpeg",
+                               etag=f'"{hashlib.sha1(r.content).hexdigest()}"',
+                               last_modified=r.headers.get("Last-Modified") or formatdate(usegmt=True))
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        data_file = self._proxy_path / key[:2] / key
+        meta_file = data_file.with_suffix(".json")
+        with self.__file_lock(str(data_file)):
+            meta = self.__read_meta(meta_file) if data_file.exists() else None
+            if not meta or meta.get("expires", 0) < time.time():
+                meta = self.__refresh_image(url, data_file, meta_file, meta, proxies) or meta
+            if not meta or not data_file.exists():
+                return None
+            # 更新时间用于淘汰最久未使用的图片
+            os.utime(data_file)
+            if width:
+                return self.__get_thumb(data_file, meta, width)
+            return CachedImage(content=data_file.read_bytes(),
+                               content_type=meta.get("content_type") or "image/jpeg",
+                               etag=f'"{meta.get("digest")}"',
+                               last_modified=formatdate(meta.get("modified"), usegmt=True))
+
+    @staticmethod
+    def is_cacheable(url: str) -> bool:
+        """
+        图片地址是否允许缓存到磁盘，只缓存TMDB及 IMAGE_CACHE_DOMAINS 中的图片域名，避免任意地址写入磁盘
+        """
+        host = (urlparse(url).hostname or "").lower()
+        if not host:
+            return False
+        domains = [settings.TMDB_IMAGE_DOMAIN] + (settings.IMAGE_CACHE_DOMAINS or "").split(",")
+        for domain in domains:
+            domain = domain.strip().lower()
+            if domain and (host == domain or host.endswith(f".{domain}")):
+                return True
+        return False
+
+    @staticmethod
+    def __read_meta(meta_file: Path) -> Optional[dict]:
+        """
+        读取缓存图片的元数据
+        """
+        try:
+            return json.loads(meta_file.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def __refresh_image(self, url: str, data_file: Path, meta_file: Path,
+                        meta: Optional[dict], proxies: dict = None) -> Optional[dict]:
+        """
+        从上游获取图片，有缓存时条件请求，未变化时只延长有效期
+        :return: 新的元数据，上游获取失败时返回None（继续使用过期缓存）
+        """
+        headers = {"User-Agent": settings.USER_AGENT}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta.get("etag")
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta.get("last_modified")
+        r = RequestUtils(headers=headers, proxies=proxies).get_res(url=url)
+        if r is None:
+            return None
+        if r.status_code == 304 and meta:
+            meta["expires"] = time.time() + self.__max_age(r.headers.get("Cache-Control"))
+            meta_file.write_text(json.dumps(meta))
+            return meta
+        if r.status_code != 200 or not r.content:
+            return None
+        content_type = r.headers.get("Content-Type") or "image/jpeg"
+        if not content_type.startswith("image/"):
+            logger.warn(f"图片代理地址返回的不是图片：{url}，类型：{content_type}")
+            return None
+        old_size = data_file.stat().st_size if data_file.exists() else 0
+        meta = {
+            "url": url,
+            "content_type": content_type,
+            "etag": r.headers.get("ETag"),
+            "last_modified": r.headers.get("Last-Modified"),
+            "digest": hashlib.sha1(r.content).hexdigest(),
+            "modified": time.time(),
+            "expires": time.time() + self.__max_age(r.headers.get("Cache-Control"))
+        }
+        data_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = data_file.with_name(f"{data_file.name}.{uuid.uuid4().hex}.tmp")
+        temp_file.write_bytes(r.content)
+        os.replace(temp_file, data_file)
+        meta_file.write_text(json.dumps(meta))
+        # 原图变化后删除旧的缩略图
+        for thumb_file in data_file.parent.glob(f"{data_file.name}_w*"):
+            thumb_file.unlink(missing_ok=True)
+        self.__evict(len(r.content) - old_size, 0 if old_size else 1)
+        return meta
+
+    def __max_age(self, cache_control: Optional[str]) -> int:
+        """
+        按上游Cache-Control计算有效期，未指定或不允许缓存时使用默认有效期
+        """
+        match = re.search(r"max-age=(\d+)", cache_control or "")
+        if match and int(match.group(1)) > 0:
+            return max(int(match.group(1)), 3600)
+        return self._proxy_max_age
+
+    def __get_thumb(self, data_file: Path, meta: dict, width: int) -> CachedImage:
+        """
+        获取缩略图，按支持的宽度生成并缓存，原图更窄或无法处理时返回原图
+        """
+        width = next((w for w in self._thumb_widths if w >= width), self._thumb_widths[-1])
+        thumb_file = data_file.with_name(f"{data_file.name}_w{width}")
+        content_type = meta.get("content_type") or "image/jpeg"
+        if not thumb_file.exists():
+            try:
+                with Image.open(data_file) as image:
+                    if image.width > width:
+                        image.thumbnail((width, round(image.height * width / image.width)))
+                        buffer = io.BytesIO()
+                        if image.mode in ("RGBA", "LA", "P"):
+                            # 保留透明通道
+                            image.save(buffer, format="PNG", optimize=True)
+                        else:
+                            image.convert("RGB").save(buffer, format="JPEG", quality=85)
+                        thumb_file.write_bytes(buffer.getvalue())
+                        self.__evict(thumb_file.stat().st_size, 1)
+            except Exception as err:
+                logger.debug(f"生成缩略图失败：{meta.get('url')} - {str(err)}")
+        if not thumb_file.exists():
+            return CachedImage(content=data_file.read_bytes(),
+                               content_type=content_type,
+                               etag=f'"{meta.get("digest")}"',
+                               last_modified=formatdate(meta.get("modified"), usegmt=True))
+        content = thumb_file.read_bytes()
+        return CachedImage(content=content,
+                           content_type="image/png" if content[:4] == b"\x89PNG" else "image/jpeg",
+                           etag=f'"{meta.get("digest")}-w{width}"',
+                           last_modified=formatdate(meta.get("modified"), usegmt=True))
+
+    def __evict(self, added: int, added_count: int = 0):
+        """
+        记录新增的缓存大小及图片数，任一超过上限时按最近使用时间淘汰到上限的90%，
+        大小及图片数只统计图片及缩略图，不含元数据文件
+        :param added: 新增的大小
+        :param added_count: 新增的图片数
+        """
+        limit = settings.IMAGE_CACHE_SIZE * 1024 * 1024
+        with self._locks_lock:
+            if self._proxy_size is not None:
+                self._proxy_size += added
+                self._proxy_count += added_count
+                if self._proxy_size <= limit and self._proxy_count <= self._proxy_max_files:
+                    return
+        # 首次统计或超过上限时扫描缓存目录，已有线程在扫描时不重复扫描
+        if not self._evict_lock.acquire(blocking=False):
+            return
+        try:
+            files = []
+            for f in self._proxy_path.glob("*/*"):
+                if f.suffix in (".json", ".tmp"):
+                    continue
+                try:
+                    stat = f.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, f))
+            size = sum(file_size for _, file_size, _ in files)
+            count = len(files)
+            removed = 0
+            if size > limit or count > self._proxy_max_files:
+                files.sort()
+                for _, file_size, f in files:
+                    if size <= limit * 0.9 and count <= self._proxy_max_files * 0.9:
+                        break
+                    f.unlink(missing_ok=True)
+                    if "_w" not in f.name:
+                        f.with_suffix(".json").unlink(missing_ok=True)
+                    size -= file_size
+                    count -= 1
+                    removed += 1
+                logger.info(f"图片代理缓存超过 {settings.IMAGE_CACHE_SIZE}MB 或 {self._proxy_max_files} 张，"
+                            f"已淘汰 {removed} 个最久未使用的图片")
+            # 扫描期间其它线程新增的图片在下次扫描时校正
+            with self._locks_lock:
+                self._proxy_size = size
+                self._proxy_count = count
+        finally:
+            self._evict_lock.release()
@@ -0,0 +1,310 @@
+import os
+import sqlite3
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional, Set
+
+from watchdog.events import FileSystemEventHandler, FileSystemEvent
+from watchdog.observers import Observer
+
+from app.core.config import settings
+from app.core.metainfo import MetaInfo, MetaInfoPath
+from app.log import logger
+from app.utils.singleton import Singleton
+
+
+class LibraryFile(NamedTuple):
+    """
+    媒体库索引中的文件
+    """
+    # 文件路径
+    path: Path
+    # 按文件名识别的季，无季时为1
+    season: int
+    # 按文件名识别的开始集
+    episode: Optional[int]
+    # 按路径识别的季集字符串（合并上级目录），用于判断同一集的不同版本
+    path_season: str
+    path_episode: str
+
+
+class LibraryMonitorHandler(FileSystemEventHandler):
+    """
+    媒体库目录变化监听，媒体文件增删及目录移动时更新索引
+    """
+
+    def __init__(self, index: "LibraryIndexHelper"):
+        super().__init__()
+        self._index = index
+
+    def on_created(self, event: FileSystemEvent):
+        self.__update(event.src_path, event.is_directory)
+
+    def on_deleted(self, event: FileSystemEvent):
+        self.__remove(event.src_path, event.is_directory)
+
+    def on_moved(self, event: FileSystemEvent):
+        self.__remove(event.src_path, event.is_directory)
+        self.__update(event.dest_path, event.is_directory)
+
+    def __update(self, path: str, is_directory: bool):
+        if is_directory:
+            # 整个目录移入时不会产生文件事件，扫描目录
+            self._index.refresh(Path(path))
+        elif Path(path).suffix.lower() in settings.RMT_MEDIAEXT:
+            self._index.add_files([Path(path)])
+
+    def __remove(self, path: str, is_directory: bool):
+        if is_directory or Path(path).suffix.lower() in settings.RMT_MEDIAEXT:
+            self._index.remove(Path(path))
+
+
+class LibraryIndexHelper(metaclass=Singleton):
+    """
+    媒体库文件索引，保存媒体库中媒体文件的路径及识别出的季集，代替每次检查时遍历目录并逐个识别文件；
+    目录首次查询时扫描并持久化，之后由整理结果、目录监听和定时对账保持更新
+    """
+
+    def __init__(self):
+        self._path = settings.TEMP_PATH / "__library_index__.db"
+        self._lock = threading.RLock()
+        # 已完整扫描的目录
+        self._roots: Set[str] = set()
+        self._observer: Optional[Observer] = None
+        self._conn = self.__connect()
+
+    def __connect(self) -> Optional[sqlite3.Connection]:
+        """
+        打开索引数据库并加载已扫描的目录
+        """
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS files "
+                         "(path TEXT PRIMARY KEY, season INTEGER, episode INTEGER, "
+                         "path_season TEXT, path_episode TEXT, mtime REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS roots (path TEXT PRIMARY KEY, scanned REAL)")
+            self._roots = {row[0] for row in conn.execute("SELECT path FROM roots")}
+            return conn
+        except Exception as err:
+            logger.error(f"打开媒体库索引 {self._path} 失败：{str(err)} - {traceback.format_exc()}")
+            return None
+
+    @staticmethod
+    def __prefix_range(directory: str) -> tuple:
+        """
+        目录下所有路径的范围查询条件，利用主键索引
+        """
+        directory = directory.rstrip(os.sep)
+        return directory + os.sep, directory + chr(ord(os.sep) + 1)
+
+    def __covered(self, path: Path) -> bool:
+        """
+        路径是否在已扫描的目录中
+        """
+        return str(path) in self._roots or any(str(parent) in self._roots for parent in path.parents)
+
+    @staticmethod
+    def __recognize(file_path: Path, mtime: float) -> tuple:
+        """
+        识别文件的季集信息
+        """
+        file_meta = MetaInfo(file_path.stem)
+        path_meta = MetaInfoPath(file_path)
+        return (str(file_path), file_meta.begin_season or 1, file_meta.begin_episode,
+                path_meta.season, path_meta.episode, mtime)
+
+    @staticmethod
+    def __walk(directory: Path) -> dict:
+        """
+        遍历目录下的媒体文件
+        :return: {路径: 修改时间}
+        """
+        files = {}
+        for root, _, names in os.walk(directory):
+            for name in names:
+                if os.path.splitext(name)[-1].lower() not in settings.RMT_MEDIAEXT:
+                    continue
+                file_path = os.path.join(root, name)
+                try:
+                    files[file_path] = os.stat(file_path).st_mtime
+                except OSError:
+                    continue
+        return files
+
+    def __sync(self, directory: Path, root: bool = True) -> int:
+        """
+        按目录的实际文件更新索引，只识别新增或修改过的文件
+        :param directory: 目录
+        :param root: 是否记录为已扫描的目录
+        :return: 变化的文件数
+        """
+        files = self.__walk(directory)
+        low, high = self.__prefix_range(str(directory))
+        with self._lock:
+            if not self._conn:
+                return 0
+            indexed = dict(self._conn.execute("SELECT path, mtime FROM files WHERE path >= ? AND path < ?",
+                                              (low, high)).fetchall())
+        removed = [(path,) for path in indexed if path not in files]
+        changed = [self.__recognize(Path(path), mtime) for path, mtime in files.items()
+                   if indexed.get(path) != mtime]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("DELETE FROM files WHERE path = ?", removed)
+                self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", changed)
+                if root:
+                    self._conn.execute("INSERT OR REPLACE INTO roots VALUES (?, ?)",
+                                       (str(directory), time.time()))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            if root:
+                self._roots.add(str(directory))
+        return len(removed) + len(changed)
+
+    def list_files(self, directory: Path) -> List[LibraryFile]:
+        """
+        获取目录下（包括子目录）的媒体文件，目录未索引时扫描后加入索引
+        :param directory: 目录
+        """
+        if not self._conn:
+            return [self.__to_file(self.__recognize(path, 0)) for path in self.__walk_paths(directory)]
+        if not self.__covered(directory):
+            if not directory.exists():
+                return []
+            logger.debug(f"正在建立媒体库索引：{directory}")
+            self.__sync(directory)
+        low, high = self.__prefix_range(str(directory))
+        with self._lock:
+            rows = self._conn.execute("SELECT path, season, episode, path_season, path_episode FROM files "
+                                      "WHERE path >= ? AND path < ?", (low, high)).fetchall()
+        return [self.__to_file(row) for row in rows]
+
+    def __walk_paths(self, directory: Path) -> List[Path]:
+        return [Path(path) for path in self.__walk(directory)] if directory.exists() else []
+
+    @staticmethod
+    def __to_file(row: tuple) -> LibraryFile:
+        return LibraryFile(path=Path(row[0]), season=row[1], episode=row[2],
+                           path_season=row[3], path_episode=row[4])
+
+    def add_files(self, paths: Iterable[Path]):
+        """
+        文件加入索引，只处理已索引目录中的文件，未索引的目录在首次查询时扫描
+        """
+        rows = []
+        for path in paths:
+            if path.suffix.lower() not in settings.RMT_MEDIAEXT or not self.__covered(path):
+                continue
+            try:
+                rows.append(self.__recognize(path, path.stat().st_mtime))
+            except OSError:
+                continue
+        if not rows or not self._conn:
+            return
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def remove(self, path: Path):
+        """
+        从索引中删除文件或目录下的所有文件
+        """
+        if not self._conn:
+            return
+        low, high = self.__prefix_range(str(path))
+        with self._lock:
+            self._conn.execute("DELETE FROM files WHERE path = ? OR (path >= ? AND path < ?)",
+                               (str(path), low, high))
+
+    def refresh(self, directory: Path):
+        """
+        重新扫描已索引目录中的子目录
+        """
+        if not self._conn or not self.__covered(directory) or not directory.is_dir():
+            return
+        try:
+            self.__sync(directory, root=False)
+        except Exception as err:
+            logger.error(f"更新媒体库索引 {directory} 出错：{str(err)}")
+
+    def reconcile(self):
+        """
+        对账所有已索引的目录，处理监听遗漏的变化，不存在的目录移出索引
+        """
+        if not self._conn:
+            return
+        changed = 0
+        for root in sorted(self._roots):
+            directory = Path(root)
+            # 上级目录也已索引的不重复处理
+            if any(str(parent) in self._roots for parent in directory.parents):
+                continue
+            try:
+                if directory.exists():
+                    changed += self.__sync(directory)
+                    continue
+                self.remove(directory)
+                with self._lock:
+                    self._conn.execute("DELETE FROM roots WHERE path = ?", (root,))
+                    self._roots.discard(root)
+            except Exception as err:
+                logger.error(f"媒体库索引对账 {root} 出错：{str(err)} - {traceback.format_exc()}")
+        logger.info(f"媒体库索引对账完成，共 {len(self._roots)} 个目录，{changed} 个文件有变化")
+
+    def clear(self):
+        """
+        清空索引
+        """
+        if not self._conn:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM files")
+            self._conn.execute("DELETE FROM roots")
+            self._roots.clear()
+
+    def start(self, watch_paths: List[Path]):
+        """
+        监听媒体库目录，重复调用时按新的目录重新监听
+        """
+        self.stop()
+        paths = []
+        for path in sorted(set(watch_paths)):
+            if not path.exists() or any(parent in paths for parent in path.parents):
+                continue
+            paths.append(path)
+        if not paths:
+            return
+        observer = Observer()
+        handler = LibraryMonitorHandler(self)
+        for path in paths:
+            try:
+                observer.schedule(handler, str(path), recursive=True)
+            except Exception as err:
+                logger.warn(f"媒体库目录 {path} 无法监听：{str(err)}")
+        observer.daemon = True
+        try:
+            observer.start()
+        except Exception as err:
+            logger.warn(f"媒体库目录监听启动失败：{str(err)}")
+            return
+        self._observer = observer
+        logger.info(f"开始监听媒体库目录：{', '.join(str(path) for path in paths)}")
+
+    def stop(self):
+        """
+        停止媒体库目录监听
+        """
+        if self._observer:
+            try:
+                self._observer.stop()
+                self._observer.join(timeout=10)
+            except Exception as err:
+                logger.debug(f"停止媒体库目录监听出错：{str(err)}")
+            self._observer = None
@@ -0,0 +1,270 @@
+import pickle
+import sqlite3
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.log import logger
+
+
+class MetaCacheStore:
+    """
+    识别缓存的键值存储，SQLite按键增量写入，内存中保留最近使用的条目；
+    过期时间和媒体ID建有索引，过期清理和按ID删除不需要全表扫描
+    """
+
+    def __init__(self, path: Path, lru_size: int = 4096,
+                 legacy_path: Path = None, id_field: str = "id", expire_field: str = None):
+        """
+        :param path: 数据库文件路径
+        :param lru_size: 内存中保留的条目数
+        :param legacy_path: 旧版整体pickle缓存文件，存在时导入后删除
+        :param id_field: 旧版缓存内容中的媒体ID字段
+        :param expire_field: 旧版缓存内容中的过期时间字段
+        """
+        self._path = path
+        self._lru_size = lru_size
+        self._id_field = id_field
+        self._expire_field = expire_field
+        self._lru: OrderedDict[str, dict] = OrderedDict()
+        # 只在内存中的条目，如未识别的记录
+        self._transient: Dict[str, dict] = {}
+        # 读取时延长了有效期、等待写入的条目：key -> 过期时间
+        self._touched: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._conn = self.__connect()
+        if legacy_path and legacy_path.exists():
+            self.__import_legacy(legacy_path)
+
+    def __connect(self) -> Optional[sqlite3.Connection]:
+        """
+        打开数据库并建表
+        """
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS cache "
+                         "(key TEXT PRIMARY KEY, mid TEXT, expire INTEGER, value BLOB)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_mid ON cache (mid)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_expire ON cache (expire)")
+            return conn
+        except Exception as err:
+            logger.error(f"打开缓存数据库 {self._path} 失败：{str(err)} - {traceback.format_exc()}")
+            return None
+
+    def __import_legacy(self, legacy_path: Path):
+        """
+        导入旧版pickle缓存文件
+        """
+        try:
+            with open(legacy_path, "rb") as f:
+                data: dict = pickle.load(f)
+            self.set_many({key: value for key, value in data.items() if value and value.get(self._id_field)})
+            legacy_path.unlink()
+            logger.info(f"已导入旧版缓存文件 {legacy_path.name}：{len(data)} 条")
+        except Exception as err:
+            logger.error(f"导入旧版缓存文件 {legacy_path.name} 失败：{str(err)}")
+
+    def __remember(self, key: str, value: dict):
+        """
+        放入内存LRU
+        """
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self._lru_size:
+            old_key, old_value = self._lru.popitem(last=False)
+            # 淘汰前写入延长的有效期
+            if old_key in self._touched:
+                self.__write_expires([(old_key, self._touched.pop(old_key), old_value)])
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        获取缓存条目
+        """
+        with self._lock:
+            if key in self._transient:
+                return self._transient[key]
+            value = self._lru.get(key)
+            if value is not None:
+                self._lru.move_to_end(key)
+                return value
+            if not self._conn:
+                return None
+            row = self._conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            if not row:
+                return None
+            try:
+                value = pickle.loads(row[0])
+            except Exception as err:
+                logger.warn(f"缓存条目 {key} 已损坏：{str(err)}")
+                self.delete(key)
+                return None
+            self.__remember(key, value)
+            return value
+
+    def set(self, key: str, value: dict, mid: Any = None, expire: int = None, persist: bool = True):
+        """
+        写入缓存条目
+        :param key: 缓存key
+        :param value: 缓存内容
+        :param mid: 媒体ID，用于按ID删除
+        :param expire: 过期时间戳
+        :param persist: 是否写入数据库，为False时只保存在内存中
+        """
+        with self._lock:
+            if not persist:
+                self._transient[key] = value
+                if len(self._transient) > self._lru_size:
+                    self._transient.pop(next(iter(self._transient)))
+                self._lru.pop(key, None)
+                self.__delete_rows([key])
+                return
+            self._transient.pop(key, None)
+            self._touched.pop(key, None)
+            self.__remember(key, value)
+            if self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO cache (key, mid, expire, value) VALUES (?, ?, ?, ?)",
+                                   (key, None if mid is None else str(mid), expire,
+                                    pickle.dumps(value, pickle.HIGHEST_PROTOCOL)))
+
+    def set_many(self, items: Dict[str, dict]):
+        """
+        批量写入缓存条目（不放入内存LRU），媒体ID和过期时间从内容中读取
+        """
+        if not self._conn or not items:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO cache (key, mid, expire, value) VALUES (?, ?, ?, ?)",
+                    [(key, str(value.get(self._id_field)),
+                      value.get(self._expire_field) if self._expire_field else None,
+                      pickle.dumps(value, pickle.HIGHEST_PROTOCOL)) for key, value in items.items()])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def touch(self, key: str, expire: int):
+        """
+        延长有效期，在flush或从内存淘汰时写入
+        """
+        with self._lock:
+            if key not in self._transient:
+                self._touched[key] = expire
+
+    def delete(self, key: str) -> Optional[dict]:
+        """
+        删除缓存条目
+        :return: 被删除的缓存内容
+        """
+        with self._lock:
+            value = self._transient.pop(key, None) or self._lru.pop(key, None)
+            if value is None:
+                value = self.get(key)
+                self._lru.pop(key, None)
+            self._touched.pop(key, None)
+            self.__delete_rows([key])
+            return value
+
+    def delete_by_mid(self, mid: Any) -> List[str]:
+        """
+        按媒体ID删除缓存条目
+        :return: 被删除的缓存key
+        """
+        mid = str(mid)
+        with self._lock:
+            keys = [key for key, value in self._transient.items() if str(value.get(self._id_field)) == mid]
+            for key in keys:
+                self._transient.pop(key, None)
+            if self._conn:
+                rows = self._conn.execute("SELECT key FROM cache WHERE mid = ?", (mid,)).fetchall()
+                keys.extend(row[0] for row in rows)
+                self._conn.execute("DELETE FROM cache WHERE mid = ?", (mid,))
+            for key in keys:
+                self._lru.pop(key, None)
+                self._touched.pop(key, None)
+            return keys
+
+    def delete_transient(self):
+        """
+        删除只在内存中的条目
+        """
+        with self._lock:
+            self._transient.clear()
+
+    def delete_expired(self, now: int = None) -> int:
+        """
+        删除已过期的条目
+        :return: 删除的条目数
+        """
+        now = now or int(time.time())
+        with self._lock:
+            self.flush()
+            if not self._conn:
+                return 0
+            keys = [row[0] for row in
+                    self._conn.execute("SELECT key FROM cache WHERE expire < ?", (now,)).fetchall()]
+            if keys:
+                self._conn.execute("DELETE FROM cache WHERE expire < ?", (now,))
+                for key in keys:
+                    self._lru.pop(key, None)
+            return len(keys)
+
+    def flush(self):
+        """
+        写入读取时延长的有效期
+        """
+        with self._lock:
+            if self._touched:
+                self.__write_expires([(key, expire, self._lru.get(key))
+                                      for key, expire in self._touched.items()])
+                self._touched = {}
+
+    def clear(self):
+        """
+        清空所有条目
+        """
+        with self._lock:
+            self._lru.clear()
+            self._transient.clear()
+            self._touched.clear()
+            if self._conn:
+                self._conn.execute("DELETE FROM cache")
+
+    def count(self) -> int:
+        """
+        数据库中的条目数
+        """
+        with self._lock:
+            if not self._conn:
+                return 0
+            return self._conn.execute("SELECT COUNT(1) FROM cache").fetchone()[0]
+
+    def __write_expires(self, expires: List[Tuple[str, int, Optional[dict]]]):
+        """
+        批量更新过期时间，同时更新保存的内容
+        :param expires: [(key, 过期时间, 内容)]
+        """
+        if not self._conn:
+            return
+        rows = [(expire, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key)
+                for key, expire, value in expires if value is not None]
+        if rows:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("UPDATE cache SET expire = ?, value = ? WHERE key = ?", rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def __delete_rows(self, keys: List[str]):
+        if self._conn and keys:
+            self._conn.executemany("DELETE FROM cache WHERE key = ?", [(key,) for key in keys])
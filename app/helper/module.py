@@ -1,23 +1,48 @@
 # -*- coding: utf-8 -*-
+import ast
 import importlib
 import pkgutil
+import sys
 import traceback
 from pathlib import Path
+from typing import Dict, Optional
 
 from app.log import logger
 
 
+class ModuleManifest:
+    """
+    系统模块清单，模块未导入时代替模块类提供ID、名称及开关设置
+    """
+
+    def __init__(self, mid: str, package: str, name: str = None, setting: tuple = None):
+        # 模块ID，与模块类名一致
+        self.__name__ = mid
+        # 模块包名
+        self.package = package
+        self._name = name or mid
+        self._setting = setting
+
+    def get_name(self) -> str:
+        return self._name
+
+    def init_setting(self) -> Optional[tuple]:
+        return self._setting
+
+
 class ModuleHelper:
     """
     模块动态加载
     """
 
     @classmethod
-    def load(cls, package_path: str, filter_func=lambda name, obj: True):
+    def load(cls, package_path: str, filter_func=lambda name, obj: True,
+             package_filter=lambda package_name: True):
         """
         导入模块
         :param package_path: 父包名
         :param filter_func: 子模块过滤函数，入参为模块名和模块对象，返回True则导入，否则不导入
+        :param package_filter: 子包过滤函数，入参为子包名，返回False时不导入该子包
         :return: 导入的模块对象列表
         """
 
@@ -27,9 +52,14 @@ class ModuleHelper:
             try:
                 if package_name.startswith('_'):
                     continue
+                if not package_filter(package_name):
+                    continue
                 full_package_name = f'{package_path}.{package_name}'
+                # 已导入过的重新加载
+                loaded = full_package_name in sys.modules
                 module = importlib.import_module(full_package_name)
-                importlib.reload(module)
+                if loaded:
+                    importlib.reload(module)
                 for name, obj in module.__dict__.items():
                     if name.startswith('_'):
                         continue
@@ -92,6 +122,36 @@ class ModuleHelper:
 
         return submodules
 
+    @classmethod
+    def load_package(cls, package_name: str, filter_func=lambda name, obj: True, reload: bool = False):
+        """
+        导入单个包，未导入过时只导入一次，仅在需要热更新时重新加载
+        :param package_name: 完整包名
+        :param filter_func: 子模块过滤函数，入参为模块名和模块对象，返回True则导入，否则不导入
+        :param reload: 是否重新加载（包括一级子模块）
+        :return: 导入的模块对象列表
+        """
+        try:
+            if reload and package_name in sys.modules:
+                module = sys.modules[package_name]
+                if hasattr(module, "__path__"):
+                    for _, sub_module_name, _ in pkgutil.walk_packages(module.__path__):
+                        full_sub_module_name = f'{package_name}.{sub_module_name}'
+                        try:
+                            importlib.reload(importlib.import_module(full_sub_module_name))
+                        except Exception as sub_err:
+                            logger.debug(f'加载子模块 {full_sub_module_name} 失败：{str(sub_err)} - {traceback.format_exc()}')
+                module = importlib.reload(module)
+            else:
+                module = importlib.import_module(package_name)
+            return [
+                obj for name, obj in module.__dict__.items()
+                if not name.startswith('_') and isinstance(obj, type) and filter_func(name, obj)
+            ]
+        except Exception as err:
+            logger.debug(f'加载模块 {package_name} 失败：{str(err)} - {traceback.format_exc()}')
+        return []
+
     @staticmethod
     def dynamic_import_all_modules(base_path: Path, package_name: str):
         """
@@ -105,3 +165,56 @@ class ModuleHelper:
                 modules.append(file_name)
                 full_module_name = f"{package_name}.{file_name}"
                 importlib.import_module(full_module_name)
+
+    @staticmethod
+    def load_manifests(package_path: str, base_class: str) -> Dict[str, Optional[ModuleManifest]]:
+        """
+        静态解析各子包入口文件中的模块类，不导入即可获取模块ID、名称及开关设置
+        :param package_path: 父包名
+        :param base_class: 模块基类名
+        :return: {子包名: 模块清单}，无法静态解析的为None，需要导入后获取
+        """
+
+        def __literal(func: ast.FunctionDef) -> Optional[tuple]:
+            """
+            获取只返回字面量的方法的返回值，忽略文档字符串和pass，无法静态获取时返回None
+            :return: (返回值,)
+            """
+            statements = [node for node in func.body
+                          if not isinstance(node, ast.Pass)
+                          and not (isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant))]
+            if not statements:
+                return None,
+            if len(statements) != 1 or not isinstance(statements[0], ast.Return):
+                return None
+            try:
+                return ast.literal_eval(statements[0].value) if statements[0].value else None,
+            except Exception:
+                return None
+
+        manifests = {}
+        packages = importlib.import_module(package_path)
+        for _, package_name, _ in pkgutil.iter_modules(packages.__path__):
+            if package_name.startswith('_'):
+                continue
+            manifests[package_name] = None
+            init_file = Path(packages.__path__[0]) / package_name / "__init__.py"
+            try:
+                tree = ast.parse(init_file.read_text(encoding="utf-8"), filename=str(init_file))
+            except Exception as err:
+                logger.debug(f'解析模块 {package_name} 失败：{str(err)}')
+                continue
+            classes = [node for node in tree.body if isinstance(node, ast.ClassDef)
+                       and any(getattr(base, "id", None) == base_class for base in node.bases)]
+            # 一个子包只有一个模块类时才能确定
+            if len(classes) != 1:
+                continue
+            methods = {node.name: __literal(node) for node in classes[0].body if isinstance(node, ast.FunctionDef)}
+            setting, name = methods.get("init_setting"), methods.get("get_name")
+            if not setting or (setting[0] is not None and not isinstance(setting[0], tuple)):
+                continue
+            manifests[package_name] = ModuleManifest(mid=classes[0].name,
+                                                     package=package_name,
+                                                     name=name[0] if name else None,
+                                                     setting=setting[0])
+        return manifests
@@ -1,5 +1,7 @@
+import ast
 import json
 import shutil
+import threading
 import traceback
 from pathlib import Path
 from typing import Dict, Tuple, Optional, List
@@ -233,3 +235,158 @@ class PluginHelper(metaclass=Singleton):
         self.install_reg(pid)
 
         return True, ""
+
+
+class PluginManifest:
+    """
+    本地插件清单，插件未导入时代替插件类提供ID及元数据
+    """
+
+    def __init__(self, pid: str, package: str, meta: dict):
+        # 插件ID，与插件类名一致
+        self.__name__ = pid
+        # 插件包名
+        self.package = package
+        # 是否有详情页面
+        self.has_page = False
+        # 与插件基类一致的默认属性
+        self.plugin_name = ""
+        self.plugin_desc = ""
+        self.plugin_order = 9999
+        for key, value in (meta or {}).items():
+            setattr(self, key, value)
+
+
+class PluginIndexHelper(metaclass=Singleton):
+    """
+    本地插件索引，通过静态解析插件入口文件获取插件ID及元数据而不导入插件，按文件修改时间缓存
+    """
+
+    # 可静态读取的插件类属性
+    _meta_attrs = ("plugin_name", "plugin_desc", "plugin_icon", "plugin_version", "plugin_label",
+                   "plugin_author", "author_url", "plugin_config_prefix", "plugin_order",
+                   "auth_level", "plugin_public_key")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._plugins_path = settings.ROOT_PATH / "app" / "plugins"
+        self._index_path = settings.TEMP_PATH / "__plugin_index__"
+        self._index: Dict[str, dict] = self.__load()
+
+    def __load(self) -> Dict[str, dict]:
+        """
+        从本地加载索引缓存
+        """
+        if not self._index_path.exists():
+            return {}
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                return json.load(f) or {}
+        except Exception as e:
+            logger.warn(f"加载插件索引缓存失败：{str(e)}")
+            return {}
+
+    def __save(self):
+        """
+        保存索引缓存
+        """
+        try:
+            with open(self._index_path, "w", encoding="utf-8") as f:
+                json.dump(self._index, f, ensure_ascii=False)
+        except Exception as e:
+            logger.warn(f"保存插件索引缓存失败：{str(e)}")
+
+    @staticmethod
+    def __is_implemented(func: ast.FunctionDef) -> bool:
+        """
+        检查函数是否已实现（不只有文档字符串和pass）
+        """
+        for node in func.body:
+            if isinstance(node, ast.Pass):
+                continue
+            if isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant) \
+                    and isinstance(node.value.value, str):
+                continue
+            return True
+        return False
+
+    def __parse(self, init_file: Path) -> Optional[dict]:
+        """
+        静态解析插件入口文件，获取插件类名及元数据，无法解析时返回None
+        """
+        try:
+            tree = ast.parse(init_file.read_text(encoding="utf-8"), filename=str(init_file))
+        except Exception as e:
+            logger.debug(f"解析插件文件 {init_file} 失败：{str(e)}")
+            return None
+        for node in tree.body:
+            if not isinstance(node, ast.ClassDef):
+                continue
+            bases = [base.id if isinstance(base, ast.Name) else getattr(base, "attr", None)
+                     for base in node.bases]
+            if "_PluginBase" not in bases:
+                continue
+            meta = {}
+            for item in node.body:
+                if isinstance(item, ast.Assign) and len(item.targets) == 1:
+                    target, value = item.targets[0], item.value
+                elif isinstance(item, ast.AnnAssign) and item.value is not None:
+                    target, value = item.target, item.value
+                elif isinstance(item, ast.FunctionDef) and item.name == "get_page":
+                    meta["has_page"] = self.__is_implemented(item)
+                    continue
+                else:
+                    continue
+                if not isinstance(target, ast.Name) or target.id not in self._meta_attrs:
+                    continue
+                try:
+                    meta[target.id] = ast.literal_eval(value)
+                except ValueError:
+                    # 非字面量属性，需要导入后才能获取
+                    continue
+            return {
+                "id": node.name,
+                "meta": meta
+            }
+        return None
+
+    def list(self) -> Dict[str, Optional[PluginManifest]]:
+        """
+        获取本地所有插件清单，key为插件包名，无法静态解析的插件清单为None，需要导入后获取
+        """
+        if not self._plugins_path.exists():
+            return {}
+        ret_manifests = {}
+        with self._lock:
+            changed = False
+            packages = []
+            for plugin_dir in sorted(self._plugins_path.iterdir()):
+                if not plugin_dir.is_dir() or plugin_dir.name.startswith(("_", ".")):
+                    continue
+                init_file = plugin_dir / "__init__.py"
+                if not init_file.exists():
+                    continue
+                package = plugin_dir.name
+                packages.append(package)
+                stat = init_file.stat()
+                signature = [stat.st_mtime_ns, stat.st_size]
+                cached = self._index.get(package)
+                if not cached or cached.get("signature") != signature:
+                    cached = {
+                        "signature": signature,
+                        "plugin": self.__parse(init_file)
+                    }
+                    self._index[package] = cached
+                    changed = True
+                plugin = cached.get("plugin")
+                ret_manifests[package] = PluginManifest(pid=plugin.get("id"),
+                                                        package=package,
+                                                        meta=plugin.get("meta")) if plugin else None
+            # 清理已删除的插件
+            for package in list(self._index.keys()):
+                if package not in packages:
+                    self._index.pop(package)
+                    changed = True
+            if changed:
+                self.__save()
+        return ret_manifests
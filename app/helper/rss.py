@@ -1,10 +1,12 @@
 import re
+import threading
 import traceback
 import xml.dom.minidom
 from typing import List, Tuple, Union
 from urllib.parse import urljoin
 
 import chardet
+from cachetools import LRUCache
 from lxml import etree
 
 from app.core.config import settings
@@ -15,6 +17,11 @@ from app.utils.http import RequestUtils
 from app.utils.string import StringUtils
 
 
+# RSS缓存验证信息：RSS地址 -> (ETag, Last-Modified, 上次解析的种子信息列表)
+_feed_validators = LRUCache(maxsize=256)
+_feed_lock = threading.Lock()
+
+
 class RssHelper:
     """
     RSS帮助类，解析RSS报文、获取RSS地址等
@@ -228,6 +235,7 @@ class RssHelper:
     def parse(url, proxy: bool = False, timeout: int = 15) -> Union[List[dict], None]:
         """
         解析RSS订阅URL，获取RSS中的种子信息
+        带上次响应的ETag/Last-Modified条件请求，RSS未变化（304）时直接返回上次解析的结果
         :param url: RSS地址
         :param proxy: 是否使用代理
         :param timeout: 请求超时
@@ -237,13 +245,27 @@ class RssHelper:
         ret_array: list = []
         if not url:
             return []
+        with _feed_lock:
+            validator = _feed_validators.get(url)
+        headers = None
+        if validator:
+            etag, last_modified, _ = validator
+            headers = {}
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
         try:
-            ret = RequestUtils(proxies=settings.PROXY if proxy else None, timeout=timeout).get_res(url)
+            ret = RequestUtils(headers=headers, proxies=settings.PROXY if proxy else None,
+                               timeout=timeout).get_res(url)
             if not ret:
                 return []
         except Exception as err:
             logger.error(f"获取RSS失败：{str(err)} - {traceback.format_exc()}")
             return []
+        if ret.status_code == 304 and validator:
+            logger.debug(f"RSS未变化：{StringUtils.get_url_domain(url)}")
+            return [dict(item) for item in validator[2]]
         if ret:
             ret_xml = ""
             try:
@@ -279,6 +301,8 @@ class RssHelper:
                             continue
                         # 描述
                         description = DomUtils.tag_value(item, "description", default="")
+                        # 唯一标识
+                        guid = DomUtils.tag_value(item, "guid", default="")
                         # 种子页面
                         link = DomUtils.tag_value(item, "link", default="")
                         # 种子链接
@@ -305,6 +329,7 @@ class RssHelper:
                                     'size': size,
                                     'description': description,
                                     'link': link,
+                                    'guid': guid or enclosure,
                                     'pubdate': pubdate}
                         ret_array.append(tmp_dict)
                     except Exception as e1:
@@ -320,6 +345,13 @@ class RssHelper:
                 ]
                 if ret_xml in _rss_expired_msg:
                     return None
+        # 保存缓存验证信息，下次请求时带上
+        etag, last_modified = ret.headers.get("ETag"), ret.headers.get("Last-Modified")
+        with _feed_lock:
+            if ret_array and (etag or last_modified):
+                _feed_validators[url] = (etag, last_modified, [dict(item) for item in ret_array])
+            else:
+                _feed_validators.pop(url, None)
         return ret_array
 
     def get_rss_link(self, url: str, cookie: str, ua: str, proxy: bool = False) -> Tuple[str, str]:
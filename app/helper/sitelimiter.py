@@ -0,0 +1,235 @@
+import json
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.site_oper import SiteOper
+from app.log import logger
+from app.utils.singleton import Singleton
+
+# 令牌桶容量，允许的突发请求数
+_BURST = 3
+# 每秒请求数的上下限
+_MAX_RATE = 2.0
+_MIN_RATE = 0.05
+# 超过该耗时（秒）视为响应慢，降低请求频率
+_SLOW_LATENCY = 10
+# 单次请求最长等待时间（秒）
+_MAX_WAIT = 60
+# 连续失败次数达到该值时熔断
+_FAILURE_THRESHOLD = 5
+# 熔断时长（秒），每次再熔断翻倍
+_COOLDOWN = 300
+_MAX_COOLDOWN = 7200
+# 站点域名列表刷新间隔（秒）
+_DOMAINS_TTL = 300
+
+
+class _DomainState:
+    """
+    单个站点的流控和熔断状态
+    """
+
+    __slots__ = ("rate", "tokens", "updated", "blocked_until", "failures", "open_until", "trips", "probing",
+                 "generation")
+
+    def __init__(self, rate: float = _MAX_RATE, failures: int = 0, open_until: float = 0, trips: int = 0):
+        # 每秒允许的请求数
+        self.rate = rate
+        self.tokens = float(_BURST)
+        self.updated = time.monotonic()
+        # Retry-After 要求的暂停截止时间
+        self.blocked_until = 0.0
+        # 连续失败次数
+        self.failures = failures
+        # 熔断截止时间（时间戳）
+        self.open_until = open_until
+        # 连续熔断次数
+        self.trips = trips
+        # 熔断到期后是否有试探请求在进行
+        self.probing = False
+        # 熔断状态代次，熔断及放行试探请求时加一，之前发出的请求结果不再影响熔断状态
+        self.generation = 0
+
+    def to_dict(self) -> dict:
+        return {"rate": self.rate, "failures": self.failures, "open_until": self.open_until, "trips": self.trips}
+
+
+class SiteLimiterHelper(metaclass=Singleton):
+    """
+    站点请求流控与熔断，所有经 RequestUtils 访问站点的请求共用：
+    按域名令牌桶控制请求间隔，根据 429/5xx 响应和耗时自适应调整频率；
+    连续失败的站点在冷却时间内不再请求，冷却后放行一个试探请求，状态持久化
+    """
+
+    def __init__(self):
+        self._path = settings.TEMP_PATH / "__site_limiter__.json"
+        self._lock = threading.Lock()
+        self._states: Dict[str, _DomainState] = {}
+        # 站点域名及主机名匹配缓存
+        self._domains: Tuple[str, ...] = ()
+        self._domains_time = 0.0
+        self._hosts: Dict[str, Optional[str]] = {}
+        self.__load()
+
+    def __load(self):
+        """
+        加载持久化的熔断状态
+        """
+        if not self._path.exists():
+            return
+        try:
+            data = json.loads(self._path.read_text(encoding="utf-8"))
+            for domain, state in data.items():
+                self._states[domain] = _DomainState(rate=state.get("rate") or _MAX_RATE,
+                                                    failures=state.get("failures") or 0,
+                                                    open_until=state.get("open_until") or 0,
+                                                    trips=state.get("trips") or 0)
+        except Exception as err:
+            logger.warn(f"加载站点熔断状态失败：{str(err)}")
+
+    def __save(self):
+        """
+        保存熔断状态，只保存有失败记录或降低了频率的站点
+        """
+        data = {domain: state.to_dict() for domain, state in self._states.items()
+                if state.failures or state.open_until or state.trips or state.rate < _MAX_RATE}
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._path.write_text(json.dumps(data), encoding="utf-8")
+        except Exception as err:
+            logger.warn(f"保存站点熔断状态失败：{str(err)}")
+
+    def __match(self, host: str) -> Optional[str]:
+        """
+        匹配主机名对应的站点域名，非站点返回None
+        """
+        if not host:
+            return None
+        if time.monotonic() - self._domains_time > _DOMAINS_TTL:
+            self._domains_time = time.monotonic()
+            try:
+                self._domains = tuple(sorted({site.domain for site in SiteOper().list() if site.domain},
+                                             key=len, reverse=True))
+            except Exception as err:
+                logger.debug(f"读取站点域名失败：{str(err)}")
+            self._hosts = {}
+        if host not in self._hosts:
+            self._hosts[host] = next((domain for domain in self._domains
+                                      if host == domain or host.endswith(f".{domain}")), None)
+        return self._hosts[host]
+
+    def __state(self, domain: str) -> _DomainState:
+        state = self._states.get(domain)
+        if not state:
+            state = self._states[domain] = _DomainState()
+        return state
+
+    def acquire(self, host: str) -> Tuple[Optional[str], bool, int]:
+        """
+        请求前获取令牌，需要时等待
+        :param host: 请求的主机名
+        :return: (站点域名，非站点为None；是否允许请求，熔断中为False；熔断状态代次，请求完成时传给release)
+        """
+        domain = self.__match(host)
+        if not domain:
+            return None, True, 0
+        with self._lock:
+            state = self.__state(domain)
+            now = time.monotonic()
+            if state.open_until:
+                if time.time() < state.open_until or state.probing:
+                    metrics.inc("site_circuit_rejected_total", domain=domain)
+                    return domain, False, state.generation
+                # 冷却结束，放行一个试探请求，之前发出的请求结果不再影响熔断状态
+                state.probing = True
+                state.generation += 1
+            generation = state.generation
+            # 补充令牌，预占一个令牌，不足时按频率计算等待时间
+            state.tokens = min(float(_BURST), state.tokens + (now - state.updated) * state.rate)
+            state.updated = now
+            state.tokens -= 1
+            wait = max(-state.tokens / state.rate if state.tokens < 0 else 0, state.blocked_until - now)
+        if wait > 0:
+            time.sleep(min(wait, _MAX_WAIT))
+        return domain, True, generation
+
+    def release(self, domain: str, generation: int, status_code: Optional[int], latency: float,
+                retry_after: str = None):
+        """
+        请求完成后记录结果，调整请求频率及熔断状态
+        :param domain: 站点域名
+        :param generation: acquire返回的熔断状态代次，与当前不同时（熔断或试探前发出的请求）只调整频率
+        :param status_code: 响应状态码，请求异常时为None
+        :param latency: 请求耗时（秒）
+        :param retry_after: 响应中的 Retry-After
+        """
+        if not domain:
+            return
+        failed = status_code is None or status_code == 429 or status_code >= 500
+        with self._lock:
+            state = self.__state(domain)
+            changed = False
+            if status_code in (429, 503):
+                # 站点要求限流，频率减半并按 Retry-After 暂停
+                state.rate = max(_MIN_RATE, state.rate / 2)
+                if retry_after and retry_after.isdigit():
+                    state.blocked_until = time.monotonic() + min(int(retry_after), _MAX_COOLDOWN)
+                changed = True
+            elif failed:
+                state.rate = max(_MIN_RATE, state.rate * 0.75)
+            elif latency > _SLOW_LATENCY:
+                state.rate = max(_MIN_RATE, state.rate * 0.8)
+            elif latency < _SLOW_LATENCY / 4 and state.rate < _MAX_RATE:
+                state.rate = min(_MAX_RATE, state.rate * 1.1)
+            # 熔断或试探前发出的请求，结果只调整频率，不影响熔断状态
+            current = generation == state.generation
+            if current and failed:
+                state.failures += 1
+                if state.probing or state.failures >= _FAILURE_THRESHOLD:
+                    # 熔断，再次熔断时冷却时间翻倍
+                    cooldown = min(_COOLDOWN * (2 ** state.trips), _MAX_COOLDOWN)
+                    state.open_until = time.time() + cooldown
+                    state.trips += 1
+                    state.probing = False
+                    state.generation += 1
+                    logger.warn(f"站点 {domain} 连续 {state.failures} 次请求失败，暂停访问 {cooldown // 60} 分钟")
+                    metrics.inc("site_circuit_open_total", domain=domain)
+                    changed = True
+            elif current and (state.failures or state.open_until):
+                if state.open_until:
+                    logger.info(f"站点 {domain} 恢复访问")
+                state.failures = 0
+                state.open_until = 0
+                state.trips = 0
+                state.probing = False
+                changed = True
+            if changed:
+                self.__save()
+
+    def get_open(self, domain: str) -> Optional[float]:
+        """
+        站点是否处于熔断中
+        :return: 熔断截止时间戳，未熔断返回None
+        """
+        with self._lock:
+            state = self._states.get(domain)
+            if state and state.open_until and time.time() < state.open_until:
+                return state.open_until
+        return None
+
+    def reset(self, domain: str = None):
+        """
+        重置站点的流控和熔断状态，站点信息更新或手动测试站点时调用，重置前发出的请求结果不再影响熔断状态
+        :param domain: 站点域名，为空时重置所有站点
+        """
+        with self._lock:
+            for key in ([domain] if domain else list(self._states)):
+                state = self._states.get(key)
+                if not state:
+                    continue
+                new_state = self._states[key] = _DomainState()
+                new_state.generation = state.generation + 1
+            self.__save()
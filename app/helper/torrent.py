@@ -1,4 +1,5 @@
 import datetime
+import os
 import re
 import traceback
 from pathlib import Path
@@ -6,13 +7,14 @@ from typing import Tuple, Optional, List, Union, Dict
 from urllib.parse import unquote
 
 from requests import Response
-from torrentool.api import Torrent
 
 from app.core.config import settings
 from app.core.context import Context, TorrentInfo, MediaInfo
 from app.core.metainfo import MetaInfo
 from app.db.systemconfig_oper import SystemConfigOper
+from app.helper.torrentcache import TorrentCacheHelper
 from app.log import logger
+from app.utils.bencode import BencodeUtils
 from app.utils.http import RequestUtils
 from app.schemas.types import MediaType, SystemConfigKey
 from app.utils.singleton import Singleton
@@ -29,6 +31,7 @@ class TorrentHelper(metaclass=Singleton):
 
     def __init__(self):
         self.system_config = SystemConfigOper()
+        self.torrentcache = TorrentCacheHelper()
 
     def download_torrent(self, url: str,
                          cookie: str = None,
@@ -37,11 +40,20 @@ class TorrentHelper(metaclass=Singleton):
                          proxy: bool = False) \
             -> Tuple[Optional[Path], Optional[Union[str, bytes]], Optional[str], Optional[list], Optional[str]]:
         """
-        把种子下载到本地
+        把种子下载到本地，已缓存的种子不再请求站点
         :return: 种子保存路径、种子内容、种子主目录、种子文件清单、错误信息
         """
         if url.startswith("magnet:"):
             return None, url, "", [], f"磁力链接"
+        # 种子缓存
+        cached = self.torrentcache.get(url)
+        if cached:
+            file_path, _ = cached
+            logger.debug(f"使用缓存的种子文件：{file_path.name}")
+            folder_name, file_list = self.get_torrent_info(file_path)
+            return file_path, file_path.read_bytes(), folder_name, file_list, ""
+        # 原始下载链接，跳转后的种子也按原始链接缓存
+        origin_url = url
         # 请求种子文件
         req = RequestUtils(
             ua=ua,
@@ -90,7 +102,8 @@ class TorrentHelper(metaclass=Singleton):
                             ).post_res(url=action, data=data)
                             if req and req.status_code == 200:
                                 # 检查是不是种子文件，如果不是抛出异常
-                                Torrent.from_string(req.content)
+                                if not BencodeUtils.read_torrent(req.content):
+                                    raise ValueError("返回的不是种子文件")
                                 # 跳过成功
                                 logger.info(f"触发了站点首次种子下载，已自动跳过：{url}")
                                 skip_flag = True
@@ -110,10 +123,13 @@ class TorrentHelper(metaclass=Singleton):
                 try:
                     # 读取种子文件名
                     file_name = self.get_url_filename(req, url)
-                    # 种子文件路径
-                    file_path = Path(settings.TEMP_PATH) / file_name
-                    # 保存到文件
-                    file_path.write_bytes(req.content)
+                    # 保存到种子缓存，不是有效的种子时按原方式保存
+                    cached = self.torrentcache.put(origin_url, req.content, file_name)
+                    if cached:
+                        file_path, _ = cached
+                    else:
+                        file_path = Path(settings.TEMP_PATH) / file_name
+                        file_path.write_bytes(req.content)
                     # 获取种子目录和文件清单
                     folder_name, file_list = self.get_torrent_info(file_path)
                     # 成功拿到种子数据
@@ -143,11 +159,11 @@ class TorrentHelper(metaclass=Singleton):
         if not torrent_path or not torrent_path.exists():
             return "", []
         try:
-            torrentinfo = Torrent.from_file(torrent_path)
-            # 获取文件清单
-            if (not torrentinfo.files
-                    or (len(torrentinfo.files) == 1
-                        and torrentinfo.files[0].name == torrentinfo.name)):
+            torrentinfo = BencodeUtils.read_torrent_file(torrent_path)
+            if not torrentinfo:
+                logger.error(f"种子文件解析失败：{torrent_path.name} 格式错误")
+                return "", []
+            if not torrentinfo.multi_file:
                 # 单文件种子目录名返回空
                 folder_name = ""
                 # 单文件种子
@@ -155,16 +171,8 @@ class TorrentHelper(metaclass=Singleton):
             else:
                 # 目录名
                 folder_name = torrentinfo.name
-                # 文件清单，如果一级目录与种子名相同则去掉
-                file_list = []
-                for fileinfo in torrentinfo.files:
-                    file_path = Path(fileinfo.name)
-                    # 根路径
-                    root_path = file_path.parts[0]
-                    if root_path == folder_name:
-                        file_list.append(str(file_path.relative_to(root_path)))
-                    else:
-                        file_list.append(fileinfo.name)
+                # 文件清单，相对于种子目录
+                file_list = [os.path.join(*parts) for parts, _ in torrentinfo.files if parts]
             logger.debug(f"解析种子：{torrent_path.name} => 目录：{folder_name}，文件清单：{file_list}")
             return folder_name, file_list
         except Exception as err:
@@ -285,6 +293,39 @@ class TorrentHelper(metaclass=Singleton):
             episodes = list(set(episodes).union(set(meta.episode_list)))
         return episodes
 
+    @staticmethod
+    def fingerprint(torrent: TorrentInfo) -> str:
+        """
+        资源指纹，同一资源在不同站点发布时相同：识别和比对用到的标题、副标题、站点分类原样参与，
+        指纹相同的种子识别及比对结果一定相同；另加大小区间（两位有效数字，兼容各站点的大小取整差异）区分不同资源
+        """
+        return "|".join([torrent.title or "", torrent.description or "", torrent.category or "",
+                         f"{float(torrent.size or 0):.1e}"])
+
+    @staticmethod
+    def rule_signature(torrent: TorrentInfo) -> tuple:
+        """
+        种子中影响规则过滤结果的内容，相同时过滤结果也相同
+        """
+        return (torrent.title, torrent.description, tuple(torrent.labels or []),
+                torrent.downloadvolumefactor, torrent.uploadvolumefactor)
+
+    def group_torrents(self, torrents: List[TorrentInfo]) -> List[List[TorrentInfo]]:
+        """
+        按资源指纹将不同站点发布的同一资源分为一组，已缓存种子文件的按infohash区分指纹相同的不同资源
+        :return: 资源分组，组内及组间保持原顺序
+        """
+        groups: Dict[str, List[TorrentInfo]] = {}
+        # 分组 -> 组内已知的infohash
+        hashes: Dict[str, str] = {}
+        for torrent in torrents:
+            key = self.fingerprint(torrent)
+            infohash = self.torrentcache.get_hash(torrent.enclosure)
+            if infohash and hashes.setdefault(key, infohash) != infohash:
+                key = f"{key}|{infohash}"
+            groups.setdefault(key, []).append(torrent)
+        return list(groups.values())
+
     def is_invalid(self, url: str) -> bool:
         """
         判断种子是否是无效种子
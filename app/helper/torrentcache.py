@@ -0,0 +1,174 @@
+import shutil
+import sqlite3
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.log import logger
+from app.utils.bencode import BencodeUtils
+from app.utils.singleton import Singleton
+
+metrics.describe("torrent_cache_requests_total", "种子文件缓存查询次数（hit/miss）")
+metrics.describe("torrent_cache_evictions_total", "种子文件缓存淘汰数")
+
+
+class TorrentCacheHelper(metaclass=Singleton):
+    """
+    种子文件缓存，按infohash保存种子文件，下载链接指向infohash；
+    重复下载、重试及多个订阅选中同一资源时不再请求站点，不同链接的相同种子只保存一份，超出容量时淘汰最久未使用的种子
+    """
+
+    def __init__(self):
+        self._dir = settings.TEMP_PATH / "torrents"
+        self._path = settings.TEMP_PATH / "__torrent_cache__.db"
+        self._lock = threading.Lock()
+        self._conn = self.__connect()
+
+    def __connect(self) -> Optional[sqlite3.Connection]:
+        """
+        打开缓存索引数据库
+        """
+        try:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, infohash TEXT)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_urls_infohash ON urls (infohash)")
+            conn.execute("CREATE TABLE IF NOT EXISTS torrents "
+                         "(infohash TEXT PRIMARY KEY, name TEXT, size INTEGER, atime REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_torrents_atime ON torrents (atime)")
+            return conn
+        except Exception as err:
+            logger.error(f"打开种子缓存 {self._path} 失败：{str(err)} - {traceback.format_exc()}")
+            return None
+
+    def __file(self, infohash: str, name: str) -> Path:
+        return self._dir / infohash / name
+
+    def get_hash(self, url: str) -> Optional[str]:
+        """
+        查询下载链接对应的infohash
+        """
+        if not self._conn or not url:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT infohash FROM urls WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def get(self, url: str) -> Optional[Tuple[Path, str]]:
+        """
+        按下载链接查询缓存的种子文件
+        :return: 种子文件路径、infohash，未缓存返回None
+        """
+        if not self._conn or not url:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT torrents.infohash, torrents.name FROM urls "
+                                     "JOIN torrents ON torrents.infohash = urls.infohash "
+                                     "WHERE urls.url = ?", (url,)).fetchone()
+            if row:
+                file_path = self.__file(*row)
+                if file_path.exists():
+                    self._conn.execute("UPDATE torrents SET atime = ? WHERE infohash = ?", (time.time(), row[0]))
+                    metrics.inc("torrent_cache_requests_total", result="hit")
+                    return file_path, row[0]
+                # 文件已被删除
+                self.__remove(row[0])
+        metrics.inc("torrent_cache_requests_total", result="miss")
+        return None
+
+    def put(self, url: str, content: bytes, name: str) -> Optional[Tuple[Path, str]]:
+        """
+        缓存种子文件，相同infohash的种子只保存一份
+        :param url: 下载链接
+        :param content: 种子内容
+        :param name: 种子文件名
+        :return: 种子文件路径、infohash，不是有效的种子返回None
+        """
+        torrentinfo = BencodeUtils.read_torrent(content)
+        if not torrentinfo:
+            return None
+        infohash = torrentinfo.infohash
+        if not self._conn:
+            return None
+        name = Path(name).name if name else f"{infohash}.torrent"
+        with self._lock:
+            row = self._conn.execute("SELECT name FROM torrents WHERE infohash = ?", (infohash,)).fetchone()
+            if row and self.__file(infohash, row[0]).exists():
+                name = row[0]
+            else:
+                file_path = self.__file(infohash, name)
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                file_path.write_bytes(content)
+            self._conn.execute("INSERT OR REPLACE INTO torrents VALUES (?, ?, ?, ?)",
+                               (infohash, name, len(content), time.time()))
+            if url:
+                self._conn.execute("INSERT OR REPLACE INTO urls VALUES (?, ?)", (url, infohash))
+            self.__evict(keep=infohash)
+        return self.__file(infohash, name), infohash
+
+    def link(self, url: str, infohash: str):
+        """
+        关联下载链接和infohash，同一种子的其它链接（如需解析的下载地址）也可命中缓存
+        """
+        if not self._conn or not url or not infohash:
+            return
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO urls VALUES (?, ?)", (url, infohash))
+
+    def __remove(self, infohash: str):
+        """
+        删除缓存的种子及其链接
+        """
+        self._conn.execute("DELETE FROM urls WHERE infohash = ?", (infohash,))
+        self._conn.execute("DELETE FROM torrents WHERE infohash = ?", (infohash,))
+        shutil.rmtree(self._dir / infohash, ignore_errors=True)
+
+    def __evict(self, keep: str):
+        """
+        超出容量时淘汰最久未使用的种子
+        :param keep: 刚保存的种子，不淘汰
+        """
+        limit = (settings.TORRENT_CACHE_SIZE or 0) * 1024 * 1024
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM torrents").fetchone()[0]
+        if total <= limit:
+            return
+        evicted = 0
+        for infohash, size in self._conn.execute("SELECT infohash, size FROM torrents ORDER BY atime").fetchall():
+            if total <= limit:
+                break
+            if infohash == keep:
+                continue
+            self.__remove(infohash)
+            total -= size
+            evicted += 1
+        metrics.inc("torrent_cache_evictions_total", evicted)
+        logger.debug(f"种子缓存超出容量，已淘汰 {evicted} 个种子")
+
+    def stats(self) -> dict:
+        """
+        缓存统计：种子数、链接数、占用空间（Byte）
+        """
+        if not self._conn:
+            return {"torrents": 0, "urls": 0, "size": 0}
+        with self._lock:
+            torrents, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM torrents").fetchone()
+            urls = self._conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+        return {"torrents": torrents, "urls": urls, "size": size}
+
+    def clear(self):
+        """
+        清空缓存
+        """
+        if not self._conn:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM urls")
+            self._conn.execute("DELETE FROM torrents")
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir.mkdir(parents=True, exist_ok=True)
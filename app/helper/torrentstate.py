@@ -0,0 +1,142 @@
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.meta import MetaBase
+from app.core.metainfo import MetaInfo
+from app.log import logger
+
+
+class TorrentStateCache:
+    """
+    下载器种子状态缓存
+    读取时按间隔增量同步，定期全量同步，避免每次都从下载器拉取全部种子；
+    同时缓存每个种子名称的识别元数据，并在种子由未完成变为已完成时发出通知
+    """
+
+    def __init__(self, name: str,
+                 sync_func: Callable[[bool], Optional[Tuple[bool, Dict[str, Any], List[str]]]],
+                 completed_func: Callable[[Any], bool],
+                 name_func: Callable[[Any], str],
+                 on_completed: Callable[[str, Any], None] = None,
+                 interval: int = 3,
+                 full_interval: int = 1800):
+        """
+        :param name: 下载器名称
+        :param sync_func: 同步函数，入参为是否全量，返回 (是否全量, {hash: 种子数据}, [已删除的hash])，出错时返回None；
+                          种子数据为字典时与已缓存的数据合并（增量字段），否则直接替换
+        :param completed_func: 判断种子是否已完成
+        :param name_func: 获取种子名称
+        :param on_completed: 种子变为已完成时的回调，入参为hash及种子数据
+        :param interval: 增量同步的最小间隔（秒）
+        :param full_interval: 全量同步间隔（秒）
+        """
+        self._name = name
+        self._sync_func = sync_func
+        self._completed_func = completed_func
+        self._name_func = name_func
+        self._on_completed = on_completed
+        self._interval = interval
+        self._full_interval = full_interval
+        self._torrents: Dict[str, Any] = {}
+        # 已完成的种子
+        self._completed: set = set()
+        # 识别元数据：hash -> (名称, 元数据)
+        self._metas: Dict[str, Tuple[str, MetaBase]] = {}
+        self._lock = threading.Lock()
+        self._last_sync = 0
+        self._last_full = 0
+        # 是否已完成首次同步
+        self._ready = False
+
+    def invalidate(self):
+        """
+        下次读取时强制全量同步，用于下载器重连或增量数据不可靠时
+        """
+        self._last_full = 0
+
+    def expire(self):
+        """
+        下次读取时立即增量同步，用于修改了种子状态（如标签）后
+        """
+        self._last_sync = 0
+
+    def torrents(self) -> Optional[List[Any]]:
+        """
+        获取所有种子，必要时先同步，同步失败且没有缓存时返回None
+        """
+        if not self.sync():
+            return None
+        return list(self._torrents.values())
+
+    def sync(self) -> bool:
+        """
+        同步种子状态，未到间隔时直接使用缓存
+        :return: 缓存是否可用
+        """
+        with self._lock:
+            now = time.time()
+            if self._ready and now - self._last_sync < self._interval:
+                return True
+            full = not self._ready or now - self._last_full >= self._full_interval
+            try:
+                result = self._sync_func(full)
+            except Exception as err:
+                logger.error(f"{self._name} 同步种子状态出错：{str(err)} - {traceback.format_exc()}")
+                result = None
+            if result is None:
+                # 同步失败，下次全量同步
+                self._last_full = 0
+                return self._ready
+            is_full, changed, removed = result
+            self.__apply(is_full, changed, removed)
+            self._last_sync = now
+            if is_full:
+                self._last_full = now
+            self._ready = True
+            return True
+
+    def __apply(self, is_full: bool, changed: Dict[str, Any], removed: List[str]):
+        """
+        应用同步结果
+        """
+        if is_full:
+            removed = [h for h in self._torrents if h not in changed]
+        for torrent_hash in removed or []:
+            self._torrents.pop(torrent_hash, None)
+            self._metas.pop(torrent_hash, None)
+            self._completed.discard(torrent_hash)
+        completed = []
+        for torrent_hash, torrent in changed.items():
+            cached = self._torrents.get(torrent_hash)
+            if isinstance(cached, dict) and isinstance(torrent, dict) and not is_full:
+                cached.update(torrent)
+                torrent = cached
+            self._torrents[torrent_hash] = torrent
+            if self._completed_func(torrent):
+                if torrent_hash not in self._completed:
+                    self._completed.add(torrent_hash)
+                    # 首次同步的已完成种子不算新完成
+                    if self._ready:
+                        completed.append(torrent_hash)
+            else:
+                self._completed.discard(torrent_hash)
+        for torrent_hash in completed:
+            logger.info(f"{self._name} 下载任务已完成：{self._name_func(self._torrents[torrent_hash])}")
+            if self._on_completed:
+                try:
+                    self._on_completed(torrent_hash, self._torrents[torrent_hash])
+                except Exception as err:
+                    logger.error(f"{self._name} 处理下载完成通知出错：{str(err)}")
+
+    def get_meta(self, torrent_hash: str, title: str) -> MetaBase:
+        """
+        获取种子名称的识别元数据，名称不变时不重复识别
+        """
+        cached = self._metas.get(torrent_hash)
+        if cached and cached[0] == title:
+            return cached[1]
+        meta = MetaInfo(title)
+        self._metas[torrent_hash] = (title, meta)
+        return meta
@@ -0,0 +1,204 @@
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from watchdog.events import FileSystemEventHandler, FileSystemEvent
+from watchdog.observers import Observer
+
+from app.core.config import settings
+from app.log import logger
+from app.utils.singleton import Singleton
+
+
+class DownloadDirMonitorHandler(FileSystemEventHandler):
+    """
+    下载目录变化监听，有媒体文件新建或改名（如去掉未完成后缀）时加入整理队列
+    """
+
+    def __init__(self, root: Path, queue: "TransferQueueHelper"):
+        super().__init__()
+        self._root = root
+        self._queue = queue
+
+    def on_created(self, event: FileSystemEvent):
+        if not event.is_directory:
+            self.__handle(Path(event.src_path))
+
+    def on_moved(self, event: FileSystemEvent):
+        if not event.is_directory:
+            self.__handle(Path(event.dest_path))
+
+    def __handle(self, file_path: Path):
+        if file_path.suffix.lower() not in settings.RMT_MEDIAEXT:
+            return
+        try:
+            relative = file_path.relative_to(self._root)
+        except ValueError:
+            return
+        # 种子内容路径：下载目录下的第一级文件或目录
+        self._queue.put_path(self._root / relative.parts[0])
+
+
+class TransferQueueHelper(metaclass=Singleton):
+    """
+    下载器文件整理队列
+    下载完成通知、下载目录文件变化、下载器Webhook触发的整理按种子去抖合并后，由后台线程依次执行
+    """
+
+    # 按种子Hash触发的去抖时间（秒）
+    _hash_delay = 5
+    # 按文件变化触发的去抖时间（秒），等待文件写入完成
+    _path_delay = 30
+    # 未找到已完成种子时的重试次数及间隔（秒）
+    _max_retries = 3
+    _retry_delay = 30
+
+    def __init__(self):
+        # 待处理的种子：hash -> (执行时间, 已重试次数)
+        self._hashs: Dict[str, Tuple[float, int]] = {}
+        # 待处理的路径：path -> 执行时间
+        self._paths: Dict[Path, float] = {}
+        self._condition = threading.Condition()
+        self._handler: Optional[Callable[[List[str], List[Path]], List[str]]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._observer: Optional[Observer] = None
+        self._stopped = True
+
+    def start(self, handler: Callable[[List[str], List[Path]], List[str]], watch_paths: List[Path] = None):
+        """
+        启动整理队列及下载目录监听，重复调用时按新的目录重新监听
+        :param handler: 整理函数，入参为种子Hash列表和路径列表，返回未找到已完成种子的Hash
+        :param watch_paths: 需要监听的下载目录
+        """
+        self.stop_monitor()
+        with self._condition:
+            self._handler = handler
+            self._stopped = False
+            if not self._thread or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.__run, name="transfer-queue", daemon=True)
+                self._thread.start()
+        self.__start_monitor(watch_paths or [])
+
+    def stop(self):
+        """
+        停止整理队列及目录监听
+        """
+        self.stop_monitor()
+        with self._condition:
+            self._stopped = True
+            self._hashs.clear()
+            self._paths.clear()
+            self._condition.notify_all()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=10)
+        self._thread = None
+
+    def put_hash(self, torrent_hash: str, delay: int = None):
+        """
+        按种子Hash加入整理队列，去抖时间内的重复请求合并
+        """
+        if not torrent_hash:
+            return
+        with self._condition:
+            if self._stopped:
+                return
+            _, retries = self._hashs.get(torrent_hash, (0, 0))
+            self._hashs[torrent_hash] = (time.time() + (self._hash_delay if delay is None else delay), retries)
+            self._condition.notify()
+
+    def put_path(self, path: Path):
+        """
+        按下载内容路径加入整理队列，路径持续变化时推迟执行
+        """
+        with self._condition:
+            if self._stopped:
+                return
+            if path not in self._paths:
+                logger.debug(f"下载目录文件变化：{path}")
+            self._paths[path] = time.time() + self._path_delay
+            self._condition.notify()
+
+    def __start_monitor(self, watch_paths: List[Path]):
+        """
+        监听下载目录
+        """
+        paths = []
+        for path in sorted(set(watch_paths)):
+            if not path.exists():
+                continue
+            # 已监听上级目录的不重复监听
+            if any(parent in paths for parent in path.parents):
+                continue
+            paths.append(path)
+        if not paths:
+            return
+        observer = Observer()
+        for path in paths:
+            try:
+                observer.schedule(DownloadDirMonitorHandler(path, self), str(path), recursive=True)
+            except Exception as err:
+                logger.warn(f"下载目录 {path} 无法监听：{str(err)}")
+        observer.daemon = True
+        try:
+            observer.start()
+        except Exception as err:
+            logger.warn(f"下载目录监听启动失败：{str(err)}")
+            return
+        self._observer = observer
+        logger.info(f"开始监听下载目录：{', '.join(str(path) for path in paths)}")
+
+    def stop_monitor(self):
+        """
+        停止下载目录监听
+        """
+        if self._observer:
+            try:
+                self._observer.stop()
+                self._observer.join(timeout=10)
+            except Exception as err:
+                logger.debug(f"停止下载目录监听出错：{str(err)}")
+            self._observer = None
+
+    def __take_due(self) -> Tuple[Dict[str, int], List[Path]]:
+        """
+        等待并取出已到执行时间的任务
+        """
+        with self._condition:
+            while not self._stopped:
+                now = time.time()
+                due_hashs = {h: retries for h, (due, retries) in self._hashs.items() if due <= now}
+                due_paths = [p for p, due in self._paths.items() if due <= now]
+                if due_hashs or due_paths:
+                    for h in due_hashs:
+                        self._hashs.pop(h, None)
+                    for p in due_paths:
+                        self._paths.pop(p, None)
+                    return due_hashs, due_paths
+                dues = [due for due, _ in self._hashs.values()] + list(self._paths.values())
+                self._condition.wait(timeout=min(dues) - now if dues else None)
+            return {}, []
+
+    def __run(self):
+        """
+        后台执行整理
+        """
+        while True:
+            hashs, paths = self.__take_due()
+            if self._stopped:
+                break
+            try:
+                missing = self._handler(list(hashs), paths) or []
+            except Exception as err:
+                logger.error(f"执行整理队列出错：{str(err)} - {traceback.format_exc()}")
+                continue
+            # 下载器中还未显示完成的种子稍后重试
+            with self._condition:
+                for torrent_hash in missing:
+                    retries = hashs.get(torrent_hash)
+                    if retries is None or retries >= self._max_retries \
+                            or torrent_hash in self._hashs or self._stopped:
+                        continue
+                    self._hashs[torrent_hash] = (time.time() + self._retry_delay, retries + 1)
+                self._condition.notify()
@@ -1,11 +1,6 @@
 import base64
 from pathlib import Path
-from typing import Optional, Tuple, List
-
-import oss2
-import py115
-from py115 import Cloud
-from py115.types import LoginTarget, QrcodeSession, QrcodeStatus, Credential, DownloadTicket
+from typing import Optional, Tuple, List, TYPE_CHECKING
 
 from app import schemas
 from app.db.systemconfig_oper import SystemConfigOper
@@ -13,14 +8,19 @@ from app.log import logger
 from app.schemas.types import SystemConfigKey
 from app.utils.singleton import Singleton
 
+if TYPE_CHECKING:
+    # 115相关依赖较重，使用时才导入
+    from py115 import Cloud
+    from py115.types import QrcodeSession, Credential, DownloadTicket
+
 
 class U115Helper(metaclass=Singleton):
     """
     115相关操作
     """
 
-    cloud: Optional[Cloud] = None
-    _session: QrcodeSession = None
+    cloud: Optional["Cloud"] = None
+    _session: "QrcodeSession" = None
 
     def __init__(self):
         self.systemconfig = SystemConfigOper()
@@ -35,6 +35,7 @@ class U115Helper(metaclass=Singleton):
             return False
         try:
             if not self.cloud:
+                import py115
                 self.cloud = py115.connect(credential)
         except Exception as err:
             logger.error(f"115连接失败，请重新扫码登录：{str(err)}")
@@ -43,16 +44,17 @@ class U115Helper(metaclass=Singleton):
         return True
 
     @property
-    def __credential(self) -> Optional[Credential]:
+    def __credential(self) -> Optional["Credential"]:
         """
         获取已保存的115认证参数
         """
         cookie_dict = self.systemconfig.get(SystemConfigKey.User115Params)
         if not cookie_dict:
             return None
+        from py115.types import Credential
         return Credential.from_dict(cookie_dict)
 
-    def __save_credentail(self, credential: Credential):
+    def __save_credentail(self, credential: "Credential"):
         """
         设置115认证参数
         """
@@ -69,6 +71,8 @@ class U115Helper(metaclass=Singleton):
         生成二维码
         """
         try:
+            import py115
+            from py115.types import LoginTarget
             self.cloud = py115.connect()
             self._session = self.cloud.qrcode_login(LoginTarget.Web)
             image_bin = self._session.image_data
@@ -91,6 +95,7 @@ class U115Helper(metaclass=Singleton):
         try:
             if not self.cloud:
                 return {}, "请先生成二维码！"
+            from py115.types import QrcodeStatus
             status = self.cloud.qrcode_poll(self._session)
             if status == QrcodeStatus.Done:
                 # 确认完成，保存认证信息
@@ -208,7 +213,7 @@ class U115Helper(metaclass=Singleton):
             logger.error(f"重命名115文件失败：{str(e)}")
         return False
 
-    def download(self, pickcode: str) -> Optional[DownloadTicket]:
+    def download(self, pickcode: str) -> Optional["DownloadTicket"]:
         """
         获取下载链接
         """
@@ -248,6 +253,7 @@ class U115Helper(metaclass=Singleton):
                 logger.warn(f"115请求上传失败：文件已存在")
                 return {}
             else:
+                import oss2
                 auth = oss2.StsAuth(**ticket.oss_token)
                 bucket = oss2.Bucket(
                     auth=auth,
@@ -5,9 +5,12 @@ import sys
 import threading
 from types import FrameType
 
+# 启动耗时统计，需在导入其它模块前开始
+from app.core.startup import startup
+
 import uvicorn as uvicorn
 from PIL import Image
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from uvicorn import Config
 
@@ -19,7 +22,9 @@ if SystemUtils.is_frozen():
     sys.stderr = open(os.devnull, 'w')
 
 from app.core.config import settings, global_vars
+from app.core.metrics import metrics
 from app.core.module import ModuleManager
+from app.log import logger
 
 # SitesHelper涉及资源包拉取，提前引入并容错提示
 try:
@@ -31,6 +36,7 @@ except ImportError as e:
 
 from app.core.plugin import PluginManager
 from app.db.init import init_db, update_db, init_super_user
+from app.db.plugindata_oper import PluginDataOper
 from app.helper.thread import ThreadHelper
 from app.helper.display import DisplayHelper
 from app.helper.resource import ResourceHelper
@@ -39,6 +45,8 @@ from app.scheduler import Scheduler
 from app.command import Command, CommandChian
 from app.schemas import Notification, NotificationType
 
+startup.mark("导入依赖")
+
 # App
 App = FastAPI(title=settings.PROJECT_NAME,
               openapi_url=f"{settings.API_V1_STR}/openapi.json")
@@ -52,6 +60,27 @@ App.add_middleware(
     allow_headers=["*"],
 )
 
+
+@App.middleware("http")
+async def trace_request(request: Request, call_next):
+    """
+    记录API请求耗时，开启请求追踪时输出该请求各环节的耗时
+    """
+    token = metrics.start_trace() if settings.REQUEST_TRACE and request.headers.get("X-Trace") else None
+    try:
+        with metrics.span("api_request", method=request.method, route="other") as labels:
+            response = await call_next(request)
+            # 按路由模板统计，避免路径参数导致标签过多
+            route = request.scope.get("route")
+            labels["route"] = getattr(route, "path", "other")
+    finally:
+        if token:
+            spans = metrics.finish_trace(token)
+            logger.info(f"请求追踪 {request.method} {request.url.path}：\n{metrics.format_trace(spans)}")
+    if token:
+        response.headers["Server-Timing"] = metrics.server_timing(spans)
+    return response
+
 # uvicorn服务
 Server = uvicorn.Server(Config(App, host=settings.HOST, port=settings.PORT,
                                reload=settings.DEV, workers=multiprocessing.cpu_count()))
@@ -205,6 +234,8 @@ def shutdown_server():
     Scheduler().stop()
     # 停止线程池
     ThreadHelper().shutdown()
+    # 提交缓存中的插件数据
+    PluginDataOper().stop()
     # 停止前端服务
     stop_frontend()
 
@@ -214,6 +245,7 @@ def start_module():
     """
     启动模块
     """
+    startup.mark("启动服务")
     # 初始化超级管理员
     init_super_user()
     # 虚拟显示
@@ -222,16 +254,20 @@ def start_module():
     SitesHelper()
     # 资源包检测
     ResourceHelper()
+    startup.mark("站点及资源包")
     # 加载模块
     ModuleManager()
+    startup.mark("加载模块")
     # 安装在线插件
     PluginManager().install_online_plugin()
     # 加载插件
     PluginManager().start()
+    startup.mark("加载插件")
     # 启动定时服务
     Scheduler()
     # 启动事件消费
     Command()
+    startup.mark("定时服务及事件消费")
     # 初始化路由
     init_routers()
     # 启动前端服务
@@ -240,6 +276,9 @@ def start_module():
     check_auth()
     # 监听停止信号
     singal_handle()
+    startup.mark("初始化路由")
+    # 输出启动耗时
+    logger.info(startup.report())
 
 
 if __name__ == '__main__':
@@ -249,5 +288,6 @@ if __name__ == '__main__':
     init_db()
     # 更新数据库
     update_db()
+    startup.mark("初始化数据库")
     # 启动API服务
     Server.run()
@@ -12,6 +12,9 @@ class _ModuleBase(metaclass=ABCMeta):
     输入参数与输出参数一致的，或没有输出的，可以被多个模块重复实现
     """
 
+    # 是否在首次使用时才初始化，初始化时需要启动消息监听等后台服务的模块不能延迟
+    lazy_init: bool = False
+
     @abstractmethod
     def init_module(self) -> None:
         """
@@ -11,6 +11,8 @@ from app.utils.http import RequestUtils
 
 
 class BangumiModule(_ModuleBase):
+    lazy_init = True
+
     bangumiapi: BangumiApi = None
 
     def init_module(self) -> None:
@@ -23,6 +23,9 @@ from app.utils.system import SystemUtils
 
 
 class DoubanModule(_ModuleBase):
+    # 首次使用时再加载豆瓣缓存
+    lazy_init = True
+
     doubanapi: DoubanApi = None
     scraper: DoubanScraper = None
     cache: DoubanCache = None
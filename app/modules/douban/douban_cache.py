@@ -1,7 +1,4 @@
-import pickle
-import random
 import time
-import traceback
 from pathlib import Path
 from threading import RLock
 from typing import Optional
@@ -9,6 +6,7 @@ from typing import Optional
 from app.core.config import settings
 from app.core.meta import MetaBase
 from app.core.metainfo import MetaInfo
+from app.helper.metacache import MetaCacheStore
 from app.log import logger
 from app.utils.singleton import Singleton
 from app.schemas.types import MediaType
@@ -21,7 +19,7 @@ EXPIRE_TIMESTAMP = settings.CACHE_CONF.get('meta')
 
 class DoubanCache(metaclass=Singleton):
     """
-    豆瓣缓存数据
+    豆瓣缓存数据，按key增量保存在SQLite中，最近使用的条目保留在内存
     {
         "id": '',
         "title": '',
@@ -29,22 +27,26 @@ class DoubanCache(metaclass=Singleton):
         "type": MediaType
     }
     """
-    _meta_data: dict = {}
+    # 缓存存储
+    _store: MetaCacheStore = None
     # 缓存文件路径
     _meta_path: Path = None
-    # TMDB缓存过期
+    # 豆瓣缓存过期
     _tmdb_cache_expire: bool = True
 
     def __init__(self):
-        self._meta_path = settings.TEMP_PATH / "__douban_cache__"
-        self._meta_data = self.__load(self._meta_path)
+        self._meta_path = settings.TEMP_PATH / "__douban_cache__.db"
+        self._store = MetaCacheStore(path=self._meta_path,
+                                     lru_size=settings.CACHE_CONF.get('meta_lru'),
+                                     legacy_path=settings.TEMP_PATH / "__douban_cache__",
+                                     expire_field=CACHE_EXPIRE_TIMESTAMP_STR)
 
     def clear(self):
         """
-        清空所有TMDB缓存
+        清空所有豆瓣缓存
         """
         with lock:
-            self._meta_data = {}
+            self._store.clear()
 
     @staticmethod
     def __get_key(meta: MetaBase) -> str:
@@ -60,12 +62,12 @@ class DoubanCache(metaclass=Singleton):
         """
         key = self.__get_key(meta)
         with lock:
-            info: dict = self._meta_data.get(key)
+            info: dict = self._store.get(key)
             if info:
                 expire = info.get(CACHE_EXPIRE_TIMESTAMP_STR)
                 if not expire or int(time.time()) < expire:
                     info[CACHE_EXPIRE_TIMESTAMP_STR] = int(time.time()) + EXPIRE_TIMESTAMP
-                    self._meta_data[key] = info
+                    self._store.touch(key, info[CACHE_EXPIRE_TIMESTAMP_STR])
                 elif expire and self._tmdb_cache_expire:
                     self.delete(key)
             return info or {}
@@ -77,25 +79,21 @@ class DoubanCache(metaclass=Singleton):
         @return: 被删除的缓存内容
         """
         with lock:
-            return self._meta_data.pop(key, None)
+            return self._store.delete(key)
 
     def delete_by_doubanid(self, doubanid: str) -> None:
         """
         清空对应豆瓣ID的所有缓存记录，以强制更新TMDB中最新的数据
         """
-        for key in list(self._meta_data):
-            if self._meta_data.get(key, {}).get("id") == doubanid:
-                with lock:
-                    self._meta_data.pop(key)
+        with lock:
+            self._store.delete_by_mid(doubanid)
 
     def delete_unknown(self) -> None:
         """
         清除未识别的缓存记录，以便重新搜索TMDB
         """
-        for key in list(self._meta_data):
-            if self._meta_data.get(key, {}).get("id") == "0":
-                with lock:
-                    self._meta_data.pop(key)
+        with lock:
+            self._store.delete_by_mid("0")
 
     def modify(self, key: str, title: str) -> dict:
         """
@@ -105,25 +103,20 @@ class DoubanCache(metaclass=Singleton):
         @return: 被修改后缓存内容
         """
         with lock:
-            if self._meta_data.get(key):
-                self._meta_data[key]['title'] = title
-                self._meta_data[key][CACHE_EXPIRE_TIMESTAMP_STR] = int(time.time()) + EXPIRE_TIMESTAMP
-            return self._meta_data.get(key)
+            info = self._store.get(key)
+            if info:
+                info['title'] = title
+                info[CACHE_EXPIRE_TIMESTAMP_STR] = int(time.time()) + EXPIRE_TIMESTAMP
+                self.__set(key, info)
+            return info
 
-    @staticmethod
-    def __load(path: Path) -> dict:
+    def __set(self, key: str, info: dict):
         """
-        从文件中加载缓存
+        写入缓存条目
         """
-        try:
-            if path.exists():
-                with open(path, 'rb') as f:
-                    data = pickle.load(f)
-                return data
-            return {}
-        except Exception as e:
-            logger.error(f"加载缓存失败: {str(e)} - {traceback.format_exc()}")
-            return {}
+        self._store.set(key, info,
+                        mid=info.get("id"),
+                        expire=info.get(CACHE_EXPIRE_TIMESTAMP_STR))
 
     def update(self, meta: MetaBase, info: dict) -> None:
         """
@@ -153,74 +146,35 @@ class DoubanCache(metaclass=Singleton):
                 if not poster_path and info.get("cover"):
                     poster_path = info.get("cover").get("url")
 
-                self._meta_data[self.__get_key(meta)] = {
+                self.__set(self.__get_key(meta), {
                         "id": info.get("id"),
                         "type": mtype,
                         "year": cache_year,
                         "title": cache_title,
                         "poster_path": poster_path,
                         CACHE_EXPIRE_TIMESTAMP_STR: int(time.time()) + EXPIRE_TIMESTAMP
-                    }
+                    })
             elif info is not None:
                 # None时不缓存，此时代表网络错误，允许重复请求
-                self._meta_data[self.__get_key(meta)] = {'id': "0"}
+                self.__set(self.__get_key(meta), {'id': "0"})
 
     def save(self, force: bool = False) -> None:
         """
-        保存缓存数据到文件
-        """
-
-        meta_data = self.__load(self._meta_path)
-        new_meta_data = {k: v for k, v in self._meta_data.items() if v.get("id")}
-
-        if not force \
-                and not self._random_sample(new_meta_data) \
-                and meta_data.keys() == new_meta_data.keys():
-            return
-
-        with open(self._meta_path, 'wb') as f:
-            pickle.dump(new_meta_data, f, pickle.HIGHEST_PROTOCOL)
-
-    def _random_sample(self, new_meta_data: dict) -> bool:
-        """
-        采样分析是否需要保存
+        写入读取时延长的有效期，并清理过期的缓存（条目在更新时已逐条写入）
         """
-        ret = False
-        if len(new_meta_data) < 25:
-            keys = list(new_meta_data.keys())
-            for k in keys:
-                info = new_meta_data.get(k)
-                expire = info.get(CACHE_EXPIRE_TIMESTAMP_STR)
-                if not expire:
-                    ret = True
-                    info[CACHE_EXPIRE_TIMESTAMP_STR] = int(time.time()) + EXPIRE_TIMESTAMP
-                elif int(time.time()) >= expire:
-                    ret = True
-                    if self._tmdb_cache_expire:
-                        new_meta_data.pop(k)
-        else:
-            count = 0
-            keys = random.sample(sorted(new_meta_data.keys()), 25)
-            for k in keys:
-                info = new_meta_data.get(k)
-                expire = info.get(CACHE_EXPIRE_TIMESTAMP_STR)
-                if not expire:
-                    ret = True
-                    info[CACHE_EXPIRE_TIMESTAMP_STR] = int(time.time()) + EXPIRE_TIMESTAMP
-                elif int(time.time()) >= expire:
-                    ret = True
-                    if self._tmdb_cache_expire:
-                        new_meta_data.pop(k)
-                        count += 1
-            if count >= 5:
-                ret |= self._random_sample(new_meta_data)
-        return ret
+        with lock:
+            if self._tmdb_cache_expire:
+                count = self._store.delete_expired()
+                if count:
+                    logger.debug(f"已清理 {count} 条过期的豆瓣缓存")
+            else:
+                self._store.flush()
 
     def get_title(self, key: str) -> Optional[str]:
         """
         获取缓存的标题
         """
-        cache_media_info = self._meta_data.get(key)
+        cache_media_info = self._store.get(key)
         if not cache_media_info or not cache_media_info.get("id"):
             return None
         return cache_media_info.get("title")
@@ -229,7 +183,9 @@ class DoubanCache(metaclass=Singleton):
         """
         重新设置缓存标题
         """
-        cache_media_info = self._meta_data.get(key)
-        if not cache_media_info:
-            return
-        self._meta_data[key]['title'] = cn_title
+        with lock:
+            cache_media_info = self._store.get(key)
+            if not cache_media_info:
+                return
+            cache_media_info['title'] = cn_title
+            self.__set(key, cache_media_info)
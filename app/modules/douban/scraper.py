@@ -1,14 +1,14 @@
 from pathlib import Path
-from typing import Union, Optional
+from typing import Union, Optional, Dict
 from xml.dom import minidom
 
 from app.core.config import settings
 from app.core.context import MediaInfo
 from app.core.meta import MetaBase
+from app.helper.image import ImageHelper
 from app.log import logger
 from app.schemas.types import MediaType
 from app.utils.dom import DomUtils
-from app.utils.http import RequestUtils
 from app.utils.system import SystemUtils
 
 
@@ -74,6 +74,8 @@ class DoubanScraper:
         self._transfer_type = transfer_type
         self._force_nfo = force_nfo
         self._force_img = force_img
+        # 需要下载的图片：{保存路径: 图片地址}
+        images: Dict[Path, str] = {}
 
         try:
             # 电影
@@ -89,8 +91,7 @@ class DoubanScraper:
                 for img_name, img_url in image_dict.items():
                     image_path = file_path.with_name(img_name)
                     if self._force_img or not image_path.exists():
-                        self.__save_image(url=img_url,
-                                          file_path=image_path)
+                        images[image_path] = img_url
             # 电视剧
             else:
                 # 不存在时才处理
@@ -103,13 +104,14 @@ class DoubanScraper:
                 for img_name, img_url in image_dict.items():
                     image_path = file_path.with_name(img_name)
                     if self._force_img or not image_path.exists():
-                        self.__save_image(url=img_url,
-                                          file_path=image_path)
+                        images[image_path] = img_url
                 # 季目录NFO
                 if self._force_nfo or not file_path.with_name("season.nfo").exists():
                     self.__gen_tv_season_nfo_file(mediainfo=mediainfo,
                                                   season=meta.begin_season,
                                                   season_path=file_path.parent)
+            # 并发下载图片
+            self.__save_images(images)
         except Exception as e:
             logger.error(f"{file_path} 刮削失败：{str(e)}")
 
@@ -221,29 +223,35 @@ class DoubanScraper:
             self.__save_nfo(doc, season_path.joinpath("season.nfo"))
         return doc
 
-    def __save_image(self, url: str, file_path: Path):
+    def __save_images(self, images: Dict[Path, str]):
         """
-        下载图片并保存
+        并发下载图片到本地缓存，再链接或复制到保存路径
+        :param images: {保存路径: 图片地址}
         """
-        if not url:
-            return
-        try:
+        urls = {}
+        for file_path, url in images.items():
+            if not url:
+                continue
             # 没有后缀时，处理URL转化为jpg格式
             if not file_path.suffix:
                 url = url.replace("/format/webp", "/format/jpg")
-                file_path.with_suffix(".jpg")
-            logger.info(f"正在下载{file_path.stem}图片：{url} ...")
-            r = RequestUtils().get_res(url=url)
-            if r:
+            urls[file_path] = url
+        if not urls:
+            return
+        cache_files = ImageHelper().fetch_all(list(urls.values()))
+        for file_path, url in urls.items():
+            cache_file = cache_files.get(url)
+            if not cache_file:
+                logger.info(f"{file_path.stem}图片下载失败，请检查网络连通性")
+                continue
+            try:
                 if self._transfer_type in ['rclone_move', 'rclone_copy']:
-                    self.__save_remove_file(file_path, r.content)
+                    self.__save_remove_file(file_path, cache_file.read_bytes())
                 else:
-                    file_path.write_bytes(r.content)
+                    ImageHelper.link(cache_file, file_path)
                 logger.info(f"图片已保存：{file_path}")
-            else:
-                logger.info(f"{file_path.stem}图片下载失败，请检查网络连通性")
-        except Exception as err:
-            logger.error(f"{file_path.stem}图片下载失败：{str(err)}")
+            except Exception as err:
+                logger.error(f"{file_path.stem}图片保存失败：{str(err)}")
 
     def __save_nfo(self, doc, file_path: Path):
         """
@@ -10,6 +10,7 @@ from app.core.context import MediaInfo
 from app.core.meta import MetaBase
 from app.core.metainfo import MetaInfo, MetaInfoPath
 from app.helper.directory import DirectoryHelper
+from app.helper.libraryindex import LibraryIndexHelper
 from app.helper.message import MessageHelper
 from app.log import logger
 from app.modules import _ModuleBase
@@ -514,6 +515,8 @@ class FileTransferModule(_ModuleBase):
                                     is_bluray=bluray_flag)
 
             logger.info(f"文件夹 {in_path} 转移成功")
+            # 更新媒体库索引
+            LibraryIndexHelper().refresh(new_path)
             # 返回转移后的路径
             return TransferInfo(success=True,
                                 path=in_path,
@@ -612,6 +615,8 @@ class FileTransferModule(_ModuleBase):
                                     fail_list=[str(in_path)])
 
             logger.info(f"文件 {in_path} 转移成功")
+            # 更新媒体库索引
+            LibraryIndexHelper().add_files([new_file])
             return TransferInfo(success=True,
                                 path=in_path,
                                 target_path=new_file,
@@ -760,8 +765,8 @@ class FileTransferModule(_ModuleBase):
             if not media_path.exists():
                 continue
 
-            # 检索媒体文件
-            media_files = SystemUtils.list_files(directory=media_path, extensions=settings.RMT_MEDIAEXT)
+            # 从媒体库索引中检索媒体文件
+            media_files = LibraryIndexHelper().list_files(media_path)
             if not media_files:
                 continue
 
@@ -773,14 +778,11 @@ class FileTransferModule(_ModuleBase):
                 # 电视剧检索集数
                 seasons: Dict[int, list] = {}
                 for media_file in media_files:
-                    file_meta = MetaInfo(media_file.stem)
-                    season_index = file_meta.begin_season or 1
-                    episode_index = file_meta.begin_episode
-                    if not episode_index:
+                    if not media_file.episode:
                         continue
-                    if season_index not in seasons:
-                        seasons[season_index] = []
-                    seasons[season_index].append(episode_index)
+                    if media_file.season not in seasons:
+                        seasons[media_file.season] = []
+                    seasons[media_file.season].append(media_file.episode)
                 # 返回剧集情况
                 logger.info(f"{mediainfo.title_year} 文件系统已存在：{seasons}")
                 return ExistMediaInfo(type=MediaType.TV, seasons=seasons)
@@ -797,21 +799,21 @@ class FileTransferModule(_ModuleBase):
         meta = MetaInfoPath(path)
         season = meta.season
         episode = meta.episode
-        # 检索媒体文件
+        # 从媒体库索引中检索媒体文件
         logger.warn(f"正在删除目标目录中其它版本的文件：{path.parent}")
-        media_files = SystemUtils.list_files(directory=path.parent, extensions=settings.RMT_MEDIAEXT)
+        library_index = LibraryIndexHelper()
+        media_files = library_index.list_files(path.parent)
         if not media_files:
             logger.info(f"目录中没有媒体文件：{path.parent}")
             return False
         # 删除文件
         for media_file in media_files:
-            if str(media_file) == str(path):
+            if str(media_file.path) == str(path):
                 continue
-            # 识别文件中的季集信息
-            filemeta = MetaInfoPath(media_file)
             # 相同季集的文件才删除
-            if filemeta.season != season or filemeta.episode != episode:
+            if media_file.path_season != season or media_file.path_episode != episode:
                 continue
-            logger.info(f"正在删除文件：{media_file}")
-            media_file.unlink()
+            logger.info(f"正在删除文件：{media_file.path}")
+            media_file.path.unlink(missing_ok=True)
+            library_index.remove(media_file.path)
         return True
@@ -9,6 +9,9 @@ from app.schemas.types import MediaType
 
 
 class JellyfinModule(_ModuleBase):
+    # 首次使用时再连接Jellyfin
+    lazy_init = True
+
     jellyfin: Jellyfin = None
 
     def init_module(self) -> None:
@@ -131,6 +134,22 @@ class JellyfinModule(_ModuleBase):
             return None
         return self.jellyfin.get_items(library_id)
 
+    def mediaserver_library_items(self, server: str, library_id: str) -> Optional[Generator]:
+        """
+        批量获取媒体库项目列表，电视剧包含各季剧集
+        """
+        if server != "jellyfin":
+            return None
+        return self.jellyfin.get_library_items(library_id)
+
+    def mediaserver_library_token(self, server: str, library_id: str) -> Optional[str]:
+        """
+        媒体库变更标识
+        """
+        if server != "jellyfin":
+            return None
+        return self.jellyfin.get_library_token(library_id)
+
     def mediaserver_iteminfo(self, server: str, item_id: str) -> Optional[schemas.MediaServerItem]:
         """
         媒体库项目详情
@@ -7,6 +7,7 @@ from app import schemas
 from app.core.config import settings
 from app.log import logger
 from app.schemas import MediaType
+from app.utils.common import fetch_pages
 from app.utils.http import RequestUtils
 
 
@@ -594,6 +595,10 @@ class Jellyfin:
                 or message.get("ItemType") == "Season":
             # 剧集
             eventItem.item_type = "TV"
+            if message.get("ItemType") == "Series":
+                eventItem.series_id = message.get('ItemId')
+            else:
+                eventItem.series_id = message.get('SeriesId')
             eventItem.season_id = message.get('SeasonNumber')
             eventItem.episode_id = message.get('EpisodeNumber')
             eventItem.item_name = "%s %s%s %s" % (
@@ -636,20 +641,7 @@ class Jellyfin:
             res = RequestUtils().get_res(req_url)
             if res and res.status_code == 200:
                 item = res.json()
-                tmdbid = item.get("ProviderIds", {}).get("Tmdb")
-                return schemas.MediaServerItem(
-                    server="jellyfin",
-                    library=item.get("ParentId"),
-                    item_id=item.get("Id"),
-                    item_type=item.get("Type"),
-                    title=item.get("Name"),
-                    original_title=item.get("OriginalTitle"),
-                    year=item.get("ProductionYear"),
-                    tmdbid=int(tmdbid) if tmdbid else None,
-                    imdbid=item.get("ProviderIds", {}).get("Imdb"),
-                    tvdbid=item.get("ProviderIds", {}).get("Tvdb"),
-                    path=item.get("Path")
-                )
+                return self.__format_item(item, library=item.get("ParentId"))
         except Exception as e:
             logger.error(f"连接Users/Items出错：" + str(e))
         return None
@@ -679,6 +671,98 @@ class Jellyfin:
             logger.error(f"连接Users/Items出错：" + str(e))
         yield None
 
+    @staticmethod
+    def __format_item(item: dict, library: str = None) -> schemas.MediaServerItem:
+        """
+        转换项目详情
+        """
+        tmdbid = item.get("ProviderIds", {}).get("Tmdb")
+        return schemas.MediaServerItem(
+            server="jellyfin",
+            library=library,
+            item_id=item.get("Id"),
+            item_type=item.get("Type"),
+            title=item.get("Name"),
+            original_title=item.get("OriginalTitle"),
+            year=item.get("ProductionYear"),
+            tmdbid=int(tmdbid) if tmdbid else None,
+            imdbid=item.get("ProviderIds", {}).get("Imdb"),
+            tvdbid=item.get("ProviderIds", {}).get("Tvdb"),
+            path=item.get("Path")
+        )
+
+    def __get_library_page(self, library_id: str, item_types: str, fields: str,
+                           start: int, limit: int) -> Tuple[List[dict], int]:
+        """
+        分页获取媒体库中指定类型的项目，按入库时间排序，分页期间新入库的项目排在最后
+        :return: 该页项目, 总数
+        """
+        req_url = "%sUsers/%s/Items?parentId=%s&Recursive=true&IncludeItemTypes=%s&Fields=%s" \
+                  "&IsMissing=false&SortBy=DateCreated,SortName&SortOrder=Ascending" \
+                  "&EnableImages=false&EnableUserData=false&StartIndex=%s&Limit=%s&api_key=%s" % (
+                      self._host, self.user, library_id, item_types, fields, start, limit, self._apikey)
+        res = RequestUtils().get_res(req_url)
+        if not res or res.status_code != 200:
+            raise IOError(f"Users/Items 未获取到返回数据：{res.status_code if res is not None else '无响应'}")
+        result = res.json()
+        return result.get("Items") or [], result.get("TotalRecordCount") or 0
+
+    def get_library_items(self, library_id: str) -> Generator[schemas.MediaServerItem, None, None]:
+        """
+        分页批量获取媒体库的所有电影和电视剧，电视剧的seasoninfo为各季已有的集，
+        剧集同样分页批量获取后按电视剧分组，不再逐个查询；获取出错时抛出异常
+        """
+        if not library_id or not self._host or not self._apikey:
+            return
+        page_size = settings.MEDIASERVER_SYNC_PAGE_SIZE
+        workers = settings.MEDIASERVER_SYNC_THREADS
+
+        def __episodes(start: int, limit: int):
+            return self.__get_library_page(library_id, "Episode", "ParentId", start, limit)
+
+        def __items(start: int, limit: int):
+            return self.__get_library_page(library_id, "Movie,Series", "ProviderIds,OriginalTitle,Path", start, limit)
+
+        # 电视剧ID -> {季: [集]}
+        seasoninfos: Dict[str, Dict[int, list]] = {}
+        for page in fetch_pages(__episodes, page_size=page_size, workers=workers):
+            for episode in page:
+                series_id = episode.get("SeriesId")
+                season_index = episode.get("ParentIndexNumber")
+                episode_index = episode.get("IndexNumber")
+                if not series_id or not season_index or not episode_index:
+                    continue
+                seasoninfos.setdefault(series_id, {}).setdefault(season_index, []).append(episode_index)
+        for page in fetch_pages(__items, page_size=page_size, workers=workers):
+            for item in page:
+                if not item.get("Id"):
+                    continue
+                mediaitem = self.__format_item(item, library=library_id)
+                if item.get("Type") == "Series":
+                    mediaitem.seasoninfo = seasoninfos.get(item.get("Id")) or {}
+                yield mediaitem
+
+    def get_library_token(self, library_id: str) -> Optional[str]:
+        """
+        获取媒体库变更标识：电影、电视剧、剧集总数及最新入库的项目，媒体库有增删时变化
+        """
+        if not library_id:
+            return None
+        if not self._host or not self._apikey:
+            return None
+        req_url = "%sUsers/%s/Items?parentId=%s&Recursive=true&IncludeItemTypes=Movie,Series,Episode" \
+                  "&SortBy=DateCreated&SortOrder=Descending&Limit=1&api_key=%s" % (
+                      self._host, self.user, library_id, self._apikey)
+        try:
+            res = RequestUtils().get_res(req_url)
+            if res and res.status_code == 200:
+                result = res.json()
+                latest = (result.get("Items") or [{}])[0].get("Id")
+                return f"{result.get('TotalRecordCount') or 0}:{latest or ''}"
+        except Exception as e:
+            logger.error(f"连接Users/Items出错：" + str(e))
+        return None
+
     def get_data(self, url: str) -> Optional[Response]:
         """
         自定义URL从媒体服务器获取数据，其中[HOST]、[APIKEY]、[USER]会被替换成实际的值
@@ -9,6 +9,9 @@ from app.schemas.types import MediaType
 
 
 class PlexModule(_ModuleBase):
+    # 首次使用时再连接Plex
+    lazy_init = True
+
     plex: Plex = None
 
     def init_module(self) -> None:
@@ -125,6 +128,22 @@ class PlexModule(_ModuleBase):
             return None
         return self.plex.get_items(library_id)
 
+    def mediaserver_library_items(self, server: str, library_id: str) -> Optional[Generator]:
+        """
+        批量获取媒体库项目列表，电视剧包含各季剧集
+        """
+        if server != "plex":
+            return None
+        return self.plex.get_library_items(library_id)
+
+    def mediaserver_library_token(self, server: str, library_id: str) -> Optional[str]:
+        """
+        媒体库变更标识
+        """
+        if server != "plex":
+            return None
+        return self.plex.get_library_token(library_id)
+
     def mediaserver_iteminfo(self, server: str, item_id: str) -> Optional[schemas.MediaServerItem]:
         """
         媒体库项目详情
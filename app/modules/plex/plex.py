@@ -12,6 +12,7 @@ from app import schemas
 from app.core.config import settings
 from app.log import logger
 from app.schemas import MediaType
+from app.utils.common import fetch_pages
 from app.utils.http import RequestUtils
 
 
@@ -386,24 +387,7 @@ class Plex:
         if not self._plex:
             return None
         try:
-            item = self._plex.fetchItem(itemid)
-            ids = self.__get_ids(item.guids)
-            path = None
-            if item.locations:
-                path = item.locations[0]
-            return schemas.MediaServerItem(
-                server="plex",
-                library=item.librarySectionID,
-                item_id=item.key,
-                item_type=item.type,
-                title=item.title,
-                original_title=item.originalTitle,
-                year=item.year,
-                tmdbid=ids['tmdb_id'],
-                imdbid=ids['imdb_id'],
-                tvdbid=ids['tvdb_id'],
-                path=path,
-            )
+            return self.__format_item(self._plex.fetchItem(itemid))
         except Exception as err:
             logger.error(f"获取项目详情出错：{str(err)}")
         return None
@@ -455,23 +439,7 @@ class Plex:
                     try:
                         if not item:
                             continue
-                        ids = self.__get_ids(item.guids)
-                        path = None
-                        if item.locations:
-                            path = item.locations[0]
-                        yield schemas.MediaServerItem(
-                            server="plex",
-                            library=item.librarySectionID,
-                            item_id=item.key,
-                            item_type=item.type,
-                            title=item.title,
-                            original_title=item.originalTitle,
-                            year=item.year,
-                            tmdbid=ids['tmdb_id'],
-                            imdbid=ids['imdb_id'],
-                            tvdbid=ids['tvdb_id'],
-                            path=path,
-                        )
+                        yield self.__format_item(item)
                     except Exception as e:
                         logger.error(f"处理媒体项目时出错：{str(e)}, 跳过此项目。")
                         continue
@@ -479,6 +447,117 @@ class Plex:
             logger.error(f"获取媒体库列表出错：{str(err)}")
         yield None
 
+    def __format_item(self, item: Any) -> schemas.MediaServerItem:
+        """
+        转换项目详情
+        """
+        ids = self.__get_ids(item.guids)
+        path = None
+        if item.locations:
+            path = item.locations[0]
+        return schemas.MediaServerItem(
+            server="plex",
+            library=item.librarySectionID,
+            item_id=item.key,
+            item_type=item.type,
+            title=item.title,
+            original_title=item.originalTitle,
+            year=item.year,
+            tmdbid=ids['tmdb_id'],
+            imdbid=ids['imdb_id'],
+            tvdbid=ids['tvdb_id'],
+            path=path,
+        )
+
+    def __format_element(self, element: Any, library_id: str) -> schemas.MediaServerItem:
+        """
+        转换媒体库列表中的XML元素，只使用列表中已有的属性；
+        列表中的媒体对象是不完整的，读取缺少的属性（如没有年份、路径）时会逐个重新请求详情
+        """
+        attrib = element.attrib
+        if attrib.get("type") == "show":
+            paths = [location.attrib.get("path") for location in element.iter("Location")]
+        else:
+            paths = [part.attrib.get("file") for part in element.iter("Part")]
+        ids = self.__get_ids([{"id": guid.attrib.get("id")} for guid in element.iter("Guid")
+                              if guid.attrib.get("id")])
+        return schemas.MediaServerItem(
+            server="plex",
+            library=library_id,
+            item_id=attrib.get("key", "").replace("/children", ""),
+            item_type=attrib.get("type"),
+            title=attrib.get("title"),
+            original_title=attrib.get("originalTitle"),
+            year=attrib.get("year"),
+            tmdbid=ids['tmdb_id'],
+            imdbid=ids['imdb_id'],
+            tvdbid=ids['tvdb_id'],
+            path=next((path for path in paths if path), None),
+        )
+
+    def __get_library_page(self, key: str, start: int, size: int, params: dict = None) -> Tuple[List[Any], int]:
+        """
+        按容器分页获取媒体库数据
+        :param key: 请求路径
+        :return: 该页数据的XML元素, 总数
+        """
+        data = self._plex.query(key, headers={"X-Plex-Container-Start": str(start),
+                                              "X-Plex-Container-Size": str(size)}, params=params)
+        total = data.attrib.get("totalSize") or data.attrib.get("size")
+        return list(data), int(total) if total else 0
+
+    def get_library_items(self, library_id: str) -> Generator[schemas.MediaServerItem, None, None]:
+        """
+        分页批量获取媒体库的所有电影和电视剧，电视剧的seasoninfo为各季已有的集，
+        剧集通过 allLeaves 分页批量获取后按电视剧分组，均直接读取XML属性；获取出错时抛出异常
+        """
+        if not library_id or not self._plex:
+            return
+        page_size = settings.MEDIASERVER_SYNC_PAGE_SIZE
+        workers = settings.MEDIASERVER_SYNC_THREADS
+        section = self._plex.library.sectionByID(int(library_id))
+
+        def __episodes(start: int, size: int):
+            return self.__get_library_page(f"/library/sections/{section.key}/allLeaves", start, size)
+
+        def __items(start: int, size: int):
+            return self.__get_library_page(f"/library/sections/{section.key}/all", start, size,
+                                           params={"includeGuids": 1, "includeLocations": 1})
+
+        # 电视剧key -> {季: [集]}
+        seasoninfos: Dict[str, Dict[int, list]] = {}
+        if section.type == "show":
+            for page in fetch_pages(__episodes, page_size=page_size, workers=workers):
+                for element in page:
+                    series_key = element.attrib.get("grandparentKey")
+                    season_index = element.attrib.get("parentIndex")
+                    episode_index = element.attrib.get("index")
+                    if not series_key or season_index is None or episode_index is None:
+                        continue
+                    seasoninfos.setdefault(series_key, {}).setdefault(int(season_index), []).append(int(episode_index))
+        for page in fetch_pages(__items, page_size=page_size, workers=workers):
+            for element in page:
+                mediaitem = self.__format_element(element, library_id=str(library_id))
+                if mediaitem.item_type == "show":
+                    mediaitem.seasoninfo = seasoninfos.get(mediaitem.item_id) or {}
+                yield mediaitem
+
+    def get_library_token(self, library_id: str) -> Optional[str]:
+        """
+        获取媒体库变更标识：项目总数、电影或剧集总数及最新入库的电影或剧集，媒体库有增删时变化
+        """
+        if not library_id or not self._plex:
+            return None
+        try:
+            section = self._plex.library.sectionByID(int(library_id))
+            libtype = "episode" if section.type == "show" else section.type
+            latest = section.search(libtype=libtype, sort="addedAt:desc", maxresults=1)
+            return f"{section.totalViewSize()}:{section.totalViewSize(libtype=libtype)}:" \
+                   f"{latest[0].ratingKey if latest else ''}"
+        except Exception as err:
+            logger.error(f"获取媒体库变更标识出错：{str(err)}")
+        return None
+
     def get_webhook_message(self, form: any) -> Optional[schemas.WebhookEventInfo]:
         """
         解析Plex报文
@@ -607,6 +686,7 @@ class Plex:
                     "E" + str(message.get('Metadata', {}).get('index')),
                     message.get('Metadata', {}).get('title'))
                 eventItem.item_id = message.get('Metadata', {}).get('ratingKey')
+                eventItem.series_id = message.get('Metadata', {}).get('grandparentRatingKey')
                 eventItem.season_id = message.get('Metadata', {}).get('parentIndex')
                 eventItem.episode_id = message.get('Metadata', {}).get('index')
 
@@ -622,6 +702,10 @@ class Plex:
                     message.get('Metadata', {}).get('title'),
                     "(" + str(message.get('Metadata', {}).get('year')) + ")")
                 eventItem.item_id = message.get('Metadata', {}).get('ratingKey')
+                if message.get('Metadata', {}).get('type') == 'show':
+                    eventItem.series_id = eventItem.item_id
+                elif message.get('Metadata', {}).get('type') == 'season':
+                    eventItem.series_id = message.get('Metadata', {}).get('parentRatingKey')
                 if len(message.get('Metadata', {}).get('summary')) > 100:
                     eventItem.overview = str(message.get('Metadata', {}).get('summary'))[:100] + "..."
                 else:
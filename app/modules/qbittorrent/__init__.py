@@ -3,25 +3,45 @@ from pathlib import Path
 from typing import Set, Tuple, Optional, Union, List
 
 from qbittorrentapi import TorrentFilesList
-from torrentool.torrent import Torrent
 
 from app import schemas
 from app.core.config import settings
+from app.core.event import eventmanager
 from app.core.metainfo import MetaInfo
+from app.helper.torrentstate import TorrentStateCache
 from app.log import logger
 from app.modules import _ModuleBase
 from app.modules.qbittorrent.qbittorrent import Qbittorrent
 from app.schemas import TransferTorrent, DownloadingTorrent
-from app.schemas.types import TorrentStatus
+from app.schemas.types import TorrentStatus, EventType
+from app.utils.bencode import BencodeUtils
 from app.utils.string import StringUtils
 from app.utils.system import SystemUtils
 
 
 class QbittorrentModule(_ModuleBase):
+    # 首次使用时再连接下载器
+    lazy_init = True
+
     qbittorrent: Qbittorrent = None
+    # 种子状态缓存
+    _state_cache: TorrentStateCache = None
+    # 增量同步的rid
+    _rid: int = 0
+    # 已完成（做种中）的状态
+    _completed_states = ("uploading", "stalledUP", "checkingUP", "queuedUP", "forcedUP")
+    # 下载中的状态
+    _downloading_states = ("downloading", "metaDL", "forcedMetaDL", "stalledDL", "checkingDL",
+                           "pausedDL", "stoppedDL", "queuedDL", "forcedDL")
 
     def init_module(self) -> None:
         self.qbittorrent = Qbittorrent()
+        self._rid = 0
+        self._state_cache = TorrentStateCache(name="Qbittorrent",
+                                              sync_func=self.__sync_torrents,
+                                              completed_func=lambda t: t.get("state") in self._completed_states,
+                                              name_func=lambda t: t.get("name"),
+                                              on_completed=self.__on_completed)
 
     @staticmethod
     def get_name() -> str:
@@ -50,6 +70,55 @@ class QbittorrentModule(_ModuleBase):
         # 定时重连
         if self.qbittorrent.is_inactive():
             self.qbittorrent.reconnect()
+            self._state_cache.invalidate()
+
+    def __sync_torrents(self, full: bool) -> Optional[Tuple[bool, dict, list]]:
+        """
+        通过sync/maindata增量同步种子状态
+        """
+        data = self.qbittorrent.sync_maindata(rid=0 if full else self._rid)
+        if data is None:
+            return None
+        self._rid = data.get("rid") or 0
+        torrents = {}
+        for torrent_hash, torrent in (data.get("torrents") or {}).items():
+            torrent = dict(torrent)
+            torrent["hash"] = torrent_hash
+            torrents[torrent_hash] = torrent
+        return bool(data.get("full_update")), torrents, data.get("torrents_removed") or []
+
+    @staticmethod
+    def __match_tags(torrent: dict, tags: Optional[str]) -> bool:
+        """
+        种子是否包含指定标签
+        """
+        if not tags:
+            return True
+        torrent_tags = [str(tag).strip() for tag in (torrent.get("tags") or "").split(',')]
+        return tags in torrent_tags
+
+    def __list_cached(self, states: tuple) -> Optional[List[dict]]:
+        """
+        从状态缓存中获取指定状态且包含默认标签的种子
+        """
+        torrents = self._state_cache.torrents()
+        if torrents is None:
+            return None
+        return [torrent for torrent in torrents
+                if torrent.get("state") in states and self.__match_tags(torrent, settings.TORRENT_TAG)]
+
+    def __on_completed(self, torrent_hash: str, torrent: dict):
+        """
+        种子下载完成，未整理的发出下载完成事件
+        """
+        if not self.__match_tags(torrent, settings.TORRENT_TAG) \
+                or self.__match_tags(torrent, "已整理"):
+            return
+        eventmanager.send_event(EventType.DownloadCompleted, {
+            "downloader": "qbittorrent",
+            "hash": torrent_hash,
+            "name": torrent.get("name")
+        })
 
     def download(self, content: Union[Path, str], download_dir: Path, cookie: str,
                  episodes: Set[int] = None, category: str = None,
@@ -71,9 +140,11 @@ class QbittorrentModule(_ModuleBase):
             """
             try:
                 if isinstance(content, Path):
-                    torrentinfo = Torrent.from_file(content)
+                    torrentinfo = BencodeUtils.read_torrent_file(content)
                 else:
-                    torrentinfo = Torrent.from_string(content)
+                    torrentinfo = BencodeUtils.read_torrent(content)
+                if not torrentinfo:
+                    return "", 0
                 return torrentinfo.name, torrentinfo.total_size
             except Exception as e:
                 logger.error(f"获取种子名称失败：{e}")
@@ -119,14 +190,9 @@ class QbittorrentModule(_ModuleBase):
                     # 名称与大小相等则认为是同一个种子
                     if torrent.get("name") == torrent_name and torrent.get("total_size") == torrent_size:
                         torrent_hash = torrent.get("hash")
-                        torrent_tags = [str(tag).strip() for tag in torrent.get("tags").split(',')]
                         logger.warn(f"下载器中已存在该种子任务：{torrent_hash} - {torrent.get('name')}")
                         # 给种子打上标签
-                        if "已整理" in torrent_tags:
-                            self.qbittorrent.remove_torrents_tag(ids=torrent_hash, tag=['已整理'])
-                        if settings.TORRENT_TAG and settings.TORRENT_TAG not in torrent_tags:
-                            logger.info(f"给种子 {torrent_hash} 打上标签：{settings.TORRENT_TAG}")
-                            self.qbittorrent.set_torrents_tag(ids=torrent_hash, tags=[settings.TORRENT_TAG])
+                        self.__tag_exists(torrent)
                         return torrent_hash, f"下载任务已存在"
             return None, f"添加种子任务失败：{content}"
         else:
@@ -202,7 +268,7 @@ class QbittorrentModule(_ModuleBase):
                 ))
         elif status == TorrentStatus.TRANSFER:
             # 获取已完成且未整理的
-            torrents = self.qbittorrent.get_completed_torrents(tags=settings.TORRENT_TAG)
+            torrents = self.__list_cached(self._completed_states)
             for torrent in torrents or []:
                 tags = torrent.get("tags") or []
                 if "已整理" in tags:
@@ -212,7 +278,7 @@ class QbittorrentModule(_ModuleBase):
                 if content_path:
                     torrent_path = Path(content_path)
                 else:
-                    torrent_path = torrent.get('save_path') / torrent.get('name')
+                    torrent_path = Path(torrent.get('save_path')) / torrent.get('name')
                 ret_torrents.append(TransferTorrent(
                     title=torrent.get('name'),
                     path=torrent_path,
@@ -221,9 +287,9 @@ class QbittorrentModule(_ModuleBase):
                 ))
         elif status == TorrentStatus.DOWNLOADING:
             # 获取正在下载的任务
-            torrents = self.qbittorrent.get_downloading_torrents(tags=settings.TORRENT_TAG)
+            torrents = self.__list_cached(self._downloading_states)
             for torrent in torrents or []:
-                meta = MetaInfo(torrent.get('name'))
+                meta = self._state_cache.get_meta(torrent.get('hash'), torrent.get('name'))
                 ret_torrents.append(DownloadingTorrent(
                     hash=torrent.get('hash'),
                     title=torrent.get('name'),
@@ -232,7 +298,7 @@ class QbittorrentModule(_ModuleBase):
                     season_episode=meta.season_episode,
                     progress=torrent.get('progress') * 100,
                     size=torrent.get('total_size'),
-                    state="paused" if torrent.get('state') in ("paused", "pausedDL") else "downloading",
+                    state="paused" if torrent.get('state') in ("paused", "pausedDL", "stoppedDL") else "downloading",
                     dlspeed=StringUtils.str_filesize(torrent.get('dlspeed')),
                     upspeed=StringUtils.str_filesize(torrent.get('upspeed')),
                     left_time=StringUtils.str_secends(
@@ -243,6 +309,36 @@ class QbittorrentModule(_ModuleBase):
             return None
         return ret_torrents
 
+    def __tag_exists(self, torrent: dict):
+        """
+        重新下载已存在的种子任务时，去掉已整理标签并打上默认标签
+        """
+        torrent_hash = torrent.get("hash")
+        torrent_tags = [str(tag).strip() for tag in (torrent.get("tags") or "").split(',')]
+        if "已整理" in torrent_tags:
+            self.qbittorrent.remove_torrents_tag(ids=torrent_hash, tag=['已整理'])
+        if settings.TORRENT_TAG and settings.TORRENT_TAG not in torrent_tags:
+            logger.info(f"给种子 {torrent_hash} 打上标签：{settings.TORRENT_TAG}")
+            self.qbittorrent.set_torrents_tag(ids=torrent_hash, tags=[settings.TORRENT_TAG])
+
+    def exists_torrent(self, torrent_hash: str,
+                       downloader: str = settings.DEFAULT_DOWNLOADER) -> Optional[bool]:
+        """
+        下载器中是否已存在该种子任务，存在时重新打上标签
+        :param torrent_hash:  种子Hash
+        :param downloader:  下载器
+        :return: 是否已存在
+        """
+        if downloader != "qbittorrent":
+            return None
+        torrents, error = self.qbittorrent.get_torrents(ids=torrent_hash)
+        if error or not torrents:
+            return False
+        torrent = torrents[0]
+        logger.warn(f"下载器中已存在该种子任务：{torrent_hash} - {torrent.get('name')}")
+        self.__tag_exists(torrent)
+        return True
+
     def transfer_completed(self, hashs: str, path: Path = None,
                            downloader: str = settings.DEFAULT_DOWNLOADER) -> None:
         """
@@ -254,6 +350,7 @@ class QbittorrentModule(_ModuleBase):
         if downloader != "qbittorrent":
             return
         self.qbittorrent.set_torrents_tag(ids=hashs, tags=['已整理'])
+        self._state_cache.expire()
         # 移动模式删除种子
         if settings.TRANSFER_TYPE in ["move", "rclone_move"]:
             if self.remove_torrents(hashs):
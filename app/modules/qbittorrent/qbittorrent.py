@@ -342,6 +342,19 @@ class Qbittorrent:
             logger.error(f"设置种子文件状态出错：{str(err)}")
             return False
 
+    def sync_maindata(self, rid: int = 0) -> Optional[dict]:
+        """
+        增量获取主要数据，rid为上次返回的rid，为0或rid失效时返回全量数据（full_update为True）
+        返回的种子数据只包含变化的字段，种子Hash为字典的Key
+        """
+        if not self.qbc:
+            return None
+        try:
+            return self.qbc.sync_maindata(rid=rid)
+        except Exception as err:
+            logger.error(f"增量获取种子数据出错：{str(err)}")
+            return None
+
     def transfer_info(self) -> Optional[TransferInfoDictionary]:
         """
         获取传输信息
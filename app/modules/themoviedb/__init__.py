@@ -7,6 +7,7 @@ from app import schemas
 from app.core.config import settings
 from app.core.context import MediaInfo
 from app.core.meta import MetaBase
+from app.helper.image import ImageHelper
 from app.log import logger
 from app.modules import _ModuleBase
 from app.modules.themoviedb.category import CategoryHelper
@@ -24,6 +25,9 @@ class TheMovieDbModule(_ModuleBase):
     TMDB媒体信息匹配
     """
 
+    # 首次识别时再加载元数据缓存
+    lazy_init = True
+
     # 元数据缓存
     cache: TmdbCache = None
     # TMDB
@@ -423,6 +427,8 @@ class TheMovieDbModule(_ModuleBase):
         定时任务，每10分钟调用一次
         """
         self.cache.save()
+        # 清理过期的缓存图片
+        ImageHelper().clean()
 
     def obtain_images(self, mediainfo: MediaInfo) -> Optional[MediaInfo]:
         """
@@ -592,4 +598,6 @@ class TheMovieDbModule(_ModuleBase):
         logger.info("开始清除TMDB缓存 ...")
         self.tmdb.clear_cache()
         self.cache.clear()
+        self.scraper.clear_cache()
+        ImageHelper().clean(force=True)
         logger.info("TMDB缓存清除完成")
@@ -1,19 +1,19 @@
+import threading
 import traceback
 from pathlib import Path
-from typing import Union, Optional, Tuple
+from typing import Union, Optional, Tuple, Dict
 from xml.dom import minidom
 
-from requests import RequestException
+from cachetools import TTLCache
 
 from app.core.config import settings
 from app.core.context import MediaInfo
 from app.core.meta import MetaBase
 from app.core.metainfo import MetaInfo
+from app.helper.image import ImageHelper
 from app.log import logger
 from app.schemas.types import MediaType
-from app.utils.common import retry
 from app.utils.dom import DomUtils
-from app.utils.http import RequestUtils
 from app.utils.system import SystemUtils
 
 
@@ -25,6 +25,50 @@ class TmdbScraper:
 
     def __init__(self, tmdb):
         self.tmdb = tmdb
+        # 季详情缓存，同一批整理的文件只查询一次
+        self._season_details = TTLCache(maxsize=64, ttl=600)
+        self._season_lock = threading.Lock()
+        # 每季的查询锁，同一季并发查询时只请求一次，不同季互不阻塞，按使用中的线程数计数，无线程使用时移除
+        self._season_locks: Dict[Tuple[int, int], threading.Lock] = {}
+        self._season_lock_refs: Dict[Tuple[int, int], int] = {}
+
+    def get_season_detail(self, tmdbid: int, season: int) -> dict:
+        """
+        获取季详情，短时间内同一季只查询一次，查询失败的结果不缓存
+        :param tmdbid: TMDB ID
+        :param season: 季号
+        """
+        key = (tmdbid, season)
+        with self._season_lock:
+            seasoninfo = self._season_details.get(key)
+            if seasoninfo is not None:
+                return seasoninfo
+            lock = self._season_locks.setdefault(key, threading.Lock())
+            self._season_lock_refs[key] = self._season_lock_refs.get(key, 0) + 1
+        try:
+            with lock:
+                with self._season_lock:
+                    seasoninfo = self._season_details.get(key)
+                if seasoninfo is None:
+                    # 网络查询不持有全局锁
+                    seasoninfo = self.tmdb.get_tv_season_detail(tmdbid, season) or {}
+                    if seasoninfo:
+                        with self._season_lock:
+                            self._season_details[key] = seasoninfo
+        finally:
+            with self._season_lock:
+                self._season_lock_refs[key] -= 1
+                if not self._season_lock_refs[key]:
+                    self._season_lock_refs.pop(key)
+                    self._season_locks.pop(key)
+        return seasoninfo
+
+    def clear_cache(self):
+        """
+        清除季详情缓存
+        """
+        with self._season_lock:
+            self._season_details.clear()
 
     def get_metadata_nfo(self, meta: MetaBase, mediainfo: MediaInfo,
                          season: int = None, episode: int = None) -> Optional[str]:
@@ -41,7 +85,7 @@ class TmdbScraper:
         else:
             if season:
                 # 查询季信息
-                seasoninfo = self.tmdb.get_tv_season_detail(mediainfo.tmdb_id, meta.begin_season)
+                seasoninfo = self.get_season_detail(mediainfo.tmdb_id, meta.begin_season)
                 if episode:
                     # 集元数据文件
                     episodeinfo = self.__get_episode_detail(seasoninfo, meta.begin_episode)
@@ -67,7 +111,7 @@ class TmdbScraper:
         images = {}
         if season:
             # 只需要季的图片
-            seasoninfo = self.tmdb.get_tv_season_detail(mediainfo.tmdb_id, season)
+            seasoninfo = self.get_season_detail(mediainfo.tmdb_id, season)
             if seasoninfo:
                 # TMDB季poster图片
                 poster_name, poster_url = self.get_season_poster(seasoninfo, season)
@@ -75,14 +119,15 @@ class TmdbScraper:
                     images[poster_name] = poster_url
             return images
         # 主媒体图片
-        for attr_name, attr_value in vars(mediainfo).items():
+        for attr_name, attr_value in mediainfo.attributes().items():
             if attr_value \
                     and attr_name.endswith("_path") \
                     and attr_value \
                     and isinstance(attr_value, str) \
                     and attr_value.startswith("http"):
-                image_name = attr_name.replace("_path", "") + Path(attr_value).suffix
-                images[image_name] = attr_value
+                image_type = attr_name.replace("_path", "")
+                image_name = image_type + Path(attr_value).suffix
+                images[image_name] = ImageHelper.tmdb_image_url(attr_value, image_type)
         return images
 
     @staticmethod
@@ -96,7 +141,7 @@ class TmdbScraper:
             # 后缀
             ext = Path(seasoninfo.get('poster_path')).suffix
             # URL
-            url = f"https://{settings.TMDB_IMAGE_DOMAIN}/t/p/original{seasoninfo.get('poster_path')}"
+            url = ImageHelper.tmdb_image_url(seasoninfo.get('poster_path'), "poster")
             image_name = f"season{sea_seq}-poster{ext}"
             return image_name, url
 
@@ -128,6 +173,8 @@ class TmdbScraper:
         self._transfer_type = transfer_type
         self._force_nfo = force_nfo
         self._force_img = force_img
+        # 需要下载的图片：{保存路径: 图片地址}
+        images: Dict[Path, str] = {}
 
         try:
             # 电影，路径为文件名 名称/名称.xxx 或者蓝光原盘目录 名称/名称
@@ -143,7 +190,7 @@ class TmdbScraper:
                 for image_name, image_url in image_dict.items():
                     image_path = file_path.with_name(image_name)
                     if self._force_img or not image_path.exists():
-                        self.__save_image(url=image_url, file_path=image_path)
+                        images[image_path] = image_url
             # 电视剧，路径为每一季的文件名 名称/Season xx/名称 SxxExx.xxx
             else:
                 # 如果有上游传入的元信息则使用，否则使用文件名识别
@@ -160,9 +207,9 @@ class TmdbScraper:
                 for image_name, image_url in image_dict.items():
                     image_path = file_path.parent.with_name(image_name)
                     if self._force_img or not image_path.exists():
-                        self.__save_image(url=image_url, file_path=image_path)
+                        images[image_path] = image_url
                 # 查询季信息
-                seasoninfo = self.tmdb.get_tv_season_detail(mediainfo.tmdb_id, meta.begin_season)
+                seasoninfo = self.get_season_detail(mediainfo.tmdb_id, meta.begin_season)
                 if seasoninfo:
                     # 季目录NFO
                     if self._force_nfo or not file_path.with_name("season.nfo").exists():
@@ -174,7 +221,7 @@ class TmdbScraper:
                     if poster_name and poster_url:
                         image_path = file_path.parent.with_name(poster_name)
                         if self._force_img or not image_path.exists():
-                            self.__save_image(url=poster_url, file_path=image_path)
+                            images[image_path] = poster_url
                 # 查询集详情
                 episodeinfo = self.__get_episode_detail(seasoninfo, meta.begin_episode)
                 if episodeinfo:
@@ -191,9 +238,9 @@ class TmdbScraper:
                         image_path = file_path.with_name(file_path.stem + "-thumb.jpg").with_suffix(
                             Path(episode_image).suffix)
                         if self._force_img or not image_path.exists():
-                            self.__save_image(
-                                f"https://{settings.TMDB_IMAGE_DOMAIN}/t/p/original{episode_image}",
-                                image_path)
+                            images[image_path] = ImageHelper.tmdb_image_url(episode_image, "still")
+            # 并发下载图片
+            self.__save_images(images)
         except Exception as e:
             logger.error(f"{file_path} 刮削失败：{str(e)} - {traceback.format_exc()}")
 
@@ -238,7 +285,7 @@ class TmdbScraper:
             DomUtils.add_node(doc, xactor, "role", actor.get("character") or actor.get("role") or "")
             DomUtils.add_node(doc, xactor, "tmdbid", actor.get("id") or "")
             DomUtils.add_node(doc, xactor, "thumb",
-                              f"https://{settings.TMDB_IMAGE_DOMAIN}/t/p/original{actor.get('profile_path')}")
+                              ImageHelper.tmdb_image_url(actor.get('profile_path') or '', "profile"))
             DomUtils.add_node(doc, xactor, "profile",
                               f"https://www.themoviedb.org/person/{actor.get('id')}")
         # 风格
@@ -401,7 +448,7 @@ class TmdbScraper:
                 DomUtils.add_node(doc, xactor, "type", "Actor")
                 DomUtils.add_node(doc, xactor, "tmdbid", actor.get("id") or "")
                 DomUtils.add_node(doc, xactor, "thumb",
-                                  f"https://{settings.TMDB_IMAGE_DOMAIN}/t/p/original{actor.get('profile_path')}")
+                                  ImageHelper.tmdb_image_url(actor.get('profile_path') or '', "profile"))
                 DomUtils.add_node(doc, xactor, "profile",
                                   f"https://www.themoviedb.org/person/{actor.get('id')}")
         # 保存文件
@@ -409,26 +456,27 @@ class TmdbScraper:
             self.__save_nfo(doc, file_path.with_suffix(".nfo"))
         return doc
 
-    @retry(RequestException, logger=logger)
-    def __save_image(self, url: str, file_path: Path):
+    def __save_images(self, images: Dict[Path, str]):
         """
-        下载图片并保存
+        并发下载图片到本地缓存，再链接或复制到保存路径
+        :param images: {保存路径: 图片地址}
         """
-        try:
-            logger.info(f"正在下载{file_path.stem}图片：{url} ...")
-            r = RequestUtils(proxies=settings.PROXY).get_res(url=url, raise_exception=True)
-            if r:
+        if not images:
+            return
+        cache_files = ImageHelper().fetch_all(list(images.values()), proxies=settings.PROXY)
+        for file_path, url in images.items():
+            cache_file = cache_files.get(url)
+            if not cache_file:
+                logger.info(f"{file_path.stem}图片下载失败，请检查网络连通性")
+                continue
+            try:
                 if self._transfer_type in ['rclone_move', 'rclone_copy']:
-                    self.__save_remove_file(file_path, r.content)
+                    self.__save_remove_file(file_path, cache_file.read_bytes())
                 else:
-                    file_path.write_bytes(r.content)
+                    ImageHelper.link(cache_file, file_path)
                 logger.info(f"图片已保存：{file_path}")
-            else:
-                logger.info(f"{file_path.stem}图片下载失败，请检查网络连通性")
-        except RequestException as err:
-            raise err
-        except Exception as err:
-            logger.error(f"{file_path.stem}图片下载失败：{str(err)}")
+            except Exception as err:
+                logger.error(f"{file_path.stem}图片保存失败：{str(err)}")
 
     def __save_nfo(self, doc: minidom.Document, file_path: Path):
         """
@@ -8,6 +8,9 @@ from app.utils.http import RequestUtils
 
 
 class TheTvDbModule(_ModuleBase):
+    # 首次使用时再初始化TVDB客户端
+    lazy_init = True
+
     tvdb: tvdbapi.Tvdb = None
 
     def init_module(self) -> None:
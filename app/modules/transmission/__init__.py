@@ -1,27 +1,55 @@
 import shutil
+import time
 from pathlib import Path
 from typing import Set, Tuple, Optional, Union, List
 
-from torrentool.torrent import Torrent
-from transmission_rpc import File
+from transmission_rpc import File, Torrent as TrTorrent
 
 from app import schemas
 from app.core.config import settings
+from app.core.event import eventmanager
 from app.core.metainfo import MetaInfo
+from app.helper.torrentstate import TorrentStateCache
 from app.log import logger
 from app.modules import _ModuleBase
 from app.modules.transmission.transmission import Transmission
 from app.schemas import TransferTorrent, DownloadingTorrent
-from app.schemas.types import TorrentStatus
+from app.schemas.types import TorrentStatus, EventType
+from app.utils.bencode import BencodeUtils
 from app.utils.string import StringUtils
 from app.utils.system import SystemUtils
 
 
 class TransmissionModule(_ModuleBase):
+    # 首次使用时再连接下载器
+    lazy_init = True
+
     transmission: Transmission = None
+    # 种子状态缓存
+    _state_cache: TorrentStateCache = None
+    # 种子ID与Hash的对应关系，用于处理已删除的种子
+    _torrent_ids: dict = {}
+    # 种子ID与简要字段的对应关系，超出recently-active时间窗口时用于比对变化的种子
+    _signatures: dict = {}
+    # 比对变化的简要字段
+    _brief_args = ["id", "hashString", "status", "percentDone", "activityDate", "labels"]
+    # 上次同步时间，recently-active只返回60秒内有变化的种子
+    _synced_at: float = 0
+    # 已完成（做种中）的状态
+    _completed_states = ("seeding", "seed_pending")
+    # 下载中的状态
+    _downloading_states = ("downloading", "download_pending", "stopped")
 
     def init_module(self) -> None:
         self.transmission = Transmission()
+        self._torrent_ids = {}
+        self._signatures = {}
+        self._synced_at = 0
+        self._state_cache = TorrentStateCache(name="Transmission",
+                                              sync_func=self.__sync_torrents,
+                                              completed_func=lambda t: t.status in self._completed_states,
+                                              name_func=lambda t: t.name,
+                                              on_completed=self.__on_completed)
 
     @staticmethod
     def get_name() -> str:
@@ -50,6 +78,87 @@ class TransmissionModule(_ModuleBase):
         # 定时重连
         if self.transmission.is_inactive():
             self.transmission.reconnect()
+            self._state_cache.invalidate()
+
+    def __signature(self, torrent: TrTorrent) -> tuple:
+        """
+        种子的简要字段，任一字段变化时重新获取完整数据
+        """
+        return tuple(str(torrent.fields.get(arg)) for arg in self._brief_args)
+
+    def __sync_torrents(self, full: bool) -> Optional[Tuple[bool, dict, list]]:
+        """
+        通过recently-active增量同步种子状态；超过50秒未同步时recently-active可能遗漏变化，
+        改为获取所有种子的简要字段，只重新获取有变化的种子；全量同步由状态缓存按间隔或重连时触发
+        """
+        now = time.time()
+        if full:
+            torrents, error = self.transmission.get_torrents()
+            if error:
+                return None
+            self._torrent_ids = {}
+            self._signatures = {}
+            removed_ids = []
+        elif now - self._synced_at <= 50:
+            result = self.transmission.get_recently_active_torrents()
+            if result is None:
+                return None
+            torrents, removed_ids = result
+        else:
+            briefs = self.transmission.get_torrents_brief(self._brief_args)
+            if briefs is None:
+                return None
+            signatures = {torrent.id: self.__signature(torrent) for torrent in briefs}
+            removed_ids = [tid for tid in self._torrent_ids if tid not in signatures]
+            changed_ids = [tid for tid, signature in signatures.items() if self._signatures.get(tid) != signature]
+            torrents = []
+            if changed_ids:
+                torrents, error = self.transmission.get_torrents(ids=changed_ids)
+                if error:
+                    return None
+        for torrent in torrents:
+            self._torrent_ids[torrent.id] = torrent.hashString
+            self._signatures[torrent.id] = self.__signature(torrent)
+        removed = []
+        for tid in removed_ids or []:
+            self._signatures.pop(tid, None)
+            if tid in self._torrent_ids:
+                removed.append(self._torrent_ids.pop(tid))
+        self._synced_at = now
+        return full, {torrent.hashString: torrent for torrent in torrents}, removed
+
+    @staticmethod
+    def __match_tags(torrent: TrTorrent, tags: Optional[str]) -> bool:
+        """
+        种子是否包含指定标签
+        """
+        if not tags:
+            return True
+        labels = [str(tag).strip() for tag in torrent.labels] if hasattr(torrent, "labels") else []
+        return tags in labels
+
+    def __list_cached(self, states: tuple) -> Optional[List[TrTorrent]]:
+        """
+        从状态缓存中获取指定状态且包含默认标签的种子
+        """
+        torrents = self._state_cache.torrents()
+        if torrents is None:
+            return None
+        return [torrent for torrent in torrents
+                if torrent.status in states and self.__match_tags(torrent, settings.TORRENT_TAG)]
+
+    def __on_completed(self, torrent_hash: str, torrent: TrTorrent):
+        """
+        种子下载完成，未整理的发出下载完成事件
+        """
+        if not self.__match_tags(torrent, settings.TORRENT_TAG) \
+                or self.__match_tags(torrent, "已整理"):
+            return
+        eventmanager.send_event(EventType.DownloadCompleted, {
+            "downloader": "transmission",
+            "hash": torrent_hash,
+            "name": torrent.name
+        })
 
     def download(self, content: Union[Path, str], download_dir: Path, cookie: str,
                  episodes: Set[int] = None, category: str = None,
@@ -71,9 +180,11 @@ class TransmissionModule(_ModuleBase):
             """
             try:
                 if isinstance(content, Path):
-                    torrentinfo = Torrent.from_file(content)
+                    torrentinfo = BencodeUtils.read_torrent_file(content)
                 else:
-                    torrentinfo = Torrent.from_string(content)
+                    torrentinfo = BencodeUtils.read_torrent(content)
+                if not torrentinfo:
+                    return "", 0
                 return torrentinfo.name, torrentinfo.total_size
             except Exception as e:
                 logger.error(f"获取种子名称失败：{e}")
@@ -119,17 +230,7 @@ class TransmissionModule(_ModuleBase):
                         torrent_hash = torrent.hashString
                         logger.warn(f"下载器中已存在该种子任务：{torrent_hash} - {torrent.name}")
                         # 给种子打上标签
-                        if settings.TORRENT_TAG:
-                            logger.info(f"给种子 {torrent_hash} 打上标签：{settings.TORRENT_TAG}")
-                            # 种子标签
-                            labels = [str(tag).strip()
-                                      for tag in torrent.labels] if hasattr(torrent, "labels") else []
-                            if "已整理" in labels:
-                                labels.remove("已整理")
-                                self.transmission.set_torrent_tag(ids=torrent_hash, tags=labels)
-                            if settings.TORRENT_TAG and settings.TORRENT_TAG not in labels:
-                                labels.append(settings.TORRENT_TAG)
-                                self.transmission.set_torrent_tag(ids=torrent_hash, tags=labels)
+                        self.__tag_exists(torrent)
                         return torrent_hash, f"下载任务已存在"
             return None, f"添加种子任务失败：{content}"
         else:
@@ -190,7 +291,7 @@ class TransmissionModule(_ModuleBase):
                 ))
         elif status == TorrentStatus.TRANSFER:
             # 获取已完成且未整理的
-            torrents = self.transmission.get_completed_torrents(tags=settings.TORRENT_TAG)
+            torrents = self.__list_cached(self._completed_states)
             for torrent in torrents or []:
                 # 含"已整理"tag的不处理
                 if "已整理" in torrent.labels or []:
@@ -209,9 +310,9 @@ class TransmissionModule(_ModuleBase):
                 ))
         elif status == TorrentStatus.DOWNLOADING:
             # 获取正在下载的任务
-            torrents = self.transmission.get_downloading_torrents(tags=settings.TORRENT_TAG)
+            torrents = self.__list_cached(self._downloading_states)
             for torrent in torrents or []:
-                meta = MetaInfo(torrent.name)
+                meta = self._state_cache.get_meta(torrent.hashString, torrent.name)
                 dlspeed = torrent.rate_download if hasattr(torrent, "rate_download") else torrent.rateDownload
                 upspeed = torrent.rate_upload if hasattr(torrent, "rate_upload") else torrent.rateUpload
                 ret_torrents.append(DownloadingTorrent(
@@ -231,6 +332,42 @@ class TransmissionModule(_ModuleBase):
             return None
         return ret_torrents
 
+    def __tag_exists(self, torrent: TrTorrent):
+        """
+        重新下载已存在的种子任务时，去掉已整理标签并打上默认标签
+        """
+        if not settings.TORRENT_TAG:
+            return
+        torrent_hash = torrent.hashString
+        logger.info(f"给种子 {torrent_hash} 打上标签：{settings.TORRENT_TAG}")
+        # 种子标签
+        labels = [str(tag).strip()
+                  for tag in torrent.labels] if hasattr(torrent, "labels") else []
+        if "已整理" in labels:
+            labels.remove("已整理")
+            self.transmission.set_torrent_tag(ids=torrent_hash, tags=labels)
+        if settings.TORRENT_TAG not in labels:
+            labels.append(settings.TORRENT_TAG)
+            self.transmission.set_torrent_tag(ids=torrent_hash, tags=labels)
+
+    def exists_torrent(self, torrent_hash: str,
+                       downloader: str = settings.DEFAULT_DOWNLOADER) -> Optional[bool]:
+        """
+        下载器中是否已存在该种子任务，存在时重新打上标签
+        :param torrent_hash:  种子Hash
+        :param downloader:  下载器
+        :return: 是否已存在
+        """
+        if downloader != "transmission":
+            return None
+        torrents, error = self.transmission.get_torrents(ids=torrent_hash)
+        if error or not torrents:
+            return False
+        torrent = torrents[0]
+        logger.warn(f"下载器中已存在该种子任务：{torrent_hash} - {torrent.name}")
+        self.__tag_exists(torrent)
+        return True
+
     def transfer_completed(self, hashs: str, path: Path = None,
                            downloader: str = settings.DEFAULT_DOWNLOADER) -> None:
         """
@@ -250,6 +387,8 @@ class TransmissionModule(_ModuleBase):
         else:
             tags = ['已整理']
         self.transmission.set_torrent_tag(ids=hashs, tags=tags)
+        # 标签变化不一定出现在recently-active中，下次读取时全量同步
+        self._state_cache.invalidate()
         # 移动模式删除种子
         if settings.TRANSFER_TYPE in ["move", "rclone_move"]:
             if self.remove_torrents(hashs):
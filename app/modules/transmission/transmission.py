@@ -273,6 +273,32 @@ class Transmission:
             logger.error(f"设置下载文件状态出错：{str(err)}")
             return False
 
+    def get_torrents_brief(self, arguments: List[str]) -> Optional[List[Torrent]]:
+        """
+        获取所有种子的指定字段，用于比对有变化的种子
+        return: 种子列表，发生错误时返回None
+        """
+        if not self.trc:
+            return None
+        try:
+            return self.trc.get_torrents(arguments=arguments)
+        except Exception as err:
+            logger.error(f"获取种子列表出错：{str(err)}")
+            return None
+
+    def get_recently_active_torrents(self) -> Optional[Tuple[List[Torrent], List[int]]]:
+        """
+        获取最近（60秒内）有变化的种子
+        return: 有变化的种子列表, 已删除的种子ID列表，发生错误时返回None
+        """
+        if not self.trc:
+            return None
+        try:
+            return self.trc.get_recently_active_torrents(arguments=self._trarg)
+        except Exception as err:
+            logger.error(f"获取最近活动的种子出错：{str(err)}")
+            return None
+
     def transfer_info(self) -> Optional[SessionStats]:
         """
         获取传输信息
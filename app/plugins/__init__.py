@@ -115,6 +115,7 @@ class _PluginBase(metaclass=ABCMeta):
             "name": "服务名称",
             "trigger": "触发器：cron/interval/date/CronTrigger.from_crontab()",
             "func": self.xxx,
+            "init": self.xxx, # 可选，延迟初始化函数，在服务首次运行前调用一次
             "kwargs": {} # 定时器参数
         }]
         """
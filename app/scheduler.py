@@ -2,6 +2,7 @@ import logging
 import threading
 import traceback
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import List
 
 import pytz
@@ -11,6 +12,7 @@ from apscheduler.schedulers.background import BackgroundScheduler
 
 from app import schemas
 from app.chain import ChainBase
+from app.chain.dashboard import DashboardChain
 from app.chain.mediaserver import MediaServerChain
 from app.chain.site import SiteChain
 from app.chain.subscribe import SubscribeChain
@@ -19,8 +21,13 @@ from app.chain.torrents import TorrentsChain
 from app.chain.transfer import TransferChain
 from app.core.config import settings
 from app.core.event import EventManager
+from app.core.metrics import metrics
 from app.core.plugin import PluginManager
+from app.helper.directory import DirectoryHelper
+from app.helper.libraryindex import LibraryIndexHelper
 from app.helper.sites import SitesHelper
+from app.helper.torrentcache import TorrentCacheHelper
+from app.helper.transferqueue import TransferQueueHelper
 from app.log import logger
 from app.schemas import Notification, NotificationType
 from app.schemas.types import EventType
@@ -67,6 +74,7 @@ class Scheduler(metaclass=Singleton):
             """
             TorrentsChain().clear_cache()
             SchedulerChain().clear_cache()
+            TorrentCacheHelper().clear()
 
         def user_auth():
             """
@@ -147,6 +155,26 @@ class Scheduler(metaclass=Singleton):
                 "func": TransferChain().process,
                 "running": False,
             },
+            "transfer_sync": {
+                "name": "下载器状态同步",
+                "func": TransferChain().sync_downloader,
+                "running": False,
+            },
+            "library_index": {
+                "name": "媒体库索引对账",
+                "func": LibraryIndexHelper().reconcile,
+                "running": False,
+            },
+            "dashboard_statistic": {
+                "name": "仪表板媒体统计",
+                "func": DashboardChain().refresh_statistic,
+                "running": False,
+            },
+            "dashboard_storage": {
+                "name": "仪表板存储空间",
+                "func": DashboardChain().refresh_storage,
+                "running": False,
+            },
             "clear_cache": {
                 "name": "缓存清理",
                 "func": clear_cache,
@@ -281,19 +309,78 @@ class Scheduler(metaclass=Singleton):
                 }
             )
 
-        # 下载器文件转移（每5分钟）
         if settings.DOWNLOADER_MONITOR:
+            # 下载完成、下载目录文件变化及下载器Webhook触发整理
+            TransferQueueHelper().start(
+                handler=TransferChain().process_queue,
+                watch_paths=[Path(d.path) for d in DirectoryHelper().get_download_dirs() if d.path]
+            )
+            # 下载器状态增量同步（每30秒），种子完成时发出下载完成事件
+            self._scheduler.add_job(
+                self.start,
+                "interval",
+                id="transfer_sync",
+                name="下载器状态同步",
+                seconds=30,
+                kwargs={
+                    'job_id': 'transfer_sync'
+                }
+            )
+            # 下载器文件转移对账（每30分钟），兜底处理遗漏的通知
             self._scheduler.add_job(
                 self.start,
                 "interval",
                 id="transfer",
                 name="下载文件整理",
-                minutes=5,
+                minutes=30,
                 kwargs={
                     'job_id': 'transfer'
                 }
             )
 
+        if settings.LIBRARY_MONITOR:
+            # 媒体库目录变化时实时更新媒体库索引
+            LibraryIndexHelper().start(
+                watch_paths=[Path(d.path) for d in DirectoryHelper().get_library_dirs() if d.path]
+            )
+        # 媒体库索引对账（每6小时），处理监听遗漏的变化
+        self._scheduler.add_job(
+            self.start,
+            "interval",
+            id="library_index",
+            name="媒体库索引对账",
+            hours=6,
+            kwargs={
+                'job_id': 'library_index'
+            }
+        )
+
+        # 仪表板统计快照，启动后立即刷新一次
+        if settings.DASHBOARD_STATISTIC_INTERVAL:
+            self._scheduler.add_job(
+                self.start,
+                "interval",
+                id="dashboard_statistic",
+                name="仪表板媒体统计",
+                minutes=settings.DASHBOARD_STATISTIC_INTERVAL,
+                next_run_time=datetime.now(pytz.timezone(settings.TZ)) + timedelta(seconds=5),
+                kwargs={
+                    'job_id': 'dashboard_statistic'
+                }
+            )
+        if settings.DASHBOARD_STORAGE_INTERVAL:
+            self._scheduler.add_job(
+                self.start,
+                "interval",
+                id="dashboard_storage",
+                name="仪表板存储空间",
+                minutes=settings.DASHBOARD_STORAGE_INTERVAL,
+                next_run_time=datetime.now(pytz.timezone(settings.TZ)) + timedelta(seconds=5),
+                kwargs={
+                    'job_id': 'dashboard_storage'
+                }
+            )
+
         # 后台刷新TMDB壁纸
         self._scheduler.add_job(
             self.start,
@@ -371,7 +458,12 @@ class Scheduler(metaclass=Singleton):
         try:
             if not kwargs:
                 kwargs = job.get("kwargs") or {}
-            job["func"](*args, **kwargs)
+            # 延迟初始化的服务，首次运行时才初始化
+            if job.get("init") and not job.get("initialized"):
+                job["init"]()
+                job["initialized"] = True
+            with metrics.span("scheduler_job", job=job_id):
+                job["func"](*args, **kwargs)
         except Exception as e:
             logger.error(f"定时任务 {job_name} 执行失败：{str(e)} - {traceback.format_exc()}")
             SchedulerChain().messagehelper.put(title=f"{job_name} 执行失败",
@@ -419,6 +511,7 @@ class Scheduler(metaclass=Singleton):
                     if job_id not in self._jobs:
                         self._jobs[job_id] = {
                             "func": service["func"],
+                            "init": service.get("init"),
                             "name": service["name"],
                             "pid": pid,
                             "plugin_name": plugin_name,
@@ -520,6 +613,8 @@ class Scheduler(metaclass=Singleton):
         关闭定时服务
         """
         try:
+            TransferQueueHelper().stop()
+            LibraryIndexHelper().stop()
             if self._scheduler:
                 logger.info("正在停止定时任务...")
                 self._event.set()
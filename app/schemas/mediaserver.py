@@ -128,6 +128,8 @@ class WebhookEventInfo(BaseModel):
     item_type: Optional[str] = None
     item_name: Optional[str] = None
     item_id: Optional[str] = None
+    # 剧集、季所属电视剧的ID
+    series_id: Optional[str] = None
     item_path: Optional[str] = None
     season_id: Optional[str] = None
     episode_id: Optional[str] = None
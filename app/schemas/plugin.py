@@ -48,6 +48,10 @@ class Plugin(BaseModel):
     add_time: Optional[int] = 0
     # 插件公钥
     plugin_public_key: Optional[str] = None
+    # 加载耗时（毫秒）
+    load_time: Optional[float] = None
+    # 加载内存增量（MB）
+    load_memory: Optional[float] = None
 
 
 class PluginDashboard(Plugin):
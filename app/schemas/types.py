@@ -28,6 +28,8 @@ class EventType(Enum):
     TransferComplete = "transfer.complete"
     # 下载已添加
     DownloadAdded = "download.added"
+    # 下载已完成（未整理）
+    DownloadCompleted = "download.completed"
     # 删除历史记录
     HistoryDeleted = "history.deleted"
     # 删除下载源文件
@@ -108,6 +110,8 @@ class ProgressKey(Enum):
     FileTransfer = "filetransfer"
     # 批量重命名
     BatchRename = "batchrename"
+    # 订阅元数据更新
+    SubscribeCheck = "subscribecheck"
 
 
 # 媒体图片类型
@@ -0,0 +1,189 @@
+import hashlib
+import mmap
+from pathlib import Path
+from typing import Any, List, NamedTuple, Optional, Set, Tuple, Union
+
+# 不解码的大字段，只跳过
+_SKIP_KEYS = {b"pieces", b"piece layers", b"file tree"}
+
+
+class TorrentMeta(NamedTuple):
+    """
+    种子元数据
+    """
+    # 种子名称，多文件种子为目录名
+    name: str
+    # 文件清单：(相对于种子目录的路径分段, 大小)，单文件种子为 [((name,), length)]
+    files: List[Tuple[Tuple[str, ...], int]]
+    # 总大小，包含填充文件
+    total_size: int
+    # v1 infohash
+    infohash: str
+    # 是否多文件种子
+    multi_file: bool
+
+
+class BencodeUtils:
+    """
+    种子元数据读取，只解码info中的名称和文件清单，跳过pieces等大字段且不复制，
+    infohash直接由原始info片段计算
+    """
+
+    @staticmethod
+    def read_torrent_file(torrent_path: Path) -> Optional[TorrentMeta]:
+        """
+        以内存映射方式读取种子文件元数据
+        :param torrent_path: 种子文件路径
+        :return: 种子元数据，文件不存在或格式错误时返回None
+        """
+        if not torrent_path or not torrent_path.exists() or not torrent_path.stat().st_size:
+            return None
+        with open(torrent_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return BencodeUtils.read_torrent(mm)
+
+    @staticmethod
+    def read_torrent(content: Union[bytes, mmap.mmap]) -> Optional[TorrentMeta]:
+        """
+        读取种子内容元数据
+        :param content: 种子文件内容
+        :return: 种子元数据，格式错误时返回None
+        """
+        if not content or content[0:1] != b"d":
+            return None
+        try:
+            info, start, end = BencodeUtils.__find_info(content)
+            meta = BencodeUtils.__parse_info(info)
+        except (ValueError, IndexError, TypeError):
+            return None
+        if not meta:
+            return None
+        name, files, total_size, multi_file = meta
+        with memoryview(content) as view:
+            infohash = hashlib.sha1(view[start:end]).hexdigest()
+        return TorrentMeta(name=name,
+                           files=files,
+                           total_size=total_size,
+                           infohash=infohash,
+                           multi_file=multi_file)
+
+    @staticmethod
+    def __parse_info(info: Any) -> Optional[Tuple[str, List[Tuple[Tuple[str, ...], int]], int, bool]]:
+        """
+        读取info中的名称和文件清单，字段类型不正确时返回None
+        :return: 名称, 文件清单, 总大小, 是否多文件种子
+        """
+        if not isinstance(info, dict):
+            return None
+        name = info.get(b"name.utf-8") or info.get(b"name")
+        if not isinstance(name, bytes):
+            return None
+        name = BencodeUtils.__text(name)
+        if b"files" not in info:
+            length = info.get(b"length") or 0
+            if not isinstance(length, int):
+                return None
+            return name, [((name,), length)], length, False
+        filelist = info.get(b"files")
+        if not isinstance(filelist, list) or not filelist:
+            return None
+        files = []
+        total_size = 0
+        for fileinfo in filelist:
+            if not isinstance(fileinfo, dict):
+                return None
+            length = fileinfo.get(b"length") or 0
+            attr = fileinfo.get(b"attr") or b""
+            path = fileinfo.get(b"path.utf-8") or fileinfo.get(b"path") or []
+            if not isinstance(length, int) or not isinstance(attr, bytes) or not isinstance(path, list) \
+                    or not all(isinstance(part, bytes) for part in path):
+                return None
+            total_size += length
+            # 跳过填充文件
+            if b"p" in attr:
+                continue
+            files.append((tuple(BencodeUtils.__text(part) for part in path), length))
+        return name, files, total_size, True
+
+    @staticmethod
+    def __find_info(buf: Union[bytes, mmap.mmap]) -> Tuple[Any, int, int]:
+        """
+        在根字典中查找info，返回info内容及其原始片段的起止位置，其它字段直接跳过
+        """
+        pos = 1
+        while buf[pos] != 0x65:  # e
+            key, pos = BencodeUtils.__decode_string(buf, pos)
+            if key == b"info":
+                info, end = BencodeUtils.__decode(buf, pos, _SKIP_KEYS)
+                return info, pos, end
+            pos = BencodeUtils.__skip(buf, pos)
+        raise ValueError("info not found")
+
+    @staticmethod
+    def __decode_string(buf: Union[bytes, mmap.mmap], pos: int) -> Tuple[bytes, int]:
+        colon = buf.find(b":", pos)
+        start = colon + 1
+        end = start + int(buf[pos:colon])
+        return buf[start:end], end
+
+    @staticmethod
+    def __decode(buf: Union[bytes, mmap.mmap], pos: int, skip_keys: Set[bytes] = None) -> Tuple[Any, int]:
+        """
+        解码一个值，字典中skip_keys的值跳过不解码
+        """
+        c = buf[pos]
+        if c == 0x64:  # d
+            result = {}
+            pos += 1
+            while buf[pos] != 0x65:
+                key, pos = BencodeUtils.__decode_string(buf, pos)
+                if skip_keys and key in skip_keys:
+                    pos = BencodeUtils.__skip(buf, pos)
+                    continue
+                result[key], pos = BencodeUtils.__decode(buf, pos)
+            return result, pos + 1
+        if c == 0x6c:  # l
+            result = []
+            pos += 1
+            while buf[pos] != 0x65:
+                value, pos = BencodeUtils.__decode(buf, pos)
+                result.append(value)
+            return result, pos + 1
+        if c == 0x69:  # i
+            end = buf.find(b"e", pos)
+            return int(buf[pos + 1:end]), end + 1
+        return BencodeUtils.__decode_string(buf, pos)
+
+    @staticmethod
+    def __skip(buf: Union[bytes, mmap.mmap], pos: int) -> int:
+        """
+        跳过一个值，返回其结束位置，字符串只计算长度不复制
+        """
+        c = buf[pos]
+        if c == 0x64 or c == 0x6c:  # d l
+            pos += 1
+            while buf[pos] != 0x65:
+                pos = BencodeUtils.__skip(buf, pos)
+            return pos + 1
+        if c == 0x69:
+            return buf.find(b"e", pos) + 1
+        colon = buf.find(b":", pos)
+        if colon < 0:
+            raise ValueError("invalid bencode string")
+        return colon + 1 + int(buf[pos:colon])
+
+    @staticmethod
+    def __text(value: Union[bytes, str, None]) -> str:
+        """
+        字节转字符串，非UTF-8编码时尝试GB18030
+        """
+        if value is None:
+            return ""
+        if isinstance(value, str):
+            return value
+        try:
+            return value.decode("utf-8")
+        except UnicodeDecodeError:
+            try:
+                return value.decode("gb18030")
+            except UnicodeDecodeError:
+                return value.decode("utf-8", errors="replace")
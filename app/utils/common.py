@@ -1,7 +1,9 @@
 import base64
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from hashlib import md5
-from typing import Any
+from typing import Any, Callable, Generator, List, Tuple
 
 from Crypto import Random
 from Crypto.Cipher import AES
@@ -43,6 +45,33 @@ def retry(ExceptionToCheck: Any,
     return deco_retry
 
 
+def fetch_pages(fetch: Callable[[int, int], Tuple[List[Any], int]],
+                page_size: int = 200, workers: int = 4) -> Generator[List[Any], None, None]:
+    """
+    分页获取全部数据，首页返回总数后并发获取其余页面，按页的顺序逐页返回，最多预取 workers 页
+    :param fetch: 获取一页数据，参数为起始位置和数量，返回该页数据及总数，出错时应抛出异常
+    :param page_size: 每页数量
+    :param workers: 并发获取的页数
+    """
+    page_size = max(page_size, 1)
+    workers = max(workers, 1)
+    items, total = fetch(0, page_size)
+    yield items
+    starts = iter(range(page_size, total or 0, page_size))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch_pages") as executor:
+        pending = deque()
+        for start in starts:
+            pending.append(executor.submit(fetch, start, page_size))
+            if len(pending) >= workers:
+                break
+        while pending:
+            items, _ = pending.popleft().result()
+            start = next(starts, None)
+            if start is not None:
+                pending.append(executor.submit(fetch, start, page_size))
+            yield items
+
+
 def bytes_to_key(data: bytes, salt: bytes, output=48) -> bytes:
     # extended from https://gist.github.com/gsakkis/4546068
     assert len(salt) == 8, len(salt)
@@ -1,3 +1,4 @@
+import time
 from typing import Union, Any, Optional
 from urllib.parse import urljoin, urlparse, parse_qs, urlencode, urlunparse
 
@@ -6,6 +7,8 @@ import urllib3
 from requests import Session, Response
 from urllib3.exceptions import InsecureRequestWarning
 
+from app.core.metrics import metrics
+from app.helper.sitelimiter import SiteLimiterHelper
 from app.log import logger
 
 urllib3.disable_warnings(InsecureRequestWarning)
@@ -71,13 +74,32 @@ class RequestUtils:
         kwargs.setdefault("timeout", self._timeout)
         kwargs.setdefault("verify", False)
         kwargs.setdefault("stream", False)
+        host = urlparse(url).hostname or ""
+        # 站点请求流控，熔断中的站点直接返回
+        limiter = SiteLimiterHelper()
+        domain, allowed, generation = limiter.acquire(host)
+        if not allowed:
+            metrics.inc("http_requests_total", host=host, status="circuit_open")
+            logger.debug(f"站点 {domain} 连续请求失败，暂停访问：{url}")
+            if raise_exception:
+                raise requests.exceptions.ConnectionError(f"站点 {domain} 连续请求失败，暂停访问")
+            return None
+        status_code, retry_after = None, None
+        start = time.perf_counter()
         try:
-            return req_method(method, url, **kwargs)
+            with metrics.span("http_request", host=host, method=method.upper()):
+                response = req_method(method, url, **kwargs)
+            status_code, retry_after = response.status_code, response.headers.get("Retry-After")
+            metrics.inc("http_requests_total", host=host, status=response.status_code)
+            return response
         except requests.exceptions.RequestException as e:
+            metrics.inc("http_requests_total", host=host, status="error")
             logger.debug(f"请求失败: {e}")
             if raise_exception:
                 raise
             return None
+        finally:
+            limiter.release(domain, generation, status_code, time.perf_counter() - start, retry_after)
 
     def get(self, url: str, params: dict = None, **kwargs) -> Optional[str]:
         """
@@ -0,0 +1,61 @@
+import json
+from enum import Enum
+from typing import Any, Callable, Generator, Iterable
+
+from fastapi.encoders import jsonable_encoder
+
+
+class JsonUtils:
+
+    @staticmethod
+    def default(obj: Any) -> Any:
+        """
+        序列化json不支持的类型
+        """
+        if isinstance(obj, Enum):
+            return obj.value
+        if isinstance(obj, (set, tuple)):
+            return list(obj)
+        return str(obj)
+
+    @staticmethod
+    def dumps(obj: Any) -> str:
+        """
+        序列化为紧凑格式的json字符串，与接口默认输出格式一致
+        """
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=JsonUtils.default)
+
+    @staticmethod
+    def iter_list(items: Iterable[Any],
+                  to_dict: Callable[[Any], Any] = None,
+                  envelope: dict = None,
+                  chunk_size: int = 50) -> Generator[str, None, None]:
+        """
+        分块生成json数组，逐个对象转换和编码，避免大列表一次性转换后再整体编码
+        :param items: 对象列表
+        :param to_dict: 转换函数，为空时调用对象的to_api_dict（没有时为to_dict）方法，字典原样输出
+        :param envelope: 外层对象，数组作为其data字段输出，如 {"success": True}
+        :param chunk_size: 每次输出的对象数
+        """
+        if to_dict is None:
+            def to_dict(item: Any) -> Any:
+                if isinstance(item, dict):
+                    return item
+                return item.to_api_dict() if hasattr(item, "to_api_dict") else item.to_dict()
+        if envelope is not None:
+            head = JsonUtils.dumps({k: v for k, v in envelope.items() if k != "data"})
+            yield f'{head[:-1]},"data":[' if len(head) > 2 else '{"data":['
+        else:
+            yield "["
+        chunk = []
+        first = True
+        for item in items:
+            # 与接口默认输出的编码一致
+            chunk.append(JsonUtils.dumps(jsonable_encoder(to_dict(item))))
+            if len(chunk) >= chunk_size:
+                yield ("" if first else ",") + ",".join(chunk)
+                first = False
+                chunk = []
+        if chunk:
+            yield ("" if first else ",") + ",".join(chunk)
+        yield "]}" if envelope is not None else "]"
@@ -7,7 +7,6 @@ from typing import Union, Tuple, Optional, Any, List, Generator
 from urllib import parse
 
 import cn2an
-import dateparser
 import dateutil.parser
 
 from app.schemas.types import MediaType
@@ -362,6 +361,8 @@ class StringUtils:
             return datetime_str
 
         try:
+            # dateparser导入耗时较长，使用时才导入
+            import dateparser
             return dateparser.parse(datetime_str).strftime('%Y-%m-%d %H:%M:%S')
         except Exception as e:
             print(str(e))
@@ -393,6 +394,7 @@ class StringUtils:
         if not date_str:
             return 0
         try:
+            import dateparser
             return dateparser.parse(date_str).timestamp()
         except Exception as e:
             print(str(e))
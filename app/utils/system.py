@@ -8,7 +8,6 @@ import sys
 from pathlib import Path
 from typing import List, Union, Tuple
 
-import docker
 import psutil
 
 from app import schemas
@@ -446,6 +445,16 @@ class SystemUtils:
         """
         return [psutil.virtual_memory().used, int(psutil.virtual_memory().percent)]
 
+    @staticmethod
+    def process_memory() -> int:
+        """
+        获取当前进程的常驻内存（单位：Byte）
+        """
+        try:
+            return psutil.Process().memory_info().rss
+        except psutil.Error:
+            return 0
+
     @staticmethod
     def can_restart() -> bool:
         """
@@ -462,6 +471,7 @@ class SystemUtils:
             return False, "非Docker环境，无法重启！"
         try:
             # 创建 Docker 客户端
+            import docker
             client = docker.DockerClient(base_url='tcp://127.0.0.1:38379')
             # 获取当前容器的 ID
             container_id = None
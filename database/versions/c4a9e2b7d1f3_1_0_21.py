@@ -0,0 +1,30 @@
+"""1.0.21
+
+Revision ID: c4a9e2b7d1f3
+Revises: a40261701909
+Create Date: 2026-10-19 10:12:31.402716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a9e2b7d1f3'
+down_revision = 'a40261701909'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    搜索结果迁移至独立的搜索结果表，删除系统配置中保存的搜索结果
+    """
+    try:
+        op.execute(sa.text("DELETE FROM systemconfig WHERE key = 'SearchResults'"))
+    except Exception as e:
+        pass
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,58 @@
+"""1.0.22
+
+Revision ID: e5b1f7c3a9d2
+Revises: c4a9e2b7d1f3
+Create Date: 2026-10-19 15:40:12.208431
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.log import logger
+
+# revision identifiers, used by Alembic.
+revision = 'e5b1f7c3a9d2'
+down_revision = 'c4a9e2b7d1f3'
+branch_labels = None
+depends_on = None
+
+# 全文索引的表及字段
+FTS_TABLES = {
+    "transferhistory": ("title", "src", "dest"),
+    "downloadhistory": ("title", "torrent_name", "path")
+}
+
+
+def upgrade() -> None:
+    """
+    转移历史、下载历史建立FTS5全文索引（trigram分词，支持中文子串匹配），由触发器同步并回填已有记录；
+    SQLite不支持FTS5时跳过，查询继续使用LIKE
+    """
+    for table, columns in FTS_TABLES.items():
+        fts = f"{table}_fts"
+        cols = ", ".join(columns)
+        new_cols = ", ".join(f"new.{col}" for col in columns)
+        old_cols = ", ".join(f"old.{col}" for col in columns)
+        try:
+            op.execute(sa.text(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, "
+                               f"content='{table}', content_rowid='id', tokenize='trigram')"))
+        except Exception as err:
+            logger.warn(f"{table} 创建全文索引失败，继续使用模糊查询：{str(err)}")
+            continue
+        op.execute(sa.text(f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+                           f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"))
+        op.execute(sa.text(f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+                           f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END"))
+        op.execute(sa.text(f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+                           f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+                           f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"))
+        # 回填已有记录
+        op.execute(sa.text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def downgrade() -> None:
+    for table in FTS_TABLES:
+        fts = f"{table}_fts"
+        for suffix in ("ai", "ad", "au"):
+            op.execute(sa.text(f"DROP TRIGGER IF EXISTS {fts}_{suffix}"))
+        op.execute(sa.text(f"DROP TABLE IF EXISTS {fts}"))
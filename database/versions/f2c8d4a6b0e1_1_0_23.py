@@ -0,0 +1,48 @@
+"""1.0.23
+
+Revision ID: f2c8d4a6b0e1
+Revises: e5b1f7c3a9d2
+Create Date: 2026-10-19 17:05:48.613920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c8d4a6b0e1'
+down_revision = 'e5b1f7c3a9d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    文件整理按日统计表，由转移历史的触发器维护，并按已有记录回填
+    """
+    op.execute(sa.text("CREATE TABLE IF NOT EXISTS transferstatistic "
+                       "(id INTEGER NOT NULL PRIMARY KEY, date VARCHAR, total INTEGER)"))
+    op.execute(sa.text("CREATE UNIQUE INDEX IF NOT EXISTS ix_transferstatistic_date ON transferstatistic (date)"))
+    op.execute(sa.text("CREATE TRIGGER IF NOT EXISTS transferstatistic_ai AFTER INSERT ON transferhistory "
+                       "WHEN new.date IS NOT NULL BEGIN "
+                       "INSERT INTO transferstatistic(date, total) VALUES (substr(new.date, 1, 10), 1) "
+                       "ON CONFLICT(date) DO UPDATE SET total = total + 1; END"))
+    op.execute(sa.text("CREATE TRIGGER IF NOT EXISTS transferstatistic_ad AFTER DELETE ON transferhistory "
+                       "WHEN old.date IS NOT NULL BEGIN "
+                       "UPDATE transferstatistic SET total = total - 1 WHERE date = substr(old.date, 1, 10); END"))
+    op.execute(sa.text("CREATE TRIGGER IF NOT EXISTS transferstatistic_au AFTER UPDATE OF date ON transferhistory "
+                       "WHEN substr(old.date, 1, 10) IS NOT substr(new.date, 1, 10) BEGIN "
+                       "UPDATE transferstatistic SET total = total - 1 WHERE date = substr(old.date, 1, 10); "
+                       "INSERT INTO transferstatistic(date, total) SELECT substr(new.date, 1, 10), 1 "
+                       "WHERE new.date IS NOT NULL ON CONFLICT(date) DO UPDATE SET total = total + 1; END"))
+    # 回填已有记录
+    op.execute(sa.text("DELETE FROM transferstatistic"))
+    op.execute(sa.text("INSERT INTO transferstatistic(date, total) "
+                       "SELECT substr(date, 1, 10), count(*) FROM transferhistory "
+                       "WHERE date IS NOT NULL GROUP BY substr(date, 1, 10)"))
+
+
+def downgrade() -> None:
+    for suffix in ("ai", "ad", "au"):
+        op.execute(sa.text(f"DROP TRIGGER IF EXISTS transferstatistic_{suffix}"))
+    op.execute(sa.text("DROP TABLE IF EXISTS transferstatistic"))
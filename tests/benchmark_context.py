@@ -0,0 +1,185 @@
+"""
+上下文基准测试，不访问网络
+
+1、种子缓存内存占用：模拟 TorrentsChain 的站点种子缓存（多个站点、每站点若干上下文），统计序列化大小以及加载后的内存占用，
+在不同版本上分别运行以对比数据结构布局：
+    python -m tests.benchmark_context --sites 60 --torrents 100
+2、接口序列化：对比 dataclasses.asdict 深拷贝、按字段投影的 to_dict 与按接口模型投影的 to_api_dict，以及整体编码与分块编码json的耗时：
+    python -m tests.benchmark_context --serialize 1000
+"""
+import argparse
+import gc
+import json
+import pickle
+import time
+import tracemalloc
+from dataclasses import asdict
+
+from app.core.context import Context, MediaInfo, TorrentInfo
+from app.core.metainfo import MetaInfo
+from app.schemas.types import MediaType
+from app.utils.json import JsonUtils
+from tests.cases.meta import meta_cases
+
+
+def build_cache(sites: int, torrents: int) -> dict:
+    """
+    构造站点种子缓存
+    """
+    cache = {}
+    for site_id in range(sites):
+        site = {
+            "id": site_id,
+            "name": f"站点{site_id}",
+            "cookie": f"c_secure_uid={site_id}; c_secure_pass={'x' * 200}; c_secure_ssl=eWVhaA%3D%3D",
+            "ua": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+            "proxy": False,
+            "pri": site_id
+        }
+        contexts = []
+        for i in range(torrents):
+            case = meta_cases[(site_id * torrents + i) % len(meta_cases)]
+            meta = MetaInfo(title=case.get("title"), subtitle=case.get("subtitle"))
+            mediainfo = MediaInfo(source="themoviedb",
+                                  type=MediaType.TV,
+                                  title=meta.name,
+                                  year=meta.year,
+                                  tmdb_id=100000 + i,
+                                  overview="简介" * 100,
+                                  poster_path="https://image.tmdb.org/t/p/original/poster.jpg",
+                                  backdrop_path="https://image.tmdb.org/t/p/original/backdrop.jpg")
+            mediainfo.clear()
+            torrent = TorrentInfo(site=site.get("id"),
+                                  site_name=site.get("name"),
+                                  site_cookie=site.get("cookie"),
+                                  site_ua=site.get("ua"),
+                                  site_proxy=site.get("proxy"),
+                                  site_order=site.get("pri"),
+                                  title=case.get("title"),
+                                  description=case.get("subtitle"),
+                                  enclosure=f"https://site{site_id}.example/download.php?id={i}&passkey=abc",
+                                  page_url=f"https://site{site_id}.example/details.php?id={i}",
+                                  size=1024 ** 3 * (i % 50 + 1),
+                                  seeders=i % 100,
+                                  peers=i % 10,
+                                  grabs=i,
+                                  pubdate="2024-01-01 00:00:00",
+                                  uploadvolumefactor=1.0,
+                                  downloadvolumefactor=0.0 if i % 3 else 1.0,
+                                  labels=["官方", "中字"] if i % 2 else [],
+                                  category=MediaType.TV.value)
+            contexts.append(Context(meta_info=meta, media_info=mediainfo, torrent_info=torrent))
+        cache[f"site{site_id}.example"] = contexts
+    return cache
+
+
+def measure(sites: int, torrents: int) -> dict:
+    """
+    统计缓存序列化大小、加载耗时及加载后占用的内存
+    """
+    data = pickle.dumps(build_cache(sites, torrents))
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    cache = pickle.loads(data)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    total = sum(len(v) for v in cache.values())
+    return {
+        "contexts": total,
+        "pickle_bytes": len(data),
+        "load_seconds": round(elapsed, 4),
+        "memory_bytes": current,
+        "memory_peak_bytes": peak,
+        "bytes_per_context": current // total if total else 0
+    }
+
+
+def build_contexts(count: int) -> list:
+    """
+    构造带完整媒体信息的搜索结果上下文
+    """
+    tmdb_info = {
+        "id": 100000,
+        "name": "测试剧集",
+        "overview": "简介" * 100,
+        "credits": {
+            "cast": [{"id": i, "name": f"演员{i}", "character": f"角色{i}", "profile_path": f"/{i}.jpg",
+                      "known_for_department": "Acting", "order": i} for i in range(30)],
+            "crew": [{"id": i, "name": f"导演{i}", "job": "Director", "profile_path": f"/{i}.jpg"}
+                     for i in range(3)]
+        },
+        "seasons": [{"season_number": s, "episode_count": 12, "air_date": "2024-01-01",
+                     "name": f"第 {s} 季", "overview": "季简介" * 20} for s in range(1, 6)],
+        "genres": [{"id": 18, "name": "剧情"}, {"id": 80, "name": "犯罪"}]
+    }
+    mediainfo = MediaInfo(source="themoviedb", type=MediaType.TV, title="测试剧集", year="2024",
+                          tmdb_id=100000, tmdb_info=tmdb_info)
+    contexts = []
+    for i in range(count):
+        case = meta_cases[i % len(meta_cases)]
+        meta = MetaInfo(title=case.get("title"), subtitle=case.get("subtitle"))
+        torrent = TorrentInfo(site=i % 30, site_name=f"站点{i % 30}", site_cookie="cookie" * 40,
+                              title=case.get("title"), description=case.get("subtitle"),
+                              enclosure=f"https://site.example/download.php?id={i}",
+                              size=1024 ** 3, seeders=i, uploadvolumefactor=1.0, downloadvolumefactor=0.0,
+                              labels=["官方", "中字"])
+        contexts.append(Context(meta_info=meta, media_info=mediainfo, torrent_info=torrent))
+    return contexts
+
+
+def legacy_to_dict(context: Context) -> dict:
+    """
+    基于 dataclasses.asdict 的上下文转换，用于对比
+    """
+    meta, media, torrent = context.meta_info, context.media_info, context.torrent_info
+    meta_dict = asdict(meta)
+    meta_dict.update(type=meta.type.value if meta.type else None, season_episode=meta.season_episode,
+                     edition=meta.edition, name=meta.name)
+    media_dict = asdict(media)
+    media_dict.update(type=media.type.value if media.type else None, detail_link=media.detail_link,
+                      title_year=media.title_year, tmdb_info=None, douban_info=None, bangumi_info=None)
+    torrent_dict = asdict(torrent)
+    torrent_dict.update(volume_factor=torrent.volume_factor, freedate_diff=torrent.freedate_diff)
+    return {"meta_info": meta_dict, "torrent_info": torrent_dict, "media_info": media_dict}
+
+
+def measure_serialize(count: int, rounds: int = 5) -> dict:
+    """
+    统计上下文转换为字典及编码为json的耗时（取多轮最小值）
+    """
+
+    def timeit(func) -> float:
+        best = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            func()
+            cost = time.perf_counter() - start
+            best = cost if best is None else min(best, cost)
+        return round(best, 4)
+
+    contexts = build_contexts(count)
+    return {
+        "contexts": count,
+        "asdict_seconds": timeit(lambda: [legacy_to_dict(c) for c in contexts]),
+        "to_dict_seconds": timeit(lambda: [c.to_dict() for c in contexts]),
+        "to_api_dict_seconds": timeit(lambda: [c.to_api_dict() for c in contexts]),
+        "json_seconds": timeit(lambda: JsonUtils.dumps([c.to_dict() for c in contexts])),
+        "json_stream_seconds": timeit(lambda: "".join(JsonUtils.iter_list(contexts))),
+        "json_bytes": len(JsonUtils.dumps([c.to_dict() for c in contexts]).encode())
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="上下文基准测试")
+    parser.add_argument("--sites", type=int, default=60, help="站点数")
+    parser.add_argument("--torrents", type=int, default=100, help="每个站点的种子数")
+    parser.add_argument("--serialize", type=int, default=0, help="测试接口序列化的上下文数量")
+    args = parser.parse_args()
+    if args.serialize:
+        print(json.dumps(measure_serialize(args.serialize), indent=2))
+    else:
+        print(json.dumps(measure(args.sites, args.torrents), indent=2))
@@ -0,0 +1,345 @@
+"""
+识别流程基准测试，不访问网络
+
+以 tests/cases/meta.py 的标题以及合成的 1万/10万 条标题为语料，使用合成的识别词、自定义制作组和过滤规则，
+TMDB媒体信息由语料中的目标值构造，分阶段统计每秒处理标题数、p50/p99 单条耗时和单条内存分配峰值：
+    words         WordsMatcher.prepare 识别词预处理
+    releasegroup  ReleaseGroupsMatcher.match 制作组识别
+    metavideo     MetaVideo 识别（非动漫标题）
+    metaanime     MetaAnime 识别（动漫标题）
+    metainfo      MetaInfo 完整识别
+    filter        FilterModule.filter_torrents 优先级规则过滤
+    match         TorrentHelper.match_torrent 种子与媒体信息比对
+
+结果保存为json，可与其它提交的结果对比（识别过程中的日志输出到stderr）：
+    python -m tests.benchmark_recognition --sizes 10000,100000 --output base.json 2>/dev/null
+    python -m tests.benchmark_recognition --sizes 10000 --compare base.json 2>/dev/null
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.context import MediaInfo, TorrentInfo
+from app.core.meta import MetaAnime, MetaVideo
+from app.core.meta.customization import CustomizationMatcher
+from app.core.meta.releasegroup import ReleaseGroupsMatcher
+from app.core.meta.words import WordsMatcher
+from app.core.metainfo import MetaInfo, is_anime
+from app.helper.torrent import TorrentHelper
+from app.modules.filter import FilterModule
+from app.schemas.types import MediaType, SystemConfigKey
+from tests.cases.meta import meta_cases
+
+# 合成标题的词库
+_EN_WORDS = ["Long", "Season", "Cherry", "Witch", "Capsule", "Dynasty", "Abyss", "Vampire", "Night", "River",
+             "Shadow", "Garden", "Empire", "Silent", "Blue", "Storm", "Golden", "Hunter", "Lost", "City"]
+_CN_WORDS = ["长", "夜", "风", "城", "梦", "海", "山", "星", "影", "花", "雪", "月", "龙", "剑", "天", "心"]
+_RESOLUTIONS = ["2160p", "1080p", "720p", "1080i", "4K"]
+_SOURCES = ["WEB-DL", "BluRay", "WEBRip", "HDTV", "UHD BluRay", "BluRay REMUX"]
+_VIDEO_CODECS = ["H264", "H265", "x264", "x265", "HEVC", "AVC"]
+_AUDIO_CODECS = ["AAC", "DDP5.1", "DTS-HD MA 5.1", "TrueHD Atmos 7.1", "FLAC", "AC3"]
+_GROUPS = ["CHDWEB", "HDSky", "MTeam", "FRDS", "ADWeb", "HHWEB", "OurTV", "PTHweb", "TTG", "WiKi", "XXX"]
+_ANIME_GROUPS = ["LoliHouse", "SweetSub", "Nekomoe kissaten", "ANi", "Lilith-Raws", "桜都字幕组"]
+_LABELS = ["官方", "中字", "国语", "特效", "DIY"]
+
+# 合成的过滤规则
+_FILTER_RULE = "CNSUB & 4K & !BLU > CNSUB & 1080P & !BLU > 4K & H265 & !BLU > 1080P & WEBDL > " \
+               "1080P & !BLU > 720P > !BLU"
+
+
+class FixtureConfig:
+    """
+    内存中的系统配置，代替数据库中的识别词、自定义制作组和占位符
+    """
+
+    def __init__(self, values: Dict[str, Any]):
+        self._values = values
+
+    def get(self, key=None) -> Any:
+        if isinstance(key, SystemConfigKey):
+            key = key.value
+        return self._values.get(key)
+
+
+def build_config(words: int, groups: int) -> FixtureConfig:
+    """
+    合成识别词、自定义制作组和占位符
+    """
+    identifiers = []
+    for i in range(words):
+        kind = i % 4
+        if kind == 0:
+            identifiers.append(f"SynthBlock{i}")
+        elif kind == 1:
+            identifiers.append(f"SynthName{i} => {_EN_WORDS[i % len(_EN_WORDS)]} Name")
+        elif kind == 2:
+            identifiers.append(f"SynthSeries{i} <> Synth >> EP+1")
+        else:
+            identifiers.append(f"(?:Fake|Dummy){i}\\.Tag")
+    release_groups = [f"SynthGroup{i}" if i % 5 else f"Synth\\d+Team{i}" for i in range(groups)]
+    return FixtureConfig({
+        SystemConfigKey.CustomIdentifiers.value: identifiers,
+        SystemConfigKey.CustomReleaseGroups.value: release_groups,
+        SystemConfigKey.Customization.value: "DIY;国配;CC"
+    })
+
+
+def build_case_items() -> List[dict]:
+    """
+    tests/cases/meta.py 中的标题，路径只取文件名
+    """
+    items = []
+    for case in meta_cases:
+        target = case.get("target")
+        title = case.get("title") or Path(case.get("path")).name
+        mtype = MediaType.TV if target.get("type") == MediaType.TV.value else MediaType.MOVIE
+        items.append({
+            "title": title,
+            "subtitle": case.get("subtitle") or "",
+            "type": mtype,
+            "cn_name": target.get("cn_name"),
+            "en_name": target.get("en_name"),
+            "year": target.get("year"),
+            "season": int(target.get("season")[1:3]) if target.get("season") else None,
+            "episode": int(target.get("episode")[1:3]) if target.get("episode") else None
+        })
+    return items
+
+
+def build_synthetic_items(count: int, seed: int = 0) -> List[dict]:
+    """
+    合成标题，覆盖电影、剧集、中英文混合及动漫格式
+    """
+    rand = random.Random(seed)
+    items = []
+    for i in range(count):
+        en_name = " ".join(rand.sample(_EN_WORDS, rand.randint(1, 3)))
+        cn_name = "".join(rand.sample(_CN_WORDS, rand.randint(2, 4)))
+        year = str(rand.randint(1980, 2024))
+        season, episode = rand.randint(1, 8), rand.randint(1, 24)
+        res, src = rand.choice(_RESOLUTIONS), rand.choice(_SOURCES)
+        vcodec, acodec, group = rand.choice(_VIDEO_CODECS), rand.choice(_AUDIO_CODECS), rand.choice(_GROUPS)
+        if i % 50 == 0:
+            # 命中合成识别词和自定义制作组
+            group = f"SynthGroup{rand.randint(1, 4)}"
+            en_name = f"{en_name} SynthBlock0"
+        kind = i % 5
+        if kind == 0:
+            title = f"{en_name.replace(' ', '.')}.{year}.{res}.{src.replace(' ', '.')}.{vcodec}.{acodec}-{group}"
+            subtitle = f"{cn_name} | 类型：剧情"
+            mtype, season, episode = MediaType.MOVIE, None, None
+        elif kind == 1:
+            title = f"{en_name} S{season:02d}E{episode:02d} {year} {res} {src} {vcodec} {acodec}-{group}"
+            subtitle = f"{cn_name} 第{season}季 第{episode}集 | 中字"
+            mtype = MediaType.TV
+        elif kind == 2:
+            title = f"{cn_name}.{en_name.replace(' ', '.')}.S{season:02d}.{year}.{res}.{src}.{vcodec}-{group}"
+            subtitle = f"全{episode}集 国语中字"
+            mtype, episode = MediaType.TV, None
+        elif kind == 3:
+            title = f"[{rand.choice(_ANIME_GROUPS)}] {en_name} - {episode:02d} [{res}][CHS]"
+            subtitle = ""
+            mtype, season, year = MediaType.TV, 1, ""
+        else:
+            title = f"{cn_name} ({year}) {res} {src} {vcodec} {acodec}.mkv"
+            subtitle = ""
+            mtype, en_name, season, episode = MediaType.MOVIE, "", None, None
+        items.append({
+            "title": title,
+            "subtitle": subtitle,
+            "type": mtype,
+            "cn_name": cn_name,
+            "en_name": en_name,
+            "year": year,
+            "season": season,
+            "episode": episode
+        })
+    return items
+
+
+def prepare(items: List[dict]):
+    """
+    构造种子信息和媒体信息（代替TMDB识别结果），以及比对用的识别结果
+    """
+    rand = random.Random(1)
+    for i, item in enumerate(items):
+        item["torrent"] = TorrentInfo(site=i % 20, site_name=f"站点{i % 20}",
+                                      title=item["title"], description=item["subtitle"],
+                                      size=1024 ** 3 * (i % 50 + 1), seeders=i % 100,
+                                      uploadvolumefactor=1.0, downloadvolumefactor=0.0 if i % 3 else 1.0,
+                                      labels=rand.sample(_LABELS, rand.randint(0, 2)),
+                                      category=item["type"].value)
+        mediainfo = MediaInfo(source="themoviedb", type=item["type"],
+                              title=item["cn_name"] or item["en_name"],
+                              original_title=item["en_name"] or item["cn_name"],
+                              year=item["year"] or None,
+                              tmdb_id=100000 + i,
+                              original_language="zh" if i % 4 == 0 else "en",
+                              names=[item["en_name"], item["cn_name"]])
+        if item["type"] == MediaType.TV and item["year"]:
+            mediainfo.season_years = {item["season"] or 1: item["year"]}
+        item["mediainfo"] = mediainfo
+        item["meta"] = MetaInfo(title=item["title"], subtitle=item["subtitle"])
+        item["season_episodes"] = {item["season"]: [item["episode"]]} \
+            if item["type"] == MediaType.TV and item["season"] and item["episode"] else None
+        item["anime"] = is_anime(item["title"])
+
+
+def stages() -> Dict[str, Callable[[dict], Any]]:
+    """
+    各阶段的执行函数
+    """
+    words_matcher = WordsMatcher()
+    groups_matcher = ReleaseGroupsMatcher()
+    filter_module = FilterModule()
+    filter_module.init_module()
+    return {
+        "words": lambda item: words_matcher.prepare(item["title"])[1],
+        "releasegroup": lambda item: groups_matcher.match(item["title"]),
+        "metavideo": lambda item: MetaVideo(item["title"], item["subtitle"]),
+        "metaanime": lambda item: MetaAnime(item["title"], item["subtitle"]),
+        "metainfo": lambda item: MetaInfo(title=item["title"], subtitle=item["subtitle"]),
+        "filter": lambda item: filter_module.filter_torrents(rule_string=_FILTER_RULE,
+                                                             torrent_list=[item["torrent"]],
+                                                             season_episodes=item["season_episodes"],
+                                                             mediainfo=item["mediainfo"]),
+        "match": lambda item: TorrentHelper.match_torrent(mediainfo=item["mediainfo"],
+                                                          torrent_meta=item["meta"],
+                                                          torrent=item["torrent"])
+    }
+
+
+def run_stage(func: Callable[[dict], Any], items: List[dict], alloc_sample: int) -> dict:
+    """
+    统计单个阶段的吞吐量、延迟和内存分配
+    """
+    if not items:
+        return {"titles": 0}
+    # 预热
+    for item in items[:20]:
+        func(item)
+    latencies = []
+    hits = 0
+    start = time.perf_counter()
+    for item in items:
+        begin = time.perf_counter_ns()
+        result = func(item)
+        latencies.append(time.perf_counter_ns() - begin)
+        if result:
+            hits += 1
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    # 内存分配：抽样统计单条处理过程中的分配峰值
+    peaks = []
+    tracemalloc.start()
+    for item in items[:alloc_sample]:
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        func(item)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - current)
+    tracemalloc.stop()
+    return {
+        "titles": len(items),
+        "titles_per_second": round(len(items) / elapsed, 1) if elapsed else None,
+        "p50_us": round(latencies[len(latencies) // 2] / 1000, 1),
+        "p99_us": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] / 1000, 1),
+        "mean_us": round(statistics.mean(latencies) / 1000, 1),
+        "alloc_peak_bytes_mean": int(statistics.mean(peaks)) if peaks else 0,
+        "alloc_peak_bytes_max": max(peaks) if peaks else 0,
+        "hit_ratio": round(hits / len(items), 3)
+    }
+
+
+def run_corpus(items: List[dict], selected: List[str], alloc_sample: int) -> dict:
+    """
+    对一组语料执行各阶段
+    """
+    prepare(items)
+    results = {}
+    for name, func in stages().items():
+        if selected and name not in selected:
+            continue
+        if name == "metavideo":
+            stage_items = [item for item in items if not item["anime"]]
+        elif name == "metaanime":
+            stage_items = [item for item in items if item["anime"]]
+        else:
+            stage_items = items
+        results[name] = run_stage(func, stage_items, alloc_sample)
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def measure(sizes: List[int], selected: List[str], words: int, groups: int, alloc_sample: int) -> dict:
+    config = build_config(words, groups)
+    # 识别词、自定义制作组及占位符使用合成配置
+    WordsMatcher().systemconfig = config
+    ReleaseGroupsMatcher().systemconfig = config
+    CustomizationMatcher().systemconfig = config
+    corpora = {"cases": build_case_items()}
+    for size in sizes:
+        corpora[f"synthetic_{size}"] = build_synthetic_items(size)
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "config": {"words": words, "groups": groups, "filter_rule": _FILTER_RULE},
+        "results": {name: run_corpus(items, selected, alloc_sample) for name, items in corpora.items()}
+    }
+
+
+def compare(base: dict, current: dict) -> dict:
+    """
+    与基准结果对比，ratio大于1表示当前更快
+    """
+    diff = {}
+    for corpus, stages_result in current.get("results", {}).items():
+        base_stages = base.get("results", {}).get(corpus) or {}
+        for name, result in stages_result.items():
+            base_result = base_stages.get(name)
+            if not base_result or not base_result.get("titles_per_second") or not result.get("titles_per_second"):
+                continue
+            diff[f"{corpus}.{name}"] = {
+                "titles_per_second": [base_result["titles_per_second"], result["titles_per_second"]],
+                "p99_us": [base_result["p99_us"], result["p99_us"]],
+                "alloc_peak_bytes_mean": [base_result["alloc_peak_bytes_mean"], result["alloc_peak_bytes_mean"]],
+                "ratio": round(result["titles_per_second"] / base_result["titles_per_second"], 2)
+            }
+    return {"base": base.get("commit"), "current": current.get("commit"), "stages": diff}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="识别流程基准测试")
+    parser.add_argument("--sizes", type=str, default="10000", help="合成标题数量，逗号分隔，如 10000,100000")
+    parser.add_argument("--stages", type=str, default="", help="只测试指定阶段，逗号分隔")
+    parser.add_argument("--words", type=int, default=200, help="合成识别词数量")
+    parser.add_argument("--groups", type=int, default=100, help="合成自定义制作组数量")
+    parser.add_argument("--alloc-sample", type=int, default=1000, help="统计内存分配的抽样条数")
+    parser.add_argument("--output", type=str, help="结果保存路径")
+    parser.add_argument("--compare", type=str, help="对比的基准结果路径")
+    args = parser.parse_args()
+    report = measure(sizes=[int(size) for size in args.sizes.split(",") if size.strip()],
+                     selected=[stage.strip() for stage in args.stages.split(",") if stage.strip()],
+                     words=args.words, groups=args.groups, alloc_sample=args.alloc_sample)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    if args.compare:
+        print(json.dumps(compare(json.loads(Path(args.compare).read_text(encoding="utf-8")), report),
+                         indent=2, ensure_ascii=False))
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
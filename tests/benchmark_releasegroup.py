@@ -0,0 +1,88 @@
+"""
+制作组识别基准测试，不访问网络
+
+以 tests/cases/meta.py 中的标题（可重复放大）为语料，对比原实现（每次拼接全部组并编译正则匹配）与 GroupPatternMatcher
+（字面量字典树 + 正则兜底）的耗时，并校验两者识别结果一致；--custom 追加若干自定义组（含正则语法的组）：
+    python -m tests.benchmark_releasegroup --repeat 50 --custom 200
+"""
+import argparse
+import json
+import time
+from typing import List
+
+import regex as re
+
+from app.core.meta.releasegroup import GroupPatternMatcher, ReleaseGroupsMatcher
+from tests.cases.meta import meta_cases
+
+
+def build_groups(custom: int) -> List[str]:
+    """
+    内置组及自定义组，自定义组中每十个有一个使用正则语法
+    """
+    groups = [group for site_groups in ReleaseGroupsMatcher.RELEASE_GROUPS.values() for group in site_groups]
+    for i in range(custom):
+        groups.append(f"Custom\\d{{2}}G{i}" if i % 10 == 0 else f"Custom(?:Team|Group){i}")
+    return groups
+
+
+def build_titles(repeat: int) -> List[str]:
+    """
+    测试标题，包含主标题和副标题
+    """
+    titles = []
+    for case in meta_cases:
+        titles.append(case.get("title"))
+        if case.get("subtitle"):
+            titles.append(case.get("subtitle"))
+    titles += ["Movie 2023 1080p WEB-DL-Custom12G10", "[CustomTeam3&CHDWEB] Show S01E01 2160p.mkv"]
+    return [f"{title} " for title in titles] * repeat
+
+
+def legacy_match(groups: List[str], title: str) -> List[str]:
+    """
+    原实现：每次拼接并编译全部组
+    """
+    groups_re = re.compile(r"(?<=[-@\[￡【&])(?:%s)(?=[@.\s\]\[】&])" % "|".join(groups), re.I)
+    return re.findall(groups_re, title)
+
+
+def measure(repeat: int, custom: int) -> dict:
+    groups = build_groups(custom)
+    titles = build_titles(repeat)
+
+    start = time.perf_counter()
+    matcher = GroupPatternMatcher(groups)
+    build_seconds = time.perf_counter() - start
+
+    for title in titles[:len(titles) // repeat]:
+        if legacy_match(groups, title) != matcher.findall(title):
+            raise AssertionError(f"识别结果不一致：{title}")
+
+    start = time.perf_counter()
+    for title in titles:
+        legacy_match(groups, title)
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for title in titles:
+        matcher.findall(title)
+    matcher_seconds = time.perf_counter() - start
+
+    return {
+        "titles": len(titles),
+        "groups": len(groups),
+        "fallback_groups": matcher.fallback_count,
+        "build_seconds": round(build_seconds, 4),
+        "regex_seconds": round(legacy_seconds, 4),
+        "matcher_seconds": round(matcher_seconds, 4),
+        "speedup": round(legacy_seconds / matcher_seconds, 1) if matcher_seconds else None
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="制作组识别基准测试")
+    parser.add_argument("--repeat", type=int, default=50, help="语料重复次数")
+    parser.add_argument("--custom", type=int, default=0, help="自定义组数量")
+    args = parser.parse_args()
+    print(json.dumps(measure(args.repeat, args.custom), indent=2))
@@ -0,0 +1,105 @@
+"""
+种子元数据读取基准测试，不访问网络
+
+构造大体积多文件种子（大量文件及较大的pieces），对比 torrentool 完整解码与 BencodeUtils 只读取元数据的耗时和内存峰值，
+并校验两者读取的名称、文件清单、大小和infohash一致：
+    python -m tests.benchmark_torrent --files 5000 --pieces 20000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from torrentool.bencode import Bencode
+from torrentool.torrent import Torrent
+
+from app.utils.bencode import BencodeUtils
+
+
+def build_torrent(path: Path, files: int, pieces: int):
+    """
+    生成多文件种子，包含填充文件
+    """
+    file_list = []
+    for i in range(files):
+        file_list.append({"length": 1024 * 1024 * (i % 50 + 1),
+                          "path": [f"Season {i // 500 + 1}", f"Show.S{i // 500 + 1:02d}E{i % 500 + 1:03d}.1080p.mkv"]})
+        if i % 10 == 0:
+            file_list.append({"length": 1024, "attr": "p", "path": [".pad", "1024"]})
+    info = {
+        "name": "Show.Complete.1080p.WEB-DL",
+        "piece length": 4 * 1024 * 1024,
+        "pieces": os.urandom(20 * pieces),
+        "files": file_list
+    }
+    content = Bencode.encode({"announce": "https://tracker.example.com/announce?passkey=x",
+                              "comment": "benchmark",
+                              "created by": "benchmark",
+                              "info": info})
+    path.write_bytes(content)
+
+
+def legacy_read(path: Path) -> tuple:
+    """
+    原读取方式：torrentool 解码整个种子
+    """
+    torrentinfo = Torrent.from_file(path)
+    files = sorted(os.path.join(*f.name.split(os.sep)[1:]) for f in torrentinfo.files
+                   if not f.name.split(os.sep)[-2:-1] == [".pad"])
+    return torrentinfo.name, files, torrentinfo.total_size, torrentinfo.info_hash
+
+
+def bencode_read(path: Path) -> tuple:
+    """
+    新读取方式：只解码元数据
+    """
+    torrentinfo = BencodeUtils.read_torrent_file(path)
+    files = sorted(os.path.join(*parts) for parts, _ in torrentinfo.files)
+    return torrentinfo.name, files, torrentinfo.total_size, torrentinfo.infohash
+
+
+def measure(files: int, pieces: int, rounds: int = 5) -> dict:
+    """
+    测试耗时和内存峰值
+    """
+
+    def timeit(func) -> float:
+        best = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            func()
+            cost = time.perf_counter() - start
+            best = cost if best is None else min(best, cost)
+        return round(best, 4)
+
+    def peak(func) -> int:
+        tracemalloc.start()
+        func()
+        _, size = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return size
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "benchmark.torrent"
+        build_torrent(path, files, pieces)
+        if legacy_read(path) != bencode_read(path):
+            raise AssertionError("读取结果不一致")
+        return {
+            "files": files,
+            "torrent_bytes": path.stat().st_size,
+            "torrentool_seconds": timeit(lambda: legacy_read(path)),
+            "bencode_seconds": timeit(lambda: bencode_read(path)),
+            "torrentool_peak_bytes": peak(lambda: legacy_read(path)),
+            "bencode_peak_bytes": peak(lambda: bencode_read(path))
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="种子元数据读取基准测试")
+    parser.add_argument("--files", type=int, default=5000, help="文件数")
+    parser.add_argument("--pieces", type=int, default=20000, help="分块数")
+    args = parser.parse_args()
+    print(json.dumps(measure(args.files, args.pieces), indent=2))
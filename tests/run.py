@@ -1,6 +1,17 @@
 import unittest
 
+from tests.test_bencode import BencodeUtilsTest
+from tests.test_compact import SchemaDictTest
+from tests.test_libraryindex import LibraryIndexTest
+from tests.test_mediaserver import FetchPagesTest, EmbyLibraryItemsTest, PlexLibraryItemsTest, MediaServerOperTest
+from tests.test_metacache import MetaCacheStoreTest
 from tests.test_metainfo import MetaInfoTest
+from tests.test_searchresult import SearchResultOperTest
+from tests.test_sitelimiter import SiteLimiterTest
+from tests.test_torrent import TorrentGroupTest
+from tests.test_torrentstate import TorrentStateCacheTest, TransmissionSyncTest
+from tests.test_transferqueue import TransferQueueTest
+from tests.test_writecache import WriteBehindCacheTest
 
 if __name__ == '__main__':
     suite = unittest.TestSuite()
@@ -8,6 +19,45 @@ if __name__ == '__main__':
     # 测试名称识别
     suite.addTest(MetaInfoTest('test_metainfo'))
 
+    # 识别缓存存储
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(MetaCacheStoreTest))
+
+    # 媒体库文件索引
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(LibraryIndexTest))
+
+    # 种子元数据读取
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(BencodeUtilsTest))
+
+    # 接口数据投影
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(SchemaDictTest))
+
+    # 种子分组
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TorrentGroupTest))
+
+    # 搜索结果存储
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(SearchResultOperTest))
+
+    # 站点流控与熔断
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(SiteLimiterTest))
+
+    # 下载器种子状态缓存
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TorrentStateCacheTest))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TransmissionSyncTest))
+
+    # 下载器文件整理队列
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TransferQueueTest))
+
+    # 数据库写回缓存
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(WriteBehindCacheTest))
+
+    # 媒体服务器分页批量获取
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(FetchPagesTest))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(EmbyLibraryItemsTest))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(PlexLibraryItemsTest))
+
+    # 媒体服务器数据存储
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(MediaServerOperTest))
+
     # 运行测试
     runner = unittest.TextTestRunner()
     runner.run(suite)
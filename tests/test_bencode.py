@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from torrentool.bencode import Bencode
+from torrentool.torrent import Torrent
+
+from app.utils.bencode import BencodeUtils
+
+
+class BencodeUtilsTest(TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self._dir.cleanup()
+
+    @staticmethod
+    def __encode(info: dict) -> bytes:
+        info.setdefault("piece length", 16384)
+        info.setdefault("pieces", os.urandom(40))
+        return Bencode.encode({"announce": "https://tracker.example.com/announce", "info": info})
+
+    def __compare(self, content: bytes):
+        """
+        与torrentool读取的名称、文件清单、大小和infohash比对
+        """
+        path = Path(self._dir.name) / "test.torrent"
+        path.write_bytes(content)
+        legacy = Torrent.from_file(path)
+        legacy_files = sorted(os.path.join(*f.name.split(os.sep)[1:]) if legacy._struct["info"].get("files")
+                              else f.name for f in legacy.files if not f.name.split(os.sep)[-2:-1] == [".pad"])
+        meta = BencodeUtils.read_torrent(content)
+        self.assertIsNotNone(meta)
+        self.assertEqual(meta.name, legacy.name)
+        self.assertEqual(sorted(os.path.join(*parts) for parts, _ in meta.files), legacy_files)
+        self.assertEqual(meta.total_size, legacy.total_size)
+        self.assertEqual(meta.infohash, legacy.info_hash)
+        return meta
+
+    def test_single_file(self):
+        meta = self.__compare(self.__encode({"name": "电影.2019.1080p.mkv", "length": 1024}))
+        self.assertFalse(meta.multi_file)
+        self.assertEqual(meta.files, [(("电影.2019.1080p.mkv",), 1024)])
+
+    def test_multi_file(self):
+        meta = self.__compare(self.__encode({"name": "Show.S01", "files": [
+            {"length": 100, "path": ["Show.S01E01.mkv"]},
+            {"length": 200, "path": ["Subs", "Show.S01E01.ass"]},
+        ]}))
+        self.assertTrue(meta.multi_file)
+        self.assertEqual(meta.files, [(("Show.S01E01.mkv",), 100), (("Subs", "Show.S01E01.ass"), 200)])
+
+    def test_padding_file(self):
+        meta = self.__compare(self.__encode({"name": "Show.S01", "files": [
+            {"length": 100, "path": ["Show.S01E01.mkv"]},
+            {"length": 16284, "attr": "p", "path": [".pad", "16284"]},
+            {"length": 200, "path": ["Show.S01E02.mkv"]},
+        ]}))
+        # 总大小包含填充文件，文件清单不包含
+        self.assertEqual(meta.total_size, 16584)
+        self.assertEqual(len(meta.files), 2)
+
+    def test_malformed(self):
+        contents = [
+            b"",
+            b"not a torrent",
+            # 截断
+            self.__encode({"name": "a", "length": 1})[:-5],
+            # 缺少info
+            b"d8:announce3:urle",
+            # 缺少名称
+            b"d4:infod6:lengthi1eee",
+            # 文件清单项不是字典
+            b"d4:infod4:name1:a5:filesli1eeee",
+            # 文件清单不是列表
+            b"d4:infod4:name1:a5:filesi1eee",
+            # 空文件清单
+            b"d4:infod4:name1:a5:fileslee",
+            # 路径不是列表
+            b"d4:infod4:name1:a5:filesld6:lengthi1e4:path1:beeee",
+            # 路径项不是字符串
+            b"d4:infod4:name1:a5:filesld6:lengthi1e4:pathli1eeeeee",
+            # 大小不是整数
+            b"d4:infod4:name1:a6:length1:1ee",
+        ]
+        for content in contents:
+            with self.subTest(content=content):
+                self.assertIsNone(BencodeUtils.read_torrent(content))
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import json
+from functools import partial
+from unittest import TestCase
+
+from fastapi.encoders import jsonable_encoder
+
+from app import schemas
+from app.core.compact import schema_dict
+from app.core.context import Context, MediaInfo, TorrentInfo
+from app.core.metainfo import MetaInfo
+from app.schemas.types import MediaType
+from app.utils.json import JsonUtils
+
+
+class SchemaDictTest(TestCase):
+    def setUp(self) -> None:
+        meta = MetaInfo(title="Three-Body S01E02 2160p WEB-DL H265 DDP5.1-GROUP", subtitle="三体 第2集")
+        mediainfo = MediaInfo(source="themoviedb", type=MediaType.TV, title="三体", year="2023",
+                              tmdb_id=108545, tvdb_id=421108, vote_average=8, season=1,
+                              seasons={1: [1, 2, 3]}, actors=[{"id": 1, "name": "张鲁一"}],
+                              genres=[{"id": 18, "name": "剧情"}], names=["Three-Body"],
+                              overview="简介")
+        torrent = TorrentInfo(site=1, site_name="站点A", site_cookie="uid=1", site_ua="UA",
+                              title="Three-Body S01E02 2160p WEB-DL", description="三体 第2集",
+                              enclosure="https://a.com/download.php?id=1", size=2 * 1024 ** 3,
+                              seeders=10, peers=2, pubdate="2024-01-01 00:00:00",
+                              uploadvolumefactor=1, downloadvolumefactor=0, labels=["中字"])
+        self.context = Context(meta_info=meta, media_info=mediainfo, torrent_info=torrent)
+
+    @staticmethod
+    def __legacy(items: list) -> str:
+        """
+        原接口的输出：按 response_model=List[schemas.Context] 校验后编码
+        """
+        models = [schemas.Context.parse_obj(item) for item in items]
+        return json.dumps(jsonable_encoder(models), ensure_ascii=False, separators=(",", ":"))
+
+    @staticmethod
+    def __stream(items: list) -> str:
+        return "".join(JsonUtils.iter_list(items, to_dict=partial(schema_dict, schema=schemas.Context)))
+
+    def test_stream_context(self):
+        self.assertEqual(self.__legacy([self.context.to_dict()]), self.__stream([self.context]))
+
+    def test_stream_stored_dict(self):
+        # 搜索结果从数据库读取为字典
+        data = json.loads(JsonUtils.dumps(self.context.to_dict()))
+        self.assertEqual(self.__legacy([data]), self.__stream([data]))
+
+    def test_to_api_dict(self):
+        mediainfo = self.context.media_info
+        dicts = mediainfo.to_api_dict()
+        self.assertEqual(list(dicts), list(schemas.MediaInfo.__fields__))
+        self.assertEqual("电视剧", dicts["type"])
+        self.assertEqual("421108", dicts["tvdb_id"])
+        # 不复制嵌套数据
+        self.assertIs(mediainfo.actors, dicts["actors"])
+        self.assertIsNot(mediainfo.actors, mediainfo.to_dict()["actors"])
+        self.assertIsNone(Context().to_api_dict()["media_info"])
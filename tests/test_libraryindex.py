@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from app.helper.libraryindex import LibraryIndexHelper
+
+
+class LibraryIndexTest(TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self.root = Path(self._dir.name)
+        self.library = self.root / "library"
+        self.show = self.library / "三体 (2023)"
+        for name in ("Season 1/三体 - S01E01 - 第 1 集.mkv", "Season 1/三体 - S01E02 - 第 2 集.mkv",
+                     "Season 2/三体 - S02E01 - 第 1 集.mp4", "Season 1/poster.jpg"):
+            self.__touch(self.show / name)
+        self.index = self.__index()
+
+    def tearDown(self) -> None:
+        self.index._conn.close()
+        self._dir.cleanup()
+
+    def __index(self) -> LibraryIndexHelper:
+        """
+        不使用单例，索引保存到临时目录
+        """
+        index = LibraryIndexHelper.__new__(LibraryIndexHelper)
+        index._path = self.root / "__library_index__.db"
+        index._lock = threading.RLock()
+        index._roots = set()
+        index._observer = None
+        index._conn = index._LibraryIndexHelper__connect()
+        return index
+
+    @staticmethod
+    def __touch(path: Path, mtime: float = None):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"")
+        if mtime:
+            os.utime(path, (mtime, mtime))
+
+    def __episodes(self, directory: Path = None) -> list:
+        return sorted((f.season, f.episode) for f in self.index.list_files(directory or self.show))
+
+    def test_index(self):
+        files = self.index.list_files(self.show)
+        # 只索引媒体文件
+        self.assertEqual(len(files), 3)
+        file = next(f for f in files if f.path.name.startswith("三体 - S02E01"))
+        self.assertEqual((file.season, file.episode, file.path_season, file.path_episode), (2, 1, "S02", "E01"))
+        # 子目录查询使用已有索引
+        self.assertEqual(self.__episodes(self.show / "Season 1"), [(1, 1), (1, 2)])
+        # 重新打开后不再扫描
+        self.index._conn.close()
+        self.index = self.__index()
+        self.__touch(self.show / "Season 1/三体 - S01E03 - 第 3 集.mkv")
+        self.assertEqual(self.__episodes(), [(1, 1), (1, 2), (2, 1)])
+
+    def test_add_remove(self):
+        self.index.list_files(self.show)
+        new_file = self.show / "Season 1/三体 - S01E03 - 第 3 集.mkv"
+        self.__touch(new_file)
+        self.index.add_files([new_file, self.show / "Season 1/poster.jpg"])
+        self.assertEqual(self.__episodes(), [(1, 1), (1, 2), (1, 3), (2, 1)])
+        # 未索引目录中的文件不加入索引
+        other = self.library / "流浪地球 (2019)/流浪地球 (2019).mkv"
+        self.__touch(other)
+        self.index.add_files([other])
+        self.assertEqual(self.index._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0], 4)
+        # 删除单个文件及整个目录
+        self.index.remove(new_file)
+        self.assertEqual(self.__episodes(), [(1, 1), (1, 2), (2, 1)])
+        self.index.remove(self.show / "Season 1")
+        self.assertEqual(self.__episodes(), [(2, 1)])
+
+    def test_refresh(self):
+        self.index.list_files(self.show)
+        # 整个目录移入
+        self.__touch(self.show / "Season 3/三体 - S03E01 - 第 1 集.mkv")
+        self.index.refresh(self.show / "Season 3")
+        self.assertEqual(self.__episodes(), [(1, 1), (1, 2), (2, 1), (3, 1)])
+
+    def test_reconcile(self):
+        self.index.list_files(self.show)
+        self.index.list_files(self.show / "Season 1")
+        movie = self.library / "流浪地球 (2019)"
+        self.__touch(movie / "流浪地球 (2019).mkv")
+        self.index.list_files(movie)
+        # 监听遗漏的新增、删除及改名
+        (self.show / "Season 1/三体 - S01E02 - 第 2 集.mkv").unlink()
+        self.__touch(self.show / "Season 2/三体 - S02E02 - 第 2 集.mkv")
+        os.rename(self.show / "Season 2/三体 - S02E01 - 第 1 集.mp4", self.show / "Season 2/三体 - S02E03.mp4")
+        for f in movie.iterdir():
+            f.unlink()
+        movie.rmdir()
+        self.index.reconcile()
+        self.assertEqual(self.__episodes(), [(1, 1), (2, 2), (2, 3)])
+        # 不存在的目录移出索引
+        self.assertNotIn(str(movie), self.index._roots)
+        self.assertEqual(self.index.list_files(movie), [])
+
+    def test_modified(self):
+        self.index.list_files(self.show)
+        # 文件修改时间变化时重新识别
+        path = self.show / "Season 1/三体 - S01E01 - 第 1 集.mkv"
+        self.index._conn.execute("UPDATE files SET episode = 9 WHERE path = ?", (str(path),))
+        self.index.reconcile()
+        self.assertEqual(self.__episodes(), [(1, 2), (1, 9), (2, 1)])
+        os.utime(path, (1, 1))
+        self.index.reconcile()
+        self.assertEqual(self.__episodes(), [(1, 1), (1, 2), (2, 1)])
+
+    def test_clear(self):
+        self.index.list_files(self.show)
+        self.index.clear()
+        self.assertEqual(self.index._roots, set())
+        self.assertEqual(self.index._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0], 0)
+        # 清空后重新扫描
+        self.assertEqual(len(self.index.list_files(self.show)), 3)
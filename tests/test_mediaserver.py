@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest import TestCase
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+from xml.etree import ElementTree
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db import Base
+from app.db.mediaserver_oper import MediaServerOper
+from app.db.models.mediaserver import MediaServerItem
+from app.modules.emby.emby import Emby
+from app.modules.plex.plex import Plex
+from app.utils.common import fetch_pages
+
+
+class FetchPagesTest(TestCase):
+    def setUp(self) -> None:
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def __fetch(self, data: list, total: int = None):
+        def fetch(start: int, limit: int):
+            with self._lock:
+                self.calls.append((start, limit))
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+            time.sleep(0.01)
+            with self._lock:
+                self.running -= 1
+            return data[start:start + limit], len(data) if total is None else total
+
+        return fetch
+
+    def test_page_boundaries(self):
+        data = list(range(10))
+        pages = list(fetch_pages(self.__fetch(data), page_size=4, workers=2))
+        self.assertEqual(pages, [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]])
+        self.assertEqual(sorted(self.calls), [(0, 4), (4, 4), (8, 4)])
+        self.assertLessEqual(self.max_running, 2)
+
+    def test_exact_pages(self):
+        # 总数为页大小的整数倍时不请求空的下一页
+        pages = list(fetch_pages(self.__fetch(list(range(8))), page_size=4, workers=3))
+        self.assertEqual(pages, [[0, 1, 2, 3], [4, 5, 6, 7]])
+        self.assertEqual(sorted(self.calls), [(0, 4), (4, 4)])
+
+    def test_empty_last_page(self):
+        # 分页期间项目减少，最后一页为空
+        pages = list(fetch_pages(self.__fetch(list(range(5)), total=9), page_size=4))
+        self.assertEqual(pages, [[0, 1, 2, 3], [4], []])
+
+    def test_empty(self):
+        self.assertEqual(list(fetch_pages(self.__fetch([]), page_size=4)), [[]])
+        self.assertEqual(self.calls, [(0, 4)])
+
+    def test_bounded_concurrency(self):
+        data = list(range(100))
+        pages = list(fetch_pages(self.__fetch(data), page_size=5, workers=3))
+        self.assertEqual([item for page in pages for item in page], data)
+        self.assertLessEqual(self.max_running, 3)
+
+    def test_error(self):
+        def fetch(start: int, limit: int):
+            if start:
+                raise IOError("page error")
+            return [0], 3
+
+        with self.assertRaises(IOError):
+            list(fetch_pages(fetch, page_size=1))
+
+
+class _EmbyHandler(BaseHTTPRequestHandler):
+    """
+    模拟Emby接口
+    """
+    movies = [{"Id": f"m{i}", "Type": "Movie", "Name": f"Movie {i}", "ProductionYear": 2000 + i,
+               "ProviderIds": {"Tmdb": str(i)}, "Path": f"/movies/{i}.mkv"} for i in range(5)]
+    series = [{"Id": f"s{i}", "Type": "Series", "Name": f"Series {i}"} for i in range(3)]
+    episodes = [{"Id": f"s{i}e{season}{episode}", "Type": "Episode", "SeriesId": f"s{i}",
+                 "ParentIndexNumber": season, "IndexNumber": episode}
+                for i in range(2) for season in (0, 1, 2) for episode in (1, 2, 3)]
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path.replace("/emby/", "/", 1))
+        query = parse_qs(url.query)
+        if url.path == "/Users":
+            body = [{"Id": "u1", "Name": "admin", "Policy": {"IsAdministrator": True}}]
+        elif url.path == "/Users/u1/Items":
+            types = query["IncludeItemTypes"][0].split(",")
+            data = [item for item in self.movies + self.series + self.episodes if item["Type"] in types]
+            start, limit = int(query["StartIndex"][0]), int(query["Limit"][0])
+            self.requests.append((query["IncludeItemTypes"][0], start, limit))
+            body = {"Items": data[start:start + limit], "TotalRecordCount": len(data)}
+        else:
+            body = {}
+        content = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class EmbyLibraryItemsTest(TestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _EmbyHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self._settings = (settings.EMBY_HOST, settings.EMBY_API_KEY,
+                          settings.MEDIASERVER_SYNC_PAGE_SIZE, settings.MEDIASERVER_SYNC_THREADS)
+        settings.EMBY_HOST = f"http://127.0.0.1:{self.server.server_port}"
+        settings.EMBY_API_KEY = "apikey"
+        settings.MEDIASERVER_SYNC_PAGE_SIZE = 4
+        settings.MEDIASERVER_SYNC_THREADS = 2
+        _EmbyHandler.requests = []
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        (settings.EMBY_HOST, settings.EMBY_API_KEY,
+         settings.MEDIASERVER_SYNC_PAGE_SIZE, settings.MEDIASERVER_SYNC_THREADS) = self._settings
+
+    def test_library_items(self):
+        items = list(Emby().get_library_items("library"))
+        self.assertEqual([item.item_id for item in items], [f"m{i}" for i in range(5)] + [f"s{i}" for i in range(3)])
+        movie = items[1]
+        self.assertEqual((movie.title, movie.year, movie.tmdbid, movie.path, movie.library),
+                         ("Movie 1", "2001", 1, "/movies/1.mkv", "library"))
+        self.assertIsNone(movie.seasoninfo)
+        # 剧集按电视剧分组，不包含第0季
+        seasoninfos = {item.item_id: item.seasoninfo for item in items if item.item_type == "Series"}
+        self.assertEqual(seasoninfos, {"s0": {1: [1, 2, 3], 2: [1, 2, 3]},
+                                       "s1": {1: [1, 2, 3], 2: [1, 2, 3]},
+                                       "s2": {}})
+        # 18集4页、8个项目2页
+        self.assertEqual(sorted(_EmbyHandler.requests),
+                         sorted([("Episode", start, 4) for start in range(0, 18, 4)]
+                                + [("Movie,Series", start, 4) for start in (0, 4)]))
+
+
+class PlexLibraryItemsTest(TestCase):
+    shows = ['<Directory key="/library/metadata/%s/children" type="show" title="Show %s" year="2020">'
+             '<Guid id="tmdb://%s"/><Location path="/tv/%s"/></Directory>' % (i, i, i, i) for i in range(3)]
+    episodes = ['<Video type="episode" grandparentKey="/library/metadata/%s" parentIndex="%s" index="%s"/>'
+                % (i, season, episode) for i in range(2) for season in (0, 1) for episode in (1, 2)]
+
+    def setUp(self) -> None:
+        self.queries = []
+        self._settings = (settings.MEDIASERVER_SYNC_PAGE_SIZE, settings.MEDIASERVER_SYNC_THREADS)
+        settings.MEDIASERVER_SYNC_PAGE_SIZE = 3
+        settings.MEDIASERVER_SYNC_THREADS = 2
+
+    def tearDown(self) -> None:
+        settings.MEDIASERVER_SYNC_PAGE_SIZE, settings.MEDIASERVER_SYNC_THREADS = self._settings
+
+    def __query(self, key: str, headers: dict = None, params: dict = None):
+        start = int(headers["X-Plex-Container-Start"])
+        size = int(headers["X-Plex-Container-Size"])
+        self.queries.append((key, start, size, params))
+        rows = self.episodes if key.endswith("/allLeaves") else self.shows
+        return ElementTree.fromstring('<MediaContainer totalSize="%s">%s</MediaContainer>'
+                                      % (len(rows), "".join(rows[start:start + size])))
+
+    def test_library_items(self):
+        plex = Plex.__new__(Plex)
+        plex._plex = SimpleNamespace(
+            library=SimpleNamespace(sectionByID=lambda key: SimpleNamespace(key=key, type="show")),
+            query=self.__query
+        )
+        items = list(plex.get_library_items("2"))
+        self.assertEqual([item.item_id for item in items], [f"/library/metadata/{i}" for i in range(3)])
+        self.assertEqual((items[1].title, items[1].year, items[1].tmdbid, items[1].path, items[1].library),
+                         ("Show 1", "2020", 1, "/tv/1", "2"))
+        self.assertEqual([item.seasoninfo for item in items],
+                         [{0: [1, 2], 1: [1, 2]}, {0: [1, 2], 1: [1, 2]}, {}])
+        # 3个项目1页，8集3页
+        self.assertEqual(sorted((key, start) for key, start, _, _ in self.queries),
+                         [("/library/sections/2/all", 0),
+                          ("/library/sections/2/allLeaves", 0), ("/library/sections/2/allLeaves", 3),
+                          ("/library/sections/2/allLeaves", 6)])
+
+
+class MediaServerOperTest(TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        engine = create_engine(f"sqlite:///{Path(self._dir.name) / 'user.db'}")
+        Base.metadata.create_all(bind=engine, tables=[MediaServerItem.__table__])
+        self.db = sessionmaker(bind=engine)()
+        self.oper = MediaServerOper(self.db)
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.db.get_bind().dispose()
+        self._dir.cleanup()
+
+    def __libraries(self) -> dict:
+        return {item.item_id: item.library for item in self.db.query(MediaServerItem).all()}
+
+    def test_webhook_library(self):
+        self.oper.replace_library("emby", "1", [{"server": "emby", "library": "1", "item_id": "a", "title": "A"}])
+        # 已同步的媒体库保留，未知的媒体库（如所在目录ID）置空
+        self.assertTrue(self.oper.upsert(server="emby", library="1", item_id="b", title="B"))
+        self.assertTrue(self.oper.upsert(server="emby", library="folder", item_id="c", title="C"))
+        self.assertTrue(self.oper.upsert(server="emby", library=None, item_id="d", title="D"))
+        # 已有数据不修改媒体库
+        self.assertFalse(self.oper.upsert(server="emby", library="folder", item_id="a", title="A2"))
+        self.assertEqual(self.__libraries(), {"a": "1", "b": "1", "c": None, "d": None})
+
+    def test_empty_others(self):
+        self.oper.replace_library("emby", "1", [{"server": "emby", "library": "1", "item_id": "a"}])
+        self.oper.replace_library("emby", "2", [{"server": "emby", "library": "2", "item_id": "b"}])
+        self.oper.upsert(server="emby", library=None, item_id="c")
+        self.oper.upsert(server="plex", library=None, item_id="d")
+        # 同步后清理已删除的媒体库及未知媒体库的数据
+        self.oper.empty_others("emby", ["1"])
+        self.assertEqual(self.__libraries(), {"a": "1", "d": None})
+
+    def test_replace_library(self):
+        self.oper.replace_library("emby", "1", [{"server": "emby", "library": "1", "item_id": "a"}])
+        self.oper.upsert(server="emby", library=None, item_id="b")
+        # 同步时按项目ID替换Webhook写入的数据
+        self.oper.replace_library("emby", "1", [{"server": "emby", "library": "1", "item_id": "a"},
+                                                {"server": "emby", "library": "1", "item_id": "b"}])
+        self.assertEqual(self.__libraries(), {"a": "1", "b": "1"})
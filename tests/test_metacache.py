@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from app.helper.metacache import MetaCacheStore
+
+
+class MetaCacheStoreTest(TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self.path = Path(self._dir.name) / "cache.db"
+        self.store = MetaCacheStore(self.path, lru_size=2, expire_field="expire")
+
+    def tearDown(self) -> None:
+        self._dir.cleanup()
+
+    def __expire(self, key: str) -> int:
+        return self.store._conn.execute("SELECT expire FROM cache WHERE key = ?", (key,)).fetchone()[0]
+
+    def test_get(self):
+        self.store.set("a", {"id": 1, "title": "A"}, mid=1, expire=100)
+        self.assertEqual(self.store.get("a"), {"id": 1, "title": "A"})
+        self.assertIsNone(self.store.get("missing"))
+        # 重新打开后从数据库读取
+        store = MetaCacheStore(self.path, lru_size=2)
+        self.assertEqual(store.get("a"), {"id": 1, "title": "A"})
+        self.assertEqual(store.count(), 1)
+
+    def test_transient(self):
+        self.store.set("a", {"id": 0}, persist=False)
+        self.assertEqual(self.store.get("a"), {"id": 0})
+        self.assertEqual(self.store.count(), 0)
+        self.store.delete_transient()
+        self.assertIsNone(self.store.get("a"))
+
+    def test_extend_on_read(self):
+        self.store.set("a", {"id": 1}, mid=1, expire=100)
+        self.store.touch("a", 200)
+        # flush前不写入数据库
+        self.assertEqual(self.__expire("a"), 100)
+        self.store.flush()
+        self.assertEqual(self.__expire("a"), 200)
+        # 已写入，再次flush不重复写入
+        self.store.flush()
+        self.assertEqual(self.store._touched, {})
+
+    def test_eviction(self):
+        self.store.set("a", {"id": 1}, mid=1, expire=100)
+        self.store.touch("a", 300)
+        self.store.set("b", {"id": 2}, mid=2, expire=100)
+        self.store.set("c", {"id": 3}, mid=3, expire=100)
+        # 超出内存容量时淘汰最久未使用的条目，淘汰前写入延长的有效期
+        self.assertNotIn("a", self.store._lru)
+        self.assertEqual(self.__expire("a"), 300)
+        self.assertEqual(self.store.get("a"), {"id": 1})
+        self.assertNotIn("b", self.store._lru)
+
+    def test_delete_expired(self):
+        self.store.set("a", {"id": 1}, mid=1, expire=100)
+        self.store.set("b", {"id": 2}, mid=2, expire=300)
+        self.store.touch("a", 400)
+        # 先写入延长的有效期，再删除过期条目
+        self.assertEqual(self.store.delete_expired(now=200), 0)
+        self.assertEqual(self.store.delete_expired(now=350), 1)
+        self.assertIsNone(self.store.get("b"))
+        self.assertEqual(self.store.get("a"), {"id": 1})
+
+    def test_delete_by_mid(self):
+        self.store.set("a", {"id": 1}, mid=1, expire=100)
+        self.store.set("b", {"id": 1}, mid=1, expire=100)
+        self.store.set("c", {"id": 2}, mid=2, expire=100)
+        self.assertEqual(sorted(self.store.delete_by_mid(1)), ["a", "b"])
+        self.assertIsNone(self.store.get("a"))
+        self.assertEqual(self.store.count(), 1)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.context import Context, MediaInfo, TorrentInfo
+from app.core.metainfo import MetaInfo
+from app.db import Base
+from app.db.models.searchresult import SearchRecord, SearchResult
+from app.db.models.site import Site
+from app.db.searchresult_oper import SearchResultOper
+from app.schemas.types import MediaType
+
+
+class SearchResultOperTest(TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        engine = create_engine(f"sqlite:///{Path(self._dir.name) / 'user.db'}")
+        Base.metadata.create_all(bind=engine, tables=[SearchRecord.__table__, SearchResult.__table__,
+                                                      Site.__table__])
+        self.db = sessionmaker(bind=engine)()
+        self.db.add(Site(id=1, name="站点A", domain="a.com", url="https://a.com/", cookie="uid=1", ua="UA"))
+        self.db.commit()
+        self.oper = SearchResultOper(self.db)
+        self.mediainfo = MediaInfo(type=MediaType.TV, title="三体", year="2023", tmdb_id=108545)
+        self.contexts = [self.__context(i) for i in range(6)]
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.db.get_bind().dispose()
+        self._dir.cleanup()
+
+    def __context(self, i: int) -> Context:
+        title = f"Three-Body S0{i % 2 + 1} {'2160p' if i % 3 == 0 else '1080p'} WEB-DL"
+        torrent = TorrentInfo(site=1 if i % 2 else 2, site_name="站点A" if i % 2 else "站点B",
+                              site_cookie="secret", title=title, description=f"三体 {i}", size=i * 1024 ** 3,
+                              seeders=10 - i, downloadvolumefactor=0 if i < 2 else 1, uploadvolumefactor=1)
+        return Context(meta_info=MetaInfo(title=title), media_info=self.mediainfo, torrent_info=torrent)
+
+    def test_save_and_list(self):
+        search_id = self.oper.save(self.contexts, keyword="三体", userid="admin")
+        total, results = self.oper.list(search_id, userid="admin")
+        self.assertEqual(total, 6)
+        self.assertEqual([r["torrent_info"]["description"] for r in results], [f"三体 {i}" for i in range(6)])
+        # 媒体信息只保存一份，读取时补充
+        self.assertEqual(results[0]["media_info"]["title"], "三体")
+        self.assertEqual(self.db.query(SearchResult).filter(SearchResult.media_info.isnot(None)).count(), 0)
+        # 不保存站点Cookie，读取时从站点信息补充
+        self.assertNotIn("secret", self.db.query(SearchResult).first().torrent_info)
+        self.assertEqual((results[1]["torrent_info"]["site_cookie"], results[1]["torrent_info"]["site_ua"]),
+                         ("uid=1", "UA"))
+        self.assertEqual(results[0]["torrent_info"]["volume_factor"], "免费")
+
+    def test_page_sort_filter(self):
+        search_id = self.oper.save(self.contexts, userid="admin")
+        total, results = self.oper.list(search_id, userid="admin", page=2, count=2, sort="size", desc=True)
+        self.assertEqual(total, 6)
+        self.assertEqual([r["torrent_info"]["description"] for r in results], ["三体 3", "三体 2"])
+        total, results = self.oper.list(search_id, userid="admin", sites=[1], free=False)
+        self.assertEqual((total, [r["torrent_info"]["description"] for r in results]), (2, ["三体 3", "三体 5"]))
+        self.assertEqual(self.oper.count(search_id, season=2), 3)
+        self.assertEqual(self.oper.count(search_id, resource_pix="2160p"), 2)
+        self.assertEqual(self.oper.count(search_id, keyword="三体 4"), 1)
+
+    def test_userid(self):
+        search_id = self.oper.save(self.contexts, userid="admin")
+        # 其他用户不能查询
+        self.assertEqual(self.oper.list(search_id, userid="guest"), (0, []))
+        self.assertIsNone(self.oper.get_record(search_id=search_id, userid="guest"))
+        self.assertIsNone(self.oper.get_record(userid="guest"))
+        self.assertEqual(self.oper.get_record(search_id=search_id, userid="admin").search_id, search_id)
+        self.assertEqual(self.oper.get_record(userid="admin").search_id, search_id)
+
+    def test_keep(self):
+        search_ids = [self.oper.save(self.contexts[:1], userid="admin") for _ in range(7)]
+        self.oper.save(self.contexts[:1], userid="guest")
+        # 每个用户只保留最近的搜索
+        records = self.db.query(SearchRecord).filter(SearchRecord.userid == "admin").all()
+        self.assertEqual(sorted(r.search_id for r in records), sorted(search_ids[-5:]))
+        self.assertEqual(self.db.query(SearchResult).count(), 6)
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from app.helper import sitelimiter
+from app.helper.sitelimiter import SiteLimiterHelper
+
+
+class _Clock:
+    """
+    模拟时间，sleep时只推进时间
+    """
+
+    def __init__(self):
+        self.now = 1000000.0
+        self.slept = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.slept.append(round(seconds, 3))
+        self.now += seconds
+
+
+class SiteLimiterTest(TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self.clock = _Clock()
+        self._patch = patch.object(sitelimiter, "time", self.clock)
+        self._patch.start()
+        self.limiter = self.__limiter()
+
+    def __limiter(self) -> SiteLimiterHelper:
+        """
+        不使用单例，状态保存到临时目录，避免读取站点数据库及影响其它测试
+        """
+        limiter = SiteLimiterHelper.__new__(SiteLimiterHelper)
+        limiter.__init__()
+        limiter._path = Path(self._dir.name) / "__site_limiter__.json"
+        limiter._states = {}
+        limiter._SiteLimiterHelper__load()
+        limiter._domains = ("a.com",)
+        limiter._domains_time = float("inf")
+        return limiter
+
+    def tearDown(self) -> None:
+        self._patch.stop()
+        self._dir.cleanup()
+
+    def __fail(self, count: int = 1):
+        for _ in range(count):
+            domain, allowed, generation = self.limiter.acquire("www.a.com")
+            self.limiter.release(domain, generation, 500, 0.1)
+
+    def test_not_site(self):
+        self.assertEqual(self.limiter.acquire("other.com"), (None, True, 0))
+
+    def test_token_bucket(self):
+        # 突发3个请求不等待，之后按每秒2个请求等待
+        for _ in range(5):
+            self.assertTrue(self.limiter.acquire("a.com")[1])
+        self.assertEqual(self.clock.slept, [0.5, 0.5])
+        # 空闲后令牌恢复，不超过容量
+        self.clock.now += 100
+        self.clock.slept = []
+        for _ in range(3):
+            self.limiter.acquire("a.com")
+        self.assertEqual(self.clock.slept, [])
+
+    def test_rate_adapt(self):
+        domain, _, generation = self.limiter.acquire("a.com")
+        self.limiter.release(domain, generation, 429, 0.1, retry_after="30")
+        state = self.limiter._states["a.com"]
+        self.assertEqual(state.rate, 1.0)
+        # 按 Retry-After 暂停
+        self.clock.now += 10
+        self.clock.slept = []
+        self.limiter.acquire("a.com")
+        self.assertEqual(self.clock.slept, [20.0])
+        # 响应快时逐步恢复频率
+        self.limiter.release(domain, generation, 200, 0.1)
+        self.assertAlmostEqual(state.rate, 1.1)
+
+    def test_breaker_open_and_recover(self):
+        self.__fail(4)
+        self.assertIsNone(self.limiter.get_open("a.com"))
+        self.__fail()
+        open_until = self.limiter.get_open("a.com")
+        self.assertEqual(open_until, self.clock.now + 300)
+        # 熔断中拒绝请求
+        self.assertFalse(self.limiter.acquire("a.com")[1])
+        # 冷却结束放行一个试探请求，试探期间拒绝其它请求
+        self.clock.now = open_until
+        domain, allowed, generation = self.limiter.acquire("a.com")
+        self.assertTrue(allowed)
+        self.assertFalse(self.limiter.acquire("a.com")[1])
+        # 试探成功恢复访问
+        self.limiter.release(domain, generation, 200, 0.1)
+        self.assertIsNone(self.limiter.get_open("a.com"))
+        self.assertTrue(self.limiter.acquire("a.com")[1])
+        self.assertEqual(self.limiter._states["a.com"].failures, 0)
+
+    def test_breaker_probe_fail(self):
+        self.__fail(5)
+        self.clock.now = self.limiter.get_open("a.com")
+        # 试探失败再次熔断，冷却时间翻倍
+        self.__fail()
+        self.assertEqual(self.limiter.get_open("a.com"), self.clock.now + 600)
+
+    def test_stale_result(self):
+        # 熔断前发出的请求
+        stale = self.limiter.acquire("a.com")
+        self.__fail(5)
+        open_until = self.limiter.get_open("a.com")
+        # 熔断前发出的请求成功，不恢复访问
+        self.limiter.release(stale[0], stale[2], 200, 0.1)
+        self.assertEqual(self.limiter.get_open("a.com"), open_until)
+        # 试探期间返回的旧请求结果不影响试探
+        self.clock.now = open_until
+        probe = self.limiter.acquire("a.com")
+        self.assertTrue(probe[1])
+        self.limiter.release(stale[0], stale[2], 500, 0.1)
+        self.assertIsNone(self.limiter.get_open("a.com"))
+        self.assertFalse(self.limiter.acquire("a.com")[1])
+        self.limiter.release(probe[0], probe[2], 200, 0.1)
+        self.assertTrue(self.limiter.acquire("a.com")[1])
+
+    def test_reset(self):
+        stale = self.limiter.acquire("a.com")
+        self.__fail(5)
+        # 重置后立即恢复访问，重置前发出的请求结果不影响熔断状态
+        self.limiter.reset("a.com")
+        self.assertIsNone(self.limiter.get_open("a.com"))
+        self.limiter.release(stale[0], stale[2], 500, 0.1)
+        self.assertEqual(self.limiter._states["a.com"].failures, 0)
+        self.assertTrue(self.limiter.acquire("a.com")[1])
+        self.assertIsNone(self.__limiter().get_open("a.com"))
+
+    def test_persist(self):
+        self.__fail(5)
+        open_until = self.limiter.get_open("a.com")
+        limiter = self.__limiter()
+        self.assertEqual(limiter.get_open("a.com"), open_until)
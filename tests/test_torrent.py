@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+
+from app.core.context import MediaInfo, TorrentInfo
+from app.core.metainfo import MetaInfo
+from app.helper.torrent import TorrentHelper
+from app.schemas.types import MediaType
+
+
+class TorrentGroupTest(TestCase):
+    def setUp(self) -> None:
+        self.helper = TorrentHelper()
+        self.mediainfo = MediaInfo(type=MediaType.MOVIE, title="流浪地球", original_title="The Wandering Earth",
+                                   year="2019", tmdb_id=535167)
+        size = 10 * 1024 ** 3
+        self.torrents = [
+            # 标题相同，副标题不同，只有副标题包含中文名的能匹配
+            TorrentInfo(site=1, site_name="A", title="Some Movie 2019 1080p", description="", size=size),
+            TorrentInfo(site=2, site_name="B", title="Some Movie 2019 1080p", description="流浪地球 | 中字",
+                        size=size),
+            # 标题、副标题相同，站点分类不同
+            TorrentInfo(site=3, site_name="C", title="The Wandering Earth 2019 1080p", description="流浪地球",
+                        category=MediaType.MOVIE.value, size=size),
+            TorrentInfo(site=4, site_name="D", title="The Wandering Earth 2019 1080p", description="流浪地球",
+                        category=MediaType.TV.value, size=size),
+            # 不同站点的相同资源，大小取整不同
+            TorrentInfo(site=5, site_name="E", title="The Wandering Earth 2019 2160p", description="流浪地球",
+                        size=size),
+            TorrentInfo(site=6, site_name="F", title="The Wandering Earth 2019 2160p", description="流浪地球",
+                        size=size + 1024 ** 2),
+            TorrentInfo(site=7, site_name="G", title="Other Movie 2019 1080p", description="其它电影", size=size),
+        ]
+
+    def __match(self, torrent: TorrentInfo) -> bool:
+        return self.helper.match_torrent(mediainfo=self.mediainfo,
+                                         torrent_meta=MetaInfo(title=torrent.title, subtitle=torrent.description),
+                                         torrent=torrent)
+
+    def test_group_same_result(self):
+        # 逐个比对
+        expected = [torrent for torrent in self.torrents if self.__match(torrent)]
+        # 分组后每组只比对第一个
+        groups = self.helper.group_torrents(self.torrents)
+        grouped = [torrent for group in groups if self.__match(group[0]) for torrent in group]
+        self.assertEqual([id(t) for t in sorted(grouped, key=self.torrents.index)], [id(t) for t in expected])
+        self.assertEqual([t.site_name for t in expected], ["B", "C", "E", "F"])
+
+    def test_group_merge(self):
+        groups = self.helper.group_torrents(self.torrents)
+        self.assertEqual([[t.site_name for t in group] for group in groups],
+                         [["A"], ["B"], ["C"], ["D"], ["E", "F"], ["G"]])
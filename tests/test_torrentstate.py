@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+import time
+from unittest import TestCase
+
+from transmission_rpc import Torrent
+
+from app.helper.torrentstate import TorrentStateCache
+from app.modules.transmission import TransmissionModule
+
+
+class TorrentStateCacheTest(TestCase):
+    def setUp(self) -> None:
+        # 同步函数依次返回的结果
+        self.results = []
+        self.calls = []
+        self.completed = []
+        self.cache = TorrentStateCache(name="test",
+                                       sync_func=self.__sync,
+                                       completed_func=lambda t: t.get("progress") == 1,
+                                       name_func=lambda t: t.get("name"),
+                                       on_completed=lambda h, t: self.completed.append(h),
+                                       interval=0)
+
+    def __sync(self, full: bool):
+        self.calls.append(full)
+        return self.results.pop(0)
+
+    def __torrents(self) -> dict:
+        return {t["name"]: t for t in self.cache.torrents()}
+
+    def test_merge(self):
+        self.results = [
+            (True, {"a": {"name": "a", "progress": 0.5, "state": "downloading"},
+                    "b": {"name": "b", "progress": 1}}, []),
+            # 增量字段与已缓存的数据合并
+            (False, {"a": {"progress": 0.8}}, []),
+        ]
+        self.assertEqual(set(self.__torrents()), {"a", "b"})
+        self.assertEqual(self.__torrents()["a"], {"name": "a", "progress": 0.8, "state": "downloading"})
+        self.assertEqual(self.calls, [True, False])
+
+    def test_full_replace(self):
+        self.results = [
+            (True, {"a": {"name": "a", "progress": 0.5, "state": "downloading"}}, []),
+            # 全量同步直接替换
+            (True, {"a": {"name": "a", "progress": 0.6}}, []),
+        ]
+        self.cache.torrents()
+        self.cache.invalidate()
+        self.assertEqual(self.__torrents()["a"], {"name": "a", "progress": 0.6})
+        self.assertEqual(self.calls, [True, True])
+
+    def test_removal(self):
+        self.results = [
+            (True, {"a": {"name": "a"}, "b": {"name": "b"}, "c": {"name": "c"}}, []),
+            # 增量同步按返回的hash删除
+            (False, {}, ["a"]),
+            # 全量同步删除未返回的种子
+            (True, {"c": {"name": "c"}}, []),
+        ]
+        self.cache.get_meta("a", "A.2023.1080p")
+        self.assertEqual(set(self.__torrents()), {"a", "b", "c"})
+        self.assertEqual(set(self.__torrents()), {"b", "c"})
+        self.assertNotIn("a", self.cache._metas)
+        self.cache.invalidate()
+        self.assertEqual(set(self.__torrents()), {"c"})
+
+    def test_completed(self):
+        self.results = [
+            # 首次同步的已完成种子不通知
+            (True, {"a": {"name": "a", "progress": 1}, "b": {"name": "b", "progress": 0.5}}, []),
+            (False, {"b": {"progress": 1}}, []),
+            (False, {"b": {"progress": 1}}, []),
+        ]
+        for _ in range(3):
+            self.cache.torrents()
+        self.assertEqual(self.completed, ["b"])
+
+    def test_sync_error(self):
+        self.results = [
+            (True, {"a": {"name": "a"}}, []),
+            None,
+            (True, {"b": {"name": "b"}}, []),
+        ]
+        self.cache.torrents()
+        # 同步失败时使用已有缓存，下次全量同步
+        self.assertEqual(set(self.__torrents()), {"a"})
+        self.assertEqual(set(self.__torrents()), {"b"})
+        self.assertEqual(self.calls, [True, False, True])
+
+    def test_interval(self):
+        self.cache._interval = 60
+        self.results = [(True, {"a": {"name": "a"}}, [])]
+        self.cache.torrents()
+        self.cache.torrents()
+        self.assertEqual(self.calls, [True])
+        # 修改种子后立即增量同步
+        self.results = [(False, {}, [])]
+        self.cache.expire()
+        self.cache.torrents()
+        self.assertEqual(self.calls, [True, False])
+
+
+class _Transmission:
+    """
+    模拟Transmission下载器
+    """
+
+    def __init__(self):
+        self.torrents = {}
+        self.calls = []
+
+    def add(self, tid: int, **fields):
+        self.torrents[tid] = {"id": tid, "hashString": f"h{tid}", "name": f"t{tid}", "status": "downloading",
+                              "percentDone": 0, "activityDate": 0, "labels": [], **fields}
+
+    def get_torrents(self, ids: list = None):
+        self.calls.append(("full", sorted(ids) if ids else None))
+        return [Torrent(fields=dict(fields)) for tid, fields in self.torrents.items()
+                if not ids or tid in ids], False
+
+    def get_torrents_brief(self, arguments: list):
+        self.calls.append(("brief", None))
+        return [Torrent(fields={arg: fields.get(arg) for arg in arguments}) for fields in self.torrents.values()]
+
+    def get_recently_active_torrents(self):
+        self.calls.append(("recently", None))
+        return [], []
+
+
+class TransmissionSyncTest(TestCase):
+    def setUp(self) -> None:
+        self.module = TransmissionModule.__new__(TransmissionModule)
+        self.module.transmission = _Transmission()
+        self.module._torrent_ids = {}
+        self.module._signatures = {}
+        self.module._synced_at = 0
+        for tid in (1, 2, 3):
+            self.module.transmission.add(tid)
+
+    def __sync(self, full: bool = False):
+        return self.module._TransmissionModule__sync_torrents(full)
+
+    def test_brief_sync(self):
+        trc = self.module.transmission
+        is_full, changed, removed = self.__sync(full=True)
+        self.assertTrue(is_full)
+        self.assertEqual(set(changed), {"h1", "h2", "h3"})
+        # 超出recently-active时间窗口，只重新获取有变化的种子
+        self.module._synced_at = time.time() - 120
+        trc.torrents[1]["percentDone"] = 0.5
+        trc.torrents.pop(2)
+        trc.add(4)
+        trc.calls = []
+        is_full, changed, removed = self.__sync()
+        self.assertFalse(is_full)
+        self.assertEqual(set(changed), {"h1", "h4"})
+        self.assertEqual(removed, ["h2"])
+        self.assertEqual(trc.calls, [("brief", None), ("full", [1, 4])])
+        # 没有变化时不获取完整数据
+        self.module._synced_at = time.time() - 120
+        trc.calls = []
+        self.assertEqual(self.__sync(), (False, {}, []))
+        self.assertEqual(trc.calls, [("brief", None)])
+
+    def test_recently_active(self):
+        self.__sync(full=True)
+        self.module.transmission.calls = []
+        self.assertEqual(self.__sync(), (False, {}, []))
+        self.assertEqual(self.module.transmission.calls, [("recently", None)])
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import TestCase
+
+from app.helper.transferqueue import DownloadDirMonitorHandler, TransferQueueHelper
+
+
+class TransferQueueTest(TestCase):
+    def setUp(self) -> None:
+        # 不使用单例，缩短去抖及重试时间
+        self.queue = TransferQueueHelper.__new__(TransferQueueHelper)
+        self.queue.__init__()
+        self.queue._hash_delay = 0.05
+        self.queue._path_delay = 0.1
+        self.queue._retry_delay = 0.05
+        self.calls = []
+        self.missing = set()
+        self.done = threading.Event()
+
+    def tearDown(self) -> None:
+        self.queue.stop()
+
+    def __handler(self, hashs: list, paths: list) -> list:
+        self.calls.append((sorted(hashs), sorted(str(p) for p in paths)))
+        self.done.set()
+        return [h for h in hashs if h in self.missing]
+
+    def __wait(self, count: int, timeout: float = 2):
+        """
+        等待整理函数被调用指定次数
+        """
+        deadline = time.time() + timeout
+        while len(self.calls) < count and time.time() < deadline:
+            time.sleep(0.01)
+        # 确认没有多余的调用
+        time.sleep(0.15)
+
+    def test_dedup(self):
+        self.queue.start(self.__handler)
+        for _ in range(3):
+            self.queue.put_hash("a")
+        self.queue.put_hash("b")
+        self.__wait(1)
+        # 去抖时间内的重复请求合并为一次
+        self.assertEqual(self.calls, [(["a", "b"], [])])
+
+    def test_order(self):
+        self.queue.start(self.__handler)
+        self.queue.put_path(Path("/downloads/Movie"))
+        self.queue.put_hash("a", delay=0.2)
+        self.queue.put_hash("b", delay=0)
+        self.__wait(3)
+        # 按执行时间先后处理
+        self.assertEqual(self.calls, [(["b"], []), ([], ["/downloads/Movie"]), (["a"], [])])
+
+    def test_path_debounce(self):
+        self.queue.start(self.__handler)
+        start = time.time()
+        # 文件持续变化时推迟执行
+        for _ in range(4):
+            self.queue.put_path(Path("/downloads/Show"))
+            time.sleep(0.05)
+        self.assertTrue(self.done.wait(2))
+        self.assertGreaterEqual(time.time() - start, 0.25)
+        self.__wait(1)
+        self.assertEqual(self.calls, [([], ["/downloads/Show"])])
+
+    def test_retry(self):
+        self.missing = {"a"}
+        self.queue.start(self.__handler)
+        self.queue.put_hash("a")
+        self.queue.put_hash("b")
+        # 未找到已完成种子的重试 _max_retries 次
+        self.__wait(4)
+        self.assertEqual(self.calls, [(["a", "b"], [])] + [(["a"], [])] * 3)
+
+    def test_stop(self):
+        self.queue.start(self.__handler)
+        self.queue.put_hash("a", delay=0.2)
+        self.queue.stop()
+        self.queue.put_hash("b", delay=0)
+        time.sleep(0.3)
+        self.assertEqual(self.calls, [])
+
+    def test_monitor_handler(self):
+        root = Path("/downloads")
+        handler = DownloadDirMonitorHandler(root, self.queue)
+        self.queue._stopped = False
+        handler.on_created(SimpleNamespace(is_directory=False, src_path="/downloads/Show/Season 1/E01.mkv"))
+        handler.on_moved(SimpleNamespace(is_directory=False, src_path="/downloads/Movie.mkv.!qB",
+                                         dest_path="/downloads/Movie.mkv"))
+        # 非媒体文件、目录及下载目录以外的文件忽略
+        handler.on_created(SimpleNamespace(is_directory=False, src_path="/downloads/Show/poster.jpg"))
+        handler.on_created(SimpleNamespace(is_directory=True, src_path="/downloads/Other"))
+        handler.on_created(SimpleNamespace(is_directory=False, src_path="/other/Movie.mkv"))
+        # 按种子内容路径（下载目录下的第一级）合并
+        self.assertEqual(sorted(self.queue._paths), [Path("/downloads/Movie.mkv"), Path("/downloads/Show")])
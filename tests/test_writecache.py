@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import threading
+from unittest import TestCase
+
+from app.db.writecache import WriteBehindCache
+
+
+class WriteBehindCacheTest(TestCase):
+    def setUp(self) -> None:
+        self.db = {}
+        self.batches = []
+        self.flushed = threading.Event()
+        self.cache = WriteBehindCache(name="test", flush_func=self.__flush, maxsize=16, interval=0.1)
+
+    def tearDown(self) -> None:
+        self.cache.stop()
+
+    def __flush(self, items: dict):
+        self.batches.append(dict(items))
+        self.db.update(items)
+        self.flushed.set()
+
+    def test_coalesce(self):
+        for i in range(5):
+            self.cache.set("a", i)
+        self.cache.set("b", 1)
+        # 提交前从缓存读取最新值
+        self.assertEqual(self.cache.get("a", lambda: None), 4)
+        self.assertTrue(self.cache.is_dirty("a"))
+        self.cache.flush()
+        # 同一Key的多次写入合并为一次
+        self.assertEqual(self.batches, [{"a": 4, "b": 1}])
+        self.assertFalse(self.cache.is_dirty("a"))
+        metrics = self.cache.metrics()
+        self.assertEqual((metrics["writes"], metrics["db_writes"], metrics["writes_saved"]), (6, 2, 4))
+        # 已提交的数据命中缓存，不再加载
+        self.assertEqual(self.cache.get("b", lambda: self.fail("loader called")), 1)
+
+    def test_flush_on_timer(self):
+        self.cache.set("a", 1)
+        self.assertTrue(self.flushed.wait(2))
+        self.assertEqual(self.db, {"a": 1})
+
+    def test_flush_on_stop(self):
+        cache = WriteBehindCache(name="test", flush_func=self.__flush, interval=3600)
+        cache.set("a", 1)
+        cache.set("a", 2)
+        self.assertEqual(self.db, {})
+        cache.stop()
+        self.assertEqual(self.db, {"a": 2})
+
+    def test_flush_error(self):
+        def fail(_):
+            raise IOError("db error")
+
+        cache = WriteBehindCache(name="test", flush_func=fail, interval=3600)
+        cache.set("a", 1)
+        cache.flush()
+        # 提交失败时保留待提交数据
+        self.assertTrue(cache.is_dirty("a"))
+        self.assertEqual(cache.metrics()["errors"], 1)
+
+    def test_discard(self):
+        self.cache.set(("p", "a"), 1)
+        self.cache.set(("q", "a"), 1)
+        self.cache.discard(lambda k: k[0] == "p")
+        self.cache.flush()
+        self.assertEqual(self.batches, [{("q", "a"): 1}])